@@ -0,0 +1,117 @@
+"""Batch execution of per-file tasks in a process pool.
+
+Files of a batch are independent, so they are spread over worker processes
+instead of threads, which would be serialized by the GIL. Paths are handed
+out in chunks to keep the submission overhead low, results are yielded as
+soon as their chunk is done. A failing file does not stop the batch, its
+error is reported in the BatchResult.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import concurrent.futures
+import math
+import traceback
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+from rinex_parser.logger import logger
+
+# Chunks per worker, more chunks balance uneven file sizes better
+CHUNKS_PER_WORKER = 4
+
+
+class BatchResult:
+    """Outcome of a task for one path.
+
+    Attributes:
+        path: Input path of the task.
+        value: Return value of the task, None if it failed.
+        error: Formatted exception if the task failed, else None.
+    """
+
+    __slots__ = ("path", "value", "error")
+
+    def __init__(self, path: str, value: Any = None, error: str | None = None) -> None:
+        self.path = path
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Check if the task succeeded."""
+        return self.error is None
+
+    @property
+    def message(self) -> str:
+        """Get the last line of error, the exception and its message."""
+        return self.error.strip().splitlines()[-1] if self.error else ""
+
+
+def run_task(func: Callable[..., Any], path: str, kwargs: Dict[str, Any]) -> BatchResult:
+    """Run func(path, **kwargs) and catch its errors."""
+    try:
+        return BatchResult(path, value=func(path, **kwargs))
+    except Exception:
+        return BatchResult(path, error=traceback.format_exc())
+
+
+def run_chunk(
+    func: Callable[..., Any], paths: Sequence[str], kwargs: Dict[str, Any]
+) -> List[BatchResult]:
+    """Run func on each path of a chunk, executed in a worker process."""
+    return [run_task(func, path, kwargs) for path in paths]
+
+
+def split_chunks(paths: Sequence[str], workers: int, chunk_size: int = 0) -> List[List[str]]:
+    """Split paths into chunks, CHUNKS_PER_WORKER per worker by default."""
+    if chunk_size <= 0:
+        chunk_size = max(1, math.ceil(len(paths) / (workers * CHUNKS_PER_WORKER)))
+    return [list(paths[i : i + chunk_size]) for i in range(0, len(paths), chunk_size)]
+
+
+def iter_batch(
+    func: Callable[..., Any],
+    paths: Sequence[str],
+    workers: int = 1,
+    chunk_size: int = 0,
+    **kwargs: Any,
+) -> Iterator[BatchResult]:
+    """Run func(path, **kwargs) for all paths.
+
+    With a single worker the tasks run in this process, in order. Otherwise
+    func, kwargs and the return values must be picklable.
+
+    Args:
+        func: Module level function processing one path.
+        paths: Input paths.
+        workers: Number of worker processes (default: 1).
+        chunk_size: Paths per submitted task, 0 to derive it from workers.
+        **kwargs: Further arguments of func.
+
+    Yields:
+        BatchResult: Result of each path, in order of completion.
+    """
+    paths = list(paths)
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield run_task(func, path, kwargs)
+        return
+
+    chunks = split_chunks(paths, workers, chunk_size)
+    logger.debug(f"Processing {len(paths)} files in {len(chunks)} chunks")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks))
+    ) as executor:
+        futures = {
+            executor.submit(run_chunk, func, chunk, kwargs): chunk for chunk in chunks
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results = future.result()
+            except Exception:
+                # The worker died or the results could not be sent back
+                error = traceback.format_exc()
+                logger.error(f"Worker failed on {', '.join(futures[future])}")
+                results = [BatchResult(path, error=error) for path in futures[future]]
+            yield from results
@@ -2,24 +2,23 @@
 """Command-line interface for RinexParser."""
 
 import argparse
+import contextlib
 import datetime
-import gzip
 import glob
+import json
 import os
 import re
 import sys
 import traceback
 import cProfile
 import pstats
-import threading
-import queue
 import logging
-import time
 
 from pathlib import Path
-from typing import Optional, List, Tuple, Dict
+from typing import Any, Callable, Optional, Iterator, List, Dict
 
 
+from rinex_parser.batch import iter_batch
 from rinex_parser.logger import logger
 from rinex_parser.obs_parser import (
     RinexParser,
@@ -27,30 +26,27 @@ from rinex_parser.obs_parser import (
     EPOCH_MIN,
     EPOCH_MAX,
 )
-from rinex_parser.obs_quality import RinexQuality
+from rinex_parser.obs_quality import DEFAULT_VALIDITY, EpochValidity, RinexQuality
+from rinex_parser.compression import strip_compression_suffix
+from rinex_parser.hatanaka import is_crinex
+from rinex_parser.obs_catalog import ArchiveCatalog
+from rinex_parser.obs_reader import open_rinex_obs
+from rinex_parser.obs_scan import inventory_entry, scan_file
 from rinex_parser.obs_epoch import RinexEpoch
 from rinex_parser.utils import handle_rx3_info
 from rinex_parser import __version__ as VERSION
 
 
-SUPPORTED_RINEX_EXTENSIONS = (".rnx", ".obs", ".o", ".gz")
+SUPPORTED_RINEX_EXTENSIONS = (".rnx", ".crx", ".obs", ".o", ".gz", ".bz2", ".xz", ".z")
 
 
 def detect_rinex_version(rinex_file: str) -> int:
     """Detect RINEX file version by reading first line."""
     try:
-        # Handle gzipped files
-        if rinex_file.endswith(".gz"):
-            with gzip.open(rinex_file, "rt") as f:
-                first_line = f.readline()
-        else:
-            with open(rinex_file, "r") as f:
-                first_line = f.readline()
-
-        # RINEX version is in columns 0-9, format like "     3.04"
-        if first_line:
-            version_str = first_line[0:9].strip()
-            return int(float(version_str))
+        # Compressed files are decompressed transparently
+        handler, rinex_version = open_rinex_obs(rinex_file)
+        handler.close()
+        return rinex_version
     except Exception as e:
         logger.warning(f"Could not detect version from {rinex_file}: {e}")
 
@@ -177,12 +173,108 @@ def create_parser() -> argparse.ArgumentParser:
         help="Generate RINSTAT quality report in JSON format",
     )
 
+    mode_group.add_argument(
+        "--completeness",
+        action="store_true",
+        help="Generate observation completeness report per satellite and observation type",
+    )
+
+    mode_group.add_argument(
+        "--completeness-json",
+        action="store_true",
+        help="Generate observation completeness report in JSON format",
+    )
+
+    mode_group.add_argument(
+        "--slips",
+        action="store_true",
+        help="Generate cycle slip report per satellite (geometry-free and Melbourne-Wuebbena)",
+    )
+
+    mode_group.add_argument(
+        "--slips-json",
+        action="store_true",
+        help="Generate cycle slip report in JSON format",
+    )
+
+    mode_group.add_argument(
+        "--multipath",
+        action="store_true",
+        help="Generate code multipath (MP1/MP2/MPx) report per satellite and observation type",
+    )
+
+    mode_group.add_argument(
+        "--multipath-json",
+        action="store_true",
+        help="Generate code multipath report in JSON format",
+    )
+
     mode_group.add_argument(
         "--convert-name",
         action="store_true",
         help="Convert RINEX v3 files to compliant RINEX 3 long filenames",
     )
 
+    mode_group.add_argument(
+        "--inventory",
+        action="append",
+        metavar="DIR",
+        help="Scan headers and time spans of all RINEX files below DIR into "
+        "JSON lines (repeatable)",
+    )
+
+    mode_group.add_argument(
+        "--catalog-refresh",
+        action="append",
+        metavar="DIR",
+        help="Add new and changed RINEX files below DIR to the --catalog database "
+        "(repeatable)",
+    )
+
+    mode_group.add_argument(
+        "--catalog-query",
+        action="store_true",
+        help="Print the files of the --catalog database matching the --query-* options",
+    )
+
+    parser.add_argument(
+        "--catalog",
+        metavar="DB",
+        help="SQLite catalog of RINEX files, other modes process the files "
+        "matching the --query-* options",
+    )
+
+    parser.add_argument(
+        "--query-station",
+        metavar="SSSS",
+        help="Catalog query: 4 character station code",
+    )
+
+    parser.add_argument(
+        "--query-start",
+        metavar="DATETIME",
+        help="Catalog query: files with epochs at or after DATETIME (ISO format)",
+    )
+
+    parser.add_argument(
+        "--query-end",
+        metavar="DATETIME",
+        help="Catalog query: files with epochs before DATETIME (ISO format)",
+    )
+
+    parser.add_argument(
+        "--query-interval",
+        type=float,
+        metavar="SECONDS",
+        help="Catalog query: observation interval",
+    )
+
+    parser.add_argument(
+        "--query-signal",
+        metavar="CODE",
+        help="Catalog query: observation type, optionally with system (L5Q, G:L5Q)",
+    )
+
     parser.add_argument(
         "--apply",
         action="store_true",
@@ -270,6 +362,28 @@ def create_parser() -> argparse.ArgumentParser:
         default="",
         help="Remove observation type (G1C,R1C,E8I,C6Q).",
     )
+
+    parser.add_argument(
+        "--keep-obs",
+        type=str,
+        default="",
+        metavar="SPEC",
+        help="Keep only these observation types of the listed systems "
+        "(G:C1C,L1C,C2W,L2W;E:C1C,L1C), RINEX 3 only",
+    )
+    parser.add_argument(
+        "--passthrough",
+        action="store_true",
+        help="Copy epochs kept unchanged byte for byte instead of reformatting them "
+        "(with --resample, RINEX 3 only)",
+    )
+    parser.add_argument(
+        "--epoch-validity",
+        metavar="SPEC",
+        default=DEFAULT_VALIDITY,
+        help="Minimum satellites with these observation bands for a valid epoch "
+        f"(G:5:L1,L2;E:4:L1,L5), used by --rinstat (default: {DEFAULT_VALIDITY})",
+    )
     parser.add_argument(
         "-t",
         "--skeleton",
@@ -286,7 +400,43 @@ def create_parser() -> argparse.ArgumentParser:
     )
 
     parser.add_argument(
-        "-n", "--threads", type=int, default=1, help="Number of threads to use"
+        "-n",
+        "--threads",
+        type=int,
+        default=1,
+        help="Number of worker processes for a batch of files",
+    )
+
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Keep observations in a columnar store instead of epoch objects",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Decode large uncompressed RINEX 3 files with N processes (with --columnar)",
+    )
+
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Seek to cropped/resampled epochs via a persisted epoch index (.rxi)",
+    )
+
+    parser.add_argument(
+        "--no-mmap",
+        action="store_true",
+        help="Read large files line by line instead of through mmap",
+    )
+
+    parser.add_argument(
+        "--crinex",
+        action="store_true",
+        help="Write resampled output Hatanaka compressed (CRINEX 3, .crx)",
     )
 
     parser.add_argument(
@@ -388,17 +538,17 @@ def process_resample(
     output_file: Optional[str] = None,
     show_output: bool = False,
     skeleton_file: Optional[str] = None,
+    crinex: bool = False,
 ) -> str:
-    """Resample RINEX observations to specified interval."""
+    """Resample RINEX observations to specified interval.
+
+    With crinex the output is written Hatanaka compressed (.crx).
+    """
     logger.info(f"Resampling {parser.rinex_file} to {parser.sampling}s interval")
 
     try:
-        logger.debug(f"Creating data dictionary {output_file}.")
-        parser.do_create_datadict()
-        # parser.rinex_reader.do_thinning(interval)
-
-        # Write output
-        logger.debug(f"Preparing output filename {output_file}.")
+        logger.debug(f"Streaming epochs of {parser.rinex_file}.")
+        rinex_epochs = parser.iter_epochs()
 
         country_file_in = parser.get_country_from_filename()
         country_file_out = "XXX"
@@ -423,12 +573,10 @@ def process_resample(
         )
 
         out_dir = os.path.dirname(parser.rinex_file)
-
-        if output_file is None or output_file == "":
-            out_fil = parser.get_rx3_long(country=parser.rinex_reader.header.country)
+        out_fil = None
 
         # get info from rx3 indicator '::RX3-cAUT-sGRAZ::
-        elif output_file.startswith("::RX3"):
+        if output_file and output_file.startswith("::RX3"):
             rx3_info = handle_rx3_info(output_file)
             if rx3_info.country:
                 parser.rinex_reader.header.country = rx3_info.country
@@ -438,17 +586,32 @@ def process_resample(
                 parser.rinex_reader.header.receiver_id = rx3_info.receiver_id
             if rx3_info.monument_id:
                 parser.rinex_reader.header.monument_id = rx3_info.monument_id
-            out_fil = parser.get_rx3_long(country=parser.rinex_reader.header.country)
-        else:
+        elif output_file:
             out_fil = os.path.basename(output_file)
             out_dir = os.path.dirname(output_file)
 
-        output_file = os.path.join(out_dir, out_fil)
-
-        # Write RINEX file
-        logger.info(f"Writing resampled RINEX to {output_file}.")
-        with open(output_file, "w") as f:
-            f.write(parser.rinex_reader.to_rinex3())
+        # Write RINEX file, the long name depends on the first and last epoch
+        # and is only known after streaming all epochs.
+        logger.info(f"Writing resampled RINEX to {out_dir or '.'}.")
+        part_file = os.path.join(
+            out_dir, f".{os.path.basename(parser.rinex_file)}.{os.getpid()}.part"
+        )
+        try:
+            with open(part_file, "wb", buffering=1 << 20) as f:
+                if not parser.rinex_reader.write_rinex3(f, rinex_epochs, crinex=crinex):
+                    raise ValueError(f"No epochs left in {parser.rinex_file}")
+            if out_fil is None:
+                out_fil = parser.get_rx3_long(
+                    country=parser.rinex_reader.header.country, ts_source="header"
+                )
+                if crinex:
+                    out_fil = f"{out_fil[:-4]}.crx"
+            output_file = os.path.join(out_dir, out_fil)
+            os.replace(part_file, output_file)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(part_file)
+            raise
 
         logger.info(f"Output written to {output_file}.")
 
@@ -463,29 +626,43 @@ def process_resample(
     return output_file
 
 
-def process_rinstat(
+def write_report(
     parser: RinexParser,
+    name: str,
+    build: Callable[[Any], Dict[str, Any]],
+    format_text: Callable[[Dict[str, Any]], str],
     output_file: Optional[str] = None,
     show_output: bool = False,
     json_format: bool = False,
-) -> None:
-    """Generate RINSTAT quality report."""
-    logger.info(f"Generating RINSTAT report for {parser.rinex_file}")
+) -> str:
+    """Write a quality report of a RINEX file as text or JSON.
 
-    try:
+    Args:
+        parser: Parser of the file, its header is read here.
+        name: Report name, used in the default output file name.
+        build: Get the report dict from the reader of parser.
+        format_text: Format the report dict as text.
+        output_file: Output path (default: see get_output_filename()).
+        show_output: Print the report.
+        json_format: Write the report dict as JSON.
+
+    Returns:
+        str: Absolute path of the report.
+    """
+    logger.info(f"Generating {name} report for {parser.rinex_file}")
 
-        parser.do_create_datadict()
-        quality = RinexQuality()
+    try:
+        parser.do_read_header()
+        report_dict = build(parser.rinex_reader)
 
         if json_format:
-            rinstat_dict = quality.get_rinstat_as_dict(parser.rinex_reader)
-            report = quality.to_json(rinstat_dict).strip()
+            report = RinexQuality().to_json(report_dict).strip()
         else:
-            report = quality.get_rinstat_out(parser.rinex_reader)
+            report = format_text(report_dict)
 
         if output_file is None:
             suffix = "json" if json_format else "txt"
-            output_file = get_output_filename(parser.rinex_file, "rinstat", suffix)
+            output_file = get_output_filename(parser.rinex_file, name, suffix)
 
         output_file = os.path.abspath(output_file)
 
@@ -498,12 +675,164 @@ def process_rinstat(
             print(report)
 
     except Exception as e:
-        logger.error(f"Error generating RINSTAT for {parser.rinex_file}: {e}")
+        logger.error(f"Error generating {name} report for {parser.rinex_file}: {e}")
         raise
 
     return output_file
 
 
+def process_rinstat(
+    parser: RinexParser,
+    output_file: Optional[str] = None,
+    show_output: bool = False,
+    json_format: bool = False,
+    validity: str = DEFAULT_VALIDITY,
+) -> str:
+    """Generate RINSTAT quality report.
+
+    The epochs are counted in a single pass while reading, none are kept
+    (see RinexQuality.accumulate()).
+    """
+    quality = RinexQuality(validity=validity)
+    return write_report(
+        parser,
+        "rinstat",
+        lambda reader: quality.get_rinstat_as_dict(quality.accumulate(reader)),
+        quality.get_rinstat_as_str,
+        output_file,
+        show_output,
+        json_format,
+    )
+
+
+def process_completeness(
+    parser: RinexParser,
+    output_file: Optional[str] = None,
+    show_output: bool = False,
+    json_format: bool = False,
+) -> str:
+    """Generate completeness report per satellite and observation type.
+
+    The epochs are streamed in columnar blocks, none are kept (see
+    RinexQuality.get_completeness_as_dict()).
+    """
+    quality = RinexQuality()
+    return write_report(
+        parser,
+        "completeness",
+        quality.get_completeness_as_dict,
+        quality.get_completeness_as_str,
+        output_file,
+        show_output,
+        json_format,
+    )
+
+
+def process_slips(
+    parser: RinexParser,
+    output_file: Optional[str] = None,
+    show_output: bool = False,
+    json_format: bool = False,
+) -> str:
+    """Generate cycle slip report per satellite.
+
+    Requires numpy, see RinexQuality.get_slips_as_dict().
+    """
+    quality = RinexQuality()
+    return write_report(
+        parser,
+        "slips",
+        quality.get_slips_as_dict,
+        quality.get_slips_as_str,
+        output_file,
+        show_output,
+        json_format,
+    )
+
+
+def process_multipath(
+    parser: RinexParser,
+    output_file: Optional[str] = None,
+    show_output: bool = False,
+    json_format: bool = False,
+) -> str:
+    """Generate code multipath report per satellite and observation type.
+
+    Requires numpy, see RinexQuality.get_multipath_as_dict().
+    """
+    quality = RinexQuality()
+    return write_report(
+        parser,
+        "multipath",
+        quality.get_multipath_as_dict,
+        quality.get_multipath_as_str,
+        output_file,
+        show_output,
+        json_format,
+    )
+
+
+def iter_merge_epochs(result_list: List[RinexParserResult]) -> Iterator[RinexEpoch | str]:
+    """Stream the epochs of processed files again, in the given order.
+
+    The filters of each parser apply again. A header change event record
+    precedes the epochs of files whose header differs from the first one.
+    """
+    first_header = result_list[0].rinex_parser.rinex_reader.header
+    for rinex_result in result_list:
+        reader = rinex_result.rinex_parser.rinex_reader
+        logger.debug(f"Streaming RINEX 3 epochs of {rinex_result.rinex_file}")
+        differ = first_header.has_other_info(reader.header)
+        if differ:
+            yield "\n".join(
+                [
+                    f">{'':30s}4 {len(differ) + 1:2d}",
+                    *differ,
+                    f"{'  --> HEADER CHANGES DURING MERGE <--':60s}COMMENT",
+                ]
+            )
+        yield from reader.iter_epochs()
+
+
+def write_merged_rinex(result_list: List[RinexParserResult]) -> str:
+    """Write the epochs of processed files of one station into one RINEX 3 file.
+
+    The header of the first file is used, its first and last observation
+    are taken from the streamed epochs. The file gets the RINEX 3 long name
+    in the directory of the first file.
+
+    Args:
+        result_list: Results with parsers, sorted by first observation.
+
+    Returns:
+        str: Path of the merged file.
+
+    Raises:
+        ValueError: If no epochs are left to merge.
+    """
+    first = result_list[0]
+    output_dir = os.path.dirname(first.rinex_file)
+    part_file = os.path.join(
+        output_dir, f".{os.path.basename(first.rinex_file)}.{os.getpid()}.merge.part"
+    )
+    try:
+        with open(part_file, "wb", buffering=1 << 20) as f:
+            reader = first.rinex_parser.rinex_reader
+            if not reader.write_rinex3(f, iter_merge_epochs(result_list)):
+                raise ValueError(f"No epochs to merge into {first.rinex_file}")
+        output_file = os.path.join(
+            output_dir,
+            first.rinex_parser.get_rx3_long(country=reader.header.country, ts_source="header"),
+        )
+        logger.info(f"Writing merged RINEX to {output_file}.")
+        os.replace(part_file, output_file)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(part_file)
+        raise
+    return output_file
+
+
 def is_supported_rinex_file(path: str) -> bool:
     lower_path = path.lower()
     if lower_path.endswith(SUPPORTED_RINEX_EXTENSIONS):
@@ -513,7 +842,9 @@ def is_supported_rinex_file(path: str) -> bool:
     # Accept RINEX2-style short names:
     # daily:  ssssdddt.yy{o|d}   (e.g. amst0580.26o)
     # hourly: ssssddd[a-x].yy{o|d} (e.g. amst058a.26o)
-    return bool(re.match(r"^[a-z0-9]{4}\d{3}[0a-x]\.\d{2}[od](\.gz)?$", filename))
+    return bool(
+        re.match(r"^[a-z0-9]{4}\d{3}[0a-x]\.\d{2}[od](\.(gz|bz2|xz|z))?$", filename)
+    )
 
 
 def _expand_file_or_dir(path: str, recursive: bool) -> List[str]:
@@ -617,6 +948,13 @@ def convert_single_rinex_name(
         header = parser.rinex_reader.header
         first_obs_ts = parse_header_obs_timestamp(header.first_observation)
         last_obs_ts = parse_header_obs_timestamp(header.last_observation)
+        if first_obs_ts is None or last_obs_ts is None:
+            # The first and last epoch lines are enough for the long name
+            try:
+                scan = scan_file(rinex_file)
+                first_obs_ts, last_obs_ts = scan.first_epoch, scan.last_epoch
+            except (OSError, ValueError) as err:
+                logger.debug(f"Could not scan epochs of {rinex_file}: {err}")
         if first_obs_ts is None or last_obs_ts is None:
             ts_source = "epoch"
             try:
@@ -643,8 +981,10 @@ def convert_single_rinex_name(
             ts_source=ts_source,
             origin=default_origin,
         )
-        if rinex_file.lower().endswith(".gz"):
-            out_name = f"{out_name}.gz"
+        # keep the (Hatanaka) compression of the input
+        if is_crinex(strip_compression_suffix(rinex_file)):
+            out_name = f"{out_name[:-4]}.crx"
+        out_name += rinex_file[len(strip_compression_suffix(rinex_file)) :]
 
         target_path = os.path.join(os.path.dirname(os.path.abspath(rinex_file)), out_name)
         result["target"] = target_path
@@ -720,6 +1060,79 @@ def process_convert_name(args: argparse.Namespace) -> int:
     return 1 if failures > 0 else 0
 
 
+def collect_inventory_paths(directories: List[str]) -> List[str]:
+    """Collect supported RINEX files below directories, recursively."""
+    found_paths: List[str] = []
+    for directory in directories:
+        if os.path.isfile(directory):
+            found_paths.append(os.path.abspath(directory))
+            continue
+        if not os.path.isdir(directory):
+            logger.warning(f"Input path does not exist: {directory}")
+            continue
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if is_supported_rinex_file(name):
+                    found_paths.append(os.path.abspath(os.path.join(root, name)))
+    return list(dict.fromkeys(found_paths))
+
+
+def process_inventory(args: argparse.Namespace) -> int:
+    """Write an inventory entry per RINEX file as JSON lines.
+
+    Files are scanned in worker processes, entries are written in order of
+    completion. Files which can not be scanned get an entry with path and
+    error only.
+    """
+    paths = collect_inventory_paths(args.inventory + list(args.rinex_files))
+    if not paths:
+        logger.error("No RINEX files found for inventory")
+        return 1
+    logger.info(f"Scanning {len(paths)} file(s) for inventory")
+
+    failures = 0
+    handler = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for result in iter_batch(inventory_entry, paths, workers=args.threads):
+            if result.ok:
+                entry = result.value
+            else:
+                failures += 1
+                logger.debug(result.error)
+                entry = {"path": result.path, "error": result.message}
+            handler.write(json.dumps(entry) + "\n")
+    finally:
+        if handler is not sys.stdout:
+            handler.close()
+    logger.info(f"Inventory of {len(paths)} file(s) done, {failures} failed")
+    return 1 if failures > 0 else 0
+
+
+def query_catalog(args: argparse.Namespace) -> List[str]:
+    """Get the files of the --catalog database matching the --query-* options."""
+    with ArchiveCatalog(args.catalog) as catalog:
+        return catalog.files(
+            station=args.query_station,
+            start=parse_crop_timestamp(args.query_start),
+            end=parse_crop_timestamp(args.query_end),
+            interval=args.query_interval,
+            signal=args.query_signal,
+        )
+
+
+def process_catalog_refresh(args: argparse.Namespace) -> int:
+    """Refresh the --catalog database with the files below --catalog-refresh."""
+    paths = collect_inventory_paths(args.catalog_refresh)
+    roots = [path for path in args.catalog_refresh if os.path.isdir(path)]
+    with ArchiveCatalog(args.catalog) as catalog:
+        stats = catalog.refresh(paths, roots=roots, workers=args.threads)
+        total = len(catalog)
+    print("CATALOG\t" + "\t".join(f"{key}={value}" for key, value in stats.items()))
+    logger.info(f"Catalog {args.catalog} holds {total} file(s)")
+    return 1 if stats["failed"] > 0 else 0
+
+
 def process_rinex_file(rinex_file: str, args: argparse.Namespace) -> RinexParserResult:
     """Process a single RINEX file based on CLI arguments."""
 
@@ -746,16 +1159,21 @@ def process_rinex_file(rinex_file: str, args: argparse.Namespace) -> RinexParser
             "filter_sat_obs": args.filter_sat_obs,
         }
 
-        rinex_version = detect_rinex_version(rinex_file)
-        parser = RinexParser(
+        # One open: version, header and body are read from the same handler
+        parser = RinexParser.from_file(
             rinex_file=rinex_file,
-            rinex_version=rinex_version,
             crop_beg=crop_start,
             crop_end=crop_end,
             sampling=args.resample if args.resample else 0,
             filter_sat_obs=kwargs.get("filter_sat_obs", ""),
             filter_sat_pnr=kwargs.get("filter_sat_pnr", ""),
             filter_sat_sys=kwargs.get("filter_sat_sys", ""),
+            columnar=getattr(args, "columnar", False),
+            use_index=getattr(args, "index", False),
+            use_mmap=False if getattr(args, "no_mmap", False) else None,
+            workers=getattr(args, "workers", 1),
+            keep_obs=getattr(args, "keep_obs", ""),
+            passthrough=getattr(args, "passthrough", False),
         )
 
         if args.resample is not None and args.resample >= 0:
@@ -764,6 +1182,7 @@ def process_rinex_file(rinex_file: str, args: argparse.Namespace) -> RinexParser
                 output_file=args.output,
                 show_output=args.show_output,
                 skeleton_file=args.skeleton,
+                crinex=getattr(args, "crinex", False),
             )
         elif args.rinstat or args.rinstat_json:
             output_file = process_rinstat(
@@ -771,11 +1190,36 @@ def process_rinex_file(rinex_file: str, args: argparse.Namespace) -> RinexParser
                 output_file=args.output,
                 show_output=args.show_output,
                 json_format=args.rinstat_json,
+                validity=args.epoch_validity,
+            )
+        elif args.completeness or args.completeness_json:
+            output_file = process_completeness(
+                parser,
+                output_file=args.output,
+                show_output=args.show_output,
+                json_format=args.completeness_json,
+            )
+        elif args.slips or args.slips_json:
+            output_file = process_slips(
+                parser,
+                output_file=args.output,
+                show_output=args.show_output,
+                json_format=args.slips_json,
+            )
+        elif args.multipath or args.multipath_json:
+            output_file = process_multipath(
+                parser,
+                output_file=args.output,
+                show_output=args.show_output,
+                json_format=args.multipath_json,
             )
         else:
             logger.error(
-                "Please specify an operation (--resample, --rinstat, --rinstat-json, or --convert-name)"
+                "Please specify an operation (--resample, --rinstat, --rinstat-json, "
+                "--completeness, --completeness-json, --slips, --slips-json, --multipath, "
+                "--multipath-json, or --convert-name)"
             )
+            parser.close()
             return RinexParserResult(None, None)
     except Exception as e:
         logger.error(f"Error processing {rinex_file}: {e}")
@@ -784,30 +1228,25 @@ def process_rinex_file(rinex_file: str, args: argparse.Namespace) -> RinexParser
     return RinexParserResult(output_file, parser)
 
 
-LIST_LOCK = threading.Lock()
+def process_rinex_task(
+    rinex_file: str, args: argparse.Namespace, keep_parser: bool = False
+) -> RinexParserResult:
+    """Process a single file in a batch worker.
 
+    The parser is only sent back with keep_parser, e.g. for merging, it
+    is large and bound to the worker otherwise.
 
-def run_thread(
-    queue: queue.Queue,
-    namespace: argparse.Namespace,
-    path_list: List[Tuple[str, RinexParser]],
-):
-    while not queue.empty():
-        try:
-            path = queue.get()
-            logger.debug(f"Process {path}")
-            with LIST_LOCK:
-                path_list.append(
-                    process_rinex_file(
-                        rinex_file=path,
-                        args=namespace,
-                    )
-                )
-                logger.debug(f"Appended {path_list[-1].rinex_file}")
-            queue.task_done()
-        except Exception as e:
-            logger.error(f"Error in thread processing {path}: {e}")
-            traceback.print_exc()
+    Raises:
+        FileNotFoundError: If rinex_file does not exist.
+    """
+    result = process_rinex_file(rinex_file=rinex_file, args=args)
+    if not isinstance(result, RinexParserResult):
+        raise FileNotFoundError(f"File not found: {rinex_file}")
+    if not keep_parser:
+        if result.rinex_parser is not None:
+            result.rinex_parser.close()
+        result.rinex_parser = None
+    return result
 
 
 def main() -> int:
@@ -825,46 +1264,68 @@ def main() -> int:
             handler.setLevel(logging.DEBUG)
         logger.setLevel(logging.DEBUG)
 
+    if (args.catalog_refresh or args.catalog_query) and not args.catalog:
+        logger.error("--catalog DB is required for catalog modes")
+        return 1
+
+    try:
+        EpochValidity.parse(args.epoch_validity)
+    except ValueError as err:
+        logger.error(f"Invalid --epoch-validity: {err}")
+        return 1
+
+    if args.catalog_refresh:
+        return process_catalog_refresh(args)
+
+    if args.catalog:
+        catalog_files = query_catalog(args)
+        if args.catalog_query:
+            for path in catalog_files:
+                print(path)
+            return 0
+        logger.info(f"Catalog query matched {len(catalog_files)} file(s)")
+        args.rinex_files = list(args.rinex_files) + catalog_files
+
     if args.convert_name:
         if args.merge:
             logger.error("--merge is not supported with --convert-name")
             return 1
         return process_convert_name(args)
 
+    if args.inventory:
+        return process_inventory(args)
+
     if not args.rinex_files:
         logger.error("No input files provided")
         return 1
 
-    parse_queue = queue.Queue()
-    parse_threads: List[threading.Thread] = []
-
     parsed_files: List[RinexParserResult] = []
     grouped_files: Dict[str, List[RinexParserResult]] = {}
     paths = [f for f in args.rinex_files]
 
-    kwargs = {}
-
     try:
-
-        # Fill Queue with tasks
         for path in paths:
             assert os.path.exists(path)
-            logger.debug(f"Queuing {path}")
-            parse_queue.put(path)
-
-        for _ in range(args.threads):
-            t = threading.Thread(
-                target=run_thread, args=(parse_queue, args, parsed_files)
-            )
-            parse_threads.append(t)
-            t.start()
-
-        while not parse_queue.empty():
-            time.sleep(0.01)
 
-        for t in parse_threads:
-            t.join()
-        logger.debug(f"Finished processing input file(s)")
+        # Files are processed in worker processes, results arrive when done
+        failures = 0
+        for result in iter_batch(
+            process_rinex_task,
+            paths,
+            workers=args.threads,
+            args=args,
+            keep_parser=args.merge,
+        ):
+            if result.ok:
+                logger.debug(f"Finished {result.path}")
+                parsed_files.append(result.value)
+            else:
+                failures += 1
+                logger.error(f"Error in processing {result.path}: {result.message}")
+                logger.debug(result.error)
+        logger.debug(
+            f"Finished processing input file(s), {failures} of {len(paths)} failed"
+        )
 
         if args.merge:
             logger.info("Merging processed RINEX files")
@@ -899,55 +1360,7 @@ def main() -> int:
                     for rinex_result in result_list:
                         logger.info(f" - {rinex_result.rinex_file}")
 
-                    result_list[0].rinex_parser.rinex_reader.update_header_obs()
-                    result_list[0].rinex_parser.rinex_reader.header.last_observation = (
-                        result_list[
-                            -1
-                        ].rinex_parser.rinex_reader.header.last_observation
-                    )
-
-                    output_dir = os.path.dirname(result_list[0].rinex_file)
-                    output_file = "MERGED.rnx"
-                    output_file = result_list[0].rinex_parser.get_rx3_long(
-                        country=result_list[0].rinex_parser.rinex_reader.header.country,
-                        ts_source="header",
-                    )
-                    output_file = os.path.join(output_dir, output_file)
-
-                    logger.info(f"Writing merged RINEX to {output_file}.")
-
-                    with open(output_file, "w") as f:
-                        # write header from first file
-                        f.write(
-                            result_list[0].rinex_parser.rinex_reader.header.to_rinex3()
-                        )
-                        f.write("\n")
-                        # write epochs from all files
-                        for rinex_result in result_list:
-                            logger.debug(
-                                f"Processing RINEX 3 epochs ({rinex_result.rinex_file},{len(rinex_result.rinex_parser.rinex_epochs)} total)"
-                            )
-                            # TODO: check if header changes between files
-                            differ = result_list[
-                                0
-                            ].rinex_parser.rinex_reader.header.has_other_info(
-                                rinex_result.rinex_parser.rinex_reader.header
-                            )
-
-                            if differ:
-                                # TODO: write epoch flag to rinex file
-                                f.write(f">{'':30s}4 {len(differ)+1:2d}\n")
-                                for field in differ:
-                                    f.write(f"{field}\n")
-                                f.write(
-                                    f"{'  --> HEADER CHANGES DURING MERGE <--':60s}COMMENT\n"
-                                )
-
-                            # optimize epoch writing to avoid loading all epochs in memory
-                            for rinex_epoch in rinex_result.rinex_parser.rinex_epochs:
-                                f.write(rinex_epoch.to_rinex3())
-                                f.write("\n")
-
+                    output_file = write_merged_rinex(result_list)
                     logger.info(f"Merged output written to {output_file}.")
 
     except KeyboardInterrupt:
@@ -968,7 +1381,8 @@ def main() -> int:
             stats.sort_stats("cumulative")
             print("\n=== CPU Profiling Results ===")
             stats.print_stats(20)  # Top 20 functions
-        return 0
+
+    return 1 if failures > 0 else 0
 
 
 if __name__ == "__main__":
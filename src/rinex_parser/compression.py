@@ -0,0 +1,280 @@
+"""Transparent decompression of RINEX input files.
+
+Compressed files are recognized by their suffix. The registered decoder
+turns the compressed byte stream into chunks of plain bytes, which run
+through a bounded queue fed by a background thread. Decompression and
+parsing overlap this way, nothing is written to temporary files.
+
+Supported out of the box are gzip (.gz), bzip2 (.bz2), xz (.xz) and Unix
+compress (.Z). The LZW decoder of the latter is pure Python. Hatanaka
+compressed files (.crx, .??d) are expanded after decompression.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+from typing import BinaryIO, Callable, Dict, Iterator, TextIO
+
+from rinex_parser.hatanaka import decode_crinex, is_crinex
+from rinex_parser.logger import logger
+
+# Size of decompressed chunks handed to the reader
+CHUNK_SIZE = 256 * 1024
+# Decompressed chunks buffered ahead of the reader
+QUEUE_DEPTH = 8
+# Read buffer of opened input files
+BUFFER_SIZE = 1024 * 1024
+
+LZW_MAGIC = b"\x1f\x9d"
+LZW_CLEAR = 256
+LZW_INIT_BITS = 9
+
+Decoder = Callable[[BinaryIO], Iterator[bytes]]
+
+
+def iter_file_chunks(handler: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Read a binary file-like object in chunks until EOF."""
+    yield from iter(lambda: handler.read(chunk_size), b"")
+
+
+def iter_lzw(handler: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Decode a Unix compress (.Z) stream.
+
+    Codes are packed in groups of eight, a group takes as many bytes as
+    codes have bits. When the code width grows or the table is cleared,
+    the rest of the current group is padding and gets skipped.
+
+    Args:
+        handler: Binary handler positioned at the magic bytes.
+        chunk_size: Approximate size of the yielded chunks.
+
+    Yields:
+        bytes: Decompressed data.
+
+    Raises:
+        ValueError: If the stream is not valid LZW data.
+    """
+    head = handler.read(3)
+    if len(head) < 3 or head[:2] != LZW_MAGIC:
+        raise ValueError("Not a Unix compress (.Z) stream")
+    max_bits = head[2] & 0x1F
+    block_mode = bool(head[2] & 0x80)
+    if not LZW_INIT_BITS <= max_bits <= 16:
+        raise ValueError(f"Unsupported LZW code width: {max_bits} bits")
+    max_entries = 1 << max_bits
+    first_entry = LZW_CLEAR + 1 if block_mode else LZW_CLEAR
+
+    table = [bytes((i,)) for i in range(256)] + [b""] * (first_entry - 256)
+    n_bits = LZW_INIT_BITS
+    previous = b""
+    output = bytearray()
+    while True:
+        group = handler.read(n_bits)
+        if not group:
+            break
+        bits = int.from_bytes(group, "little")
+        mask = (1 << n_bits) - 1
+        for _ in range(len(group) * 8 // n_bits):
+            code = bits & mask
+            bits >>= n_bits
+            if code == LZW_CLEAR and block_mode:
+                del table[first_entry:]
+                n_bits = LZW_INIT_BITS
+                previous = b""
+                break
+            if code < len(table):
+                entry = table[code]
+            elif code == len(table) and previous:
+                entry = previous + previous[:1]
+            else:
+                raise ValueError(f"Invalid LZW code {code}")
+            output += entry
+            if previous and len(table) < max_entries:
+                table.append(previous + entry[:1])
+            previous = entry
+            if len(table) > mask and n_bits < max_bits:
+                n_bits += 1
+                break
+        if len(output) >= chunk_size:
+            yield bytes(output)
+            output.clear()
+    if output:
+        yield bytes(output)
+
+
+def decode_gzip(handler: BinaryIO) -> Iterator[bytes]:
+    return iter_file_chunks(gzip.GzipFile(fileobj=handler))
+
+
+def decode_bz2(handler: BinaryIO) -> Iterator[bytes]:
+    return iter_file_chunks(bz2.BZ2File(handler))
+
+
+def decode_xz(handler: BinaryIO) -> Iterator[bytes]:
+    return iter_file_chunks(lzma.LZMAFile(handler))
+
+
+DECODERS: Dict[str, Decoder] = {
+    ".gz": decode_gzip,
+    ".bz2": decode_bz2,
+    ".xz": decode_xz,
+    ".Z": iter_lzw,
+}
+
+
+def register_decoder(suffix: str, decoder: Decoder) -> None:
+    """Register a decoder for files ending with suffix.
+
+    Args:
+        suffix: File suffix including the dot, e.g. ".zst".
+        decoder: Callable taking the compressed binary handler and
+            returning an iterator of decompressed chunks.
+    """
+    DECODERS[suffix] = decoder
+
+
+def get_decoder(path: str) -> Decoder | None:
+    """Get the decoder of a compressed path, None if uncompressed."""
+    for suffix, decoder in DECODERS.items():
+        if path.endswith(suffix):
+            return decoder
+    return None
+
+
+def is_compressed(path: str) -> bool:
+    """Check if path has a registered compression suffix or is Hatanaka compressed."""
+    return get_decoder(path) is not None or is_crinex(strip_compression_suffix(path))
+
+
+def strip_compression_suffix(path: str) -> str:
+    """Remove a registered compression suffix from path."""
+    for suffix in DECODERS:
+        if path.endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def iter_decoded(path: str, decoder: Decoder) -> Iterator[bytes]:
+    """Open the compressed path and stream its decoded chunks."""
+    with open(path, "rb", buffering=BUFFER_SIZE) as handler:
+        yield from decoder(handler)
+
+
+def iter_threaded(chunks: Iterator[bytes], depth: int = QUEUE_DEPTH) -> Iterator[bytes]:
+    """Pull chunks in a background thread through a bounded queue.
+
+    The worker stops when the iterator is exhausted, fails or the consumer
+    closes the returned generator. Errors are raised in the consumer.
+
+    Args:
+        chunks: Iterator producing the chunks, e.g. a decoder.
+        depth: Maximum number of chunks buffered ahead.
+
+    Yields:
+        bytes: Chunks in order.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def work() -> None:
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    break
+        except BaseException as err:
+            put(err)
+        else:
+            put(done)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    worker = threading.Thread(target=work, name="rinex-decompress", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+
+class ChunkReader(io.RawIOBase):
+    """Raw, read-only stream over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self.chunks = chunks
+        self.pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.pending = memoryview(chunk)
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            close = getattr(self.chunks, "close", None)
+            if close is not None:
+                close()
+        super().close()
+
+
+def open_binary(path: str, threaded: bool = True) -> io.BufferedReader:
+    """Open path for reading, decompressing transparently.
+
+    Args:
+        path: Plain or compressed file.
+        threaded: Decompress in a background thread (default: True).
+
+    Returns:
+        io.BufferedReader: Buffered binary handler of the plain data.
+    """
+    decoder = get_decoder(path)
+    crinex = is_crinex(strip_compression_suffix(path))
+    if decoder is None and not crinex:
+        return open(path, "rb", buffering=BUFFER_SIZE)
+    if decoder is None:
+        decoder = iter_file_chunks
+    logger.debug(f"Decompressing {path} with {decoder.__name__}")
+    chunks = iter_decoded(path, decoder)
+    if crinex:
+        chunks = decode_crinex(chunks)
+    if threaded:
+        chunks = iter_threaded(chunks)
+    return io.BufferedReader(ChunkReader(chunks), buffer_size=BUFFER_SIZE)
+
+
+def open_text(path: str, threaded: bool = True) -> TextIO:
+    """Open path as text, decompressing transparently (see open_binary)."""
+    return io.TextIOWrapper(open_binary(path, threaded))
@@ -60,7 +60,7 @@ RINEX3_FORMAT_SYS_OBS_TYPES = (
 RINEX3_FORMAT_FILE_NAME = (
     r"(?P<station>\w{4})(\d)(\d)(?P<country>[A-Z]{3})_\w_(?P<year4>\d{4})"
     r"(?P<doy>\d{3})(?P<hour>\d{2})(?P<minute>\d{2})_(?P<file_period>\d\d[A-Z])"
-    r"_((?P<data_freq>\d\d[A-Z])_)?\w\w.[rc]nx"
+    r"_((?P<data_freq>\d\d[A-Z])_)?\w\w.(?:[rc]nx|crx)"
 )
 RINEX3_DATA_OBSERVATION_FIELD_REGEXP = (
     r"((?P<value>\ *[\-\+]?[0-9]*\.?[0-9]{3})(?P<lli>[\ \d])?(?P<ssi>[\ \d])?)"
@@ -0,0 +1,951 @@
+"""Hatanaka compression (Compact RINEX) of RINEX observation files.
+
+Compact RINEX (CRINEX) keeps the RINEX layout but stores every epoch line
+as text difference to the previous one and every observation as high order
+difference of the integer thousandths of its previous values, as defined
+by Y. Hatanaka (CRINEX 1.0 for RINEX 2, CRINEX 3.0 for RINEX 3 and 4).
+
+The decoder and encoder here are line by line ports of CRX2RNX and RNX2CRX
+and produce the same bytes. Differences of all fields of an epoch are
+integrated or taken at once, with numpy if it is installed.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import datetime
+import re
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from rinex_parser import __version__
+from rinex_parser.obs_store import np
+
+CRINEX_VERSION_LABEL = "CRINEX VERS   / TYPE"
+CRINEX_PROG_LABEL = "CRINEX PROG / DATE"
+CRINEX_FORMAT = "COMPACT RINEX FORMAT"
+CRINEX_VERSIONS = {2: "1.0", 3: "3.0", 4: "3.0"}
+# CRINEX 1.0 (RINEX 2) or 3.0 (RINEX 3/4) file names
+CRINEX_FILE_NAME = re.compile(r"\.(crx|CRX|\d\d[dD])$")
+
+# Order of differences taken by the encoder
+ARC_ORDER = 3
+# Highest order of differences accepted by the decoder
+MAX_DIFF_ORDER = 5
+# Upper digits (above 1e5 thousandths) of a difference restarting the arc
+ARC_LIMIT = 100000
+# Observations and clock offsets are split at these powers of ten
+OBS_SPLIT = 10**5
+CLOCK_SPLIT = 10**8
+
+# Arc markers of decoded fields besides the order of an initialized arc
+ARC_CONTINUE = -1
+ARC_BLANK = -2
+
+# Approximate size of the yielded chunks
+CHUNK_SIZE = 256 * 1024
+
+EVENT_FLAGS = ("0", "1")
+DIGITS = "0123456789"
+INTEGER = re.compile(r"\s*[-+]?\d+")
+
+
+class Layout:
+    """Column positions of the epoch line of one RINEX major version."""
+
+    __slots__ = (
+        "marker",
+        "init_marker",
+        "event",
+        "nsat",
+        "sat_list",
+        "clock",
+        "clock_shift",
+        "offset",
+    )
+
+    def __init__(self, rinex_version: int) -> None:
+        if rinex_version == 2:
+            self.marker = " "
+            self.init_marker = "&"
+            self.event = 28
+            self.nsat = 29
+            self.sat_list = 32
+            self.clock = 68
+            self.clock_shift = 1
+            self.offset = 3
+        else:
+            self.marker = ">"
+            self.init_marker = ">"
+            self.event = 31
+            self.nsat = 32
+            self.sat_list = 41
+            self.clock = 41
+            self.clock_shift = 4
+            self.offset = 6
+
+
+def is_crinex(path: str) -> bool:
+    """Check if path is a Compact RINEX file name (.crx, .??d)."""
+    return CRINEX_FILE_NAME.search(path) is not None
+
+
+def atoi(text: str) -> int:
+    """Read the leading integer of text, 0 if there is none (like C atoi)."""
+    match = INTEGER.match(text)
+    return int(match.group()) if match else 0
+
+
+def chop(line: str) -> str:
+    """Remove trailing blanks, keeping the first character."""
+    return line.rstrip(" ") or line[:1]
+
+
+def repair(old: str, diff: str) -> str:
+    """Apply a text difference to the old string.
+
+    A blank keeps the old character, "&" turns it into a blank and every
+    other character replaces it. Characters beyond the old string are
+    appended.
+    """
+    if not diff.strip(" "):
+        return old + diff[len(old) :]
+    chars = [
+        c if d == " " else (" " if d == "&" else d) for c, d in zip(old, diff)
+    ]
+    return "".join(chars) + old[len(diff) :] + diff[len(old) :].replace("&", " ")
+
+
+def text_diff(old: str, new: str) -> str:
+    """Get the text difference of new to old (see repair).
+
+    Trailing blanks are removed from the result.
+    """
+    chars = [" " if c == d else ("&" if d == " " else d) for c, d in zip(old, new)]
+    chars.append("".join(" " if c == " " else "&" for c in old[len(new) :]))
+    chars.append(new[len(old) :])
+    return "".join(chars)
+
+
+def split_upper(value: int, split: int) -> Tuple[int, int]:
+    """Split value into upper and lower digits, both with the sign of value."""
+    upper = abs(value) // split
+    if value < 0:
+        upper = -upper
+    return upper, value - upper * split
+
+
+def format_obs(value: int) -> str:
+    """Format thousandths as F14.3 value of CRX2RNX.
+
+    Values below 1 are written without leading zero, e.g. "-.125".
+
+    Raises:
+        ValueError: If value does not fit into 14 characters.
+    """
+    if value < 0:
+        sign, value = "-", -value
+    else:
+        sign = ""
+    if value < 1000:
+        text = f"{sign}.{value:03d}"
+    else:
+        text = f"{sign}{value // 1000}.{value % 1000:03d}"
+    if len(text) > 14:
+        raise ValueError(f"Observation {sign}{value} out of RINEX range")
+    return text.rjust(14)
+
+
+def format_clock(value: int, shift: int) -> str:
+    """Format a clock offset like CRX2RNX.
+
+    Args:
+        value: Clock offset in units of the last digit.
+        shift: Digits between the decimal point and the lower 8 digits.
+
+    Raises:
+        ValueError: If value does not fit into the clock field.
+    """
+    upper, lower = split_upper(value, CLOCK_SPLIT)
+    # One more digit keeps the sign of "-0"
+    extended = upper * 10 + (-1 if lower < 0 else 1)
+    digits = ("-" if extended < 0 else "") + f"{abs(extended):0{shift + 1}d}"
+    n = len(digits) - 1
+    head = list("  ")
+    if n > shift:
+        head[1] = digits[n - shift - 1]
+        if n > shift + 1:
+            head[0] = digits[n - shift - 2]
+            if n > shift + 2:
+                raise ValueError(f"Clock offset {value} out of RINEX range")
+    return f"{''.join(head)}.{digits[n - shift : n]}{abs(lower):08d}"
+
+
+def parse_clock(field: str, shift: int) -> int:
+    """Parse a clock offset field into units of its last digit (RNX2CRX).
+
+    Raises:
+        ValueError: If there is no decimal point at the third position.
+    """
+    if field[2:3] != ".":
+        raise ValueError(f"Invalid clock offset: {field!r}")
+    upper = int(field[:2] + field[3 : 3 + shift])
+    lower = re.match(r"\d*", field[3 + shift :]).group()
+    lower = int(lower) if lower else 0
+    if "-" in field[:2]:
+        lower = -lower
+    return upper * CLOCK_SPLIT + lower
+
+
+def new_state(columns: int, matrices: int):
+    """Get the difference state of an epoch without fields.
+
+    The state holds matrices with one row of differences per field and
+    vectors with the order (and arc order) of each field. The last row is
+    a blank sentinel used by new fields.
+    """
+    if np is not None:
+        return tuple(np.zeros((1, columns), dtype=np.int64) for _ in range(matrices)) + tuple(
+            np.full(1, -1, dtype=np.int64) for _ in range(3 - matrices)
+        )
+    return tuple([[0] * columns] for _ in range(matrices)) + tuple(
+        [-1] for _ in range(3 - matrices)
+    )
+
+
+def integrate_python(state, rows: Sequence[int], diffs: Sequence[int], arcs: Sequence[int]):
+    """Integrate field differences without numpy, see integrate()."""
+    y0, order0, arc0 = state
+    y1, order1, arc1, values = [], [], [], []
+    for row, diff, arc in zip(rows, diffs, arcs):
+        y = [0] * (MAX_DIFF_ORDER + 1)
+        order = -1
+        if arc == ARC_CONTINUE:
+            if arc0[row] < 0:
+                raise ValueError("Data arc is not initialized")
+            order, arc = order0[row], arc0[row]
+        elif arc == ARC_BLANK:
+            arc = -1
+        prev = y0[row]
+        y[0] = diff
+        if order < arc:
+            order += 1
+            for k in range(order):
+                y[k + 1] = y[k] + prev[k]
+        else:
+            for k in range(order):
+                y[k + 1] = y[k] + prev[k + 1]
+        y1.append(y)
+        order1.append(order)
+        arc1.append(arc)
+        values.append(y[max(order, 0)])
+    y1.append([0] * (MAX_DIFF_ORDER + 1))
+    order1.append(-1)
+    arc1.append(-1)
+    return values, (y1, order1, arc1)
+
+
+def integrate(state, rows: Sequence[int], diffs: Sequence[int], arcs: Sequence[int]):
+    """Reconstruct the observations of an epoch from their differences.
+
+    Args:
+        state: Difference state of the previous epoch (see new_state).
+        rows: Row of each field in the previous epoch, -1 if new.
+        diffs: Transmitted difference of each field.
+        arcs: Order of a new arc, ARC_CONTINUE or ARC_BLANK.
+
+    Returns:
+        tuple: (values, state), values are thousandths (0 if blank).
+
+    Raises:
+        ValueError: If a field continues an arc that does not exist.
+    """
+    if np is None:
+        return integrate_python(state, rows, diffs, arcs)
+    y0, order0, arc0 = state
+    rows = np.array(rows, dtype=np.int64)
+    arcs = np.array(arcs, dtype=np.int64)
+    arc_prev = arc0[rows]
+    cont = arcs == ARC_CONTINUE
+    if (cont & (arc_prev < 0)).any():
+        raise ValueError("Data arc is not initialized")
+    arc = np.where(cont, arc_prev, np.maximum(arcs, -1))
+    order = np.where(cont, order0[rows], -1)
+    grow = order < arc
+    order += grow
+    prev = y0[rows]
+    y = np.zeros((len(rows) + 1, MAX_DIFF_ORDER + 1), dtype=np.int64)
+    y[:-1, 0] = diffs
+    for k in range(MAX_DIFF_ORDER):
+        active = k < order
+        if not active.any():
+            break
+        step = np.where(grow, prev[:, k], prev[:, k + 1])
+        y[:-1, k + 1] = np.where(active, y[:-1, k] + step, 0)
+    values = y[np.arange(len(rows)), np.maximum(order, 0)]
+    return values.tolist(), (y, np.append(order, -1), np.append(arc, -1))
+
+
+def difference_python(state, rows: Sequence[int], values: Sequence[int | None]):
+    """Take field differences without numpy, see difference()."""
+    t0, u0, order0 = state
+    t1, u1, order1, diffs, inits = [], [], [], [], []
+    for row, value in zip(rows, values):
+        t = [0] * (ARC_ORDER + 1)
+        u = [0] * (ARC_ORDER + 1)
+        init, order = True, -1
+        if value is not None:
+            t[0] = value
+            u[0] = split_upper(value, OBS_SPLIT)[0]
+            order = order0[row]
+            init = order < 0
+            if init:
+                order = 0
+            else:
+                order = min(order + 1, ARC_ORDER)
+                for k in range(order):
+                    t[k + 1] = t[k] - t0[row][k]
+                    u[k + 1] = u[k] - u0[row][k]
+                if abs(u[order]) > ARC_LIMIT:
+                    init, order = True, 0
+        t1.append(t)
+        u1.append(u)
+        order1.append(order)
+        diffs.append(t[max(order, 0)])
+        inits.append(init)
+    t1.append([0] * (ARC_ORDER + 1))
+    u1.append([0] * (ARC_ORDER + 1))
+    order1.append(-1)
+    return diffs, inits, (t1, u1, order1)
+
+
+def difference(state, rows: Sequence[int], values: Sequence[int | None]):
+    """Take the differences of the observations of an epoch.
+
+    An arc is restarted if it is new, was blank in the previous epoch or
+    its upper digits jump by more than ARC_LIMIT (cycle slip).
+
+    Args:
+        state: Difference state of the previous epoch (see new_state).
+        rows: Row of each field in the previous epoch, -1 if new.
+        values: Observation of each field in thousandths, None if blank.
+
+    Returns:
+        tuple: (diffs, inits, state), inits flags restarted arcs.
+    """
+    if np is None:
+        return difference_python(state, rows, values)
+    t0, u0, order0 = state
+    rows = np.array(rows, dtype=np.int64)
+    blank = np.array([value is None for value in values], dtype=bool)
+    size = len(rows)
+    t = np.zeros((size + 1, ARC_ORDER + 1), dtype=np.int64)
+    u = np.zeros((size + 1, ARC_ORDER + 1), dtype=np.int64)
+    t[:-1, 0] = [0 if value is None else value for value in values]
+    u[:-1, 0] = np.sign(t[:-1, 0]) * (np.abs(t[:-1, 0]) // OBS_SPLIT)
+    order_prev = order0[rows]
+    init = order_prev < 0
+    order = np.where(init, 0, np.minimum(order_prev + 1, ARC_ORDER))
+    for k in range(ARC_ORDER):
+        active = k < order
+        t[:-1, k + 1] = np.where(active, t[:-1, k] - t0[rows, k], 0)
+        u[:-1, k + 1] = np.where(active, u[:-1, k] - u0[rows, k], 0)
+    index = np.arange(size)
+    init |= np.abs(u[index, order]) > ARC_LIMIT
+    order[init] = 0
+    diffs = t[index, order]
+    order[blank] = -1
+    return diffs.tolist(), init.tolist(), (t, u, np.append(order, -1))
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Split byte chunks into lines without line ends."""
+    rest = ""
+    for chunk in chunks:
+        lines = (rest + chunk.decode("latin-1")).split("\n")
+        rest = lines.pop()
+        for line in lines:
+            yield line[:-1] if line.endswith("\r") else line
+    if rest:
+        yield rest
+
+
+def iter_chunks(texts: Iterable[str], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Join texts into byte chunks of about chunk_size."""
+    pending: List[str] = []
+    size = 0
+    for text in texts:
+        pending.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield "".join(pending).encode("latin-1")
+            pending.clear()
+            size = 0
+    if pending:
+        yield "".join(pending).encode("latin-1")
+
+
+def next_line(lines: Iterator[str]) -> str:
+    """Get the next line, which has to exist."""
+    line = next(lines, None)
+    if line is None:
+        raise ValueError("Unexpected end of file")
+    return line
+
+
+def field_starts(ntypes: Sequence[int]) -> List[int]:
+    """Get the first field of each satellite in the flat field list."""
+    starts, start = [], 0
+    for ntype in ntypes:
+        starts.append(start)
+        start += ntype
+    return starts
+
+
+class CrinexCodec:
+    """State shared by CrinexDecoder and CrinexEncoder."""
+
+    __slots__ = ("rinex_version", "layout", "ntype", "ntype_gnss", "sat_ids", "ntypes")
+
+    def __init__(self) -> None:
+        self.rinex_version = 0
+        self.layout: Layout | None = None
+        self.ntype = 0
+        self.ntype_gnss = {}
+        self.sat_ids: List[str] = []
+        self.ntypes: List[int] = []
+
+    def update_obs_types(self, line: str) -> None:
+        """Update the number of observation types from a header line."""
+        if line[60:79] == "# / TYPES OF OBSERV" and line[5:6] != " ":
+            self.ntype = atoi(line)
+        elif line[60:79] == "SYS / # / OBS TYPES" and line[:1] != " ":
+            self.ntype_gnss[line[0]] = atoi(line[3:])
+
+    def get_ntypes(self, sat_ids: Sequence[str]) -> List[int]:
+        """Get the number of observation types of each satellite.
+
+        Raises:
+            ValueError: If a satellite system has no observation types.
+        """
+        if self.rinex_version == 2:
+            return [self.ntype] * len(sat_ids)
+        try:
+            return [self.ntype_gnss[sat_id[0]] for sat_id in sat_ids]
+        except (KeyError, IndexError):
+            raise ValueError(f"Satellite system not defined in header: {sat_ids}")
+
+
+class CrinexDecoder(CrinexCodec):
+    """Decode Compact RINEX lines into RINEX lines (CRX2RNX)."""
+
+    __slots__ = (
+        "crinex_version",
+        "line",
+        "flags",
+        "state",
+        "clock",
+        "clock_prev",
+        "clock_order",
+        "clock_arc_order",
+    )
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.crinex_version = 0
+        self.line = ""
+        self.flags: List[str] = []
+        self.state = new_state(MAX_DIFF_ORDER + 1, 1)
+        self.clock = [0] * (MAX_DIFF_ORDER + 1)
+        self.clock_prev = [0] * (MAX_DIFF_ORDER + 1)
+        self.clock_order = -1
+        self.clock_arc_order = 0
+
+    def decode(self, lines: Iterable[str]) -> Iterator[str]:
+        """Decode a whole CRINEX file.
+
+        Args:
+            lines: Lines without line ends.
+
+        Yields:
+            str: RINEX text, the header and then one epoch at a time.
+
+        Raises:
+            ValueError: If the lines are no valid CRINEX data.
+        """
+        lines = iter(lines)
+        yield self.decode_header(lines)
+        yield from self.decode_body(lines)
+
+    def decode_header(self, lines: Iterator[str]) -> str:
+        """Read the CRINEX header and return the RINEX header."""
+        line = next(lines, "")
+        if line[:3] not in ("1.0", "3.0") or line[60:79] != CRINEX_VERSION_LABEL[:19]:
+            raise ValueError("Not a Compact RINEX file")
+        self.crinex_version = atoi(line)
+        next_line(lines)
+
+        line = chop(next_line(lines))
+        if line[60:80] != "RINEX VERSION / TYPE" or line[5:6] not in ("2", "3", "4"):
+            raise ValueError(f"Unsupported RINEX version: {line!r}")
+        self.rinex_version = atoi(line)
+        self.layout = Layout(self.rinex_version)
+        header = [line]
+        while line[60:73] != "END OF HEADER":
+            line = chop(next_line(lines))
+            header.append(line)
+            self.update_obs_types(line)
+        header.append("")
+        return "\n".join(header)
+
+    def decode_body(self, lines: Iterator[str]) -> Iterator[str]:
+        """Decode the epochs following the header."""
+        layout = self.layout
+        for dline in lines:
+            while True:
+                if self.crinex_version == 3:
+                    while dline.startswith("&"):
+                        dline = next(lines, None)
+                        if dline is None:
+                            return
+                if dline[:1] == layout.init_marker:
+                    dline = layout.marker + dline[1:]
+                    if dline[layout.event : layout.event + 1] not in EVENT_FLAGS:
+                        dline = yield from self.decode_event(dline, lines)
+                        if dline is None:
+                            return
+                        continue
+                    self.line = ""
+                    self.sat_ids = []
+                    self.ntypes = []
+                elif dline[:1] == "\x1a":
+                    return
+                break
+            yield self.decode_epoch(dline, lines)
+
+    def decode_event(self, dline: str, lines: Iterator[str]):
+        """Copy the lines of special events (epoch flag > 1).
+
+        Returns:
+            str: Next initialized epoch line, None at the end of the file.
+        """
+        layout = self.layout
+        while True:
+            dline = chop(layout.marker + dline[1:])
+            yield dline + "\n"
+            if len(dline) > 29:
+                for _ in range(atoi(dline[layout.event + 1 :])):
+                    line = chop(next_line(lines))
+                    self.update_obs_types(line)
+                    yield line + "\n"
+            dline = next(lines, None)
+            while dline is not None and self.crinex_version >= 3 and dline.startswith("&"):
+                dline = next(lines, None)
+            if dline is None:
+                return None
+            event = dline[layout.event : layout.event + 1]
+            if dline[:1] != layout.init_marker or len(dline) < 29 or event not in DIGITS:
+                raise ValueError(f"Epoch after event is not initialized: {dline!r}")
+            if event in EVENT_FLAGS:
+                return dline
+
+    def decode_epoch(self, dline: str, lines: Iterator[str]) -> str:
+        """Decode one epoch, dline is the difference of its epoch line."""
+        layout = self.layout
+        line = repair(self.line, dline)
+        pos = layout.offset
+        if (
+            line[:1] != layout.marker
+            or len(line) < 26 + pos
+            or line[pos + 23] != " "
+            or line[pos + 24] != " "
+            or line[pos + 25] not in DIGITS
+        ):
+            raise ValueError(f"Invalid epoch line: {line!r}")
+        line = chop(line)
+
+        nsat = atoi(line[layout.nsat : layout.nsat + 3])
+        sat_list = line[layout.sat_list :]
+        sat_ids = [sat_list[i : i + 3].ljust(3) for i in range(0, 3 * nsat, 3)]
+        ntypes = self.get_ntypes(sat_ids)
+        prev_index = {sat_id: i for i, sat_id in enumerate(self.sat_ids)}
+        prev_start = field_starts(self.ntypes)
+
+        cline = next_line(lines)
+        self.read_clock(cline)
+
+        rows, diffs, arcs, dflags = [], [], [], []
+        for sat_id, ntype in zip(sat_ids, ntypes):
+            i0 = prev_index.get(sat_id, -1)
+            start = prev_start[i0] if i0 >= 0 else -1
+            fields = next_line(lines).split(" ", ntype)
+            if len(fields) > ntype:
+                dflags.append(fields.pop())
+            else:
+                dflags.append("")
+                fields += [""] * (ntype - len(fields))
+            for j, field in enumerate(fields):
+                rows.append(start + j if start >= 0 else -1)
+                if not field:
+                    diffs.append(0)
+                    arcs.append(ARC_BLANK)
+                    continue
+                if field[1:2] == "&":
+                    arc = atoi(field)
+                    if arc > MAX_DIFF_ORDER:
+                        raise ValueError(f"Invalid order of differences: {field!r}")
+                    arcs.append(arc)
+                    field = field[2:]
+                elif start < 0:
+                    raise ValueError(f"New satellite {sat_id} without initialization")
+                else:
+                    arcs.append(ARC_CONTINUE)
+                diffs.append(int(field))
+        values, self.state = integrate(self.state, rows, diffs, arcs)
+
+        if cline:
+            self.process_clock()
+        output = [self.format_epoch_line(line, nsat)]
+        flags_out = []
+        k = 0
+        for i, (sat_id, ntype) in enumerate(zip(sat_ids, ntypes)):
+            i0 = prev_index.get(sat_id, -1)
+            dflag = dflags[i]
+            if i0 >= 0:
+                flag = self.flags[i0][: ntype * 2]
+            elif self.rinex_version >= 3:
+                flag = ""
+            else:
+                flag = dflag.ljust(ntype * 2)
+            flag = list(repair(flag, dflag).ljust(ntype * 2))
+            fields = []
+            for j in range(ntype):
+                if arcs[k + j] != ARC_BLANK:
+                    fields.append(format_obs(values[k + j]) + flag[2 * j] + flag[2 * j + 1])
+                elif self.crinex_version == 1:
+                    fields.append(" " * 16)
+                    flag[2 * j] = flag[2 * j + 1] = " "
+                else:
+                    fields.append(" " * 14 + flag[2 * j] + flag[2 * j + 1])
+            k += ntype
+            if self.rinex_version == 2:
+                for j in range(0, ntype, 5):
+                    output.append("".join(fields[j : j + 5]).rstrip(" "))
+            else:
+                output.append((sat_id + "".join(fields)).rstrip(" "))
+            flags_out.append("".join(flag))
+        output.append("")
+
+        self.line = line
+        self.sat_ids = sat_ids
+        self.ntypes = ntypes
+        self.flags = flags_out
+        self.clock_prev = self.clock[:]
+        return "\n".join(output)
+
+    def read_clock(self, cline: str) -> None:
+        """Read the clock offset difference of an epoch."""
+        if not cline:
+            self.clock_order = -1
+            return
+        if cline[1:2] == "&":
+            self.clock_arc_order = atoi(cline)
+            if self.clock_arc_order > MAX_DIFF_ORDER:
+                raise ValueError(f"Invalid order of differences: {cline!r}")
+            self.clock_order = -1
+            cline = cline[2:]
+        self.clock[0] = int(cline)
+
+    def process_clock(self) -> None:
+        """Integrate the clock offset differences."""
+        clock, prev = self.clock, self.clock_prev
+        if self.clock_order < self.clock_arc_order:
+            self.clock_order += 1
+            for k in range(self.clock_order):
+                clock[k + 1] = clock[k] + prev[k]
+        else:
+            for k in range(self.clock_order):
+                clock[k + 1] = clock[k] + prev[k + 1]
+
+    def format_epoch_line(self, line: str, nsat: int) -> str:
+        """Format the epoch line(s) with the clock offset."""
+        layout = self.layout
+        if self.clock_order >= 0:
+            clock = format_clock(self.clock[self.clock_order], layout.clock_shift)
+        else:
+            clock = None
+        if self.rinex_version == 2:
+            if clock is None:
+                lines = [line[:68]]
+            else:
+                lines = [f"{line[:68]:68s}{clock}"]
+            for pos in range(68, 68 + 36 * ((nsat - 1) // 12), 36):
+                lines.append(" " * 32 + line[pos : pos + 36])
+            return "\n".join(lines)
+        if clock is None:
+            return chop(line[:41])
+        return line[:41] + clock
+
+
+class CrinexEncoder(CrinexCodec):
+    """Encode RINEX lines into Compact RINEX lines (RNX2CRX).
+
+    Attributes:
+        program: Program name written to CRINEX PROG / DATE.
+        date: Date written to CRINEX PROG / DATE.
+    """
+
+    __slots__ = (
+        "program",
+        "date",
+        "line",
+        "flags",
+        "state",
+        "clock",
+        "clock_prev",
+        "clock_order",
+    )
+
+    def __init__(self, program: str | None = None, date: str | None = None) -> None:
+        super().__init__()
+        self.program = program if program is not None else f"rinex_parser {__version__}"
+        if date is None:
+            date = datetime.datetime.now(datetime.timezone.utc).strftime("%d-%b-%y %H:%M")
+        self.date = date
+        self.reset()
+
+    def reset(self) -> None:
+        """Restart all arcs, e.g. after special events."""
+        self.line = "&"
+        self.sat_ids = []
+        self.ntypes = []
+        self.flags: List[str] = []
+        self.state = new_state(ARC_ORDER + 1, 2)
+        self.clock = [0] * (ARC_ORDER + 1)
+        self.clock_prev = [0] * (ARC_ORDER + 1)
+        self.clock_order = -1
+
+    def encode(self, lines: Iterable[str]) -> Iterator[str]:
+        """Encode a whole RINEX observation file.
+
+        Args:
+            lines: Lines without line ends.
+
+        Yields:
+            str: CRINEX text, the header and then one epoch at a time.
+
+        Raises:
+            ValueError: If the lines are no valid RINEX observation data.
+        """
+        lines = iter(lines)
+        yield self.encode_header(lines)
+        yield from self.encode_body(lines)
+
+    def encode_header(self, lines: Iterator[str]) -> str:
+        """Read the RINEX header and return the CRINEX header."""
+        line = chop(next(lines, ""))
+        if line[60:80] != "RINEX VERSION / TYPE" or line[20:21] != "O":
+            raise ValueError("Not a RINEX observation file")
+        self.rinex_version = atoi(line)
+        if self.rinex_version not in CRINEX_VERSIONS:
+            raise ValueError(f"Unsupported RINEX version: {line!r}")
+        self.layout = Layout(self.rinex_version)
+        self.ntype_gnss = {}
+        header = [
+            f"{CRINEX_VERSIONS[self.rinex_version]:20s}{CRINEX_FORMAT:40s}"
+            f"{CRINEX_VERSION_LABEL}",
+            f"{self.program:40.40s}{self.date:20.20s}{CRINEX_PROG_LABEL}",
+            line,
+        ]
+        while line[60:73] != "END OF HEADER":
+            line = chop(next_line(lines))
+            header.append(line)
+            self.update_obs_types(line)
+        header.append("")
+        return "\n".join(header)
+
+    def encode_body(self, lines: Iterator[str]) -> Iterator[str]:
+        """Encode the epochs following the header."""
+        layout = self.layout
+        for line in lines:
+            if line[:1] == "\x1a":
+                return
+            line = chop(line)
+            if not self.is_epoch_line(line):
+                raise ValueError(f"Invalid epoch line: {line!r}")
+            if self.rinex_version > 2:
+                line = line.ljust(41)
+            if atoi(line[layout.event : layout.event + 1]) > 1:
+                yield self.encode_event(line, lines)
+                self.reset()
+                continue
+            yield self.encode_epoch(line, lines)
+
+    def is_epoch_line(self, line: str) -> bool:
+        """Check the epoch line of RNX2CRX."""
+        if self.rinex_version > 2:
+            return line[:1] == ">"
+        return (
+            len(line) >= 29
+            and line[0] == " "
+            and line[27] == " "
+            and line[28] in DIGITS
+            and line[29:30] in ("", " ") + tuple(DIGITS)
+        )
+
+    def encode_event(self, line: str, lines: Iterator[str]) -> str:
+        """Copy the lines of special events (epoch flag > 1)."""
+        if self.rinex_version == 2:
+            if line[26:27] == ".":
+                raise ValueError(f"Invalid event line: {line!r}")
+            output = ["&" + line[1:]]
+            count = atoi(line[29:]) if len(line) > 29 else 0
+        else:
+            if len(line) < 35 or line[29:30] == ".":
+                raise ValueError(f"Invalid event line: {line!r}")
+            output = [chop(line)]
+            count = atoi(line[32:])
+        for _ in range(count):
+            line = chop(next_line(lines))
+            self.update_obs_types(line)
+            output.append(line)
+        output.append("")
+        return "\n".join(output)
+
+    def encode_epoch(self, line: str, lines: Iterator[str]) -> str:
+        """Encode one epoch, line is its epoch line."""
+        layout = self.layout
+        if len(line) > layout.clock:
+            clock = parse_clock(line[layout.clock :], layout.clock_shift)
+            line = line[: layout.clock]
+            self.clock_order = min(self.clock_order + 1, ARC_ORDER)
+        else:
+            clock = None
+            self.clock_order = -1
+        nsat = atoi(line[layout.nsat :])
+        if self.rinex_version == 2:
+            pos, n = layout.sat_list, nsat
+            while n > 12:
+                pos += 36
+                cline = chop(next_line(lines))
+                line = line[:pos] + (cline[32:] if cline[2:3] == " " else cline)
+                n -= 12
+
+        records = []
+        if self.rinex_version == 2:
+            for _ in range(nsat):
+                record = [next_line(lines)]
+                for _ in range((self.ntype - 1) // 5):
+                    record.append(next_line(lines))
+                records.append(record)
+            sat_ids = [
+                line[i : i + 3]
+                for i in range(layout.sat_list, layout.sat_list + 3 * nsat, 3)
+            ]
+            line = line[: layout.sat_list + 3 * nsat]
+        else:
+            records = [[next_line(lines)] for _ in range(nsat)]
+            sat_ids = [record[0][:3] for record in records]
+            line = line[: layout.sat_list] + "".join(sat_ids)
+        if len(set(sat_ids)) != len(sat_ids):
+            raise ValueError(f"Duplicated satellite in epoch: {line!r}")
+        ntypes = self.get_ntypes(sat_ids)
+
+        prev_index = {sat_id: i for i, sat_id in enumerate(self.sat_ids)}
+        prev_start = field_starts(self.ntypes)
+
+        rows, values, flags = [], [], []
+        for sat_id, ntype, record in zip(sat_ids, ntypes, records):
+            i0 = prev_index.get(sat_id, -1)
+            sat_values, flag = self.read_record(record, ntype)
+            rows.extend(range(prev_start[i0], prev_start[i0] + ntype) if i0 >= 0 else [-1] * ntype)
+            values.extend(sat_values)
+            flags.append(flag)
+        diffs, inits, self.state = difference(self.state, rows, values)
+
+        output = [text_diff(self.line, line).rstrip(" ")]
+        if clock is None:
+            output.append("")
+        else:
+            self.clock[0] = clock
+            for k in range(self.clock_order):
+                self.clock[k + 1] = self.clock[k] - self.clock_prev[k]
+            prefix = f"{ARC_ORDER}&" if self.clock_order == 0 else ""
+            output.append(f"{prefix}{self.clock[self.clock_order]}")
+        k = 0
+        for sat_id, ntype, flag in zip(sat_ids, ntypes, flags):
+            i0 = prev_index.get(sat_id, -1)
+            old_flag = self.flags[i0] if i0 >= 0 else ""
+            texts = []
+            for j in range(k, k + ntype):
+                if values[j] is None:
+                    if i0 >= 0 and self.rinex_version == 2:
+                        pos = 2 * (j - k)
+                        old_flag = old_flag[:pos] + "  " + old_flag[pos + 2 :]
+                    texts.append("")
+                elif inits[j]:
+                    texts.append(f"{ARC_ORDER}&{diffs[j]}")
+                else:
+                    texts.append(str(diffs[j]))
+            k += ntype
+            text = " ".join(texts) + " "
+            if i0 < 0 and self.rinex_version > 2:
+                output.append(text + flag.replace(" ", "&"))
+            else:
+                output.append((text + text_diff(old_flag, flag)).rstrip(" "))
+        output.append("")
+
+        self.line = line
+        self.sat_ids = sat_ids
+        self.ntypes = ntypes
+        self.flags = flags
+        self.clock_prev = self.clock[:]
+        return "\n".join(output)
+
+    def read_record(self, record: Sequence[str], ntype: int) -> Tuple[list, str]:
+        """Read the observations and flags of one satellite.
+
+        Returns:
+            tuple: (values, flags), values are thousandths or None if blank.
+
+        Raises:
+            ValueError: If a field is no F14.3 value.
+        """
+        if self.rinex_version == 2:
+            per_line, first = 5, 0
+        else:
+            per_line, first = ntype, 3
+        values, flags = [], []
+        for i, line in enumerate(record):
+            nfield = min(ntype - i * per_line, per_line)
+            end = first + 16 * nfield
+            line = chop(line)
+            if len(line) > end and line[end:].strip(" "):
+                raise ValueError(f"Mismatch of number of observation types: {line!r}")
+            line = line.ljust(end)
+            for pos in range(first, end, 16):
+                field = line[pos : pos + 16]
+                if field[10] == ".":
+                    values.append(int(field[:14].replace(".", "", 1)))
+                elif not field[:14].strip(" "):
+                    if self.rinex_version == 2 and field[14:] != "  ":
+                        raise ValueError(f"Flags of a blank observation: {line!r}")
+                    values.append(None)
+                else:
+                    raise ValueError(f"Invalid observation field: {field!r}")
+                flags.append(field[14:])
+        return values, "".join(flags)
+
+
+def decode_crinex(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decode a CRINEX byte stream into RINEX chunks."""
+    return iter_chunks(CrinexDecoder().decode(iter_lines(chunks)))
+
+
+def encode_crinex(chunks: Iterable[bytes], **kwargs) -> Iterator[bytes]:
+    """Encode a RINEX byte stream into CRINEX chunks.
+
+    Args:
+        chunks: RINEX observation data.
+        **kwargs: Passed to CrinexEncoder.
+    """
+    return iter_chunks(CrinexEncoder(**kwargs).encode(iter_lines(chunks)))
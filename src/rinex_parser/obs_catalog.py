@@ -0,0 +1,374 @@
+"""Persistent SQLite catalog of RINEX observation files.
+
+The catalog keeps per-file metadata of an archive in a local SQLite
+database: header fields, epoch span and count, obs types, a RINSTAT like
+epoch summary and a content fingerprint. A refresh only rescans files whose
+size or modification time changed since they were cataloged, files are
+scanned in worker processes (see batch.iter_batch()). Queries return the
+files of a station, time window, interval or signal without touching the
+archive.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import hashlib
+import json
+import lzma
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from rinex_parser.batch import iter_batch
+from rinex_parser.logger import logger
+from rinex_parser.obs_quality import find_epoch_gaps
+from rinex_parser.obs_scan import HeaderScan
+
+# Version of the schema, stored as user_version of the database
+CATALOG_SCHEMA_VERSION = 1
+# Gaps up to this number of epochs are short gaps, as in RINSTAT
+CATALOG_GAPSIZE = 5
+# Errors of files that cannot be read or decompressed (e.g. truncated or
+# corrupt .gz), they are cataloged with the file
+SCAN_ERRORS = (ValueError, EOFError, OSError, lzma.LZMAError, zlib.error)
+# Bytes hashed per read for the fingerprint
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024
+# Rows written per transaction during a refresh
+REFRESH_COMMIT_ROWS = 1000
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    fingerprint TEXT,
+    station TEXT,
+    version REAL,
+    marker_name TEXT,
+    marker_number TEXT,
+    receiver_type TEXT,
+    antenna_type TEXT,
+    interval REAL,
+    time_system TEXT,
+    first_epoch REAL,
+    last_epoch REAL,
+    epoch_count INTEGER,
+    obs_types TEXT,
+    rinstat TEXT,
+    error TEXT,
+    scanned REAL
+);
+CREATE INDEX IF NOT EXISTS files_station ON files (station, first_epoch);
+CREATE INDEX IF NOT EXISTS files_epochs ON files (first_epoch, last_epoch);
+CREATE TABLE IF NOT EXISTS signals (
+    path TEXT NOT NULL REFERENCES files (path) ON DELETE CASCADE,
+    sat_sys TEXT NOT NULL,
+    code TEXT NOT NULL,
+    PRIMARY KEY (path, sat_sys, code)
+);
+CREATE INDEX IF NOT EXISTS signals_code ON signals (code, sat_sys);
+"""
+
+# Columns of the files table, in order
+CATALOG_COLUMNS = (
+    "path",
+    "size",
+    "mtime_ns",
+    "fingerprint",
+    "station",
+    "version",
+    "marker_name",
+    "marker_number",
+    "receiver_type",
+    "antenna_type",
+    "interval",
+    "time_system",
+    "first_epoch",
+    "last_epoch",
+    "epoch_count",
+    "obs_types",
+    "rinstat",
+    "error",
+    "scanned",
+)
+
+
+def file_fingerprint(path: str) -> str:
+    """Get the SHA-1 hex digest of the file content as stored."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as handler:
+        for block in iter(lambda: handler.read(FINGERPRINT_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def epoch_summary(
+    timestamps: Sequence[float], interval: Optional[float], gapsize: int = CATALOG_GAPSIZE
+) -> Dict[str, Any]:
+    """Summarize epoch times like the RINSTAT report.
+
+    Args:
+        timestamps: Epoch times in POSIX seconds, ascending.
+        interval: Nominal interval, the most common epoch step if None.
+            See find_epoch_gaps().
+        gapsize: Gaps up to this number of epochs are short gaps.
+
+    Returns:
+        dict: epoch_interval, epochs_max, epochs_valid, epochs_missing,
+            gaps_count, gaps_more, gaps_less, gapsize and total_secs.
+    """
+    gaps = find_epoch_gaps(timestamps, interval, gapsize)
+    total = gaps.last - gaps.first if gaps.epochs_valid else 0.0
+    return {
+        "epoch_interval": gaps.interval,
+        "epochs_max": gaps.epochs_valid + gaps.epochs_missing,
+        "epochs_valid": gaps.epochs_valid,
+        "epochs_missing": gaps.epochs_missing,
+        "gaps_count": len(gaps),
+        "gaps_more": gaps.gaps_more,
+        "gaps_less": gaps.gaps_less,
+        "gapsize": gapsize,
+        "total_secs": total,
+    }
+
+
+def catalog_entry(path: str) -> Dict[str, Any]:
+    """Scan a file into a catalog row, a picklable batch task.
+
+    Files which are no RINEX observation files or fail to decompress get a
+    row with their error, so they are not rescanned until they change.
+
+    Returns:
+        dict: Values of CATALOG_COLUMNS.
+    """
+    stat = os.stat(path)
+    row = dict.fromkeys(CATALOG_COLUMNS)
+    row.update(
+        path=path,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        fingerprint=file_fingerprint(path),
+        scanned=time.time(),
+    )
+    scan = HeaderScan(path)
+    try:
+        timestamps = scan.scan_epochs()
+    except SCAN_ERRORS as err:
+        row["error"] = str(err) or type(err).__name__
+        return row
+    row.update(
+        station=scan.station,
+        version=scan.version,
+        marker_name=scan.marker_name,
+        marker_number=scan.marker_number,
+        receiver_type=scan.receiver_type,
+        antenna_type=scan.antenna_type,
+        interval=scan.interval,
+        time_system=scan.time_system,
+        first_epoch=scan.first_epoch,
+        last_epoch=scan.last_epoch,
+        epoch_count=len(timestamps),
+        obs_types=json.dumps(scan.obs_types),
+        rinstat=json.dumps(epoch_summary(timestamps, scan.interval)),
+    )
+    return row
+
+
+class ArchiveCatalog:
+    """SQLite catalog of RINEX observation files.
+
+    Attributes:
+        path: Database file.
+        connection: Open SQLite connection.
+    """
+
+    __slots__ = ("path", "connection")
+
+    def __init__(self, path: str) -> None:
+        """Open or create the catalog database.
+
+        Raises:
+            ValueError: If the database has a newer schema.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > CATALOG_SCHEMA_VERSION:
+            self.connection.close()
+            raise ValueError(f"Unsupported catalog schema {version} of {path}")
+        with self.connection:
+            self.connection.executescript(CATALOG_SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {CATALOG_SCHEMA_VERSION}")
+
+    def __enter__(self) -> "ArchiveCatalog":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def put(self, row: Dict[str, Any]) -> None:
+        """Insert or replace the row of a file and its signals."""
+        self.connection.execute("DELETE FROM files WHERE path = ?", (row["path"],))
+        self.connection.execute(
+            f"INSERT INTO files ({', '.join(CATALOG_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(CATALOG_COLUMNS))})",
+            [row[column] for column in CATALOG_COLUMNS],
+        )
+        obs_types = json.loads(row["obs_types"]) if row["obs_types"] else {}
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO signals (path, sat_sys, code) VALUES (?, ?, ?)",
+            [
+                (row["path"], sat_sys, code)
+                for sat_sys, codes in obs_types.items()
+                for code in codes
+            ],
+        )
+
+    def refresh(
+        self, paths: Iterable[str], roots: Sequence[str] = (), workers: int = 1
+    ) -> Dict[str, int]:
+        """Bring the catalog up to date with paths.
+
+        Files are rescanned if their size or modification time differ from
+        the catalog. Cataloged files below roots which are not in paths
+        any more are removed.
+
+        Args:
+            paths: Files to catalog.
+            roots: Directories which were searched for paths.
+            workers: Number of worker processes scanning files.
+
+        Returns:
+            dict: Number of added, updated, unchanged, removed and failed files.
+        """
+        stats = dict.fromkeys(("added", "updated", "unchanged", "removed", "failed"), 0)
+        known = {
+            row["path"]: (row["size"], row["mtime_ns"])
+            for row in self.connection.execute("SELECT path, size, mtime_ns FROM files")
+        }
+        paths = [os.path.abspath(path) for path in paths]
+        pending = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError as err:
+                logger.warning(f"Could not stat {path}: {err}")
+                continue
+            if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+                stats["unchanged"] += 1
+            else:
+                pending.append(path)
+        logger.info(f"Scanning {len(pending)} new or changed file(s) for the catalog")
+
+        rows = 0
+        try:
+            for result in iter_batch(catalog_entry, pending, workers=workers):
+                if not result.ok:
+                    logger.error(f"Could not catalog {result.path}: {result.message}")
+                    stats["failed"] += 1
+                    continue
+                self.put(result.value)
+                if result.value["error"]:
+                    stats["failed"] += 1
+                stats["updated" if result.path in known else "added"] += 1
+                rows += 1
+                if rows % REFRESH_COMMIT_ROWS == 0:
+                    self.connection.commit()
+        finally:
+            self.connection.commit()
+
+        prefixes = tuple(os.path.join(os.path.abspath(root), "") for root in roots)
+        if prefixes:
+            current = set(paths)
+            removed = [(p,) for p in known if p.startswith(prefixes) and p not in current]
+            with self.connection:
+                self.connection.executemany("DELETE FROM files WHERE path = ?", removed)
+            stats["removed"] = len(removed)
+        return stats
+
+    def _select(
+        self,
+        columns: str,
+        station: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        interval: Optional[float] = None,
+        signal: Optional[str] = None,
+    ) -> List[sqlite3.Row]:
+        conditions: List[str] = ["error IS NULL"]
+        args: List[Any] = []
+        if station:
+            conditions.append("station = ?")
+            args.append(station[:4].upper())
+        if start is not None:
+            conditions.append("last_epoch >= ?")
+            args.append(start)
+        if end is not None:
+            conditions.append("first_epoch < ?")
+            args.append(end)
+        if interval:
+            conditions.append("interval = ?")
+            args.append(interval)
+        if signal:
+            sat_sys, _, code = signal.rpartition(":")
+            subquery = "SELECT 1 FROM signals s WHERE s.path = files.path AND s.code = ?"
+            args.append(code)
+            if sat_sys:
+                subquery += " AND s.sat_sys = ?"
+                args.append(sat_sys)
+            conditions.append(f"EXISTS ({subquery})")
+        return self.connection.execute(
+            f"SELECT {columns} FROM files WHERE {' AND '.join(conditions)} "
+            "ORDER BY station, first_epoch, path",
+            args,
+        ).fetchall()
+
+    def files(self, **kwargs: Any) -> List[str]:
+        """Get the files matching a query, ordered by station and time.
+
+        Args:
+            station: 4 character station code.
+            start: Files with epochs at or after start (POSIX seconds).
+            end: Files with epochs before end (POSIX seconds).
+            interval: Observation interval in seconds.
+            signal: Obs code, optionally with its system ("L5Q", "G:L5Q").
+
+        Returns:
+            List[str]: Paths of the matching files.
+        """
+        return [row["path"] for row in self._select("path", **kwargs)]
+
+    def entries(self, **kwargs: Any) -> List[Dict[str, Any]]:
+        """Get the rows of the files matching a query (see files()).
+
+        Returns:
+            List[dict]: Rows with decoded obs_types and rinstat.
+        """
+        entries = []
+        for row in self._select("*", **kwargs):
+            entry = dict(row)
+            for column in ("obs_types", "rinstat"):
+                entry[column] = json.loads(entry[column]) if entry[column] else None
+            entries.append(entry)
+        return entries
+
+    def stations(self) -> List[Tuple[str, int]]:
+        """Get the cataloged stations and their number of files."""
+        return [
+            (row[0], row[1])
+            for row in self.connection.execute(
+                "SELECT station, COUNT(*) FROM files WHERE error IS NULL "
+                "GROUP BY station ORDER BY station"
+            )
+        ]
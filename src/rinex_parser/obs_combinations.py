@@ -0,0 +1,563 @@
+"""Linear combinations of dual-frequency GNSS observations.
+
+Carrier frequencies per system and band, the observation series of each
+satellite in a columnar ObsStore, the detection of cycle slips with the
+geometry-free (GF) and Melbourne-Wuebbena (MW) combinations and the code
+multipath combination (MP1, MP2, MPx) of each code. Everything is
+computed with array operations on the series of one satellite, numpy is
+required.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from rinex_parser.obs_store import FLAG_BLANK, ObsStore, np
+
+SPEED_OF_LIGHT = 299792458.0
+
+# Carrier frequency (Hz) per system and RINEX band number
+CARRIER_FREQUENCIES = {
+    "G": {"1": 1575.42e6, "2": 1227.60e6, "5": 1176.45e6},
+    "R": {"3": 1202.025e6, "4": 1600.995e6, "6": 1248.06e6},
+    "E": {"1": 1575.42e6, "5": 1176.45e6, "6": 1278.75e6, "7": 1207.14e6, "8": 1191.795e6},
+    "C": {
+        "1": 1575.42e6,
+        "2": 1561.098e6,
+        "5": 1176.45e6,
+        "6": 1268.52e6,
+        "7": 1207.14e6,
+        "8": 1191.795e6,
+    },
+    "J": {"1": 1575.42e6, "2": 1227.60e6, "5": 1176.45e6, "6": 1278.75e6},
+    "S": {"1": 1575.42e6, "5": 1176.45e6},
+    "I": {"5": 1176.45e6, "9": 2492.028e6},
+}
+# GLONASS FDMA bands: frequency of channel 0 and channel spacing (Hz)
+GLONASS_FDMA = {"1": (1602.0e6, 0.5625e6), "2": (1246.0e6, 0.4375e6)}
+
+# Bands of the cycle slip combinations per system, in order of preference
+SLIP_BANDS = {"G": "125", "R": "12", "E": "1578", "C": "2765"}
+
+# Satellite steps longer than this number of intervals start a new arc
+ARC_GAP_EPOCHS = 10
+# GF threshold (m) for short steps, growing to GF_MAX for long steps
+GF_MIN = 0.035
+GF_MAX = 0.08
+# Time constant (s) of the GF threshold growth
+GF_T0 = 60.0
+# Half width (samples) of the rolling median of the GF epoch differences
+GF_WINDOW = 5
+# Samples averaged on each side of a MW step
+MW_WINDOW = 10
+# Minimum MW step (wide lane cycles) and its threshold in noise sigmas
+MW_MIN = 0.8
+MW_SIGMAS = 5.0
+# Multipath arcs with fewer samples are dropped
+MP_MIN_ARC = 10
+
+
+def glonass_channels(header: Any) -> Dict[int, int]:
+    """Get the FDMA channel of each GLONASS satellite number from the header.
+
+    Reads GLONASS SLOT / FRQ # records, which the header keeps among its
+    other header lines.
+
+    Args:
+        header: RinexObsHeader instance.
+
+    Returns:
+        dict: Channel (-7..6) per satellite number.
+    """
+    slots = getattr(header, "glonass_slot_frq", None)
+    if not slots:
+        lines = [
+            line
+            for line in getattr(header, "other_headers", [])
+            if line[60:].startswith("GLONASS SLOT / FRQ #")
+        ]
+        if not lines:
+            return {}
+        slots = {"satellites_number": 0, "satellites_list": {}}
+        for line in lines:
+            for pos in range(4, 60, 7):
+                sat_id, channel = line[pos : pos + 3].strip(), line[pos + 4 : pos + 6].strip()
+                if sat_id[:1] == "R" and channel:
+                    slots["satellites_list"][sat_id] = {"pnr": sat_id, "frq": int(channel)}
+    return {
+        int(sat_id[1:]): int(slot["frq"])
+        for sat_id, slot in slots["satellites_list"].items()
+        if sat_id[1:].strip().isdigit()
+    }
+
+
+def carrier_frequency(sat_sys: str, band: str, channel: Optional[int] = None) -> Optional[float]:
+    """Get the carrier frequency of a band.
+
+    Args:
+        sat_sys: Satellite system identifier.
+        band: RINEX band number, the second character of an obs code.
+        channel: FDMA channel of a GLONASS satellite.
+
+    Returns:
+        float: Frequency in Hz, None if unknown (GLONASS FDMA band without
+            channel).
+    """
+    if sat_sys == "R" and band in GLONASS_FDMA:
+        if channel is None:
+            return None
+        base, spacing = GLONASS_FDMA[band]
+        return base + channel * spacing
+    return CARRIER_FREQUENCIES.get(sat_sys, {}).get(band)
+
+
+def is_code(obs_code: str) -> bool:
+    """Check if an obs code is a pseudorange (C, or P of RINEX 2)."""
+    return obs_code[:1] in ("C", "P")
+
+
+def obs_counts(columns: Any) -> List[int]:
+    """Get the number of values of each obs code column."""
+    return [int(np.count_nonzero(~np.isnan(values))) for values in columns.values]
+
+
+def best_column(
+    columns: Any, counts: List[int], kind: str, band: str, attribute: str = ""
+) -> Optional[int]:
+    """Choose the phase ("L") or code ("C", also P) column of a band.
+
+    Takes the column with the tracking attribute if it has values,
+    otherwise the one with most values.
+
+    Returns:
+        int: Column index, None if the band has no values of that kind.
+    """
+    candidates = [
+        k
+        for k, code in enumerate(columns.obs_types)
+        if code[1:2] == band
+        and counts[k]
+        and (is_code(code) if kind == "C" else code[:1] == kind)
+    ]
+    if not candidates:
+        return None
+    same = [k for k in candidates if attribute and columns.obs_types[k][2:] == attribute]
+    return same[0] if same else max(candidates, key=counts.__getitem__)
+
+
+def band_signals(columns: Any, bands: str) -> Dict[str, Tuple[int, int]]:
+    """Choose the phase and code column of each band with observations.
+
+    The phase with most values is taken, the code with the same tracking
+    attribute if it has values, otherwise the code with most values.
+
+    Args:
+        columns: SystemColumns of one system.
+        bands: Band numbers to look for.
+
+    Returns:
+        dict: (phase column, code column) per band with both.
+    """
+    counts = obs_counts(columns)
+    signals = {}
+    for band in bands:
+        phase = best_column(columns, counts, "L", band)
+        if phase is None:
+            continue
+        code = best_column(columns, counts, "C", band, columns.obs_types[phase][2:])
+        if code is not None:
+            signals[band] = (phase, code)
+    return signals
+
+
+def band_order(sat_sys: str) -> str:
+    """Get the known bands of a system, those of SLIP_BANDS first."""
+    preferred = SLIP_BANDS.get(sat_sys, "")
+    bands = list(CARRIER_FREQUENCIES.get(sat_sys, {}))
+    if sat_sys == "R":
+        bands = [*GLONASS_FDMA, *bands]
+    return preferred + "".join(band for band in bands if band not in preferred)
+
+
+def lost_lock(lli: Any) -> Any:
+    """Get the mask of LLI flags with the lost lock bit set."""
+    return (lli != FLAG_BLANK) & (lli & 1 == 1)
+
+
+def satellite_rows(columns: Any) -> Iterator[Tuple[int, Any]]:
+    """Split the rows of a system by satellite.
+
+    Yields:
+        tuple: (satellite number, row indices in time order)
+    """
+    prns = np.asarray(columns.prns)
+    order = np.argsort(prns, kind="stable")
+    bounds = np.flatnonzero(np.diff(prns[order])) + 1
+    for rows in np.split(order, bounds):
+        if len(rows):
+            yield int(prns[rows[0]]), rows
+
+
+def arc_bounds(ts: Any, interval: float) -> List[Tuple[int, int]]:
+    """Split a satellite series into arcs at steps over ARC_GAP_EPOCHS intervals.
+
+    Returns:
+        list: (start, stop) index of each arc.
+    """
+    breaks = np.flatnonzero(np.diff(ts) > ARC_GAP_EPOCHS * interval + 1e-3) + 1
+    starts = [0, *breaks.tolist()]
+    return list(zip(starts, [*breaks.tolist(), len(ts)]))
+
+
+def gf_threshold(dt: Any) -> Any:
+    """Get the GF slip threshold (m) for time steps dt (s).
+
+    Grows from GF_MIN for short steps to GF_MAX, as the ionosphere changes
+    more between distant epochs.
+    """
+    return GF_MAX - (GF_MAX - GF_MIN) * np.exp(-np.asarray(dt) / GF_T0)
+
+
+def rolling_median(values: Any, half: int) -> Any:
+    """Get the centered rolling median over 2 * half + 1 samples, reflected at the ends."""
+    if len(values) <= half:
+        return np.full(len(values), np.median(values))
+    padded = np.pad(values, half, mode="reflect")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * half + 1)
+    return np.median(windows, axis=1)
+
+
+def gf_slips(ts: Any, gf: Any) -> Any:
+    """Find slips in the geometry-free combination of one arc.
+
+    A slip is an epoch difference of GF off the rolling median of its
+    neighbours by more than gf_threshold() of its time step.
+
+    Args:
+        ts: Epoch times (s).
+        gf: Geometry-free combination (m).
+
+    Returns:
+        ndarray: Mask of the epochs after a slip.
+    """
+    slips = np.zeros(len(gf), dtype=bool)
+    if len(gf) < 2:
+        return slips
+    diff = np.diff(gf)
+    residual = diff - rolling_median(diff, GF_WINDOW) if len(diff) > 2 else diff
+    slips[1:] = np.abs(residual) > gf_threshold(np.diff(ts))
+    return slips
+
+
+def mw_slips(mw: Any) -> Any:
+    """Find slips in the Melbourne-Wuebbena combination of one arc.
+
+    The means of up to MW_WINDOW samples before and after each epoch are
+    compared. A step is a slip if it exceeds MW_MIN and MW_SIGMAS times its
+    noise (from the median absolute epoch difference) and is the largest
+    step within MW_WINDOW samples.
+
+    Args:
+        mw: Melbourne-Wuebbena combination (wide lane cycles).
+
+    Returns:
+        ndarray: Mask of the epochs after a slip.
+    """
+    n = len(mw)
+    slips = np.zeros(n, dtype=bool)
+    if n < 2:
+        return slips
+    sums = np.concatenate(([0.0], np.cumsum(mw)))
+    k = np.arange(1, n)
+    lo, hi = np.maximum(k - MW_WINDOW, 0), np.minimum(k + MW_WINDOW, n)
+    before = (sums[k] - sums[lo]) / (k - lo)
+    after = (sums[hi] - sums[k]) / (hi - k)
+    step = np.abs(after - before)
+    # Noise of one sample, robust against the slips themselves
+    sigma = 1.4826 * np.median(np.abs(np.diff(mw))) / math.sqrt(2.0)
+    limit = np.maximum(MW_MIN, MW_SIGMAS * sigma * np.sqrt(1.0 / (k - lo) + 1.0 / (hi - k)))
+    padded = np.pad(step, MW_WINDOW, constant_values=-np.inf)
+    peak = np.lib.stride_tricks.sliding_window_view(padded, 2 * MW_WINDOW + 1).max(axis=1)
+    slips[1:] = (step > limit) & (step >= peak)
+    return slips
+
+
+def interval_of(store: ObsStore, interval: Optional[float] = None) -> float:
+    """Get the nominal interval, the most common epoch step of the store if not given."""
+    if interval:
+        return float(interval)
+    ts = np.unique(np.asarray(store.timestamps))
+    if len(ts) < 2:
+        return 1.0
+    steps, counts = np.unique(np.diff(ts), return_counts=True)
+    return float(steps[np.argmax(counts)])
+
+
+def pair_slips(
+    ts: Any,
+    interval: float,
+    frequencies: Tuple[float, float],
+    ranges: Tuple[Any, Any],
+    codes: Optional[Tuple[Any, Any]] = None,
+) -> Tuple[List[Tuple[int, int]], Any, Any]:
+    """Split a satellite series of two bands into arcs and find their slips.
+
+    Args:
+        ts: Epoch times (s).
+        interval: Nominal epoch interval.
+        frequencies: Carrier frequencies (Hz) of both bands.
+        ranges: Phases of both bands in meters.
+        codes: Codes of both bands (m), no MW test if None. Epochs with a
+            missing (NaN) code are left out of the MW test only.
+
+    Returns:
+        tuple: (arc bounds, see arc_bounds(), GF slip mask, MW slip mask)
+    """
+    f1, f2 = frequencies
+    gf = ranges[0] - ranges[1]
+    gf_mask = np.zeros(len(ts), dtype=bool)
+    mw_mask = np.zeros(len(ts), dtype=bool)
+    mw = None
+    if codes is not None:
+        wide_lane = SPEED_OF_LIGHT / (f1 - f2)
+        mw = (
+            (f1 * ranges[0] - f2 * ranges[1]) / (f1 - f2)
+            - (f1 * codes[0] + f2 * codes[1]) / (f1 + f2)
+        ) / wide_lane
+    arcs = arc_bounds(ts, interval)
+    for start, stop in arcs:
+        gf_mask[start:stop] = gf_slips(ts[start:stop], gf[start:stop])
+        if mw is not None:
+            rows = start + np.flatnonzero(~np.isnan(mw[start:stop]))
+            mw_mask[rows] = mw_slips(mw[rows])
+    return arcs, gf_mask, mw_mask
+
+
+def detect_cycle_slips(
+    store: ObsStore,
+    interval: Optional[float] = None,
+    channels: Optional[Dict[int, int]] = None,
+) -> Dict[str, Any]:
+    """Detect cycle slips per satellite with the GF and MW combinations.
+
+    For each system of SLIP_BANDS the first two bands with phase and code
+    observations are combined. Each satellite series is split into arcs at
+    data gaps (see arc_bounds()), the first epoch of an arc is no slip.
+
+    Args:
+        store: Finalized columnar store.
+        interval: Nominal epoch interval, the most common step if None.
+        channels: FDMA channel per GLONASS satellite number (see
+            glonass_channels()), satellites without channel are skipped.
+
+    Returns:
+        dict: epoch_interval, signals (phase and code obs codes per
+            system) and satellites with their epochs, arcs, gf, mw and lli
+            slip counts, slips (union of gf and mw) and slip epoch times.
+
+    Raises:
+        ImportError: If numpy is not installed.
+    """
+    if np is None:
+        raise ImportError("Cycle slip detection requires numpy")
+    interval = interval_of(store, interval)
+    channels = channels or {}
+    signals, satellites = {}, {}
+    for sat_sys, bands in SLIP_BANDS.items():
+        columns = store.systems.get(sat_sys)
+        if columns is None or not len(columns):
+            continue
+        chosen = band_signals(columns, bands)
+        if len(chosen) < 2:
+            continue
+        (band1, (l1, c1)), (band2, (l2, c2)) = list(chosen.items())[:2]
+        signals[sat_sys] = {
+            "phase": [columns.obs_types[l1], columns.obs_types[l2]],
+            "code": [columns.obs_types[c1], columns.obs_types[c2]],
+        }
+        values = [np.asarray(columns.values[k]) for k in (l1, l2, c1, c2)]
+        lli = [np.asarray(columns.lli[k]) for k in (l1, l2)]
+        timestamps = np.asarray(columns.timestamps)
+        for prn, rows in satellite_rows(columns):
+            f1 = carrier_frequency(sat_sys, band1, channels.get(prn))
+            f2 = carrier_frequency(sat_sys, band2, channels.get(prn))
+            if f1 is None or f2 is None:
+                continue
+            series = [v[rows] for v in values]
+            ok = ~np.any(np.isnan(series), axis=0)
+            rows = rows[ok]
+            if not len(rows):
+                continue
+            phase1, phase2, code1, code2 = (v[ok] for v in series)
+            ts = timestamps[rows]
+            arcs, gf_mask, mw_mask = pair_slips(
+                ts,
+                interval,
+                (f1, f2),
+                (phase1 * SPEED_OF_LIGHT / f1, phase2 * SPEED_OF_LIGHT / f2),
+                (code1, code2),
+            )
+            lost = lost_lock(lli[0][rows]) | lost_lock(lli[1][rows])
+            slips = gf_mask | mw_mask
+            satellites[f"{sat_sys}{prn:02d}"] = {
+                "epochs": len(ts),
+                "arcs": len(arcs),
+                "gf": int(np.count_nonzero(gf_mask)),
+                "mw": int(np.count_nonzero(mw_mask)),
+                "lli": int(np.count_nonzero(lost)),
+                "slips": int(np.count_nonzero(slips)),
+                "slip_epochs": ts[slips].tolist(),
+            }
+    return {"epoch_interval": interval, "signals": signals, "satellites": satellites}
+
+
+def multipath_pairs(columns: Any) -> Dict[int, Tuple[int, int, Optional[int]]]:
+    """Choose the observations combined with each code of a system.
+
+    A code is combined with the phase of its band (same tracking attribute
+    if it has values) and the phase of the first other band of
+    band_order() with values. The code of that other band is used for the
+    MW slip test.
+
+    Returns:
+        dict: (phase, other phase, other code or None) column per code column.
+    """
+    counts = obs_counts(columns)
+    order = band_order(columns.sat_sys)
+    pairs = {}
+    for k, code in enumerate(columns.obs_types):
+        if not is_code(code) or not counts[k]:
+            continue
+        band = code[1:2]
+        phase = best_column(columns, counts, "L", band, code[2:])
+        others = [
+            other
+            for other in order
+            if other != band and best_column(columns, counts, "L", other) is not None
+        ]
+        if phase is None or not others:
+            continue
+        phase2 = best_column(columns, counts, "L", others[0])
+        code2 = best_column(columns, counts, "C", others[0], columns.obs_types[phase2][2:])
+        pairs[k] = (phase, phase2, code2)
+    return pairs
+
+
+def rms_of(sum_squares: float, samples: int) -> Optional[float]:
+    """Get the root mean square (m, 0.1 mm) from a sum of squares, None without samples."""
+    return round(math.sqrt(sum_squares / samples), 4) if samples else None
+
+
+def code_multipath(
+    store: ObsStore,
+    interval: Optional[float] = None,
+    channels: Optional[Dict[int, int]] = None,
+) -> Dict[str, Any]:
+    """Compute the code multipath (MP1, MP2, MPx) of every code with a phase pair.
+
+    MPi = Pi - Li - 2 / (alpha - 1) * (Li - Lj), alpha = (fi / fj)^2, with
+    the phases Li, Lj in meters (see multipath_pairs()). The series of each
+    satellite is split into arcs at data gaps, lost locks of both phases
+    and slips detected on the pair (see pair_slips()). The arc mean, which
+    holds ambiguities and hardware biases, is removed, arcs with fewer
+    than MP_MIN_ARC samples are dropped.
+
+    Args:
+        store: Finalized columnar store.
+        interval: Nominal epoch interval, the most common step if None.
+        channels: FDMA channel per GLONASS satellite number (see
+            glonass_channels()), satellites without channel are skipped.
+
+    Returns:
+        dict: epoch_interval, satellites with samples, arcs and RMS (m) per
+            code, systems with phases, satellites, samples and RMS per code
+            and overall samples and RMS of all codes.
+
+    Raises:
+        ImportError: If numpy is not installed.
+    """
+    if np is None:
+        raise ImportError("Code multipath requires numpy")
+    interval = interval_of(store, interval)
+    channels = channels or {}
+    satellites: Dict[str, Dict[str, Any]] = {}
+    systems: Dict[str, Dict[str, Any]] = {}
+    overall = [0.0, 0]
+    for sat_sys, columns in store.systems.items():
+        if not len(columns):
+            continue
+        pairs = multipath_pairs(columns)
+        totals = {
+            k: {"phase": [columns.obs_types[li], columns.obs_types[lj]], "sums": [0.0, 0, 0]}
+            for k, (li, lj, _) in pairs.items()
+        }
+        values = [np.asarray(column) for column in columns.values]
+        lli = [np.asarray(column) for column in columns.lli]
+        timestamps = np.asarray(columns.timestamps)
+        for prn, rows in satellite_rows(columns):
+            signals = {}
+            for k, (li, lj, cj) in pairs.items():
+                fi = carrier_frequency(sat_sys, columns.obs_types[k][1], channels.get(prn))
+                fj = carrier_frequency(sat_sys, columns.obs_types[lj][1], channels.get(prn))
+                if fi is None or fj is None:
+                    continue
+                code, phase_i, phase_j = (values[c][rows] for c in (k, li, lj))
+                ok = ~(np.isnan(code) | np.isnan(phase_i) | np.isnan(phase_j))
+                if not np.any(ok):
+                    continue
+                sat_rows = rows[ok]
+                ts = timestamps[sat_rows]
+                range_i = phase_i[ok] * SPEED_OF_LIGHT / fi
+                range_j = phase_j[ok] * SPEED_OF_LIGHT / fj
+                codes = None
+                if cj is not None and cj != k:
+                    codes = (code[ok], values[cj][sat_rows])
+                arcs, gf_mask, mw_mask = pair_slips(
+                    ts, interval, (fi, fj), (range_i, range_j), codes
+                )
+                starts = gf_mask | mw_mask
+                starts |= lost_lock(lli[li][sat_rows]) | lost_lock(lli[lj][sat_rows])
+                starts[[start for start, _ in arcs]] = True
+                arc_ids = np.cumsum(starts) - 1
+                sizes = np.bincount(arc_ids)
+                mp = code[ok] - range_i - 2.0 / ((fi / fj) ** 2 - 1.0) * (range_i - range_j)
+                means = np.bincount(arc_ids, weights=mp) / sizes
+                keep = sizes[arc_ids] >= MP_MIN_ARC
+                residuals = (mp - means[arc_ids])[keep]
+                if not len(residuals):
+                    continue
+                sum_squares = float(np.dot(residuals, residuals))
+                signals[columns.obs_types[k]] = {
+                    "samples": len(residuals),
+                    "arcs": int(np.count_nonzero(sizes >= MP_MIN_ARC)),
+                    "rms": rms_of(sum_squares, len(residuals)),
+                }
+                sums = totals[k]["sums"]
+                sums[0] += sum_squares
+                sums[1] += len(residuals)
+                sums[2] += 1
+            if signals:
+                satellites[f"{sat_sys}{prn:02d}"] = signals
+        system = {}
+        for k, total in totals.items():
+            sum_squares, samples, count = total["sums"]
+            if not samples:
+                continue
+            system[columns.obs_types[k]] = {
+                "phase": total["phase"],
+                "satellites": count,
+                "samples": samples,
+                "rms": rms_of(sum_squares, samples),
+            }
+            overall[0] += sum_squares
+            overall[1] += samples
+        if system:
+            systems[sat_sys] = system
+    return {
+        "epoch_interval": interval,
+        "satellites": satellites,
+        "systems": systems,
+        "overall": {"samples": overall[1], "rms": rms_of(*overall)},
+    }
@@ -0,0 +1,603 @@
+"""Block decoder for fixed-width RINEX 3 observation records.
+
+A RINEX 3 satellite record is a 3 character satellite id followed by one
+16 character field (F14.3 value, LLI, SSI) per observation code. Records of
+one satellite system share a layout, so a whole block of them can be padded
+into a 2-D byte matrix and decoded column by column with numpy.
+
+RINEX 2 records wrap after five fields into 80 column lines and carry no
+satellite id, which is listed in the epoch line. Joined to a single line
+behind their satellite id, they have the RINEX 3 layout.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import calendar
+import functools
+import math
+from typing import Dict, List, Sequence, Tuple
+
+from rinex_parser.logger import logger
+from rinex_parser.obs_store import FLAG_BLANK, format_value, np
+
+# Width of the satellite id and of one observation field
+SAT_ID_WIDTH = 3
+FIELD_WIDTH = 16
+VALUE_WIDTH = 14
+# Index of the decimal point within a F14.3 value
+VALUE_POINT = 10
+# RINEX 2 record lines hold five fields, epoch lines twelve satellite ids
+RINEX2_LINE_WIDTH = 80
+RINEX2_FIELDS_PER_LINE = 5
+RINEX2_SATS_PER_LINE = 12
+
+ASCII_NEWLINE = 10
+ASCII_RETURN = 13
+ASCII_SPACE = 32
+ASCII_MINUS = 45
+ASCII_POINT = 46
+ASCII_ZERO = 48
+ASCII_EPOCH = 62
+
+SECONDS_PER_DAY = 86400
+# POSIX time of the GPS epoch 1980-01-06 00:00:00
+GPS_EPOCH = 315964800
+
+
+def record_width(obs_count: int) -> int:
+    """Get line width of a record with obs_count fields."""
+    return SAT_ID_WIDTH + FIELD_WIDTH * obs_count
+
+
+def rinex2_record_lines(obs_count: int) -> int:
+    """Get number of lines of a RINEX 2 record with obs_count fields."""
+    return max(1, math.ceil(obs_count / RINEX2_FIELDS_PER_LINE))
+
+
+def rinex2_sat_ids(lines: Sequence[str], nos: int) -> List[str]:
+    """Get the satellite ids of a RINEX 2 epoch.
+
+    A blank satellite system is GPS, blanks in the satellite number are
+    zeros, e.g. " 5" is "G05".
+
+    Args:
+        lines: Epoch line and its continuation lines.
+        nos: Number of satellites of the epoch.
+
+    Returns:
+        List[str]: nos satellite ids, blank if missing.
+    """
+    sats = "".join(line.rstrip("\r\n")[32:68].ljust(36) for line in lines)
+    sat_ids = [sats[3 * j : 3 * (j + 1)].ljust(3) for j in range(nos)]
+    return [
+        f"{sat_id[0].strip() or 'G'}{sat_id[1:].replace(' ', '0')}" if sat_id.strip() else sat_id
+        for sat_id in sat_ids
+    ]
+
+
+def rinex2_record(sat_id: str, lines: Sequence[str]) -> str:
+    """Join the lines of a RINEX 2 record to a RINEX 3 style record line."""
+    return sat_id + "".join(
+        line.rstrip("\r\n").ljust(RINEX2_LINE_WIDTH)[:RINEX2_LINE_WIDTH] for line in lines
+    )
+
+
+def decoded_width(systems: dict, fields: dict = None) -> int:
+    """Get line width covering all decoded fields of systems.
+
+    Args:
+        systems: SystemColumns per satellite system.
+        fields: Source field index of each column per system, systems
+            missing here are decoded field by field (see decode_matrix).
+    """
+    fields = fields or {}
+    return max(
+        record_width(max(fields[sat_sys], default=-1) + 1)
+        if sat_sys in fields
+        else record_width(len(columns.obs_types))
+        for sat_sys, columns in systems.items()
+    )
+
+
+def parse_value(raw: str) -> float:
+    """Convert a raw F14.3 field into float (NaN if blank or invalid)."""
+    raw = raw.strip()
+    if not raw:
+        return math.nan
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"Invalid observation value: {raw!r}")
+        return math.nan
+
+
+def parse_flag(raw: str) -> int:
+    """Convert a raw LLI/SSI character into int (FLAG_BLANK if not a digit)."""
+    return int(raw) if raw.isdigit() else FLAG_BLANK
+
+
+def decode_records_python(
+    lines: Sequence[str], obs_count: int, fields: Sequence[int] = None, texts: list = None
+) -> Tuple[list, list, list]:
+    """Decode records field by field without numpy.
+
+    Args:
+        lines: Satellite records of one system.
+        obs_count: Number of observation fields per record.
+        fields: Source field index of each column, other fields are not
+            touched (default: all obs_count fields).
+        texts: List of one dict per column, filled with the raw text of
+            values that F14.3 formatting does not restore (see value_texts()).
+
+    Returns:
+        tuple: (values, lli, ssi), each a list with one column per field.
+    """
+    if fields is None:
+        fields = range(obs_count)
+    offsets = [SAT_ID_WIDTH + FIELD_WIDTH * field for field in fields]
+    values = [[] for _ in offsets]
+    lli = [[] for _ in offsets]
+    ssi = [[] for _ in offsets]
+    for row, line in enumerate(lines):
+        for k, pos in enumerate(offsets):
+            raw = line[pos : pos + VALUE_WIDTH]
+            value = parse_value(raw)
+            if texts is not None and raw.strip():
+                raw = raw.rstrip("\r\n").ljust(VALUE_WIDTH)
+                if format_value(value) != raw:
+                    texts[k][row] = raw
+            values[k].append(value)
+            lli[k].append(parse_flag(line[pos + 14 : pos + 15]))
+            ssi[k].append(parse_flag(line[pos + 15 : pos + 16]))
+    return values, lli, ssi
+
+
+def to_matrix(lines: Sequence[str], obs_count: int):
+    """Pad records to the layout width and return them as uint8 matrix.
+
+    Args:
+        lines: Satellite records of one system.
+        obs_count: Number of observation fields per record.
+
+    Returns:
+        numpy.ndarray: Matrix of shape (len(lines), obs_count, FIELD_WIDTH).
+    """
+    width = record_width(obs_count)
+    buffer = "".join(
+        line.rstrip("\r\n").ljust(width)[:width] for line in lines
+    ).encode("latin-1", errors="replace")
+    matrix = np.frombuffer(buffer, dtype=np.uint8).reshape(len(lines), width)
+    return matrix[:, SAT_ID_WIDTH:].reshape(len(lines), obs_count, FIELD_WIDTH)
+
+
+def decode_flags(chars):
+    """Convert LLI/SSI characters into uint8 values."""
+    digits = chars - ASCII_ZERO
+    return np.where(digits <= 9, digits, FLAG_BLANK).astype(np.uint8)
+
+
+def decode_values(chars):
+    """Convert F14.3 characters into float64 values (see scan_values())."""
+    return scan_values(chars)[0]
+
+
+def scan_values(chars):
+    """Convert F14.3 characters into float64 values.
+
+    Values are accumulated as integers of thousandths and divided once, which
+    rounds exactly like float() on the same text. Fields that do not follow
+    the F14.3 layout are handed to parse_value().
+
+    Args:
+        chars: uint8 array of shape (rows, fields, VALUE_WIDTH).
+
+    Returns:
+        tuple: float64 array of shape (rows, fields) and the boolean mask
+            of the non-blank fields not following the F14.3 layout.
+    """
+    shape = chars.shape[:2]
+    number = np.zeros(shape, dtype=np.float64)
+    negative = np.zeros(shape, dtype=bool)
+    blank = np.ones(shape, dtype=bool)
+    irregular = np.zeros(shape, dtype=bool)
+    started = np.zeros(shape, dtype=bool)
+    for pos in range(VALUE_WIDTH):
+        char = chars[..., pos]
+        is_space = char == ASCII_SPACE
+        blank &= is_space
+        if pos == VALUE_POINT:
+            irregular |= char != ASCII_POINT
+            continue
+        digit = char - np.uint8(ASCII_ZERO)
+        is_digit = digit <= 9
+        if pos > VALUE_POINT:
+            irregular |= ~is_digit
+        else:
+            # leading spaces, an optional minus, then digits only
+            is_minus = char == ASCII_MINUS
+            irregular |= ~(is_digit | is_space | is_minus)
+            irregular |= started & (is_space | is_minus)
+            negative |= is_minus
+            started |= ~is_space
+        number *= 10.0
+        number += digit * is_digit
+    values = number / 1000.0
+    np.negative(values, out=values, where=negative)
+    values[blank] = math.nan
+
+    irregular &= ~blank
+    for row, field in np.argwhere(irregular):
+        raw = chars[row, field].tobytes().decode("latin-1")
+        values[row, field] = parse_value(raw)
+    return values, irregular
+
+
+def value_texts(chars, values, irregular) -> List[Dict[int, str]]:
+    """Get the raw text of values that F14.3 formatting does not restore.
+
+    Columnar values are written as F14.3, which would turn e.g. "-.500"
+    of CRX2RNX into "-0.500". Only fields without a units digit, with a
+    leading zero or irregular ones can differ, just these are formatted.
+
+    Args:
+        chars: uint8 array of shape (rows, fields, VALUE_WIDTH).
+        values: Decoded values of shape (rows, fields).
+        irregular: Mask of irregular fields returned by scan_values().
+
+    Returns:
+        List[Dict[int, str]]: Raw text by row, one dict per field.
+    """
+    leading = chars[..., : VALUE_POINT - 1] == ASCII_ZERO
+    before = chars[..., : VALUE_POINT - 2]
+    leading[..., 1:] &= (before == ASCII_SPACE) | (before == ASCII_MINUS)
+    units = chars[..., VALUE_POINT - 1] - np.uint8(ASCII_ZERO)
+    differ = (units > 9) | leading.any(axis=-1)
+    differ &= ~np.isnan(values)
+    differ |= irregular
+    texts = [{} for _ in range(chars.shape[1])]
+    for row, field in np.argwhere(differ).tolist():
+        raw = chars[row, field].tobytes().decode("latin-1")
+        if format_value(values[row, field]) != raw:
+            texts[field][row] = raw
+    return texts
+
+
+def decode_records(lines: Sequence[str], obs_count: int) -> Tuple[list, list, list]:
+    """Decode a block of records of one satellite system.
+
+    Uses numpy if available and falls back to decode_records_python().
+
+    Args:
+        lines: Satellite records of one system.
+        obs_count: Number of observation fields per record.
+
+    Returns:
+        tuple: (values, lli, ssi), each a list with one column per field.
+    """
+    if np is None or not lines:
+        return decode_records_python(lines, obs_count)
+    fields = to_matrix(lines, obs_count)
+    values = decode_values(fields[..., :VALUE_WIDTH])
+    lli = decode_flags(fields[..., VALUE_WIDTH])
+    ssi = decode_flags(fields[..., VALUE_WIDTH + 1])
+    return (
+        [values[:, k] for k in range(obs_count)],
+        [lli[:, k] for k in range(obs_count)],
+        [ssi[:, k] for k in range(obs_count)],
+    )
+
+
+def days_from_civil(year: int, month: int, day: int) -> int:
+    """Count days from 1970-01-01 to a date of the proleptic Gregorian calendar.
+
+    Integer arithmetic only, years are shifted to start in March so that
+    the leap day is the last day of a year.
+    """
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+@functools.lru_cache(maxsize=4096)
+def day_start(year: int, month: int, day: int) -> int:
+    """Get POSIX seconds of midnight of a date, cached per date.
+
+    Raises:
+        ValueError: If the date does not exist.
+    """
+    if not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(year, month)[1]:
+        raise ValueError(f"Invalid date: {year:04d}-{month:02d}-{day:02d}")
+    return days_from_civil(year, month, day) * SECONDS_PER_DAY
+
+
+def epoch_seconds(
+    year: int, month: int, day: int, hour: int, minute: int, second: float, gps: bool = False
+) -> float:
+    """Convert a calendar epoch into seconds.
+
+    Epochs of RINEX files are counted without leap seconds like POSIX time,
+    so GPS seconds differ by a constant.
+
+    Args:
+        year, month, day, hour, minute: Calendar fields.
+        second: Seconds including their fraction.
+        gps: Count from the GPS epoch instead of 1970-01-01 (default: False).
+    """
+    seconds = day_start(year, month, day) + hour * 3600 + minute * 60 + second
+    return seconds - GPS_EPOCH if gps else seconds
+
+
+def decode_epoch_line(line: bytes, gps: bool = False) -> Tuple[float, int, int, float]:
+    """Decode a raw RINEX 3 epoch line by its fixed columns.
+
+    Accepts bytes and str. Fractional seconds are kept.
+
+    Args:
+        line: Raw epoch line, starting with '>'.
+        gps: Return GPS instead of POSIX seconds (default: False).
+
+    Returns:
+        tuple: (timestamp, epoch flag, number of satellites, clock offset)
+
+    Raises:
+        ValueError: If a field is not a number or the date does not exist.
+    """
+    timestamp = (
+        day_start(int(line[2:6]), int(line[7:9]), int(line[10:12]))
+        + int(line[13:15]) * 3600
+        + int(line[16:18]) * 60
+        + float(line[18:29])
+    )
+    clock_offset = line[41:56].strip()
+    return (
+        timestamp - GPS_EPOCH if gps else timestamp,
+        int(line[31:32]),
+        int(line[32:35]),
+        float(clock_offset) if clock_offset else math.nan,
+    )
+
+
+def decode_epoch_line_rinex2(line: str, gps: bool = False) -> Tuple[float, int, int, float]:
+    """Decode a raw RINEX 2 epoch line by its fixed columns.
+
+    Two digit years are mapped to 1980-2079. The satellite list (columns
+    33-68) is left to the caller.
+
+    Args:
+        line: Raw epoch line.
+        gps: Return GPS instead of POSIX seconds (default: False).
+
+    Returns:
+        tuple: (timestamp, epoch flag, number of satellites, clock offset)
+
+    Raises:
+        ValueError: If a field is not a number or the date does not exist.
+    """
+    year = int(line[1:3])
+    timestamp = (
+        day_start(year + (2000 if year < 80 else 1900), int(line[4:6]), int(line[7:9]))
+        + int(line[10:12]) * 3600
+        + int(line[13:15]) * 60
+        + float(line[15:26])
+    )
+    clock_offset = line[68:80].strip()
+    return (
+        timestamp - GPS_EPOCH if gps else timestamp,
+        int(line[28:29]),
+        int(line[29:32]),
+        float(clock_offset) if clock_offset else math.nan,
+    )
+
+
+def decode_prns(lines: Sequence[str]) -> List[int]:
+    """Get satellite numbers of records (-1 if invalid)."""
+    prns = []
+    for line in lines:
+        try:
+            prns.append(int(line[1:3]))
+        except ValueError:
+            prns.append(-1)
+    return prns
+
+
+class RecordBlock:
+    """Pending satellite records of many epochs, decoded in one go.
+
+    Attributes:
+        lines: Raw satellite records of all systems.
+        epochs: Epoch index per registered epoch.
+        timestamps: Epoch timestamp per registered epoch.
+        counts: Number of records per registered epoch.
+    """
+
+    __slots__ = ("lines", "epochs", "timestamps", "counts")
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.epochs: List[int] = []
+        self.timestamps: List[float] = []
+        self.counts: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def append(self, epoch: int, timestamp: float, lines: List[str]) -> None:
+        """Queue the satellite records of one epoch."""
+        self.epochs.append(epoch)
+        self.timestamps.append(timestamp)
+        self.counts.append(len(lines))
+        self.lines += lines
+
+    def flush(
+        self,
+        systems: dict,
+        skip_sat_ids: Sequence[str] = (),
+        blanked: dict = None,
+        fields: dict = None,
+    ) -> None:
+        """Decode pending records into SystemColumns and reset the block.
+
+        Records of systems missing in systems, satellites in skip_sat_ids and
+        records with an invalid satellite number are dropped.
+
+        Args:
+            systems: SystemColumns per satellite system.
+            skip_sat_ids: Satellite ids to drop.
+            blanked: Field indices to blank per system (filtered obs types).
+            fields: Source field index of each column per system (kept obs
+                types), default all fields in order.
+        """
+        if self.lines:
+            if np is None:
+                self._flush_python(systems, skip_sat_ids, blanked or {}, fields or {})
+            else:
+                self._flush_numpy(systems, skip_sat_ids, blanked or {}, fields or {})
+        self.__init__()
+
+    def _flush_python(self, systems, skip_sat_ids, blanked, fields) -> None:
+        pending = {sat_sys: ([], [], [], []) for sat_sys in systems}
+        pos = 0
+        for epoch, timestamp, count in zip(self.epochs, self.timestamps, self.counts):
+            for line in self.lines[pos : pos + count]:
+                target = pending.get(line[0:1])
+                if target is None or line[0:3] in skip_sat_ids:
+                    continue
+                try:
+                    prn = int(line[1:3])
+                except ValueError:
+                    logger.warning(f"Invalid satellite number: {line[0:3]}")
+                    continue
+                target[0].append(line)
+                target[1].append(epoch)
+                target[2].append(timestamp)
+                target[3].append(prn)
+            pos += count
+        for sat_sys, (lines, epochs, timestamps, prns) in pending.items():
+            if not lines:
+                continue
+            columns = systems[sat_sys]
+            texts = [{} for _ in columns.obs_types]
+            values, lli, ssi = decode_records_python(
+                lines, len(columns.obs_types), fields.get(sat_sys), texts
+            )
+            for k in blanked.get(sat_sys, ()):
+                values[k] = [math.nan] * len(lines)
+                lli[k] = [FLAG_BLANK] * len(lines)
+                ssi[k] = [FLAG_BLANK] * len(lines)
+                texts[k] = {}
+            columns.extend(epochs, timestamps, prns, values, lli, ssi, texts)
+
+    def _flush_numpy(self, systems, skip_sat_ids, blanked, fields) -> None:
+        width = decoded_width(systems, fields)
+        buffer = "".join(
+            line.rstrip("\r\n").ljust(width)[:width] for line in self.lines
+        ).encode("latin-1", errors="replace")
+        decode_matrix(
+            np.frombuffer(buffer, dtype=np.uint8).reshape(-1, width),
+            np.repeat(np.asarray(self.epochs, dtype=np.uint32), self.counts),
+            np.repeat(np.asarray(self.timestamps), self.counts),
+            systems,
+            skip_sat_ids,
+            blanked,
+            fields,
+        )
+
+
+def record_matrix(buffer, starts, lengths, width: int):
+    """Cut lines out of a byte buffer into a space padded matrix.
+
+    Args:
+        buffer: uint8 array, at least width bytes beyond the last start.
+        starts: Start offsets of the lines within buffer.
+        lengths: Line lengths without line break.
+        width: Width of the matrix, longer lines are truncated.
+
+    Returns:
+        numpy.ndarray: uint8 matrix of shape (len(starts), width).
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(buffer, width)
+    matrix = windows[starts]
+    np.copyto(matrix, ASCII_SPACE, where=np.arange(width) >= np.asarray(lengths)[:, None])
+    return matrix
+
+
+def decode_matrix(
+    matrix, epochs, timestamps, systems, skip_sat_ids=(), blanked=None, fields=None
+):
+    """Decode a matrix of padded satellite records into SystemColumns.
+
+    Records of systems missing in systems, satellites in skip_sat_ids and
+    records with an invalid satellite number are dropped. With fields, only
+    the listed byte columns of a system are cut out of the matrix, the
+    other fields are never converted.
+
+    Args:
+        matrix: uint8 matrix with one satellite record per row.
+        epochs: Epoch index per row.
+        timestamps: Epoch timestamp per row.
+        systems: SystemColumns per satellite system.
+        skip_sat_ids: Satellite ids to drop.
+        blanked: Field indices to blank per system (filtered obs types).
+        fields: Source field index of each column per system (kept obs
+            types), default all fields in order.
+    """
+    blanked = blanked or {}
+    fields = fields or {}
+    prn_digits = matrix[:, 1:3] - np.uint8(ASCII_ZERO)
+    prns = prn_digits[:, 0].astype(np.int64) * 10 + prn_digits[:, 1]
+    irregular = np.flatnonzero((prn_digits > 9).any(axis=1))
+    if len(irregular):
+        sat_ids = [matrix[i, :3].tobytes().decode("latin-1") for i in irregular]
+        prns[irregular] = decode_prns(sat_ids)
+        for sat_id, prn in zip(sat_ids, prns[irregular]):
+            if prn < 0:
+                logger.warning(f"Invalid satellite number: {sat_id}")
+    keep = prns >= 0
+    if skip_sat_ids:
+        sat_ids = np.ascontiguousarray(matrix[:, :3]).view("S3").ravel()
+        skip = np.asarray([sat_id.encode() for sat_id in skip_sat_ids], dtype="S3")
+        keep &= ~np.isin(sat_ids, skip)
+
+    for sat_sys, columns in systems.items():
+        rows = np.flatnonzero(keep & (matrix[:, 0] == ord(sat_sys)))
+        if not len(rows):
+            continue
+        obs_count = len(columns.obs_types)
+        if sat_sys in fields:
+            byte_columns = (
+                SAT_ID_WIDTH
+                + FIELD_WIDTH * np.asarray(fields[sat_sys], dtype=np.intp)[:, None]
+                + np.arange(FIELD_WIDTH)
+            ).ravel()
+            if byte_columns.size and byte_columns[-1] >= matrix.shape[1]:
+                pad = int(byte_columns[-1]) + 1 - matrix.shape[1]
+                matrix = np.pad(matrix, ((0, 0), (0, pad)), constant_values=ASCII_SPACE)
+            chars = matrix[np.ix_(rows, byte_columns)]
+        else:
+            chars = matrix[rows, SAT_ID_WIDTH : record_width(obs_count)]
+            if chars.shape[1] < FIELD_WIDTH * obs_count:
+                pad = FIELD_WIDTH * obs_count - chars.shape[1]
+                chars = np.pad(chars, ((0, 0), (0, pad)), constant_values=ASCII_SPACE)
+        chars = chars.reshape(len(rows), obs_count, FIELD_WIDTH)
+        values, irregular = scan_values(chars[..., :VALUE_WIDTH])
+        texts = value_texts(chars[..., :VALUE_WIDTH], values, irregular)
+        lli = decode_flags(chars[..., VALUE_WIDTH])
+        ssi = decode_flags(chars[..., VALUE_WIDTH + 1])
+        for k in blanked.get(sat_sys, ()):
+            values[:, k] = math.nan
+            lli[:, k] = FLAG_BLANK
+            ssi[:, k] = FLAG_BLANK
+            texts[k] = {}
+        columns.extend(
+            epochs[rows],
+            timestamps[rows],
+            prns[rows],
+            [values[:, k] for k in range(obs_count)],
+            [lli[:, k] for k in range(obs_count)],
+            [ssi[:, k] for k in range(obs_count)],
+            texts,
+        )
@@ -6,7 +6,7 @@ Author: jurgen
 
 import traceback
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence, Tuple
 import datetime
 
 from rinex_parser import constants as cc
@@ -16,6 +16,8 @@ EPOCH_MIN = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc).timestam
 EPOCH_MAX = datetime.datetime(
     datetime.MAXYEAR, 12, 31, tzinfo=datetime.timezone.utc
 ).timestamp()
+# Order of satellite systems in RINEX 3 output, other systems are dropped
+RINEX3_SYS_ORDER = "".join(sorted("GRECJS"))
 
 
 def ts_epoch_to_list(line: str) -> list:
@@ -78,9 +80,8 @@ def ts_epoch_to_datetime(line: str) -> datetime.datetime:
 
 
 def ts_to_second_of_day(ts: float) -> float:
-    """Get seconds of day from timestamp."""
-    dt = ts_to_datetime(ts)
-    return get_second_of_day(dt.hour, dt.minute, dt.second + (ts - int(ts)))
+    """Get seconds of day from timestamp, POSIX days have 86400 seconds."""
+    return ts % 86400.0
 
 
 def get_second_of_day(h: int, m: int, s: float) -> float:
@@ -260,6 +261,97 @@ class Satellite:
         """
         return self.id[0] if self.id else ""
 
+    def get_observation(self, code: str) -> Observation | None:
+        """Get the observation of an observation code, None if missing."""
+        for obs in self.observations:
+            if obs.code == code:
+                return obs
+        return None
+
+
+class LazySatellite(Satellite):
+    """Satellite record decoded on first access.
+
+    Keeps the raw RINEX 3 record and the field layout of its system, the
+    Observation objects are created when observations or get_observation()
+    are used. Without cache they are decoded again on every access.
+    Assigning observations replaces the raw record.
+    """
+
+    __slots__ = ("raw", "plan", "cache", "decoded", "verbatim")
+
+    def __init__(
+        self,
+        sat_id: str,
+        raw: str,
+        plan: Sequence[Tuple[str, int]],
+        cache: bool = True,
+        verbatim: bool = False,
+    ) -> None:
+        """Initialize a lazy satellite record.
+
+        Args:
+            sat_id: Satellite identifier (e.g., "G01", "R12").
+            raw: Raw record line starting with sat_id.
+            plan: (observation code, line offset) of each field to decode.
+            cache: Keep decoded observations (default: True).
+            verbatim: plan covers all fields of raw in order, so raw can be
+                written as is while not decoded (default: False).
+        """
+        self.id: str = sat_id
+        self.raw: str = raw
+        self.plan = plan
+        self.cache: bool = cache
+        self.decoded: List[Observation] | None = None
+        self.verbatim: bool = verbatim
+
+    @staticmethod
+    def decode_field(line: str, code: str, pos: int) -> Observation:
+        """Cut the F14.3 value, LLI and SSI at pos out of a record line."""
+        lli = line[pos + 14 : pos + 15]
+        ssi = line[pos + 15 : pos + 16]
+        return Observation(
+            code=code,
+            value=line[pos : pos + 14],
+            lli=" " if lli == "\n" else lli,
+            ss=" " if ssi == "\n" else ssi,
+        )
+
+    @property
+    def observations(self) -> List[Observation]:
+        if self.decoded is not None:
+            return self.decoded
+        observations = [self.decode_field(self.raw, code, pos) for code, pos in self.plan]
+        if self.cache:
+            self.decoded = observations
+        return observations
+
+    @observations.setter
+    def observations(self, observations: List[Observation]) -> None:
+        self.decoded = observations
+
+    @property
+    def is_decoded(self) -> bool:
+        """Check if the observations were decoded or assigned."""
+        return self.decoded is not None
+
+    def is_verbatim(self, obs_codes: Sequence[str]) -> bool:
+        """Check if raw can be written unchanged for the given output codes."""
+        return self.verbatim and self.decoded is None and len(self.plan) == len(obs_codes)
+
+    def get_observation(self, code: str) -> Observation | None:
+        """Get the observation of an observation code, None if missing.
+
+        Only the requested field is decoded if observations were not
+        decoded yet.
+        """
+        if self.decoded is not None:
+            return super().get_observation(code)
+        for obs_code, pos in self.plan:
+            if obs_code == code:
+                return self.decode_field(self.raw, code, pos)
+        return None
+
 
 class RinexEpoch:
     """Represents a single epoch in a RINEX observation file.
@@ -274,6 +366,7 @@ class RinexEpoch:
         "epoch_flag",
         "rcv_clock_offset",
         "raw",
+        "source",
     )
 
     def __init__(
@@ -291,6 +384,8 @@ class RinexEpoch:
             satellites: List of Satellite objects or dicts (dicts converted automatically).
             epoch_flag: Epoch flag value (default 0).
             rcv_clock_offset: Receiver clock offset in seconds (default 0.0).
+            raw: Epoch as read, lines joined without line breaks (default: "").
+            source: (path, start, end) bytes of raw in an uncompressed file.
         """
         assert isinstance(timestamp, float), "timestamp must be a float"
 
@@ -303,8 +398,23 @@ class RinexEpoch:
         ]
         self.epoch_flag = kwargs.get("epoch_flag", 0)
         self.rcv_clock_offset = kwargs.get("rcv_clock_offset", 0.0)
-        raw = kwargs.get("raw", [])
-        self.raw: list[str] = raw
+        self.raw: str = kwargs.get("raw", "")
+        self.source: Tuple[str, int, int] | None = kwargs.get("source", None)
+
+    def is_pristine(self) -> bool:
+        """Check if raw still represents the epoch.
+
+        That is the case if no satellite was dropped and all satellites are
+        verbatim LazySatellite records, neither decoded nor assigned.
+        """
+        if not self.raw or self.raw.count("\n") != len(self.satellites):
+            return False
+        for sat in self.satellites:
+            if not isinstance(sat, LazySatellite) or not sat.is_verbatim(
+                self.observation_types.get(sat.id[0], ())
+            ):
+                return False
+        return True
 
     def get_day_seconds(self) -> int:
         """Get seconds elapsed since midnight of the epoch date.
@@ -458,13 +568,19 @@ class RinexEpoch:
     def to_rinex3(self, use_raw: bool = False) -> str:
         """Export epoch in RINEX 3 format.
 
+        Records of LazySatellite objects, which cover all output fields and
+        were not decoded, are written as read.
+
+        Args:
+            use_raw: Return raw as read if the epoch is pristine.
+
         Returns:
             str: Formatted epoch data in RINEX 3 format.
         """
         nos = len(self.satellites)
         data_lines = []
 
-        if use_raw and self.raw:
+        if use_raw and self.is_pristine():
             return self.raw
 
         nos = len(self.satellites)
@@ -474,46 +590,29 @@ class RinexEpoch:
 
         data_lines.append(f"{ts_rnx}  {self.epoch_flag}{nos:3d}{'':6s}{rco}".strip())
 
-        # Sort satellite systems in standard order
-        sat_sys_order = sorted("GRECJS")
-        sat_sys_block = {sat_sys: [] for sat_sys in sat_sys_order}
+        sat_sys_block = {sat_sys: [] for sat_sys in RINEX3_SYS_ORDER}
 
         # Process each satellite
-        # observation_types format: {"G": [...]}, "R": ︃[...︃], ...}
+        # observation_types format: {"G": [...]}, "R": [...], ...}
         for sat in self.satellites:
             try:
                 sat_sys = sat.id[0]  # Satellite system: G, R, E, C, J, S
                 obs_codes = self.observation_types[sat_sys]
+                if isinstance(sat, LazySatellite) and sat.is_verbatim(obs_codes):
+                    # sat id and 16 characters per field
+                    sat_sys_block[sat_sys].append(sat.raw[: 3 + 16 * len(obs_codes)].rstrip())
+                    continue
                 sat_data = [f"{sat.id:3s}"]
+                # First observation of each code
+                observations = {obs.code: obs for obs in reversed(sat.observations)}
 
                 for obs_code in obs_codes:
-                    found_obs_code = False
-                    for obs in sat.observations:
-                        if found_obs_code:
-                            break
-                        if obs.code == obs_code:
-                            if obs.value is not None:
-                                # val = self.get_val(obs.value)
-                                # lli = self.get_d(obs.lli)
-                                # ssi = self.get_d(obs.ss)
-                                # if (
-                                #    obs_code.startswith("L")
-                                #    and ssi != " "
-                                #    and lli == " "
-                                # ):
-                                #    lli = "0"
-                                sat_data.append(
-                                    f"{obs.value:>14s}{obs.lli:1s}{obs.ss:1s}"
-                                )
-                            else:
-                                # Satellite does not have this observation code
-                                sat_data.append(" " * 16)
-                            found_obs_code = True
-                            break
-
-                    if not found_obs_code:
-                        # Observation code not found for this satellite
+                    obs = observations.get(obs_code)
+                    if obs is None or obs.value is None:
+                        # Satellite does not have this observation code
                         sat_data.append(" " * 16)
+                    else:
+                        sat_data.append(f"{obs.value:>14s}{obs.lli:1s}{obs.ss:1s}")
 
                 sat_sys_block[sat_sys].append("".join(sat_data).strip())
             except KeyError as e:
@@ -523,7 +622,7 @@ class RinexEpoch:
                 traceback.print_exc()
 
         sat_blocks = []
-        for sat_sys in sat_sys_order:
+        for sat_sys in RINEX3_SYS_ORDER:
             if sat_sys_block[sat_sys]:
                 sat_blocks.append("\n".join(sat_sys_block[sat_sys]))
         data_lines.append("\n".join(sat_blocks))
@@ -4,7 +4,7 @@ Provides factory methods to create appropriate reader and header objects
 based on RINEX version (2 or 3).
 """
 
-from .obs_reader import Rinex2ObsReader, Rinex3ObsReader, RinexObsReader
+from .obs_reader import Rinex2ObsReader, Rinex3ObsReader, RinexObsReader, open_rinex_obs
 from .obs_header import Rinex2ObsHeader, Rinex3ObsHeader, RinexObsHeader
 
 
@@ -88,10 +88,9 @@ class RinexObsFactory:
         Returns:
             type[RinexObsReader]: Reader class for the detected version.
         """
-        with open(rinex_file, 'r') as handler:
-            version_dict = RinexObsHeader.parse_version_type(handler.readline())
-            version = int(version_dict["format_version"])
-            return self._create_obs_type_by_version(version, "reader")
+        handler, version = open_rinex_obs(rinex_file)
+        handler.close()
+        return self._create_obs_type_by_version(version, "reader")
 
     def create_obs_header_by_file(
         self,
@@ -105,8 +104,7 @@ class RinexObsFactory:
         Returns:
             type[RinexObsHeader]: Header class for the detected version.
         """
-        with open(rinex_file, 'r') as handler:
-            version_dict = RinexObsHeader.parse_version_type(handler.readline())
-            version = int(version_dict["format_version"])
-            return self._create_obs_type_by_version(version, "header")
+        handler, version = open_rinex_obs(rinex_file)
+        handler.close()
+        return self._create_obs_type_by_version(version, "header")
 
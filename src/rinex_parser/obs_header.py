@@ -32,6 +32,35 @@ SKEL_FIELDS = [
 ]
 
 
+def parse_keep_obs(spec: str) -> Dict[str, List[str]]:
+    """Parse a keep list of observation codes.
+
+    Args:
+        spec: Systems separated by ';', each with its codes separated by
+            ',', e.g. "G:C1C,L1C,C2W,L2W;E:C1C,L1C".
+
+    Returns:
+        dict: Codes to keep per satellite system.
+
+    Raises:
+        ValueError: If spec is malformed.
+    """
+    keep_obs = {}
+    for item in spec.split(";"):
+        if not item.strip():
+            continue
+        sat_sys, sep, codes = item.partition(":")
+        sat_sys = sat_sys.strip()
+        obs_codes = [code.strip() for code in codes.split(",") if code.strip()]
+        if not sep or len(sat_sys) != 1 or not obs_codes:
+            raise ValueError(f"Invalid keep list entry: {item!r}")
+        for code in obs_codes:
+            if len(code) != 3:
+                raise ValueError(f"Invalid observation code: {code!r}")
+        keep_obs.setdefault(sat_sys, []).extend(obs_codes)
+    return keep_obs
+
+
 class RinexObsHeader(abc.ABC):
     """Base class for RINEX observation file headers.
 
@@ -382,7 +411,7 @@ class RinexObsHeader(abc.ABC):
         observation_types = re.finditer(self.RE_HEADER_OBS_DESCRIPTOR, line)
         if self.observation_types is None:
             self.observation_types = []
-        self.observation_types += observation_types
+        self.observation_types += [m.group().strip() for m in observation_types]
 
     def set_first_observation(self, line):
         self.first_observation = line[:43]
@@ -817,6 +846,34 @@ class Rinex3ObsHeader(Rinex2ObsHeader):
                 sot.append(f"{temp:60s}SYS / # / OBS TYPES")
         return "︃\n".join(sot)
 
+    def keep_sys_obs_types(self, keep_obs: Dict[str, List[str]]) -> Dict[str, List[int]]:
+        """Reduce sys_obs_types of the listed systems to the kept codes.
+
+        Codes keep their order in the header, systems not listed in
+        keep_obs are left untouched. Systems without any kept code are
+        removed.
+
+        Args:
+            keep_obs: Codes to keep per satellite system (see parse_keep_obs).
+
+        Returns:
+            dict: Original field index of each kept code per listed system.
+        """
+        fields = {}
+        for sat_sys, codes in keep_obs.items():
+            obs_types = self.sys_obs_types.get(sat_sys)
+            if obs_types is None:
+                logger.warning(f"No observation types of system {sat_sys} in header")
+                continue
+            missing = [code for code in codes if code not in obs_types]
+            if missing:
+                logger.warning(f"Observation types not in header: {sat_sys}:{','.join(missing)}")
+            fields[sat_sys] = [k for k, obs_type in enumerate(obs_types) if obs_type in codes]
+            obs_types[:] = [obs_types[k] for k in fields[sat_sys]]
+            if not obs_types:
+                del self.sys_obs_types[sat_sys]
+        return fields
+
     def set_marker_type(self, line):
         self.marker_type = line[:20].strip()
 
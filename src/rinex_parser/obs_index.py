@@ -0,0 +1,288 @@
+"""Byte-offset epoch index for RINEX 3 observation files.
+
+One scan over the file records timestamp, byte offset, number of satellites
+and epoch flag of every epoch. The index is persisted as a small sidecar
+file next to the RINEX file and is reused as long as size, modification time
+and header of the RINEX file are unchanged. Readers use it to seek straight
+to the epochs selected by crop and interval filters.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import hashlib
+import itertools
+import os
+import struct
+import sys
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+from rinex_parser.logger import logger
+from rinex_parser.obs_decoder import decode_epoch_line
+from rinex_parser.obs_epoch import EPOCH_MAX, EPOCH_MIN, ts_to_second_of_day
+
+INDEX_SUFFIX = ".rxi"
+INDEX_MAGIC = b"RXPIDX02"
+# magic, byte order, size, mtime_ns, header sha1, data offset, epoch count
+INDEX_HEAD = struct.Struct("<8s1sQq20sQQ")
+HEADER_END = b"END OF HEADER"
+
+
+def index_path(rinex_file: str) -> str:
+    """Get path of the sidecar index of rinex_file."""
+    return f"{rinex_file}{INDEX_SUFFIX}"
+
+
+def read_header_bytes(handler) -> bytes:
+    """Read raw header lines including END OF HEADER from a binary handler."""
+    lines = []
+    for line in handler:
+        lines.append(line)
+        if HEADER_END in line:
+            break
+    return b"".join(lines)
+
+
+class EpochIndex:
+    """Timestamps and byte offsets of all epochs of a RINEX 3 file.
+
+    Attributes:
+        size: File size in bytes when the index was built.
+        mtime_ns: File modification time when the index was built.
+        header_hash: SHA1 digest of the raw header.
+        data_offset: Byte offset of the first line after the header.
+        timestamps: Epoch timestamps.
+        offsets: Byte offsets of the epoch lines.
+        sat_counts: Number of satellite (or event) records per epoch.
+        epoch_flags: Epoch flags.
+    """
+
+    __slots__ = (
+        "size",
+        "mtime_ns",
+        "header_hash",
+        "data_offset",
+        "timestamps",
+        "offsets",
+        "sat_counts",
+        "epoch_flags",
+    )
+
+    def __init__(
+        self,
+        size: int = 0,
+        mtime_ns: int = 0,
+        header_hash: bytes = b"",
+        data_offset: int = 0,
+    ) -> None:
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.header_hash = header_hash
+        self.data_offset = data_offset
+        self.timestamps = array("d")
+        self.offsets = array("Q")
+        self.sat_counts = array("H")
+        self.epoch_flags = array("B")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def build(cls, rinex_file: str) -> "EpochIndex":
+        """Scan rinex_file and index all epochs.
+
+        Args:
+            rinex_file: Path to a RINEX 3 observation file.
+
+        Returns:
+            EpochIndex: The new index.
+        """
+        stat = os.stat(rinex_file)
+        with open(rinex_file, "rb") as handler:
+            header = read_header_bytes(handler)
+            index = cls(
+                stat.st_size,
+                stat.st_mtime_ns,
+                hashlib.sha1(header).digest(),
+                len(header),
+            )
+            offset = len(header)
+            lines = iter(handler)
+            for line in lines:
+                line_offset = offset
+                offset += len(line)
+                if line[0:1] != b">":
+                    continue
+                try:
+                    timestamp, epoch_flag, nos, _ = decode_epoch_line(line)
+                except ValueError:
+                    logger.warning(f"Invalid epoch line at byte {line_offset}")
+                    continue
+                index.timestamps.append(timestamp)
+                index.offsets.append(line_offset)
+                index.sat_counts.append(nos)
+                index.epoch_flags.append(epoch_flag)
+                for record in itertools.islice(lines, nos):
+                    offset += len(record)
+        return index
+
+    @classmethod
+    def load(cls, rinex_file: str) -> Optional["EpochIndex"]:
+        """Load the sidecar index of rinex_file if it is still valid.
+
+        Args:
+            rinex_file: Path to the RINEX observation file.
+
+        Returns:
+            EpochIndex: The stored index, None if missing or outdated.
+        """
+        try:
+            with open(index_path(rinex_file), "rb") as handler:
+                data = handler.read()
+        except OSError:
+            return None
+        try:
+            magic, byteorder, size, mtime_ns, header_hash, data_offset, count = (
+                INDEX_HEAD.unpack_from(data)
+            )
+        except struct.error:
+            return None
+        if magic != INDEX_MAGIC:
+            return None
+
+        stat = os.stat(rinex_file)
+        if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+            logger.debug(f"Epoch index of {rinex_file} is outdated")
+            return None
+        with open(rinex_file, "rb") as handler:
+            if hashlib.sha1(read_header_bytes(handler)).digest() != header_hash:
+                logger.debug(f"Epoch index of {rinex_file} has another header")
+                return None
+
+        index = cls(size, mtime_ns, header_hash, data_offset)
+        pos = INDEX_HEAD.size
+        for column in (index.timestamps, index.offsets, index.sat_counts, index.epoch_flags):
+            end = pos + count * column.itemsize
+            column.frombytes(data[pos:end])
+            pos = end
+            if byteorder.decode() != sys.byteorder[0]:
+                column.byteswap()
+        if len(index.epoch_flags) != count:
+            return None
+        return index
+
+    def save(self, rinex_file: str) -> bool:
+        """Write the index as sidecar of rinex_file.
+
+        Args:
+            rinex_file: Path to the RINEX observation file.
+
+        Returns:
+            bool: True if the sidecar was written.
+        """
+        head = INDEX_HEAD.pack(
+            INDEX_MAGIC,
+            sys.byteorder[0].encode(),
+            self.size,
+            self.mtime_ns,
+            self.header_hash,
+            self.data_offset,
+            len(self),
+        )
+        path = index_path(rinex_file)
+        try:
+            with open(f"{path}.tmp", "wb") as handler:
+                handler.write(head)
+                for column in (
+                    self.timestamps,
+                    self.offsets,
+                    self.sat_counts,
+                    self.epoch_flags,
+                ):
+                    column.tofile(handler)
+            os.replace(f"{path}.tmp", path)
+        except OSError as err:
+            logger.debug(f"Could not write epoch index {path}: {err}")
+            return False
+        return True
+
+    @classmethod
+    def for_file(cls, rinex_file: str, persist: bool = True) -> "EpochIndex":
+        """Get a valid index of rinex_file, building it if needed.
+
+        Args:
+            rinex_file: Path to a RINEX 3 observation file.
+            persist: Write a newly built index as sidecar (default: True).
+
+        Returns:
+            EpochIndex: Index of rinex_file.
+        """
+        index = cls.load(rinex_file)
+        if index is None:
+            index = cls.build(rinex_file)
+            if persist:
+                index.save(rinex_file)
+        return index
+
+    def select(
+        self,
+        crop_beg: float = EPOCH_MIN,
+        crop_end: float = EPOCH_MAX,
+        interval: int = 0,
+    ) -> List[int]:
+        """Get positions of epochs within the crop window and on the interval.
+
+        Args:
+            crop_beg: First timestamp to keep.
+            crop_end: Last timestamp to keep.
+            interval: Keep only epochs on multiples of interval seconds of day.
+
+        Returns:
+            list: Ascending epoch positions.
+        """
+        return [
+            pos
+            for pos, ts in enumerate(self.timestamps)
+            if crop_beg <= ts <= crop_end
+            and (interval <= 0 or ts_to_second_of_day(ts) % interval == 0)
+        ]
+
+    @staticmethod
+    def _position_runs(positions: List[int]) -> Iterator[Tuple[int, int]]:
+        start = None
+        count = 0
+        for pos in positions:
+            if start is not None and pos == start + count:
+                count += 1
+                continue
+            if start is not None:
+                yield start, count
+            start, count = pos, 1
+        if start is not None:
+            yield start, count
+
+    def runs(self, positions: List[int]) -> Iterator[Tuple[int, int]]:
+        """Group epoch positions into contiguous runs.
+
+        Args:
+            positions: Ascending epoch positions (see select()).
+
+        Yields:
+            tuple: (byte offset of first epoch, number of epochs)
+        """
+        for start, count in self._position_runs(positions):
+            yield self.offsets[start], count
+
+    def byte_ranges(self, positions: List[int]) -> Iterator[Tuple[int, int]]:
+        """Get byte ranges covering contiguous runs of epoch positions.
+
+        Args:
+            positions: Ascending epoch positions (see select()).
+
+        Yields:
+            tuple: (first byte, end byte) of each run.
+        """
+        for start, count in self._position_runs(positions):
+            end = start + count
+            yield self.offsets[start], self.offsets[end] if end < len(self) else self.size
@@ -15,11 +15,12 @@ import os
 import math
 import argparse
 
-from typing import Optional, Tuple, List
+from typing import Iterator, Optional, Tuple, List
 from pathlib import Path
 
 from rinex_parser.logger import logger
 from rinex_parser.obs_factory import RinexObsFactory, RinexObsReader
+from rinex_parser.obs_reader import open_rinex_obs
 from rinex_parser.obs_epoch import (
     ts_to_datetime,
     EPOCH_MIN,
@@ -90,6 +91,14 @@ class RinexParser:
         self.filter_on_read: bool = kwargs.get("filter_on_read", True)
         self.sampling = sampling
         self.__create_reader(self.rinex_version)
+        self.rinex_reader.columnar = kwargs.get("columnar", False)
+        self.rinex_reader.use_index = kwargs.get("use_index", False)
+        self.rinex_reader.use_mmap = kwargs.get("use_mmap", None)
+        self.rinex_reader.workers = kwargs.get("workers", 1)
+        self.rinex_reader.keep_obs = kwargs.get("keep_obs", "")
+        self.rinex_reader.lazy = kwargs.get("lazy", False)
+        self.rinex_reader.passthrough = kwargs.get("passthrough", False)
+        self.rinex_reader.handler = kwargs.get("handler", None)
         self.rinex_reader.rinex_obs_file = rinex_file
         self.rinex_reader.interval_filter = self.sampling
         self.rinex_reader.filter_sat_sys = filter_sat_sys
@@ -98,6 +107,40 @@ class RinexParser:
         self.rinex_reader.crop_beg = crop_beg
         self.rinex_reader.crop_end = crop_end
 
+    @classmethod
+    def from_file(cls, rinex_file: str, **kwargs) -> "RinexParser":
+        """Create a parser for rinex_file, detecting its RINEX version.
+
+        The file is opened only once. The version is sniffed from the first
+        line, header and epochs are read later from the same buffered
+        handler, which is closed after the epochs were read (or by close()).
+
+        Args:
+            rinex_file: Path to the RINEX observation file.
+            **kwargs: Further arguments of RinexParser.
+
+        Returns:
+            RinexParser: Parser of the detected version.
+
+        Raises:
+            ValueError: If the first line holds no RINEX version.
+        """
+        handler, rinex_version = open_rinex_obs(rinex_file)
+        try:
+            return cls(
+                rinex_file=rinex_file,
+                rinex_version=rinex_version,
+                handler=handler,
+                **kwargs,
+            )
+        except BaseException:
+            handler.close()
+            raise
+
+    def close(self) -> None:
+        """Close the input handler if the epochs were not read."""
+        self.rinex_reader.close()
+
     @property
     def rinex_file(self):
         return self.rinex_reader.rinex_obs_file
@@ -279,6 +322,29 @@ class RinexParser:
         self.rinex_reader.read_header_from_file()
         self.rinex_reader.read_epochs_from_file()
 
+    def iter_epochs(self) -> Iterator[RinexEpoch]:
+        """Read the header and stream epochs of the configured RINEX file.
+
+        Crop range, sampling and satellite filters are applied while reading,
+        so memory stays constant regardless of the file length. Epochs are
+        not kept in rinex_epochs.
+
+        Returns:
+            Iterator[RinexEpoch]: Epochs passing the filters.
+        """
+        self.do_read_header()
+        return self.rinex_reader.iter_epochs()
+
+    def do_read_header(self) -> None:
+        """Read only the header of the configured RINEX file.
+
+        The epochs can be streamed afterwards, e.g. by iter_epochs() of the
+        reader or RinexQuality.accumulate().
+        """
+        assert self.rinex_file != "", "Rinex file not specified"
+        self.rinex_reader.set_rinex_obs_file(self.rinex_file)
+        self.rinex_reader.read_header_from_file()
+
     def do_clear_datadict(self) -> None:
         """Clear unused observation types from header data.
 
@@ -289,12 +355,15 @@ class RinexParser:
         for sat_sys in self.rinex_reader.header.sys_obs_types.keys():
             found_obs_types[sat_sys] = set()
 
-        # Iterate through all epochs and satellites to find used obs types
-        for rinex_epoch in self.rinex_reader.rinex_epochs:
-            for item in rinex_epoch.satellites:
-                sat_sys = item.id[0]  # Satellite system (G, R, E, C, J, S)
-                for sat_obs in item.observations:
-                    found_obs_types[sat_sys].add(sat_obs.code)
+        if self.rinex_reader.obs_store is not None:
+            found_obs_types.update(self.rinex_reader.obs_store.found_obs_types())
+        else:
+            # Iterate through all epochs and satellites to find used obs types
+            for rinex_epoch in self.rinex_reader.rinex_epochs:
+                for item in rinex_epoch.satellites:
+                    sat_sys = item.id[0]  # Satellite system (G, R, E, C, J, S)
+                    for sat_obs in item.observations:
+                        found_obs_types[sat_sys].add(sat_obs.code)
 
         # Remove obs types from header that weren't found in any epoch
         for sat_sys in self.rinex_reader.header.sys_obs_types:
@@ -318,14 +387,21 @@ class RinexParser:
             self.do_clear_datadict()
         # crop epochs to time windows
         cleared_epochs = []
-        for epoch in self.rinex_reader.rinex_epochs:
-            # CROP
-            if epoch.timestamp < self.rinex_reader.crop_beg:
-                continue
-            if epoch.timestamp > self.rinex_reader.crop_end:
-                continue
-            # APPEND
-            cleared_epochs.append(epoch)
+        if self.rinex_reader.obs_store is not None:
+            cleared_epochs = self.rinex_reader.obs_store.filter_epochs(
+                lambda ts: self.rinex_reader.crop_beg
+                <= ts
+                <= self.rinex_reader.crop_end
+            ).epochs
+        else:
+            for epoch in self.rinex_reader.rinex_epochs:
+                # CROP
+                if epoch.timestamp < self.rinex_reader.crop_beg:
+                    continue
+                if epoch.timestamp > self.rinex_reader.crop_end:
+                    continue
+                # APPEND
+                cleared_epochs.append(epoch)
 
         self.rinex_reader.rinex_epochs = cleared_epochs
         self.rinex_reader.header.first_observation = self.rinex_reader.rinex_epochs[
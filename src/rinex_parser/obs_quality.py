@@ -5,14 +5,801 @@ Provides functionality to assess data quality, detect gaps, and generate
 quality reports for RINEX observation files.
 """
 
+import calendar
+import collections
+import itertools
+import math
 import os
 import time
 import datetime
-from typing import Any, Dict, Generator, List
+from typing import Any, Dict, Generator, Iterable, List, Optional, Sequence, Tuple
 
 from rinex_parser import constants as cc
 from rinex_parser.logger import logger
+from rinex_parser.obs_combinations import code_multipath, detect_cycle_slips, glonass_channels
 from rinex_parser.obs_epoch import RinexEpoch, Satellite, Observation, ts_epoch_to_time
+from rinex_parser.obs_store import FLAG_BLANK, SAT_SYS_ORDER, ObsStore, np
+
+# Epoch steps longer than the interval by more than this are gaps (seconds)
+GAP_TOLERANCE = 1e-3
+# Valid epochs buffered to find the interval of files without INTERVAL
+STREAM_INTERVAL_EPOCHS = 100
+# Satellite number slots per system of the completeness counters (uint8 prns)
+PRN_SLOTS = 256
+# Signal strength values 0..9 of the SSI histograms
+SSI_VALUES = 10
+
+
+class EpochGaps:
+    """Gaps between the valid epochs of an observation file.
+
+    Attributes:
+        timestamps: Sorted unique times of the valid epochs, empty if they
+            were only counted (see QualityAccumulator).
+        interval: Nominal epoch interval in seconds.
+        gapsize: Gaps up to gapsize epochs are short gaps.
+        gap_begin: Time of the last epoch before each gap.
+        gap_end: Time of the first epoch after each gap.
+        epochs_valid: Number of valid epochs.
+        first: Time of the first valid epoch, None without valid epochs.
+        last: Time of the last valid epoch, None without valid epochs.
+    """
+
+    __slots__ = (
+        "timestamps",
+        "interval",
+        "gapsize",
+        "gap_begin",
+        "gap_end",
+        "epochs_valid",
+        "first",
+        "last",
+    )
+
+    def __init__(
+        self,
+        timestamps: Sequence[float],
+        interval: float,
+        gapsize: int,
+        gap_begin: List[float],
+        gap_end: List[float],
+        epochs_valid: Optional[int] = None,
+        first: Optional[float] = None,
+        last: Optional[float] = None,
+    ) -> None:
+        self.timestamps = timestamps
+        self.interval = interval
+        self.gapsize = gapsize
+        self.gap_begin = gap_begin
+        self.gap_end = gap_end
+        self.epochs_valid = len(timestamps) if epochs_valid is None else epochs_valid
+        if first is None and len(timestamps):
+            first, last = float(timestamps[0]), float(timestamps[-1])
+        self.first = first
+        self.last = last
+
+    def __len__(self) -> int:
+        return len(self.gap_begin)
+
+    @property
+    def gaps_less(self) -> int:
+        """Get the number of gaps up to gapsize epochs."""
+        limit = self.gapsize * self.interval + GAP_TOLERANCE
+        return sum(1 for a, b in zip(self.gap_begin, self.gap_end) if b - a <= limit)
+
+    @property
+    def gaps_more(self) -> int:
+        """Get the number of gaps longer than gapsize epochs."""
+        return len(self) - self.gaps_less
+
+    @property
+    def epochs_missing(self) -> int:
+        """Get the number of epochs missing in the gaps."""
+        return sum(
+            int(round((b - a) / self.interval)) - 1 for a, b in zip(self.gap_begin, self.gap_end)
+        )
+
+
+def most_common_step(timestamps: Sequence[float]) -> Optional[float]:
+    """Get the most common step of sorted unique timestamps, None if there is none."""
+    if len(timestamps) < 2:
+        return None
+    if np is not None and isinstance(timestamps, np.ndarray):
+        steps, counts = np.unique(np.diff(timestamps), return_counts=True)
+        return float(steps[np.argmax(counts)])
+    steps = collections.Counter(b - a for a, b in zip(timestamps, timestamps[1:]))
+    return steps.most_common(1)[0][0]
+
+
+def find_epoch_gaps(
+    timestamps: Sequence[float],
+    interval: Optional[float] = None,
+    gapsize: int = 5,
+    valid: Optional[Sequence[bool]] = None,
+) -> EpochGaps:
+    """Find the gaps between epochs with sorted array arithmetic.
+
+    The timestamps are sorted and deduplicated once, every step longer
+    than interval is a gap. NumPy is used when it is installed.
+
+    Args:
+        timestamps: Epoch times in seconds, in any order.
+        interval: Nominal interval, the most common epoch step if None or 0.
+        gapsize: Gaps up to gapsize epochs are short gaps (default: 5).
+        valid: Mask of the valid epochs (default: all epochs).
+
+    Returns:
+        EpochGaps: Valid epochs and their gaps.
+    """
+    if np is not None:
+        ts = np.asarray(timestamps, dtype=np.float64)
+        if valid is not None:
+            ts = ts[np.asarray(valid, dtype=bool)]
+        ts = np.unique(ts)
+    else:
+        if valid is not None:
+            timestamps = itertools.compress(timestamps, valid)
+        ts = sorted(set(timestamps))
+    interval = interval or most_common_step(ts) or 1.0
+    limit = interval + GAP_TOLERANCE
+    if np is not None:
+        index = np.flatnonzero(np.diff(ts) > limit)
+        gap_begin, gap_end = ts[index].tolist(), ts[index + 1].tolist()
+    else:
+        gaps = [(a, b) for a, b in zip(ts, ts[1:]) if b - a > limit]
+        gap_begin, gap_end = [a for a, _ in gaps], [b for _, b in gaps]
+    return EpochGaps(ts, interval, gapsize, gap_begin, gap_end)
+
+
+def ts_to_rinex_datetime(ts: float, fmt: str = cc.RNX_FORMAT_DATETIME) -> str:
+    """Format POSIX seconds in UTC with a RINEX datetime format."""
+    return time.strftime(fmt, time.gmtime(ts))
+
+
+# Epoch validity of is_valid_epoch_legacy(): 5 GPS satellites with L1 and L2
+DEFAULT_VALIDITY = "G:5:L1,L2"
+
+
+def is_present(value: Any) -> bool:
+    """Check if an observation value is present (not None, blank or NaN)."""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return value.strip() != ""
+    return not math.isnan(value)
+
+
+class EpochValidity:
+    """Epoch validity criteria: minimum satellites per system carrying signals.
+
+    A satellite carries a signal descriptor (e.g. "L1") if one of its obs
+    codes starting with the descriptor has a value. An epoch is valid if
+    each system of the rules has at least its minimum of satellites
+    carrying all descriptors of the system.
+
+    Attributes:
+        rules: Minimum satellite count and signal descriptors per system.
+    """
+
+    __slots__ = ("rules",)
+
+    def __init__(self, rules: Dict[str, Tuple[int, List[str]]]) -> None:
+        self.rules = rules
+
+    @classmethod
+    def parse(cls, spec: str) -> "EpochValidity":
+        """Parse validity rules.
+
+        Args:
+            spec: Systems separated by ';', each as system, minimum number
+                of satellites and descriptors separated by ',', joined by ':',
+                e.g. "G:5:L1,L2;E:4:L1,L5". Without descriptors any
+                satellite of the system counts.
+
+        Returns:
+            EpochValidity: The parsed rules.
+
+        Raises:
+            ValueError: If spec is malformed.
+        """
+        rules = {}
+        for item in spec.split(";"):
+            if not item.strip():
+                continue
+            fields = [field.strip() for field in item.split(":")]
+            if len(fields) not in (2, 3) or len(fields[0]) != 1 or not fields[1].isdigit():
+                raise ValueError(f"Invalid epoch validity entry: {item!r}")
+            descriptors = fields[2].split(",") if len(fields) == 3 else []
+            rules[fields[0]] = (int(fields[1]), [d.strip() for d in descriptors if d.strip()])
+        if not rules:
+            raise ValueError(f"Empty epoch validity: {spec!r}")
+        return cls(rules)
+
+    def __str__(self) -> str:
+        return ";".join(
+            f"{sat_sys}:{minimum}:{','.join(descriptors)}"
+            for sat_sys, (minimum, descriptors) in self.rules.items()
+        )
+
+    def carries(self, sat_sys: str, codes: Iterable[str]) -> bool:
+        """Check if a satellite with values for codes carries all signals of its system."""
+        codes = list(codes)
+        return all(
+            any(code.startswith(descriptor) for code in codes)
+            for descriptor in self.rules[sat_sys][1]
+        )
+
+    def store_counts(self, store: ObsStore) -> Dict[str, Any]:
+        """Count the satellites carrying the signals of each system per epoch.
+
+        One pass over the value columns of the store, counted per epoch
+        with numpy.bincount (or a loop without numpy).
+
+        Args:
+            store: Columnar store.
+
+        Returns:
+            dict: Satellite count per epoch of each system of the rules.
+        """
+        n = len(store)
+        counts = {}
+        for sat_sys, (_, descriptors) in self.rules.items():
+            columns = store.systems.get(sat_sys)
+            if columns is None or not len(columns):
+                counts[sat_sys] = np.zeros(n, dtype=np.int64) if np is not None else [0] * n
+                continue
+            signals = [
+                [k for k, code in enumerate(columns.obs_types) if code.startswith(descriptor)]
+                for descriptor in descriptors
+            ]
+            if np is not None:
+                carries = np.ones(len(columns), dtype=bool)
+                for fields in signals:
+                    present = np.zeros(len(columns), dtype=bool)
+                    for k in fields:
+                        present |= ~np.isnan(np.asarray(columns.values[k]))
+                    carries &= present
+                epochs = np.asarray(columns.epochs)[carries]
+                counts[sat_sys] = np.bincount(epochs, minlength=n)[:n]
+                continue
+            system_counts = [0] * n
+            values = columns.values
+            for row, epoch in enumerate(columns.epochs):
+                if all(
+                    any(not math.isnan(values[k][row]) for k in fields) for fields in signals
+                ):
+                    system_counts[epoch] += 1
+            counts[sat_sys] = system_counts
+        return counts
+
+    def store_mask(self, store: ObsStore) -> Sequence[bool]:
+        """Get the validity of each epoch of a columnar store."""
+        return self.counts_mask(self.store_counts(store), len(store))
+
+    def counts_mask(self, counts: Dict[str, Any], n: int) -> Sequence[bool]:
+        """Get the validity of n epochs from their counts (see store_counts())."""
+        if np is not None:
+            valid = np.ones(n, dtype=bool)
+            for sat_sys, (minimum, _) in self.rules.items():
+                valid &= counts[sat_sys] >= minimum
+            return valid
+        return [
+            all(counts[sat_sys][i] >= minimum for sat_sys, (minimum, _) in self.rules.items())
+            for i in range(n)
+        ]
+
+    def is_valid(self, satellites: Iterable[Any]) -> bool:
+        """Check the validity of an epoch.
+
+        Args:
+            satellites: Satellite objects or legacy dicts with "id" and
+                "observations" of the epoch.
+        """
+        counts = dict.fromkeys(self.rules, 0)
+        for satellite in satellites:
+            if isinstance(satellite, dict):
+                sat_id = satellite.get("id", "")
+                observations = satellite.get("observations", {}).items()
+            else:
+                sat_id = satellite.id
+                observations = ((obs.code, obs.value) for obs in satellite.observations)
+            if sat_id[:1] not in counts:
+                continue
+            codes = [code for code, value in observations if is_present(value)]
+            if self.carries(sat_id[0], codes):
+                counts[sat_id[0]] += 1
+        return all(counts[sat_sys] >= minimum for sat_sys, (minimum, _) in self.rules.items())
+
+    def epoch_mask(self, epochs: Iterable[RinexEpoch]) -> List[bool]:
+        """Get the validity of each epoch object."""
+        return [self.is_valid(epoch.satellites) for epoch in epochs]
+
+
+def is_lost_lock(lli: Any) -> bool:
+    """Check if a loss of lock indicator has its lost lock bit set.
+
+    Args:
+        lli: Indicator as read, a character (RINEX 3 objects), an int
+            (RINEX 2 objects, 0 if blank) or FLAG_BLANK (columnar store).
+    """
+    if isinstance(lli, str):
+        lli = lli.strip()
+        return lli.isdigit() and int(lli) & 1 == 1
+    return lli is not None and lli != FLAG_BLANK and lli & 1 == 1
+
+
+class QualityAccumulator:
+    """Single pass quality statistics of epochs streamed from a reader.
+
+    Epochs are counted as they are read and dropped, the state does not
+    grow with the number of epochs: the gap search keeps the last valid
+    epoch and the gaps found, satellites keep their counters. Without a
+    header interval the most common step of the first
+    STREAM_INTERVAL_EPOCHS valid epochs is the interval. Valid epochs
+    which are not later than the last one are ignored.
+
+    Attributes:
+        reader: RinexObsReader streaming the epochs, header read.
+        validity: Epoch validity criteria.
+        interval: Nominal epoch interval, None until known.
+        pending: Valid epoch times waiting for the interval.
+        epochs_read: Number of epochs read.
+        epochs_valid: Number of valid epochs passed to the gap search.
+        first: Time of the first valid epoch.
+        last: Time of the last valid epoch.
+        gap_begin: Time of the last epoch before each gap.
+        gap_end: Time of the first epoch after each gap.
+        system_epochs: Epochs meeting the validity rule of each system.
+        sat_epochs: Epochs of each satellite.
+        observations: Observations per obs code of each satellite.
+        lost_lock: Observations with lost lock (LLI bit 0) per obs code
+            of each satellite.
+    """
+
+    __slots__ = (
+        "reader",
+        "validity",
+        "interval",
+        "pending",
+        "epochs_read",
+        "epochs_valid",
+        "first",
+        "last",
+        "gap_begin",
+        "gap_end",
+        "system_epochs",
+        "sat_epochs",
+        "observations",
+        "lost_lock",
+    )
+
+    def __init__(self, reader, validity: EpochValidity) -> None:
+        self.reader = reader
+        self.validity = validity
+        self.interval: Optional[float] = reader.header.interval or None
+        self.pending: List[float] = []
+        self.epochs_read = 0
+        self.epochs_valid = 0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.gap_begin: List[float] = []
+        self.gap_end: List[float] = []
+        self.system_epochs = dict.fromkeys(validity.rules, 0)
+        self.sat_epochs: Dict[str, int] = collections.Counter()
+        self.observations: Dict[str, collections.Counter] = collections.defaultdict(
+            collections.Counter
+        )
+        self.lost_lock: Dict[str, collections.Counter] = collections.defaultdict(
+            collections.Counter
+        )
+
+    def add_epoch(self, epoch: RinexEpoch) -> None:
+        """Count an epoch object."""
+        self.epochs_read += 1
+        counts = dict.fromkeys(self.validity.rules, 0)
+        for satellite in epoch.satellites:
+            sat_id = satellite.id
+            codes = []
+            for obs in satellite.observations:
+                if is_present(obs.value):
+                    codes.append(obs.code)
+                    if is_lost_lock(obs.lli):
+                        self.lost_lock[sat_id][obs.code] += 1
+            self.sat_epochs[sat_id] += 1
+            self.observations[sat_id].update(codes)
+            if sat_id[:1] in counts and self.validity.carries(sat_id[0], codes):
+                counts[sat_id[0]] += 1
+        valid = True
+        for sat_sys, (minimum, _) in self.validity.rules.items():
+            if counts[sat_sys] >= minimum:
+                self.system_epochs[sat_sys] += 1
+            else:
+                valid = False
+        if valid:
+            self.add_valid_times([epoch.timestamp])
+
+    def add_store(self, store: ObsStore) -> None:
+        """Count the epochs of a columnar block with array reductions."""
+        n = len(store)
+        self.epochs_read += n
+        counts = self.validity.store_counts(store)
+        for sat_sys, (minimum, _) in self.validity.rules.items():
+            if np is not None:
+                self.system_epochs[sat_sys] += int(np.count_nonzero(counts[sat_sys] >= minimum))
+            else:
+                self.system_epochs[sat_sys] += sum(c >= minimum for c in counts[sat_sys])
+        valid = self.validity.counts_mask(counts, n)
+        if np is not None:
+            self.add_valid_times(np.asarray(store.timestamps)[valid])
+        else:
+            self.add_valid_times(list(itertools.compress(store.timestamps, valid)))
+        for sat_sys, columns in store.systems.items():
+            if len(columns):
+                self.add_columns(columns)
+
+    def add_columns(self, columns: Any) -> None:
+        """Count the satellite records of the SystemColumns of one system."""
+        sat_sys = columns.sat_sys
+        if np is None:
+            for row, prn in enumerate(columns.prns):
+                sat_id = f"{sat_sys}{prn:02d}"
+                self.sat_epochs[sat_id] += 1
+                for k, code in enumerate(columns.obs_types):
+                    if not math.isnan(columns.values[k][row]):
+                        self.observations[sat_id][code] += 1
+                        if is_lost_lock(columns.lli[k][row]):
+                            self.lost_lock[sat_id][code] += 1
+            return
+        prns = np.asarray(columns.prns)
+        for prn, count in self.prn_counts(prns):
+            self.sat_epochs[f"{sat_sys}{prn:02d}"] += count
+        for k, code in enumerate(columns.obs_types):
+            present = ~np.isnan(np.asarray(columns.values[k]))
+            for prn, count in self.prn_counts(prns[present]):
+                self.observations[f"{sat_sys}{prn:02d}"][code] += count
+            lli = np.asarray(columns.lli[k])
+            lost = present & (lli != FLAG_BLANK) & (lli & 1 == 1)
+            for prn, count in self.prn_counts(prns[lost]):
+                self.lost_lock[f"{sat_sys}{prn:02d}"][code] += count
+
+    @staticmethod
+    def prn_counts(prns: Any) -> List[Tuple[int, int]]:
+        """Get (prn, count) of the satellite numbers of an array."""
+        counts = np.bincount(prns)
+        return [(int(prn), int(counts[prn])) for prn in np.flatnonzero(counts)]
+
+    def add_valid_times(self, timestamps: Sequence[float]) -> None:
+        """Pass valid epoch times in file order to the gap search."""
+        if self.interval is None:
+            self.pending.extend(float(ts) for ts in timestamps)
+            if len(self.pending) >= STREAM_INTERVAL_EPOCHS:
+                self.flush_pending()
+            return
+        if np is None or not isinstance(timestamps, np.ndarray):
+            for ts in timestamps:
+                self.advance(ts)
+            return
+        ts = np.unique(timestamps)
+        if self.last is not None:
+            ts = ts[ts > self.last]
+        if not len(ts):
+            return
+        if self.last is None:
+            self.first = float(ts[0])
+            times = ts
+        else:
+            times = np.concatenate(([self.last], ts))
+        index = np.flatnonzero(np.diff(times) > self.interval + GAP_TOLERANCE)
+        self.gap_begin.extend(times[index].tolist())
+        self.gap_end.extend(times[index + 1].tolist())
+        self.epochs_valid += len(ts)
+        self.last = float(ts[-1])
+
+    def advance(self, ts: float) -> None:
+        """Pass one valid epoch time to the gap search."""
+        if self.last is None:
+            self.first = ts
+        elif ts <= self.last:
+            return
+        elif ts - self.last > self.interval + GAP_TOLERANCE:
+            self.gap_begin.append(self.last)
+            self.gap_end.append(ts)
+        self.last = ts
+        self.epochs_valid += 1
+
+    def flush_pending(self) -> None:
+        """Fix the interval from the pending epochs and pass them on."""
+        pending = self.pending
+        self.pending = []
+        pending = sorted(set(pending))
+        self.interval = most_common_step(pending) or 1.0
+        self.add_valid_times(pending)
+
+    def gaps(self, gapsize: int = 5) -> EpochGaps:
+        """Get the gaps found so far, at the end of the file the final result."""
+        if self.interval is None:
+            self.flush_pending()
+        return EpochGaps(
+            [],
+            self.interval,
+            gapsize,
+            list(self.gap_begin),
+            list(self.gap_end),
+            epochs_valid=self.epochs_valid,
+            first=self.first,
+            last=self.last,
+        )
+
+    def statistics(self) -> Dict[str, Any]:
+        """Get the counters of systems and satellites.
+
+        Returns:
+            dict: epochs_read, systems with their epochs_valid and
+                satellites with their epochs, observations and lost_lock
+                per obs code.
+        """
+        return {
+            "epochs_read": self.epochs_read,
+            "systems": {
+                sat_sys: {"epochs_valid": count} for sat_sys, count in self.system_epochs.items()
+            },
+            "satellites": {
+                sat_id: {
+                    "epochs": self.sat_epochs[sat_id],
+                    "observations": dict(sorted(self.observations[sat_id].items())),
+                    "lost_lock": dict(sorted(self.lost_lock[sat_id].items())),
+                }
+                for sat_id in sorted(self.sat_epochs)
+            },
+        }
+
+
+def percent(part: int, whole: int) -> float:
+    """Get part of whole in percent, rounded to 0.1, 0 if whole is 0."""
+    return round(100.0 * part / whole, 1) if whole else 0.0
+
+
+class SystemCompleteness:
+    """Counters per satellite and obs code of one satellite system.
+
+    Counters are indexed by satellite number and obs code column, blocks
+    of records are added with array reductions (or a row loop without
+    numpy).
+
+    Attributes:
+        sat_sys: Satellite system identifier.
+        obs_types: Obs codes of the columns.
+        epochs: Epochs per satellite.
+        first: First epoch time per satellite (inf if never seen).
+        last: Last epoch time per satellite (-inf if never seen).
+        present: Observations per satellite and code.
+        lli: Observations with a loss of lock indicator set.
+        lost_lock: Observations with the lost lock bit (LLI bit 0) set.
+        ssi: Histogram of signal strength 0..9 per satellite and code.
+        code_first: First observation time per satellite and code.
+        code_last: Last observation time per satellite and code.
+    """
+
+    __slots__ = (
+        "sat_sys",
+        "obs_types",
+        "epochs",
+        "first",
+        "last",
+        "present",
+        "lli",
+        "lost_lock",
+        "ssi",
+        "code_first",
+        "code_last",
+    )
+
+    def __init__(self, sat_sys: str, obs_types: List[str]) -> None:
+        self.sat_sys = sat_sys
+        self.obs_types = list(obs_types)
+        codes = len(self.obs_types)
+        if np is not None:
+            self.epochs = np.zeros(PRN_SLOTS, dtype=np.int64)
+            self.first = np.full(PRN_SLOTS, np.inf)
+            self.last = np.full(PRN_SLOTS, -np.inf)
+            self.present = np.zeros((PRN_SLOTS, codes), dtype=np.int64)
+            self.lli = np.zeros((PRN_SLOTS, codes), dtype=np.int64)
+            self.lost_lock = np.zeros((PRN_SLOTS, codes), dtype=np.int64)
+            self.ssi = np.zeros((PRN_SLOTS, codes, SSI_VALUES), dtype=np.int64)
+            self.code_first = np.full((PRN_SLOTS, codes), np.inf)
+            self.code_last = np.full((PRN_SLOTS, codes), -np.inf)
+            return
+        self.epochs = [0] * PRN_SLOTS
+        self.first = [math.inf] * PRN_SLOTS
+        self.last = [-math.inf] * PRN_SLOTS
+        self.present = [[0] * codes for _ in range(PRN_SLOTS)]
+        self.lli = [[0] * codes for _ in range(PRN_SLOTS)]
+        self.lost_lock = [[0] * codes for _ in range(PRN_SLOTS)]
+        self.ssi = [[[0] * SSI_VALUES for _ in range(codes)] for _ in range(PRN_SLOTS)]
+        self.code_first = [[math.inf] * codes for _ in range(PRN_SLOTS)]
+        self.code_last = [[-math.inf] * codes for _ in range(PRN_SLOTS)]
+
+    def add_columns(self, columns: Any) -> None:
+        """Add the records of the SystemColumns of this system."""
+        if not len(columns):
+            return
+        if np is None:
+            self._add_rows(columns)
+            return
+        prns = np.asarray(columns.prns).astype(np.intp)
+        ts = np.asarray(columns.timestamps)
+        self.epochs += np.bincount(prns, minlength=PRN_SLOTS)
+        np.minimum.at(self.first, prns, ts)
+        np.maximum.at(self.last, prns, ts)
+        for k in range(len(self.obs_types)):
+            present = ~np.isnan(np.asarray(columns.values[k]))
+            p, t = prns[present], ts[present]
+            self.present[:, k] += np.bincount(p, minlength=PRN_SLOTS)
+            np.minimum.at(self.code_first[:, k], p, t)
+            np.maximum.at(self.code_last[:, k], p, t)
+            lli = np.asarray(columns.lli[k])[present]
+            flagged = (lli != 0) & (lli != FLAG_BLANK)
+            self.lli[:, k] += np.bincount(p[flagged], minlength=PRN_SLOTS)
+            lost = flagged & (lli & 1 == 1)
+            self.lost_lock[:, k] += np.bincount(p[lost], minlength=PRN_SLOTS)
+            ssi = np.asarray(columns.ssi[k])[present].astype(np.intp)
+            known = ssi < SSI_VALUES
+            self.ssi[:, k, :] += np.bincount(
+                p[known] * SSI_VALUES + ssi[known], minlength=PRN_SLOTS * SSI_VALUES
+            ).reshape(PRN_SLOTS, SSI_VALUES)
+
+    def _add_rows(self, columns: Any) -> None:
+        for row, prn in enumerate(columns.prns):
+            ts = columns.timestamps[row]
+            self.epochs[prn] += 1
+            self.first[prn] = min(self.first[prn], ts)
+            self.last[prn] = max(self.last[prn], ts)
+            for k in range(len(self.obs_types)):
+                if math.isnan(columns.values[k][row]):
+                    continue
+                self.present[prn][k] += 1
+                self.code_first[prn][k] = min(self.code_first[prn][k], ts)
+                self.code_last[prn][k] = max(self.code_last[prn][k], ts)
+                lli = columns.lli[k][row]
+                if lli not in (0, FLAG_BLANK):
+                    self.lli[prn][k] += 1
+                    self.lost_lock[prn][k] += lli & 1
+                ssi = columns.ssi[k][row]
+                if ssi < SSI_VALUES:
+                    self.ssi[prn][k][ssi] += 1
+
+    def satellites(self, interval: float) -> Dict[str, Dict[str, Any]]:
+        """Get the summary of each satellite seen.
+
+        The expected observations of a satellite are the epochs of its span
+        from first to last epoch at the interval, for each obs code.
+
+        Args:
+            interval: Nominal epoch interval in seconds.
+
+        Returns:
+            dict: Per satellite id its first, last, epochs, expected and
+                signals with present, expected, completeness (percent),
+                lli, lost_lock, ssi histogram, first and last per obs code.
+        """
+        satellites = {}
+        for prn in range(PRN_SLOTS):
+            epochs = int(self.epochs[prn])
+            if not epochs:
+                continue
+            first, last = float(self.first[prn]), float(self.last[prn])
+            expected = int(round((last - first) / interval)) + 1
+            signals = {}
+            for k, code in enumerate(self.obs_types):
+                present = int(self.present[prn][k])
+                signals[code] = {
+                    "present": present,
+                    "expected": expected,
+                    "completeness": percent(present, expected),
+                    "lli": int(self.lli[prn][k]),
+                    "lost_lock": int(self.lost_lock[prn][k]),
+                    "ssi": [int(count) for count in self.ssi[prn][k]],
+                    "first": ts_to_rinex_datetime(self.code_first[prn][k]) if present else None,
+                    "last": ts_to_rinex_datetime(self.code_last[prn][k]) if present else None,
+                }
+            satellites[f"{self.sat_sys}{prn:02d}"] = {
+                "first": ts_to_rinex_datetime(first),
+                "last": ts_to_rinex_datetime(last),
+                "epochs": epochs,
+                "expected": expected,
+                "signals": signals,
+            }
+        return satellites
+
+
+class SignalCompleteness:
+    """Completeness of the observations per satellite and obs code.
+
+    Like the teqc summary: observations present vs expected, loss of lock
+    indicators, signal strength histogram and first/last observation time
+    for every satellite and obs code. Columnar stores are added with one
+    reduction pass each, so the whole file or its streamed blocks can be
+    added.
+
+    Attributes:
+        interval: Nominal epoch interval, the most common step if None.
+        systems: SystemCompleteness per satellite system.
+        epochs: Number of epochs added.
+        first: Time of the first epoch.
+        last: Time of the last epoch.
+        steps: Epoch steps and their count, to find a missing interval.
+    """
+
+    __slots__ = ("interval", "systems", "epochs", "first", "last", "steps")
+
+    def __init__(self, interval: Optional[float] = None) -> None:
+        self.interval = interval or None
+        self.systems: Dict[str, SystemCompleteness] = {}
+        self.epochs = 0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.steps: Dict[float, int] = collections.Counter()
+
+    def add_store(self, store: ObsStore) -> None:
+        """Add the epochs of a finalized columnar store (or block)."""
+        if not len(store):
+            return
+        if np is not None:
+            ts = np.unique(np.asarray(store.timestamps))
+            steps, counts = np.unique(np.diff(ts), return_counts=True)
+            self.steps.update(dict(zip(steps.tolist(), counts.tolist())))
+        else:
+            ts = sorted(set(store.timestamps))
+            self.steps.update(b - a for a, b in zip(ts, ts[1:]))
+        first, last = float(ts[0]), float(ts[-1])
+        if self.last is not None and first > self.last:
+            self.steps[first - self.last] += 1
+        self.epochs += len(ts)
+        self.first = first if self.first is None else min(self.first, first)
+        self.last = last if self.last is None else max(self.last, last)
+        for sat_sys, columns in store.systems.items():
+            if not len(columns):
+                continue
+            if sat_sys not in self.systems:
+                self.systems[sat_sys] = SystemCompleteness(sat_sys, columns.obs_types)
+            self.systems[sat_sys].add_columns(columns)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the completeness summary.
+
+        Returns:
+            dict: epoch_interval, epochs, epoch_first, epoch_last,
+                satellites (see SystemCompleteness.satellites()) and systems
+                with present, expected and completeness per obs code.
+        """
+        interval = self.interval
+        if interval is None:
+            interval = self.steps.most_common(1)[0][0] if self.steps else 1.0
+        if float(interval).is_integer():
+            interval = int(interval)
+        satellites, systems = {}, {}
+        for sat_sys in sorted(self.systems, key=SAT_SYS_ORDER.find):
+            system = self.systems[sat_sys].satellites(interval)
+            satellites.update(system)
+            totals = {}
+            for code in self.systems[sat_sys].obs_types:
+                present = sum(sat["signals"][code]["present"] for sat in system.values())
+                expected = sum(sat["expected"] for sat in system.values())
+                totals[code] = {
+                    "present": present,
+                    "expected": expected,
+                    "completeness": percent(present, expected),
+                }
+            systems[sat_sys] = totals
+        return {
+            "epoch_interval": interval,
+            "epochs": self.epochs,
+            "epoch_first": ts_to_rinex_datetime(self.first) if self.epochs else None,
+            "epoch_last": ts_to_rinex_datetime(self.last) if self.epochs else None,
+            "satellites": satellites,
+            "systems": systems,
+        }
+
 
 class RinexQuality:
     """Quality assessment and analysis for RINEX observation data.
@@ -32,8 +819,14 @@ class RinexQuality:
         
         Args:
             rinex_format: RINEX format version (2 or 3, default: 3).
+            validity: Epoch validity, EpochValidity or its spec
+                (default: DEFAULT_VALIDITY).
         """
         self.rinex_format = kwargs.get("rinex_format", 3)
+        validity = kwargs.get("validity") or DEFAULT_VALIDITY
+        if not isinstance(validity, EpochValidity):
+            validity = EpochValidity.parse(validity)
+        self.validity = validity
 
     def filter_by_observation_descriptor(
         self,
@@ -74,100 +867,142 @@ class RinexQuality:
 
     def is_valid_epoch(
         self,
-        epoch: RinexEpoch,
-        satellite_systems=["G"],
-        observation_descriptors=["L1", "L2"],
-        satellites=5,
-    ):
+        epoch: Dict[str, Any] | RinexEpoch,
+        satellite_systems: List[str] | None = None,
+        observation_descriptors: List[str] | None = None,
+        satellites: int | None = None,
+    ) -> bool:
         """Check if epoch meets validity criteria.
         
-        Default criteria:
-        - Contains GPS satellite system
-        - Contains L1 and L2 observations
-        - At least 5 satellites within each system
+        Default criteria are the validity of this instance, e.g. 5 GPS
+        satellites with L1 and L2 observations. Given criteria apply to
+        each listed system.
         
         Args:
             epoch: Epoch data dictionary or RinexEpoch object containing satellites.
-            satellite_systems: List of required satellite systems (default: ["G"]).
-            observation_descriptors: List of required observations (default: ["L1", "L2"]).
-            satellites: Minimum number of satellites required (default: 5).
+            satellite_systems: List of required satellite systems.
+            observation_descriptors: List of required observations (e.g. ["L1", "L2"]).
+            satellites: Minimum number of satellites required in each system.
             
         Returns:
             bool: True if epoch meets all criteria, False otherwise.
         """
+        validity = self.validity
+        if satellite_systems or observation_descriptors or satellites is not None:
+            rules = {}
+            for sat_sys in satellite_systems or list(validity.rules):
+                minimum, descriptors = validity.rules.get(sat_sys, (5, ["L1", "L2"]))
+                rules[sat_sys] = (
+                    minimum if satellites is None else satellites,
+                    list(observation_descriptors or descriptors),
+                )
+            validity = EpochValidity(rules)
+        if isinstance(epoch, dict):
+            return validity.is_valid(epoch.get("satellites", []))
+        return validity.is_valid(epoch.satellites)
+
+    def valid_epochs(self, reader) -> Sequence[bool]:
+        """Get the validity of each epoch of a reader.
         
-    @staticmethod
-    def _build_datadict_from_reader(reader) -> Dict[str, Any]:
-        """Build datadict structure from reader's rinex_epochs.
+        Columnar readers are checked with one counting pass over the
+        store, see EpochValidity.store_counts().
         
         Args:
-            reader: RinexObsReader instance with rinex_epochs.
+            reader: RinexObsReader instance with read epochs.
             
         Returns:
-            dict: Datadict structure compatible with quality methods.
-        """
-        from rinex_parser import constants as cc
-        
-        datadict = {
-            "epochs": [],
-            "fileName": reader.rinex_obs_file,
-            "year4": getattr(reader, 'year', 0),
-            "doy": getattr(reader, 'doy', 0),
-            "markerName": getattr(reader, 'station', reader.header.marker_name),
-            "epochInterval": reader.header.interval,
-            "epochFirst": None,
-            "epochLast": None
-        }
+            Sequence[bool]: Validity mask in epoch order.
+        """
+        if getattr(reader, "obs_store", None) is not None:
+            return self.validity.store_mask(reader.obs_store)
+        return self.validity.epoch_mask(reader.rinex_epochs)
+
+    def accumulate(self, reader, columnar: Optional[bool] = None) -> QualityAccumulator:
+        """Read the epochs of a reader once into a QualityAccumulator.
         
-        # Add epochPeriod for RINEX 3
-        if hasattr(reader, 'file_period'):
-            datadict["epochPeriod"] = reader.file_period
-        else:
-            datadict["epochPeriod"] = "01D"
-        
-        # Convert rinex_epochs to dict format
-        for epoch in reader.rinex_epochs:
-            # Convert Satellite objects to dicts
-            satellites = []
-            for sat in epoch.satellites:
-                if hasattr(sat, 'id'):
-                    # It's a Satellite object with observations as a list
-                    obs_dict = {}
-                    if isinstance(sat.observations, list):
-                        # observations is a list of Observation objects
-                        for obs_obj in sat.observations:
-                            if hasattr(obs_obj, 'code') and hasattr(obs_obj, 'value'):
-                                obs_dict[obs_obj.code] = obs_obj.value
-                    elif isinstance(sat.observations, dict):
-                        # observations is already a dict
-                        for obs_code, obs_obj in sat.observations.items():
-                            if hasattr(obs_obj, 'value'):
-                                obs_dict[obs_code] = obs_obj.value
-                            else:
-                                obs_dict[obs_code] = obs_obj
-                    
-                    sat_dict = {
-                        "id": sat.id,
-                        "observations": obs_dict
-                    }
-                    satellites.append(sat_dict)
-                else:
-                    # Assume it's already a dict
-                    satellites.append(sat)
-            
-            epoch_dict = {
-                "id": epoch.timestamp.strftime(cc.RNX_FORMAT_DATETIME),
-                "satellites": satellites
-            }
-            datadict["epochs"].append(epoch_dict)
+        Epochs are streamed and dropped after counting, in columnar mode
+        as blocks (see RinexObsReader.iter_store_blocks()), otherwise as
+        objects. The accumulator replaces the reader in the report methods,
+        e.g. get_rinstat_as_dict(quality.accumulate(reader)).
         
-        # Set first/last
-        if datadict["epochs"]:
-            datadict["epochFirst"] = datadict["epochs"][0]["id"]
-            datadict["epochLast"] = datadict["epochs"][-1]["id"]
+        Args:
+            reader: RinexObsReader instance with read header.
+            columnar: Stream columnar blocks (default: reader.columnar).
+            
+        Returns:
+            QualityAccumulator: Counted epochs of the reader.
+        """
+        accumulator = QualityAccumulator(reader, self.validity)
+        if reader.columnar if columnar is None else columnar:
+            for store in reader.iter_store_blocks():
+                accumulator.add_store(store)
+        else:
+            for epoch in reader.iter_epochs():
+                accumulator.add_epoch(epoch)
+        return accumulator
+
+    @staticmethod
+    def reader_timestamps(reader) -> Sequence[float]:
+        """Get the epoch times of a reader, from its columnar store if it has one.
         
-        return datadict
-      
+        Args:
+            reader: RinexObsReader instance with read epochs.
+            
+        Returns:
+            Sequence[float]: Epoch times in POSIX seconds.
+        """
+        if getattr(reader, "obs_store", None) is not None:
+            return reader.obs_store.timestamps
+        return [epoch.timestamp for epoch in reader.rinex_epochs]
+
+    @staticmethod
+    def reader_store(reader) -> ObsStore:
+        """Get the columnar store of a reader.
+
+        A reader without columnar store is streamed in blocks (see
+        RinexObsReader.iter_store_blocks()), which are joined.
+
+        Args:
+            reader: RinexObsReader instance, its header must be read.
+
+        Returns:
+            ObsStore: Finalized store of all epochs.
+
+        Raises:
+            ValueError: If the reader has no epochs.
+        """
+        store = getattr(reader, "obs_store", None)
+        if store is None:
+            store = ObsStore.concatenate(
+                reader.store_obs_types(),
+                reader.header.rcv_clock_offset,
+                [block.to_arrays() for block in reader.iter_store_blocks()],
+            )
+        if not len(store):
+            raise ValueError("No epochs for the report")
+        return store
+
+    def combination_report(self, reader, store: ObsStore) -> Dict[str, Any]:
+        """Get the report head of the combinations of a store.
+
+        Returns:
+            dict: filename, station, epoch_first and epoch_last.
+        """
+        return {
+            "filename": os.path.basename(reader.rinex_obs_file),
+            "station": getattr(reader, "station", "") or reader.header.marker_name,
+            "epoch_first": ts_to_rinex_datetime(float(store.timestamps[0])),
+            "epoch_last": ts_to_rinex_datetime(float(store.timestamps[-1])),
+        }
+
+    @staticmethod
+    def datadict_timestamps(datadict: Dict[str, Any]) -> List[float]:
+        """Get the epoch times of a legacy datadict."""
+        return [
+            calendar.timegm(time.strptime(epoch["id"], cc.RNX_FORMAT_DATETIME))
+            for epoch in datadict["epochs"]
+        ]
+
     def is_valid_epoch_legacy(
         self,
         epoch: Dict[str, Any] | RinexEpoch,
@@ -241,118 +1076,103 @@ class RinexQuality:
     def do_prepare_datadict(self, reader_or_datadict, gapsize: int = 5):
         """Prepare and analyze epoch data for quality reporting.
         
-        Processes epochs, identifies gaps, and computes quality metrics.
+        Works on the epoch times of the reader (or its columnar store), gaps
+        between the valid epochs are found with find_epoch_gaps(). The gaps
+        of a QualityAccumulator were found while reading.
         
         Args:
-            reader_or_datadict: RinexObsReader instance or legacy datadict.
+            reader_or_datadict: RinexObsReader instance, QualityAccumulator
+                (see accumulate()) or legacy datadict.
             gapsize: Minimum gap size in epochs to report.
             
         Returns:
             dict: Quality analysis data with gap information.
         """
-        # Support both reader objects and legacy datadict
-        if hasattr(reader_or_datadict, 'rinex_epochs'):
-            datadict = self._build_datadict_from_reader(reader_or_datadict)
+        accumulator = None
+        if isinstance(reader_or_datadict, QualityAccumulator):
+            accumulator = reader_or_datadict
+            reader_or_datadict = accumulator.reader
+        if hasattr(reader_or_datadict, "rinex_epochs"):
+            reader = reader_or_datadict
+            timestamps = self.reader_timestamps(reader) if accumulator is None else []
+            header = reader.header
+            file_name = reader.rinex_obs_file
+            station = getattr(reader, "station", "") or header.marker_name
+            year4 = getattr(reader, "year", 0)
+            doy = getattr(reader, "doy", 0)
+            period = getattr(reader, "file_period", "") or "01D"
+            interval = header.interval
+            valid = self.valid_epochs(reader) if len(timestamps) else None
         else:
             datadict = reader_or_datadict
-        
-        if not datadict.get("epochs"):
+            timestamps = self.datadict_timestamps(datadict) if datadict.get("epochs") else []
+            file_name = datadict["fileName"]
+            station = datadict["markerName"]
+            year4 = datadict.get("year4", 0)
+            doy = datadict.get("doy", 0)
+            period = datadict.get("epochPeriod", "01D")
+            interval = datadict.get("epochInterval")
+            valid = [self.is_valid_epoch(epoch) for epoch in datadict.get("epochs", [])]
+
+        if accumulator is not None:
+            gaps = accumulator.gaps(gapsize) if accumulator.epochs_read else None
+        elif len(timestamps):
+            gaps = find_epoch_gaps(timestamps, interval, gapsize, valid)
+        else:
+            gaps = None
+        if gaps is None:
             logger.warning("No Epoch parsed")
             return {}
+        if not gaps.epochs_valid:
+            logger.warning(f"No valid epoch ({self.validity})")
+            return {}
+        interval = gaps.interval
+        if float(interval).is_integer():
+            interval = int(interval)
+        first, last = gaps.first, gaps.last
 
-        # Set first/last epoch times if missing
-        for zeitpunkt in ["epochFirst", "epochLast"]:
-            if zeitpunkt not in datadict or datadict.get(zeitpunkt) is None:
-                datadict[zeitpunkt] = datetime.datetime.now().strftime(cc.RNX_FORMAT_DATETIME)
-        
-        dt0 = datetime.datetime.strptime(
-            f"{datadict['year4']}-{datadict['doy']:03d}",
-            "%Y-%j"
-        )
-
-        if "epochPeriod" not in datadict:
-            datadict["epochPeriod"] = "01D"  # Daily files as default
-
-        period_count = int(datadict["epochPeriod"][:2])
-        period_unit = datadict["epochPeriod"][-1]
+        if year4 and doy:
+            dt0 = datetime.datetime.strptime(f"{year4}-{doy:03d}", "%Y-%j")
+        else:
+            # No date in the file name, the day of the first epoch
+            dt0 = datetime.datetime.strptime(ts_to_rinex_datetime(first, "%Y-%j"), "%Y-%j")
 
         period_seconds = int(
-            self.RINEX_PERIOD_UNITS[period_unit]
-            * period_count
-            / datadict["epochInterval"]
+            self.RINEX_PERIOD_UNITS[period[-1]] * int(period[:2]) / interval
         )
 
         chkdoy = {
-            "filename": os.path.basename(datadict["fileName"]),
-            "station": datadict["markerName"],
-            "year": datadict["year4"],
-            "doy": datadict["doy"],
+            "filename": os.path.basename(file_name),
+            "station": station,
+            "year": dt0.year,
+            "doy": int(dt0.strftime("%j")),
             "dom": dt0.day,
             "month": dt0.month,
             "gaps": [],
-            "epoch_interval": int(datadict["epochInterval"]),
-            "epochs_valid": 0,
-            "epochs_max": int(period_seconds),
-            "epochs_missing": 0,
-            "epoch_first": datadict["epochFirst"],
-            "epoch_last": datadict["epochLast"],
+            "epoch_interval": interval,
+            "epochs_valid": gaps.epochs_valid,
+            "epochs_max": period_seconds,
+            "epochs_missing": max(0, period_seconds - gaps.epochs_valid),
+            "epoch_first": ts_to_rinex_datetime(first),
+            "epoch_last": ts_to_rinex_datetime(last),
         }
 
-        dt_epoch_first = datetime.datetime.strptime(
-            chkdoy["epoch_first"],
-            cc.RNX_FORMAT_DATETIME
-        )
-        dt_epoch_last = datetime.datetime.strptime(
-            chkdoy["epoch_last"],
-            cc.RNX_FORMAT_DATETIME
-        )
-        total_seconds = int((dt_epoch_last - dt_epoch_first).total_seconds())
-
-        # Filter valid epochs
-        epoch_valid = []
-        for epoch in datadict["epochs"]:
-            if not self.is_valid_epoch(epoch):
-                continue
-            if epoch["id"] not in epoch_valid:
-                epoch_valid.append(epoch["id"])
-
-        chkdoy["epochs_valid"] = len(epoch_valid)
-        
-        # Sort and deduplicate epochs
-        epochs = []
-        for epoch in epoch_valid:
-            temp_utc = self.get_datetime_utc(epoch_str=epoch)
-            if temp_utc not in epochs:
-                epochs.append(temp_utc)
-        epochs = sorted(epochs)
-
-        # Detect gaps between epochs
-        gaps_less = 0
-        gaps_more = 0
-        for i in range(len(epochs) - 1):
-            epoch_delta = int((epochs[i + 1] - epochs[i]).total_seconds())
-            if epoch_delta > chkdoy["epoch_interval"]:
-                chkdoy["gaps"].append({
-                    "gap_begin": epochs[i].strftime(cc.RNX_FORMAT_DATETIME),
-                    "gap_end": epochs[i + 1].strftime(cc.RNX_FORMAT_DATETIME),
-                    "gap_epoch_count": epoch_delta / chkdoy["epoch_interval"],
-                    "gap_duration": epoch_delta,
-                })
-
-                if epoch_delta <= gapsize * chkdoy["epoch_interval"]:
-                    gaps_less += 1
-                else:
-                    gaps_more += 1
+        for gap_begin, gap_end in zip(gaps.gap_begin, gaps.gap_end):
+            epoch_delta = int(round(gap_end - gap_begin))
+            chkdoy["gaps"].append({
+                "gap_begin": ts_to_rinex_datetime(gap_begin),
+                "gap_end": ts_to_rinex_datetime(gap_end),
+                "gap_epoch_count": epoch_delta / interval,
+                "gap_duration": epoch_delta,
+            })
 
         chkdoy.update(
             {
-                "gaps_less": gaps_less,
-                "gaps_more": gaps_more,
+                "gaps_less": gaps.gaps_less,
+                "gaps_more": gaps.gaps_more,
                 "gapsize": gapsize,
                 "date": dt0.strftime(cc.RNX_FORMAT_DATE),
-                "epoch_first": dt_epoch_first.strftime(cc.RNX_FORMAT_DATETIME),
-                "epoch_last": dt_epoch_last.strftime(cc.RNX_FORMAT_DATETIME),
-                "total_secs": int(total_seconds),
+                "total_secs": int(last - first),
             }
         )
 
@@ -372,13 +1192,9 @@ class RinexQuality:
         Returns:
             list: List of availability windows with time/station information.
         """
-        # Support both reader objects and legacy datadict
-        if hasattr(reader_or_datadict, 'rinex_epochs'):
-            datadict = self._build_datadict_from_reader(reader_or_datadict)
-        else:
-            datadict = reader_or_datadict
-        
-        chkdoy = self.do_prepare_datadict(datadict, gapsize)
+        chkdoy = self.do_prepare_datadict(reader_or_datadict, gapsize)
+        if not chkdoy:
+            raise ValueError("No valid epochs for the report")
         rinex_v = []
         d = {
             "date": chkdoy["date"],
@@ -485,19 +1301,19 @@ class RinexQuality:
         """Get RINEX statistics as a dictionary.
         
         Args:
-            reader_or_datadict: RinexObsReader instance or legacy datadict.
+            reader_or_datadict: RinexObsReader instance, QualityAccumulator
+                or legacy datadict.
             gapsize: Minimum gap size in epochs (default: 5).
             
         Returns:
-            dict: Statistics dictionary with gap details.
+            dict: Statistics dictionary with gap details, with the
+                QualityAccumulator.statistics() of an accumulator.
         """
-        # Support both reader objects and legacy datadict
-        if hasattr(reader_or_datadict, 'rinex_epochs'):
-            datadict = self._build_datadict_from_reader(reader_or_datadict)
-        else:
-            datadict = reader_or_datadict
-        
-        chkdoy = self.do_prepare_datadict(datadict, gapsize)
+        chkdoy = self.do_prepare_datadict(reader_or_datadict, gapsize)
+        if not chkdoy:
+            raise ValueError("No valid epochs for the report")
+        if isinstance(reader_or_datadict, QualityAccumulator):
+            chkdoy.update(reader_or_datadict.statistics())
         chkdoy["gaps_count"] = len(chkdoy["gaps"])
         chkdoy["epoch_first"] = datetime.datetime.strptime(
             chkdoy["epoch_first"],
@@ -570,6 +1386,210 @@ class RinexQuality:
         chkdoy = self.get_rinstat_as_dict(reader_or_datadict, gapsize)
         return self.get_rinstat_as_str(chkdoy)
 
+    def get_completeness_as_dict(self, reader) -> Dict[str, Any]:
+        """Get the completeness per satellite and obs code of a reader.
+        
+        A columnar store of the reader is reduced in one pass. Otherwise
+        the file of the reader is streamed in columnar blocks (see
+        RinexObsReader.iter_store_blocks()), its header must be read.
+        
+        Args:
+            reader: RinexObsReader instance.
+            
+        Returns:
+            dict: filename, station and SignalCompleteness.to_dict().
+        """
+        completeness = SignalCompleteness(reader.header.interval)
+        if getattr(reader, "obs_store", None) is not None:
+            completeness.add_store(reader.obs_store)
+        else:
+            for store in reader.iter_store_blocks():
+                completeness.add_store(store)
+        if not completeness.epochs:
+            raise ValueError("No epochs for the report")
+        return {
+            "filename": os.path.basename(reader.rinex_obs_file),
+            "station": getattr(reader, "station", "") or reader.header.marker_name,
+            **completeness.to_dict(),
+        }
+
+    def get_completeness_as_str(self, completeness_dict: Dict[str, Any]) -> str:
+        """Format the completeness dictionary as a report string.
+        
+        Args:
+            completeness_dict: Result of get_completeness_as_dict().
+            
+        Returns:
+            str: One line per satellite and obs code, then per system and obs code.
+        """
+        lines = [
+            "+++ >>>   {filename}".format(**completeness_dict),
+            "+++ SIG.SUM   {station}   {epoch_first} - {epoch_last}   "
+            "{epoch_interval} s   {epochs} e".format(**completeness_dict),
+            "+++ SAT  OBS   #expt   #have  %have    #lli   #lost   first - last",
+        ]
+        for sat_id, satellite in completeness_dict["satellites"].items():
+            for code, signal in satellite["signals"].items():
+                span = "-"
+                if signal["present"]:
+                    span = f"{signal['first'][11:]} - {signal['last'][11:]}"
+                lines.append(
+                    f"    {sat_id}  {code:3s} {signal['expected']:7d} {signal['present']:7d} "
+                    f"{signal['completeness']:6.1f} {signal['lli']:7d} "
+                    f"{signal['lost_lock']:7d}   {span}"
+                )
+        lines.append("+++ SYS  OBS   #expt   #have  %have")
+        for sat_sys, codes in completeness_dict["systems"].items():
+            for code, total in codes.items():
+                lines.append(
+                    f"    {sat_sys}    {code:3s} {total['expected']:7d} {total['present']:7d} "
+                    f"{total['completeness']:6.1f}"
+                )
+        lines.append("+++ <<<")
+        return "\n".join(lines)
+
+    def get_completeness_out(self, reader) -> str:
+        """Generate the completeness report of a reader.
+        
+        Args:
+            reader: RinexObsReader instance (see get_completeness_as_dict()).
+            
+        Returns:
+            str: Formatted completeness report.
+        """
+        return self.get_completeness_as_str(self.get_completeness_as_dict(reader))
+
+    def get_slips_as_dict(self, reader, **kwargs: Any) -> Dict[str, Any]:
+        """Detect cycle slips per satellite of a reader (see detect_cycle_slips()).
+        
+        Slips are found on the whole series of each satellite, so streamed
+        blocks of a reader without columnar store are joined first (see
+        reader_store()).
+        
+        Args:
+            reader: RinexObsReader instance.
+            glonass_channels: FDMA channel per GLONASS satellite number,
+                taken from the GLONASS SLOT / FRQ # header records if None.
+            
+        Returns:
+            dict: filename, station, epoch_interval, signals per system,
+                satellites with slip times as RINEX datetime strings and
+                slip totals per system.
+        
+        Raises:
+            ImportError: If numpy is not installed.
+            ValueError: If the reader has no epochs.
+        """
+        store = self.reader_store(reader)
+        channels = kwargs.get("glonass_channels")
+        if channels is None:
+            channels = glonass_channels(reader.header)
+        slips = detect_cycle_slips(store, reader.header.interval, channels)
+        systems: Dict[str, Dict[str, int]] = {}
+        for sat_id, satellite in slips["satellites"].items():
+            satellite["slip_epochs"] = [
+                ts_to_rinex_datetime(ts) for ts in satellite["slip_epochs"]
+            ]
+            keys = ("gf", "mw", "lli", "slips")
+            total = systems.setdefault(sat_id[0], {"satellites": 0, **dict.fromkeys(keys, 0)})
+            total["satellites"] += 1
+            for key in keys:
+                total[key] += satellite[key]
+        return {**self.combination_report(reader, store), **slips, "systems": systems}
+
+    def get_slips_as_str(self, slips_dict: Dict[str, Any]) -> str:
+        """Format the cycle slip dictionary as a report string.
+        
+        Args:
+            slips_dict: Result of get_slips_as_dict().
+            
+        Returns:
+            str: One line per satellite with its slip times, then per system.
+        """
+        lines = [
+            "+++ >>>   {filename}".format(**slips_dict),
+            "+++ SLP.SUM   {station}   {epoch_first} - {epoch_last}   "
+            "{epoch_interval} s".format(**slips_dict),
+        ]
+        for sat_sys, signals in slips_dict["signals"].items():
+            lines.append(
+                f"+++ SIG {sat_sys}   {' '.join(signals['phase'])}   {' '.join(signals['code'])}"
+            )
+        lines.append("+++ SAT  #epoch  #arc   #gf   #mw  #lli #slip   slips")
+        for sat_id, satellite in slips_dict["satellites"].items():
+            times = " ".join(ts[11:] for ts in satellite["slip_epochs"])
+            lines.append(
+                f"    {sat_id} {satellite['epochs']:7d} {satellite['arcs']:5d} "
+                f"{satellite['gf']:5d} {satellite['mw']:5d} {satellite['lli']:5d} "
+                f"{satellite['slips']:5d}   {times}".rstrip()
+            )
+        lines.append("+++ SYS    #sat         #gf   #mw  #lli #slip")
+        for sat_sys, total in slips_dict["systems"].items():
+            lines.append(
+                f"    {sat_sys}   {total['satellites']:5d}       {total['gf']:5d} "
+                f"{total['mw']:5d} {total['lli']:5d} {total['slips']:5d}"
+            )
+        lines.append("+++ <<<")
+        return "\n".join(lines)
+
+    def get_multipath_as_dict(self, reader, **kwargs: Any) -> Dict[str, Any]:
+        """Compute the code multipath per satellite and code of a reader (see code_multipath()).
+
+        Args:
+            reader: RinexObsReader instance, see reader_store().
+            glonass_channels: FDMA channel per GLONASS satellite number,
+                taken from the GLONASS SLOT / FRQ # header records if None.
+
+        Returns:
+            dict: filename, station, epoch_first, epoch_last and the
+                multipath RMS per satellite, per system and overall.
+
+        Raises:
+            ImportError: If numpy is not installed.
+            ValueError: If the reader has no epochs.
+        """
+        store = self.reader_store(reader)
+        channels = kwargs.get("glonass_channels")
+        if channels is None:
+            channels = glonass_channels(reader.header)
+        multipath = code_multipath(store, reader.header.interval, channels)
+        return {**self.combination_report(reader, store), **multipath}
+
+    def get_multipath_as_str(self, multipath_dict: Dict[str, Any]) -> str:
+        """Format the code multipath dictionary as a report string.
+
+        Args:
+            multipath_dict: Result of get_multipath_as_dict().
+
+        Returns:
+            str: One line per satellite and code, then per system and code
+                with its phases and the overall RMS.
+        """
+        lines = [
+            "+++ >>>   {filename}".format(**multipath_dict),
+            "+++ MP.SUM   {station}   {epoch_first} - {epoch_last}   "
+            "{epoch_interval} s".format(**multipath_dict),
+            "+++ SAT  OBS     #samp  #arc  rms[m]",
+        ]
+        for sat_id, signals in multipath_dict["satellites"].items():
+            for code, signal in signals.items():
+                lines.append(
+                    f"    {sat_id}  {code:3s} {signal['samples']:9d} {signal['arcs']:5d} "
+                    f"{signal['rms']:7.4f}"
+                )
+        lines.append("+++ SYS  OBS     #samp  #sat  rms[m]   phases")
+        for sat_sys, codes in multipath_dict["systems"].items():
+            for code, total in codes.items():
+                lines.append(
+                    f"    {sat_sys}    {code:3s} {total['samples']:9d} {total['satellites']:5d} "
+                    f"{total['rms']:7.4f}   {'-'.join(total['phase'])}"
+                )
+        overall = multipath_dict["overall"]
+        if overall["samples"]:
+            lines.append(f"+++ ALL       {overall['samples']:9d}       {overall['rms']:7.4f}")
+        lines.append("+++ <<<")
+        return "\n".join(lines)
+
     def to_json(self, rinstat_dict: Dict[str, Any]) -> str:
         """Convert RINEX statistics dictionary to JSON string.
         
@@ -580,4 +1600,5 @@ class RinexQuality:
             str: JSON-formatted statistics report.
         """
         import json
-        return json.dumps(rinstat_dict, indent=None)
+        # Gap times of gaps_prepared are datetimes
+        return json.dumps(rinstat_dict, indent=None, default=str)
@@ -4,20 +4,26 @@ Created on Oct 25, 2016
 Author: jurgen
 """
 
+import concurrent.futures
+import contextlib
 import datetime
+import io
+import mmap
 import os
 import re
 import traceback
 from io import StringIO
-from typing import Any, Dict, List
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, TextIO, Tuple
 from rinex_parser import constants as cc
 from rinex_parser.logger import logger
 from rinex_parser.obs_header import (
     Rinex2ObsHeader,
     Rinex3ObsHeader,
     RinexObsHeader,
+    parse_keep_obs,
 )
 from rinex_parser.obs_epoch import (
+    LazySatellite,
     RinexEpoch,
     Satellite,
     Observation,
@@ -28,9 +34,206 @@ from rinex_parser.obs_epoch import (
     ts_to_second_of_day,
     ts_to_datetime,
 )
+from rinex_parser.obs_decoder import (
+    ASCII_EPOCH,
+    ASCII_NEWLINE,
+    ASCII_RETURN,
+    ASCII_SPACE,
+    ASCII_ZERO,
+    FIELD_WIDTH,
+    RINEX2_LINE_WIDTH,
+    RINEX2_SATS_PER_LINE,
+    SAT_ID_WIDTH,
+    VALUE_WIDTH,
+    RecordBlock,
+    decode_epoch_line,
+    decode_epoch_line_rinex2,
+    decode_matrix,
+    decoded_width,
+    record_matrix,
+    rinex2_record,
+    rinex2_record_lines,
+    rinex2_sat_ids,
+)
+from rinex_parser.compression import (
+    is_compressed,
+    open_binary,
+    open_text,
+    strip_compression_suffix,
+)
+from rinex_parser.hatanaka import CrinexEncoder
+from rinex_parser.obs_index import EpochIndex
+from rinex_parser.obs_store import SAT_SYS_ORDER, ObsStore, RinexEpochView, has_numpy, np
+from rinex_parser.obs_writer import iter_rinex3_batches, write_rinex3_epochs
 
 __updated__ = "2016-11-16"
 
+# Files of at least this size are read through mmap by default
+MMAP_THRESHOLD = 8 * 1024 * 1024
+# Bytes of whole epochs decoded at once on the mmap path
+MMAP_CHUNK_SIZE = 4 * 1024 * 1024
+# Minimum bytes of epoch data handed to one worker process
+WORKER_CHUNK_SIZE = 4 * MMAP_CHUNK_SIZE
+# Contiguous passthrough bytes copied by the kernel instead of read and written
+COPY_THRESHOLD = 64 * 1024
+# Reader attributes a worker process needs to decode a part of the body
+WORKER_STATE = (
+    "rinex_obs_file",
+    "interval_filter",
+    "crop_beg",
+    "crop_end",
+    "filter_sat_sys",
+    "filter_sat_pnr",
+    "filter_sat_obs",
+    "obs_fields",
+)
+
+
+def open_rinex_obs(rinex_file: str) -> Tuple[TextIO, int]:
+    """Open a RINEX observation file and sniff its major version.
+
+    The first line is peeked from the read buffer, the returned handler is
+    still positioned at the start of the file. Header and body can then be
+    read from it without opening the file again. Compressed files are
+    decompressed transparently (see compression).
+
+    Args:
+        rinex_file: Path to the RINEX observation file.
+
+    Returns:
+        tuple: (text handler, RINEX major version)
+
+    Raises:
+        ValueError: If the first line holds no RINEX version.
+    """
+    raw = open_binary(rinex_file)
+    try:
+        first_line = raw.peek(80)[:80].split(b"\n", 1)[0]
+        rinex_version = int(float(first_line[:9]))
+    except ValueError:
+        raw.close()
+        raise ValueError(f"No RINEX version in first line of {rinex_file}")
+    return io.TextIOWrapper(raw), rinex_version
+
+
+def split_byte_ranges(
+    mm: mmap.mmap, ranges: List[Tuple[int, int]], parts: int
+) -> List[List[Tuple[int, int]]]:
+    """Split byte ranges of epoch data into parts of similar size.
+
+    Ranges are only cut in front of an epoch line ('>' at line start).
+
+    Args:
+        mm: Memory map of a RINEX 3 file.
+        ranges: Ascending (start, end) ranges, each starting at an epoch line.
+        parts: Wanted number of parts.
+
+    Returns:
+        list: Ranges of each non-empty part, in file order.
+    """
+    part_size = max(sum(end - start for start, end in ranges) // parts, 1)
+    result, current, current_size = [], [], 0
+    for start, end in ranges:
+        pos = start
+        while pos < end:
+            stop = mm.find(b"\n>", pos + part_size - current_size - 1, end)
+            stop = end if stop < 0 else stop + 1
+            current.append((pos, stop))
+            current_size += stop - pos
+            pos = stop
+            if current_size >= part_size:
+                result.append(current)
+                current, current_size = [], 0
+    if current:
+        result.append(current)
+    return result
+
+
+def copy_byte_range(src_fd: int, handler: BinaryIO, start: int, end: int) -> None:
+    """Append bytes start:end of a file descriptor to a binary handler.
+
+    Ranges of at least COPY_THRESHOLD bytes are copied with
+    os.copy_file_range() or os.sendfile() if handler has a file descriptor,
+    the data then never enters user space. Otherwise, or if the kernel
+    refuses, the bytes are read and written.
+
+    Args:
+        src_fd: Readable file descriptor of the source file.
+        handler: Binary output handler, positioned at its end.
+        start: First byte to copy.
+        end: End offset of the range.
+    """
+    try:
+        dst_fd = handler.fileno() if end - start >= COPY_THRESHOLD else None
+    except (AttributeError, io.UnsupportedOperation):
+        dst_fd = None
+    if dst_fd is not None:
+        handler.flush()
+        try:
+            while start < end:
+                if hasattr(os, "copy_file_range"):
+                    copied = os.copy_file_range(src_fd, dst_fd, end - start, start)
+                else:
+                    copied = os.sendfile(dst_fd, src_fd, start, end - start)
+                if copied == 0:
+                    break
+                start += copied
+        except OSError as err:
+            logger.debug(f"Kernel copy failed, copying through user space: {err}")
+        # Resync the buffered handler with the advanced file position
+        handler.seek(os.lseek(dst_fd, 0, os.SEEK_CUR))
+    while start < end:
+        data = os.pread(src_fd, min(end - start, MMAP_CHUNK_SIZE), start)
+        if not data:
+            raise ValueError(f"Source file shorter than passthrough range ({start})")
+        handler.write(data)
+        start += len(data)
+
+
+def split_lines(data) -> tuple:
+    """Locate the lines of a byte buffer with numpy.
+
+    Args:
+        data: uint8 array.
+
+    Returns:
+        tuple: Start offsets, end offsets and lengths without line break
+            (CR LF or LF) of all lines as arrays.
+    """
+    newlines = np.flatnonzero(data == ASCII_NEWLINE)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(data)]))
+    if starts[-1] == len(data):
+        starts, ends = starts[:-1], ends[:-1]
+    lengths = ends - starts
+    lengths -= (lengths > 0) & (data[np.maximum(ends - 1, 0)] == ASCII_RETURN)
+    return starts, ends, lengths
+
+
+def read_ranges_columnar(
+    state: Dict[str, Any], sys_obs_types: Dict[str, List[str]], ranges: List[Tuple[int, int]]
+) -> tuple:
+    """Decode byte ranges of a RINEX 3 file in a worker process.
+
+    Args:
+        state: Reader attributes listed in WORKER_STATE.
+        sys_obs_types: Observation codes per system of the parsed header.
+        ranges: (start, end) ranges of whole epochs.
+
+    Returns:
+        tuple: Columns of the decoded epochs, see ObsStore.to_arrays().
+    """
+    reader = Rinex3ObsReader()
+    for name, value in state.items():
+        setattr(reader, name, value)
+    reader.obs_store = ObsStore(sys_obs_types)
+    with open(reader.rinex_obs_file, "rb") as handler, mmap.mmap(
+        handler.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        for start, end in ranges:
+            reader.read_mmap_range(mm, start, end)
+    return reader.obs_store.finalize().to_arrays()
+
 
 class RinexObsReader:
     """Base class for reading RINEX observation files.
@@ -43,6 +246,7 @@ class RinexObsReader:
         datadict: Dictionary containing parsed observation epochs.
         rinex_obs_file: Path to the RINEX observation file.
         rinex_epochs: List of RinexEpoch objects parsed from the file.
+        obs_store: Columnar ObsStore, if the reader runs in columnar mode.
     """
 
     RINEX_HEADER_CLASS = RinexObsHeader
@@ -66,7 +270,34 @@ class RinexObsReader:
             rinex_epochs: List of pre-existing RinexEpoch objects (default: []).
             rinex_date: Date for the observations (default: today).
             skip_datadict: Skip building full datadict for performance (default: False).
+            columnar: Read epochs into a columnar ObsStore (default: False).
+            block_size: Epochs per decoded record block in columnar mode (default: 2000).
+            use_index: Seek to selected epochs via an EpochIndex, RINEX 3 only (default: False).
+            persist_index: Store the EpochIndex as sidecar file (default: True).
+            use_mmap: Read through mmap, None to decide by mmap_threshold (default: None).
+            mmap_threshold: Minimum size of uncompressed files read through mmap.
+            workers: Processes decoding parts of large files in columnar mmap
+                mode, RINEX 3 only (default: 1).
+            handler: Open text handler of rinex_obs_file, header and body are
+                read from it instead of opening the file (see open_rinex_obs).
+            keep_obs: Observation codes to keep per system, as dict or
+                "G:C1C,L1C;E:C1C" (see parse_keep_obs), RINEX 3 only.
+            lazy: Create LazySatellite records, decoded on first access,
+                RINEX 3 only (default: False).
+            lazy_cache: Keep observations of lazy records once decoded
+                (default: True).
+            passthrough: Keep the raw text and byte range of epochs read
+                unchanged, which write_rinex3() copies as is. Implies lazy,
+                RINEX 3 only (default: False).
         """
+        self.obs_store: ObsStore | None = None
+        self.columnar: bool = kwargs.get("columnar", False)
+        self.block_size: int = kwargs.get("block_size", 2000)
+        self.use_index: bool = kwargs.get("use_index", False)
+        self.persist_index: bool = kwargs.get("persist_index", True)
+        self.use_mmap: bool | None = kwargs.get("use_mmap", None)
+        self.mmap_threshold: int = kwargs.get("mmap_threshold", MMAP_THRESHOLD)
+        self.workers: int = kwargs.get("workers", 1)
         self.header: RinexObsHeader = self.RINEX_HEADER_CLASS()
         self.interval_filter = interval_filter
         self.filter_on_read = filter_on_read
@@ -76,6 +307,19 @@ class RinexObsReader:
         self.filter_sat_sys: List[str] = filter_sat_sys.split(",")
         self.filter_sat_pnr: List[str] = filter_sat_pnr.split(",")
         self.filter_sat_obs: List[str] = filter_sat_obs.split(",")
+        self.keep_obs: str | Dict[str, List[str]] = kwargs.get("keep_obs", "")
+        # Original field index of each kept obs type per system (keep_obs)
+        self.obs_fields: Dict[str, List[int]] = {}
+        # (obs type, line offset) of each field decoded per system
+        self.obs_plan: Dict[str, List[Tuple[str, int]]] | None = None
+        self.lazy: bool = kwargs.get("lazy", False)
+        self.lazy_cache: bool = kwargs.get("lazy_cache", True)
+        self.passthrough: bool = kwargs.get("passthrough", False)
+        # Systems whose obs_plan covers all record fields in order
+        self.verbatim_systems: set = set()
+        # Last epoch line and its (start, end) byte range incl. records
+        self.epoch_line: str = ""
+        self.epoch_range: Tuple[int, int] | None = None
         self.sat_stats = {}  # {"G01": {"C1C": 4}, ...}
         self.backup_epochs: List[RinexEpoch] = []
         self.backup_interval: int = 0
@@ -85,6 +329,26 @@ class RinexObsReader:
             "rinex_date", datetime.datetime.now().date()
         )
         self.skip_datadict: bool = kwargs.get("skip_datadict", False)
+        # Open handler of rinex_obs_file shared by header and body reads
+        self.handler: TextIO | None = kwargs.get("handler", None)
+        # Raw header already read from handler
+        self.raw_header: str = ""
+
+    @property
+    def rinex_epochs(self) -> List[RinexEpoch]:
+        """Parsed epochs, a lazy view on obs_store in columnar mode."""
+        if self.obs_store is not None:
+            return self.obs_store.epochs
+        return self._rinex_epochs
+
+    @rinex_epochs.setter
+    def rinex_epochs(self, rinex_epochs: List[RinexEpoch]) -> None:
+        if isinstance(rinex_epochs, RinexEpochView):
+            self.obs_store = rinex_epochs.store
+            self._rinex_epochs = []
+        else:
+            self.obs_store = None
+            self._rinex_epochs = rinex_epochs
 
     @staticmethod
     def get_start_time(file_sequence: str) -> datetime.time:
@@ -203,6 +467,15 @@ class RinexObsReader:
         else:
             return year2 + 1900
 
+    def is_epoch_skipped(self, ts_epoch: float) -> bool:
+        """Check if an epoch is outside the crop range or off interval_filter."""
+        if ts_epoch < self.crop_beg or ts_epoch > self.crop_end:
+            return True
+        return (
+            self.interval_filter > 0
+            and ts_to_second_of_day(ts_epoch) % self.interval_filter != 0
+        )
+
     def do_thinning(self, interval: int) -> None:
         """Reduce epochs to only those at specified interval boundaries.
 
@@ -217,10 +490,15 @@ class RinexObsReader:
 
         # Pre-calculate all day_seconds to avoid repeated computation
         thinned_epochs = []
-        for epoch in self.rinex_epochs:
-            seconds = epoch.get_day_seconds()
-            if seconds % interval == 0:
-                thinned_epochs.append(epoch)
+        if self.obs_store is not None:
+            thinned_epochs = self.obs_store.filter_epochs(
+                lambda ts: ts_to_second_of_day(ts) % interval == 0
+            ).epochs
+        else:
+            for epoch in self.rinex_epochs:
+                seconds = epoch.get_day_seconds()
+                if seconds % interval == 0:
+                    thinned_epochs.append(epoch)
 
         if len(self.backup_epochs) == 0:
             self.backup_epochs = self.rinex_epochs
@@ -256,6 +534,9 @@ class RinexObsReader:
         return output.getvalue()
 
     def epochs_to_rinex3(self) -> str:
+        if self.obs_store is not None:
+            output = "".join(text for _, text in iter_rinex3_batches(self.obs_store))
+            return output[:-1]
         output = []
         for rinex_epoch in self.rinex_epochs:
             if not isinstance(rinex_epoch, RinexEpoch):
@@ -285,20 +566,188 @@ class RinexObsReader:
 
         return "\n".join(output) + "\n"
 
+    def write_rinex3(
+        self, handler: BinaryIO, epochs: Iterable[RinexEpoch | str], crinex: bool = False
+    ) -> int:
+        """Stream header and epochs in RINEX 3 format.
+
+        Epochs are formatted and written one at a time, memory does not grow
+        with the number of epochs. The header is written with placeholder
+        TIME OF FIRST/LAST OBS lines, which have a fixed width and are
+        patched in place after the last epoch. The output is the same as
+        to_rinex3() of the fully read file.
+
+        Pristine epochs read with passthrough are not formatted, their raw
+        text is written. Runs of consecutive epochs in an uncompressed file
+        are copied straight from it (see copy_byte_range()). Strings are
+        special records (e.g. header changes of a merge) written as given.
+
+        Args:
+            handler: Seekable binary file handler.
+            epochs: Epochs to write, e.g. from iter_epochs(), and records.
+            crinex: Write Hatanaka compressed CRINEX 3 (default: False).
+
+        Returns:
+            int: Number of written epochs.
+        """
+        if self.interval_filter > 0:
+            self.header.interval = self.interval_filter
+        encoder = CrinexEncoder() if crinex else None
+
+        def render_header() -> bytes:
+            header = f"{self.header.to_rinex3()}\n"
+            if encoder is not None:
+                header = encoder.encode_header(iter(header.splitlines()))
+            return header.encode()
+
+        self.header.first_observation = EPOCH_MIN
+        self.header.last_observation = EPOCH_MIN
+        header = render_header()
+        header_offset = handler.tell()
+        handler.write(header)
+
+        count = 0
+        sources: Dict[str, int] = {}
+        run: List[Any] = []  # [path, start, end] of pending source bytes
+
+        def flush_run() -> None:
+            if run:
+                path, start, end = run
+                if path not in sources:
+                    sources[path] = os.open(path, os.O_RDONLY)
+                copy_byte_range(sources[path], handler, start, end)
+                run.clear()
+
+        try:
+            if isinstance(epochs, RinexEpochView):
+                count = self.write_store_rinex3(handler, epochs.store, encoder)
+                epochs = ()
+            for rinex_epoch in epochs:
+                if isinstance(rinex_epoch, str):
+                    flush_run()
+                    if encoder is None:
+                        handler.write(f"{rinex_epoch}\n".encode())
+                    else:
+                        lines = iter(rinex_epoch.split("\n"))
+                        handler.write("".join(encoder.encode_body(lines)).encode())
+                    continue
+                if count == 0:
+                    self.header.first_observation = rinex_epoch.timestamp
+                self.header.last_observation = rinex_epoch.timestamp
+                count += 1
+                source = rinex_epoch.source
+                if encoder is None and source is not None and rinex_epoch.is_pristine():
+                    if run and run[0] == source[0] and run[2] == source[1]:
+                        run[2] = source[2]
+                    else:
+                        flush_run()
+                        run.extend(source)
+                    continue
+                flush_run()
+                if encoder is None:
+                    handler.write(rinex_epoch.to_rinex3(use_raw=True).encode())
+                    handler.write(b"\n")
+                else:
+                    lines = iter(rinex_epoch.to_rinex3(use_raw=True).split("\n"))
+                    handler.write("".join(encoder.encode_body(lines)).encode())
+            flush_run()
+        finally:
+            for fd in sources.values():
+                os.close(fd)
+        logger.info(f"Exported {count} RINEX 3 epochs")
+        if count == 0:
+            return count
+
+        patched = render_header()
+        if len(patched) != len(header):
+            raise ValueError("RINEX 3 header changed its size while writing")
+        end_offset = handler.tell()
+        handler.seek(header_offset)
+        handler.write(patched)
+        handler.seek(end_offset)
+        return count
+
+    def write_store_rinex3(
+        self, handler: BinaryIO, store: ObsStore, encoder: CrinexEncoder | None = None
+    ) -> int:
+        """Write the epochs of a columnar store with the compiled layouts.
+
+        Args:
+            handler: Binary file handler.
+            store: Columnar store.
+            encoder: CRINEX encoder of the body, None to write plain RINEX 3.
+
+        Returns:
+            int: Number of written epochs.
+        """
+        if len(store) == 0:
+            return 0
+        self.header.first_observation = float(store.timestamps[0])
+        self.header.last_observation = float(store.timestamps[-1])
+        if encoder is None:
+            return write_rinex3_epochs(handler, store)
+        count = 0
+        for n, text in iter_rinex3_batches(store):
+            lines = iter(text[:-1].split("\n"))
+            handler.write("".join(encoder.encode_body(lines)).encode())
+            count += n
+        return count
+
     def read_header_from_file(self, sort_obs_types: bool = True) -> None:
         """Read and parse the RINEX file header.
 
         Args:
             sort_obs_types: Whether to sort observation types (default: True).
         """
-        header = ""
-        with open(self.rinex_obs_file, "r") as handler:
-            for line in handler:
-                header += line
-                if "END OF HEADER" in line:
-                    break
+        if self.handler is None:
+            with open_text(self.rinex_obs_file) as handler:
+                header = self.read_header_lines(handler)
+        else:
+            # The shared handler is not rewound, it may be a decompressed stream
+            if not self.raw_header:
+                self.raw_header = self.read_header_lines(self.handler)
+            header = self.raw_header
         self.header = self.RINEX_HEADER_CLASS.from_header(header_string=header)
 
+    @staticmethod
+    def read_header_lines(handler: TextIO) -> str:
+        """Read the raw header from a handler, leaving it after END OF HEADER."""
+        lines = []
+        for line in iter(handler.readline, ""):
+            lines.append(line)
+            if "END OF HEADER" in line:
+                logger.debug("End of Header Reached")
+                break
+        return "".join(lines)
+
+    @contextlib.contextmanager
+    def open_body(self) -> Iterator[TextIO]:
+        """Open rinex_obs_file positioned at the first line after the header.
+
+        The shared handler is taken over if the header was read from it,
+        otherwise the file is opened and the header is skipped. The handler
+        is closed when leaving the context.
+
+        Yields:
+            TextIO: Text handler positioned after END OF HEADER.
+        """
+        handler, self.handler = self.handler, None
+        if handler is None:
+            handler = open_text(self.rinex_obs_file)
+            self.read_header_lines(handler)
+        elif not self.raw_header:
+            self.read_header_lines(handler)
+        self.raw_header = ""
+        with handler:
+            yield handler
+
+    def close(self) -> None:
+        """Close the shared handler if the body was not read."""
+        if self.handler is not None:
+            self.handler.close()
+            self.handler = None
+            self.raw_header = ""
+
     def add_satellite(self, satellite: str) -> None:
         """Add or increment count for a satellite in the header.
 
@@ -318,6 +767,8 @@ class RinexObsReader:
         Returns:
             bool: True if system is present, False otherwise.
         """
+        if self.obs_store is not None:
+            return self.obs_store.has_satellite_system(sat_sys)
         for epoch in self.rinex_epochs:
             if epoch.has_satellite_system(sat_sys):
                 return True
@@ -326,9 +777,71 @@ class RinexObsReader:
     def update_header_obs(self) -> None:
         """Update header with first and last observation times."""
         # First and Last Observation
+        if self.obs_store is not None:
+            self.header.first_observation = float(self.obs_store.timestamps[0])
+            self.header.last_observation = float(self.obs_store.timestamps[-1])
+            return
         self.header.first_observation = self.rinex_epochs[0].timestamp
         self.header.last_observation = self.rinex_epochs[-1].timestamp
 
+    def obs_filter_name(self, sat_sys: str, obs_type: str) -> str:
+        """Get the name of an observation type in filter_sat_obs.
+
+        Must be implemented by subclasses.
+
+        Raises:
+            NotImplementedError: Always (must be implemented in subclass).
+        """
+        raise NotImplementedError
+
+    def is_mmap_read(self) -> bool:
+        """Check if rinex_obs_file should be read through mmap."""
+        if is_compressed(self.rinex_obs_file):
+            return False
+        if self.use_mmap is not None:
+            return self.use_mmap and os.path.getsize(self.rinex_obs_file) > 0
+        if self.passthrough:
+            # Byte ranges of the epochs are known on the mmap path only
+            return os.path.getsize(self.rinex_obs_file) > 0
+        return os.path.getsize(self.rinex_obs_file) >= self.mmap_threshold
+
+    def record_filters(self) -> tuple:
+        """Get the record filters for block decoding.
+
+        Maps filter_sat_sys, filter_sat_pnr, filter_sat_obs and keep_obs to
+        what the reader does for single records.
+
+        Returns:
+            tuple: (SystemColumns per kept system, satellite ids to drop,
+                blanked field indices per system, original field index of
+                each column per projected system)
+        """
+        systems = {
+            sat_sys: columns
+            for sat_sys, columns in self.obs_store.systems.items()
+            if sat_sys not in self.filter_sat_sys
+        }
+        skip_sat_ids = self.filter_sat_pnr
+        if isinstance(skip_sat_ids, str):
+            skip_sat_ids = [s.strip() for s in skip_sat_ids.split(",") if s.strip()]
+        blanked = {
+            sat_sys: [
+                k
+                for k, obs_type in enumerate(columns.obs_types)
+                if self.obs_filter_name(sat_sys, obs_type) in self.filter_sat_obs
+            ]
+            for sat_sys, columns in systems.items()
+        }
+        return systems, skip_sat_ids, blanked, self.obs_fields
+
+    def flush_record_block(self, block: RecordBlock) -> None:
+        """Decode pending satellite records into obs_store.
+
+        Args:
+            block: Pending records of the last epochs.
+        """
+        block.flush(*self.record_filters())
+
     def read_satellite(
         self,
         sat_id: str,
@@ -360,6 +873,94 @@ class RinexObsReader:
         """
         raise NotImplementedError
 
+    def iter_epochs(self) -> Iterator[RinexEpoch]:
+        """Stream filtered epochs without keeping them in rinex_epochs.
+
+        Must be implemented by subclasses.
+
+        Raises:
+            NotImplementedError: Always (must be implemented in subclass).
+        """
+        raise NotImplementedError
+
+    def get_byte_ranges(self, mm: mmap.mmap, data_offset: int) -> List[Tuple[int, int]]:
+        """Get byte ranges of the epoch data to read from a memory map.
+
+        Args:
+            mm: Memory map of rinex_obs_file.
+            data_offset: Offset of the first line after the header.
+        """
+        return [(data_offset, len(mm))]
+
+    def iter_mmap_range(self, mm: mmap.mmap, start: int, end: int) -> Iterator[int]:
+        """Decode a byte range of whole epochs into obs_store chunk by chunk.
+
+        Must be implemented by subclasses reading through mmap.
+
+        Raises:
+            NotImplementedError: Always (must be implemented in subclass).
+        """
+        raise NotImplementedError
+
+    def read_mmap_range(self, mm: mmap.mmap, start: int, end: int) -> None:
+        """Decode a byte range of whole epochs into obs_store."""
+        for _ in self.iter_mmap_range(mm, start, end):
+            pass
+
+    def store_obs_types(self) -> Dict[str, List[str]]:
+        """Get the column layout of obs_store, the header codes per system."""
+        return self.header.sys_obs_types
+
+    def iter_store_blocks(self) -> Iterator[ObsStore]:
+        """Stream epochs as finalized columnar stores of block_size epochs.
+
+        Filters apply as in columnar mode, only the block being decoded is
+        held in obs_store, which is unset at the end. Files read through
+        mmap are decoded in blocks of one mmap chunk. Requires the header
+        to be read first.
+
+        Yields:
+            ObsStore: Next block of epochs.
+        """
+        self.obs_store = ObsStore(self.store_obs_types(), self.header.rcv_clock_offset)
+        if self.is_mmap_read() and has_numpy():
+            with self.open_body() as handler, mmap.mmap(
+                handler.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                for start, end in self.get_byte_ranges(mm, handler.tell()):
+                    for _ in self.iter_mmap_range(mm, start, end):
+                        if len(self.obs_store):
+                            yield self.next_store_block()
+            self.obs_store = None
+            return
+        block = RecordBlock()
+        for ts_epoch, epoch_flag, _, records in self.iter_epoch_records():
+            if 2 <= epoch_flag <= 5:
+                # Event records are not satellite lines
+                continue
+            epoch_index = self.obs_store.add_epoch(ts_epoch, epoch_flag)
+            block.append(epoch_index, ts_epoch, records)
+            if len(block) >= self.block_size:
+                yield self.next_store_block(block)
+        if len(block):
+            yield self.next_store_block(block)
+        self.obs_store = None
+
+    def next_store_block(self, block: RecordBlock | None = None) -> ObsStore:
+        """Finish the block in obs_store and start the next one.
+
+        Args:
+            block: Pending records to decode into obs_store first.
+
+        Returns:
+            ObsStore: The finalized block.
+        """
+        if block is not None:
+            self.flush_record_block(block)
+        store = self.obs_store.finalize()
+        self.obs_store = ObsStore(self.store_obs_types(), self.header.rcv_clock_offset)
+        return store
+
     def to_rinex2_file(self, output_path: str) -> None:
         """Stream RINEX 2 output directly to file for better performance.
 
@@ -430,7 +1031,7 @@ class Rinex2ObsReader(RinexObsReader):
     """
 
     RINEX_HEADER_CLASS = Rinex2ObsHeader
-    RINEX_FILE_NAME_REGEX = r"....\d\d\d[a-x0]\.\d\d[oO]"
+    RINEX_FILE_NAME_REGEX = r"....\d\d\d[a-x0]\.\d\d[oOdD]"
     RINEX_FORMAT = 2
     RINEX_DATELINE_REGEXP = cc.RINEX2_DATELINE_REGEXP
     RINEX_DATELINE_REGEXP_SHORT = cc.RINEX2_DATELINE_REGEXP_SHORT
@@ -458,9 +1059,20 @@ class Rinex2ObsReader(RinexObsReader):
         """Initialize a RINEX 2 observation reader."""
         super().__init__(**kwargs)
 
+    def read_header_from_file(self, sort_obs_types: bool = True) -> None:
+        super().read_header_from_file(sort_obs_types)
+        self.obs_plan = None
+        if self.keep_obs:
+            logger.warning("keep_obs is not supported for RINEX 2, use filter_sat_obs")
+
+    def obs_filter_name(self, sat_sys: str, obs_type: str) -> str:
+        """Get the name of an observation type in filter_sat_obs, e.g. "GP2"."""
+        return f"{sat_sys}{obs_type}"
+
     def set_rinex_obs_file(self, rinex_obs_file: str) -> None:
         self.rinex_obs_file = rinex_obs_file
-        self.station_doy_session = os.path.basename(self.rinex_obs_file).split(".")[0]
+        rinex_path = strip_compression_suffix(self.rinex_obs_file)
+        self.station_doy_session = os.path.basename(rinex_path).split(".")[0]
         if not self.__class__.is_valid_filename(
             os.path.basename(self.rinex_obs_file), self.header.format_version
         ):
@@ -470,7 +1082,7 @@ class Rinex2ObsReader(RinexObsReader):
             )
         self.station = self.station_doy_session[:4]
         self.doy = int(self.station_doy_session[4:7])
-        year2 = int(self.rinex_obs_file.split(".")[-1][:2])
+        year2 = int(rinex_path.split(".")[-1][:2])
         self.year = self.correct_year2(year2)
 
         self.rinex_file_sequence = self.station_doy_session[7]
@@ -488,118 +1100,256 @@ class Rinex2ObsReader(RinexObsReader):
             Satellite: Satellite object with Observation objects
         """
 
-        observations = []
-        for k in range(len(self.header.observation_types)):
-            obs_type = self.header.observation_types[k]
-            obs_col = line[(16 * k) : (16 * (k + 1))]
-            obs_val = obs_col[:14].strip()
-
-            if obs_val == "":
-                obs_val = None
-            else:
-                obs_val = float(obs_val)
-
-            if len(obs_col) < 15:
-                obs_lli = 0
-            else:
-                obs_lli = obs_col[14].strip()
-                if obs_lli == "":
-                    obs_lli = 0
-                else:
-                    obs_lli = int(obs_lli)
-
-            if len(obs_col) < 16:
-                obs_ss = 0
-            else:
-                obs_ss = obs_col[15].strip()
-                if obs_ss == "":
-                    obs_ss = 0
-                else:
-                    obs_ss = int(obs_ss)
+        if self.obs_plan is None:
+            self.obs_plan = {}
+        plan = self.obs_plan.get(sat_id[0])
+        if plan is None:
+            # (obs type, line offset) of each decoded field of the system
+            plan = self.obs_plan[sat_id[0]] = [
+                (obs_type, FIELD_WIDTH * k)
+                for k, obs_type in enumerate(self.header.observation_types)
+                if self.obs_filter_name(sat_id[0], obs_type) not in self.filter_sat_obs
+            ]
 
-            if obs_val is None:
+        observations = []
+        for obs_type, pos in plan:
+            obs_val = line[pos : pos + VALUE_WIDTH].strip()
+            if not obs_val:
                 # Do not store empty obs_type
                 continue
-
+            obs_lli = line[pos + VALUE_WIDTH : pos + VALUE_WIDTH + 1].strip()
+            obs_ss = line[pos + VALUE_WIDTH + 1 : pos + FIELD_WIDTH].strip()
             observations.append(
-                Observation(code=obs_type, value=obs_val, lli=obs_lli, ss=obs_ss)
+                Observation(
+                    code=obs_type,
+                    value=float(obs_val),
+                    lli=int(obs_lli) if obs_lli else 0,
+                    ss=int(obs_ss) if obs_ss else 0,
+                )
             )
 
         return Satellite(sat_id, observations)
 
     def read_epochs_from_file(self) -> None:
-        """ """
-        # SKIP HEADER
-        with open(self.rinex_obs_file, "r") as handler:
-            end_of_header = False
-            while True:
-
-                # Check for END_OF_FILE
-                line = handler.readline()
-                if "END OF HEADER" in line:
-                    logger.debug("End of Header Reached")
-                    end_of_header = True
-                if not end_of_header:
+        """Read all epochs after the header.
+
+        In columnar mode the records are block decoded into obs_store,
+        uncompressed files are read through mmap (see use_mmap).
+        """
+        if not self.columnar:
+            self.rinex_epochs.extend(self.iter_epochs())
+            logger.debug(f"Successfully read data {self.rinex_obs_file}.")
+            return
+
+        self.obs_store = ObsStore(self.store_obs_types(), self.header.rcv_clock_offset)
+        if self.is_mmap_read() and has_numpy():
+            with self.open_body() as handler, mmap.mmap(
+                handler.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                self.read_mmap_range(mm, handler.tell(), len(mm))
+        else:
+            block = RecordBlock()
+            for ts_epoch, epoch_flag, _, records in self.iter_epoch_records():
+                epoch_index = self.obs_store.add_epoch(ts_epoch, epoch_flag)
+                block.append(epoch_index, ts_epoch, records)
+                if len(block) >= self.block_size:
+                    self.flush_record_block(block)
+            self.flush_record_block(block)
+        self.obs_store.finalize()
+        logger.debug(f"Successfully read data {self.rinex_obs_file}.")
+
+    def store_obs_types(self) -> Dict[str, List[str]]:
+        """Get the column layout of obs_store, the header codes for every system."""
+        return {sat_sys: list(self.header.observation_types) for sat_sys in SAT_SYS_ORDER}
+
+    def iter_epochs(self) -> Iterator[RinexEpoch]:
+        """Stream epochs from rinex_obs_file one at a time.
+
+        Crop range, interval_filter and the satellite filters are applied
+        while reading. Observation types are filtered by system and RINEX 2
+        code, e.g. "GP2". Requires the header to be read first.
+
+        Yields:
+            RinexEpoch: Next epoch passing the filters.
+        """
+        for ts_epoch, epoch_flag, _, records in self.iter_epoch_records():
+            satellites = []
+            for record in records:
+                sat_num = record[:SAT_ID_WIDTH]
+                if not sat_num.strip():
                     continue
-                if line == "":
-                    break
+                if sat_num[0] in self.filter_sat_sys:
+                    continue
+                if sat_num in self.filter_sat_pnr:
+                    continue
+                self.add_satellite(sat_num)
+                satellites.append(
+                    self.read_satellite(sat_id=sat_num, line=record[SAT_ID_WIDTH:])
+                )
+            yield RinexEpoch(
+                timestamp=ts_epoch,
+                observation_types=self.header.observation_types,
+                satellites=satellites,
+                epoch_flag=epoch_flag,
+                rcv_clock_offset=self.header.rcv_clock_offset,
+            )
 
-                # Get DateLine
-                r = self._get_dateline_re().search(line)
-                if r is not None:
-                    timestamp = datetime.datetime(
-                        self.correct_year2(year2=int(r.group("year2"))),
-                        int(r.group("month")),
-                        int(r.group("day")),
-                        int(r.group("hour")),
-                        int(r.group("minute")),
-                        int(float(r.group("second"))),
-                    )
-                    # 2025 03 16 00 00  0.0000000
-                    epoch = timestamp.strftime("%Y %m %d %H %M %S.%f").ljust(27, "0")
-                    epoch_satellites = []
-
-                    sats = r.group("sat1").strip()
-                    # Number of Satellites
-                    nos = int(r.group("nos"))
-                    if nos == 0:
-                        continue
-
-                    additional_lines = int((nos - 1) / 12 % 12)
-                    for j in range(additional_lines):
-                        line = handler.readline()
-                        r2 = self._get_dateline_short_re().search(line)
-                        if r2 is not None:
-                            sats += r2.group("sat2").strip()
-
-                    # Get Observation Data
-                    satellites = []
-                    for j in range(nos):
-                        sat_num = sats[(3 * j) : (3 * (j + 1))]
-                        self.add_satellite(sat_num)
-
-                        raw_obs = ""
-                        for k in range(1 + int(len(self.header.observation_types) / 5)):
-                            raw_obs = "%s%s" % (
-                                raw_obs,
-                                self.prepare_line(handler.readline()),
-                            )
-
-                        satellites.append(
-                            self.read_satellite(sat_id=sat_num, line=raw_obs)
-                        )
-
-                    rinex_epoch = RinexEpoch(
-                        timestamp=datetime.datetime.strptime(
-                            timestamp.strftime("%FT%TZ"), cc.RNX_FORMAT_DATETIME
-                        ),
-                        observation_types=self.header.observation_types,
-                        satellites=satellites,
-                        rcv_clock_offset=self.header.rcv_clock_offset,
-                    )
-                    self.rinex_epochs.append(rinex_epoch)
+    def iter_epoch_records(self) -> Iterator[Tuple[float, int, float, List[str]]]:
+        """Stream raw epochs within crop range and on interval_filter.
 
-            logger.debug(f"Successfully read data {self.rinex_obs_file}.")
+        Records are joined to RINEX 3 style lines behind their satellite id
+        (see rinex2_record()). Event epochs (flag 2-5) and epochs without
+        satellites are skipped, lines of skipped epochs are not decoded.
+
+        Yields:
+            tuple: (timestamp, epoch flag, clock offset, record lines)
+        """
+        record_lines = rinex2_record_lines(len(self.header.observation_types))
+        with self.open_body() as handler:
+            readline = handler.readline
+            for line in iter(readline, ""):
+                try:
+                    ts_epoch, epoch_flag, nos, clock_offset = decode_epoch_line_rinex2(line)
+                except ValueError:
+                    continue
+                if 2 <= epoch_flag <= 5:
+                    # Event records are header lines, not satellites
+                    logger.info(f"Special event: {epoch_flag}")
+                    for _ in range(nos):
+                        readline()
+                    continue
+                if nos == 0:
+                    continue
+                lines = [line]
+                for _ in range((nos - 1) // RINEX2_SATS_PER_LINE):
+                    lines.append(readline())
+                if self.is_epoch_skipped(ts_epoch):
+                    for _ in range(nos * record_lines):
+                        readline()
+                    continue
+                records = [
+                    rinex2_record(sat_id, [readline() for _ in range(record_lines)])
+                    for sat_id in rinex2_sat_ids(lines, nos)
+                ]
+                yield ts_epoch, epoch_flag, clock_offset, records
+
+    def iter_mmap_range(self, mm: mmap.mmap, start: int, end: int) -> Iterator[int]:
+        """Decode a byte range of whole epochs in chunks of MMAP_CHUNK_SIZE.
+
+        RINEX 2 epoch lines carry no marker, a chunk ends at a line break
+        and its incomplete last epoch is decoded with the next chunk. The
+        chunk grows until it holds a whole epoch.
+
+        Yields:
+            int: End offset of the epochs decoded from each chunk.
+        """
+        pos = start
+        chunk_size = MMAP_CHUNK_SIZE
+        while pos < end:
+            stop = min(pos + chunk_size, end)
+            if stop < end:
+                stop = mm.rfind(b"\n", pos, stop) + 1
+            done = self.read_mmap_chunk(mm, pos, stop, stop == end) if stop > pos else pos
+            if done == pos:
+                chunk_size *= 2
+            else:
+                pos = done
+                chunk_size = MMAP_CHUNK_SIZE
+                yield pos
+
+    def read_mmap_chunk(self, mm: mmap.mmap, start: int, end: int, final: bool = True) -> int:
+        """Decode the whole epochs of a byte range into obs_store with numpy.
+
+        Only epoch lines and satellite lists are decoded one by one. The
+        record lines of each satellite are cut into a padded matrix, one
+        80 column block per line behind the satellite id, and handed to
+        decode_matrix().
+
+        Args:
+            mm: Memory map of rinex_obs_file.
+            start: Offset of an epoch line.
+            end: End offset of the range, at a line break.
+            final: Decode the complete records of a truncated last epoch
+                instead of leaving it for the next range.
+
+        Returns:
+            int: Offset behind the last decoded epoch.
+        """
+        record_lines = rinex2_record_lines(len(self.header.observation_types))
+        if end + RINEX2_LINE_WIDTH <= len(mm):
+            buffer = np.frombuffer(
+                mm, dtype=np.uint8, count=end - start + RINEX2_LINE_WIDTH, offset=start
+            )
+        else:
+            buffer = np.full(end - start + RINEX2_LINE_WIDTH, ASCII_SPACE, dtype=np.uint8)
+            buffer[: end - start] = np.frombuffer(
+                mm, dtype=np.uint8, count=end - start, offset=start
+            )
+        starts, _, lengths = split_lines(buffer[: end - start])
+        line_starts = starts.tolist()
+        line_lengths = lengths.tolist()
+        line_count = len(line_starts)
+
+        def text(line_no: int) -> str:
+            pos = start + line_starts[line_no]
+            return mm[pos : pos + line_lengths[line_no]].decode("latin-1")
+
+        sat_lists, first_lines, counts, epochs, timestamps = [], [], [], [], []
+        line_no = done = 0
+        while line_no < line_count:
+            line = text(line_no)
+            try:
+                ts_epoch, epoch_flag, nos, _ = decode_epoch_line_rinex2(line)
+            except ValueError:
+                line_no = done = line_no + 1
+                continue
+            event = 2 <= epoch_flag <= 5
+            sat_lines = (nos - 1) // RINEX2_SATS_PER_LINE if nos and not event else 0
+            next_line = line_no + 1 + (nos if event else sat_lines + nos * record_lines)
+            if next_line > line_count and not final:
+                break
+            if event:
+                logger.info(f"Special event: {epoch_flag}")
+            elif nos and not self.is_epoch_skipped(ts_epoch):
+                first = line_no + 1 + sat_lines
+                # Records cut off by the end of the range are dropped
+                count = max(0, min(nos, (line_count - first) // record_lines))
+                sats = line[32:68].ljust(36)
+                for i in range(line_no + 1, min(first, line_count)):
+                    sats += text(i)[32:68].ljust(36)
+                sat_lists.append(sats[: SAT_ID_WIDTH * count].ljust(SAT_ID_WIDTH * count))
+                first_lines.append(first)
+                counts.append(count)
+                epochs.append(self.obs_store.add_epoch(ts_epoch, epoch_flag))
+                timestamps.append(ts_epoch)
+            line_no = done = min(next_line, line_count)
+
+        total = sum(counts)
+        if total:
+            counts = np.asarray(counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            firsts = np.repeat(np.asarray(first_lines), counts) + offsets * record_lines
+            rows = (firsts[:, None] + np.arange(record_lines)).ravel()
+            matrix = np.empty(
+                (total, SAT_ID_WIDTH + RINEX2_LINE_WIDTH * record_lines), dtype=np.uint8
+            )
+            sat_ids = np.frombuffer("".join(sat_lists).encode("latin-1"), dtype=np.uint8)
+            matrix[:, :SAT_ID_WIDTH] = sat_ids.reshape(-1, SAT_ID_WIDTH)
+            # Normalize satellite ids like rinex2_sat_ids(), " 5" is "G05"
+            blanks = matrix[:, :SAT_ID_WIDTH] == ASCII_SPACE
+            named = ~blanks.all(axis=1)
+            matrix[named & blanks[:, 0], 0] = ord("G")
+            matrix[:, 1:SAT_ID_WIDTH][named[:, None] & blanks[:, 1:]] = ASCII_ZERO
+            matrix[:, SAT_ID_WIDTH:] = record_matrix(
+                buffer, starts[rows], lengths[rows], RINEX2_LINE_WIDTH
+            ).reshape(total, -1)
+            decode_matrix(
+                matrix,
+                np.repeat(np.asarray(epochs, dtype=np.uint32), counts),
+                np.repeat(np.asarray(timestamps), counts),
+                *self.record_filters(),
+            )
+        return end if done == line_count else start + line_starts[done]
 
 
 class Rinex3ObsReader(RinexObsReader):
@@ -644,6 +1394,58 @@ class Rinex3ObsReader(RinexObsReader):
         """Initialize a RINEX 3 observation reader."""
         super().__init__(**kwargs)
 
+    def obs_filter_name(self, sat_sys: str, obs_type: str) -> str:
+        """Get the name of an observation type in filter_sat_obs, e.g. "G1C"."""
+        return f"{sat_sys}{obs_type[1:]}"
+
+    def read_header_from_file(self, sort_obs_types: bool = True) -> None:
+        """Read and parse the RINEX file header, then compile the obs plan.
+
+        Args:
+            sort_obs_types: Whether to sort observation types (default: True).
+        """
+        super().read_header_from_file(sort_obs_types)
+        self.compile_obs_plan()
+
+    def compile_obs_plan(self) -> None:
+        """Compile the field layout of the satellite records from the header.
+
+        The header is reduced to the codes of keep_obs, obs_fields maps the
+        kept codes to their original fields. Systems without any kept code
+        are added to filter_sat_sys. obs_plan holds the code and line
+        offset of each field read_satellite() decodes, fields of
+        filter_sat_obs are left out. Records of verbatim_systems can be
+        written as read.
+        """
+        keep_obs = self.keep_obs
+        if isinstance(keep_obs, str):
+            keep_obs = parse_keep_obs(keep_obs)
+        self.obs_fields = self.header.keep_sys_obs_types(keep_obs) if keep_obs else {}
+        dropped = [
+            sat_sys for sat_sys in self.obs_fields if sat_sys not in self.header.sys_obs_types
+        ]
+        if dropped:
+            filter_sat_sys = self.filter_sat_sys
+            if isinstance(filter_sat_sys, str):
+                filter_sat_sys = filter_sat_sys.split(",")
+            self.filter_sat_sys = [*filter_sat_sys, *dropped]
+            for sat_sys in dropped:
+                del self.obs_fields[sat_sys]
+
+        self.obs_plan = {}
+        self.verbatim_systems = set()
+        for sat_sys, obs_types in self.header.sys_obs_types.items():
+            fields = self.obs_fields.get(sat_sys, range(len(obs_types)))
+            self.obs_plan[sat_sys] = [
+                (obs_type, SAT_ID_WIDTH + FIELD_WIDTH * field)
+                for obs_type, field in zip(obs_types, fields)
+                if self.obs_filter_name(sat_sys, obs_type) not in self.filter_sat_obs
+            ]
+            if [pos for _, pos in self.obs_plan[sat_sys]] == [
+                SAT_ID_WIDTH + FIELD_WIDTH * k for k in range(len(obs_types))
+            ]:
+                self.verbatim_systems.add(sat_sys)
+
     def set_rinex_obs_file(self, rinex_obs_file: str) -> None:
         self.rinex_obs_file = rinex_obs_file
 
@@ -681,91 +1483,315 @@ class Rinex3ObsReader(RinexObsReader):
         return m is not None
 
     def read_epochs_from_file(self) -> None:
-        """ """
-        with open(self.rinex_obs_file, "r") as handler:
-            i = 0
-            header_reached = False
-            while True:
-                line = handler.readline()
-                i += 1
-
-                if "END OF HEADER" in line:
-                    logger.debug("End of Header Reached")
-                    header_reached = True
-
-                if not header_reached:
-                    continue
+        """Read all epochs after the header.
 
-                # Check for END_OF_FILE
-                if line == "":
-                    break
+        With use_index, only the epochs selected by crop_beg, crop_end and
+        interval_filter are read, seeking to them via the EpochIndex. Large
+        uncompressed files are read through mmap (see use_mmap), in
+        columnar mode split among worker processes.
+        """
+        if not self.columnar:
+            self.rinex_epochs.extend(self.iter_epochs())
+            logger.debug(f"Successfully read data {self.rinex_obs_file}.")
+            return
 
-                # Get DateLine
-                r = self._get_dateline_re().search(line)
-                if not r:
+        self.obs_store = ObsStore(self.store_obs_types(), self.header.rcv_clock_offset)
+        if self.is_mmap_read() and has_numpy():
+            with self.open_body() as handler, mmap.mmap(
+                handler.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                ranges = self.get_byte_ranges(mm, handler.tell())
+                parts = self.split_work(mm, ranges)
+                if len(parts) > 1:
+                    self.read_parallel(parts)
+                else:
+                    for start, end in ranges:
+                        self.read_mmap_range(mm, start, end)
+        else:
+            block = RecordBlock()
+            for ts_epoch, epoch_flag, _, records in self.iter_epoch_records():
+                if 2 <= epoch_flag <= 5:
+                    # Event records are not satellite lines
                     continue
+                epoch_index = self.obs_store.add_epoch(ts_epoch, epoch_flag)
+                block.append(epoch_index, ts_epoch, records)
+                if len(block) >= self.block_size:
+                    self.flush_record_block(block)
+            self.flush_record_block(block)
+        self.obs_store.finalize()
+        logger.debug(f"Successfully read data {self.rinex_obs_file}.")
+
+    def iter_epochs(self) -> Iterator[RinexEpoch]:
+        """Stream epochs from rinex_obs_file one at a time.
+
+        Crop range, interval_filter and the satellite filters are applied
+        while reading, nothing is kept in rinex_epochs. Requires the header
+        to be read first.
+
+        Yields:
+            RinexEpoch: Next epoch passing the filters.
+        """
+        for ts_epoch, epoch_flag, _, records in self.iter_epoch_records():
+            satellites = []
+            for record in records:
+                epoch_sat = self.read_epoch_satellite(record)
+                if epoch_sat:
+                    satellites.append(epoch_sat)
+            raw, source = "", None
+            if self.passthrough and len(satellites) == len(records):
+                raw = "\n".join(line.rstrip("\r\n") for line in [self.epoch_line, *records])
+                if self.epoch_range is not None:
+                    source = (self.rinex_obs_file, *self.epoch_range)
+            yield RinexEpoch(
+                timestamp=ts_epoch,
+                observation_types=self.header.sys_obs_types,
+                satellites=satellites,
+                rcv_clock_offset=self.header.rcv_clock_offset,
+                raw=raw,
+                source=source,
+            )
 
-                # logger.debug("Found Date")
-                timestamp = datetime.datetime(
-                    int(r.group("year4")),
-                    int(r.group("month")),
-                    int(r.group("day")),
-                    int(r.group("hour")),
-                    int(r.group("minute")),
-                    int(float(r.group("second"))),
-                    tzinfo=datetime.timezone.utc,
+    def iter_epoch_records(self) -> Iterator[Tuple[float, int, float, List[str]]]:
+        """Stream raw epochs within crop range and on interval_filter.
+
+        Yields:
+            tuple: (timestamp, epoch flag, clock offset, raw record lines)
+        """
+        with self.open_body() as handler:
+            if self.is_mmap_read():
+                with mmap.mmap(handler.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for start, end in self.get_byte_ranges(mm, handler.tell()):
+                        yield from self.iter_mmap_records(mm, start, end)
+            elif self.is_index_read():
+                index, positions = self.select_indexed_epochs()
+                for offset, count in index.runs(positions):
+                    handler.seek(offset)
+                    yield from self.iter_text_records(handler, count)
+            else:
+                yield from self.iter_text_records(handler)
+
+    def select_indexed_epochs(self) -> Tuple[EpochIndex, List[int]]:
+        """Get the EpochIndex and positions of the epochs to read."""
+        index = self.get_epoch_index()
+        positions = index.select(self.crop_beg, self.crop_end, self.interval_filter)
+        logger.debug(f"Reading {len(positions)} of {len(index)} indexed epochs")
+        return index, positions
+
+    def get_byte_ranges(self, mm: mmap.mmap, data_offset: int) -> List[Tuple[int, int]]:
+        """Get byte ranges of the epoch data to read from a memory map.
+
+        Args:
+            mm: Memory map of rinex_obs_file.
+            data_offset: Offset of the first line after the header.
+        """
+        if self.is_index_read():
+            index, positions = self.select_indexed_epochs()
+            return list(index.byte_ranges(positions))
+        return [(data_offset, len(mm))]
+
+    def iter_mmap_records(
+        self, mm: mmap.mmap, start: int, end: int
+    ) -> Iterator[Tuple[float, int, float, List[str]]]:
+        """Stream raw epochs line by line from a byte range of a memory map.
+
+        Records of skipped epochs are never decoded to text.
+
+        Args:
+            mm: Memory map of rinex_obs_file.
+            start: Offset of the first epoch line.
+            end: End offset of the range.
+
+        Yields:
+            tuple: (timestamp, epoch flag, clock offset, raw record lines)
+        """
+        mm.seek(start)
+        while mm.tell() < end:
+            line_start = mm.tell()
+            line = mm.readline()
+            if line[0:1] != b">":
+                continue
+            try:
+                ts_epoch, epoch_flag, nos, clock_offset = decode_epoch_line(line)
+            except ValueError:
+                continue
+            if self.is_epoch_skipped(ts_epoch):
+                for _ in range(nos):
+                    mm.readline()
+                continue
+            if epoch_flag > 1:
+                logger.info(f"Special event: {epoch_flag}")
+            records = [mm.readline().decode("latin-1") for _ in range(nos)]
+            self.epoch_line = line.decode("latin-1")
+            self.epoch_range = (line_start, mm.tell())
+            yield ts_epoch, epoch_flag, clock_offset, records
+
+    def split_work(
+        self, mm: mmap.mmap, ranges: List[Tuple[int, int]]
+    ) -> List[List[Tuple[int, int]]]:
+        """Split byte ranges among workers, at least WORKER_CHUNK_SIZE each."""
+        size = sum(end - start for start, end in ranges)
+        parts = min(self.workers, size // WORKER_CHUNK_SIZE)
+        if parts <= 1:
+            return [ranges]
+        return split_byte_ranges(mm, ranges, parts)
+
+    def read_parallel(self, parts: List[List[Tuple[int, int]]]) -> None:
+        """Decode parts of the body in worker processes into obs_store.
+
+        The header is parsed once here, workers get its observation types
+        and return plain columns, which are concatenated in file order.
+
+        Args:
+            parts: Byte ranges of whole epochs per worker.
+        """
+        state = {name: getattr(self, name) for name in WORKER_STATE}
+        logger.debug(f"Reading {self.rinex_obs_file} with {len(parts)} processes")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(parts)) as executor:
+            results = list(
+                executor.map(
+                    read_ranges_columnar,
+                    [state] * len(parts),
+                    [self.header.sys_obs_types] * len(parts),
+                    parts,
                 )
+            )
+        self.obs_store = ObsStore.concatenate(
+            self.header.sys_obs_types, self.header.rcv_clock_offset, results
+        )
 
-                # Number of Satellites
-                nos = int(r.group("num_of_sats"))
-                ts_epoch = timestamp.timestamp()
-                ts_seconds_of_day = ts_to_second_of_day(ts_epoch)
+    def iter_mmap_range(self, mm: mmap.mmap, start: int, end: int) -> Iterator[int]:
+        """Decode a byte range of whole epochs in chunks of MMAP_CHUNK_SIZE.
 
-                skip_epoch = False
+        Yields:
+            int: End offset of each decoded chunk.
+        """
+        pos = start
+        while pos < end:
+            stop = mm.find(b"\n>", min(pos + MMAP_CHUNK_SIZE, end) - 1, end)
+            stop = end if stop < 0 else stop + 1
+            self.read_mmap_chunk(mm, pos, stop)
+            pos = stop
+            yield pos
 
-                if ts_epoch < self.crop_beg or ts_epoch > self.crop_end:
-                    # logger.debug("Skipping Epoch outside crop range")
-                    # Skip Epoch
-                    skip_epoch = True
+    def read_mmap_chunk(self, mm: mmap.mmap, start: int, end: int) -> None:
+        """Decode a byte range of whole epochs into obs_store with numpy.
 
-                if (
-                    self.interval_filter > 0
-                    and ts_seconds_of_day % self.interval_filter != 0
-                ):
-                    # logger.debug("Skipping Epoch due to interval filter")
-                    # Skip Epoch
-                    skip_epoch = True
+        Line breaks and epoch markers are located in bulk, only the epoch
+        lines are decoded one by one. The satellite records are cut into a
+        padded matrix and handed to decode_matrix().
 
-                if skip_epoch:
-                    for _ in range(nos):
-                        sat_line = handler.readline()
-                        i += 1
+        Args:
+            mm: Memory map of rinex_obs_file.
+            start: Offset of the first epoch line.
+            end: End offset of the range, at an epoch line or EOF.
+        """
+        systems, skip_sat_ids, blanked, fields = self.record_filters()
+        width = decoded_width(self.obs_store.systems, fields)
+        if end + width <= len(mm):
+            buffer = np.frombuffer(mm, dtype=np.uint8, count=end - start + width, offset=start)
+        else:
+            buffer = np.full(end - start + width, ASCII_SPACE, dtype=np.uint8)
+            buffer[: end - start] = np.frombuffer(
+                mm, dtype=np.uint8, count=end - start, offset=start
+            )
+        data = buffer[: end - start]
+
+        starts, ends, lengths = split_lines(data)
+        markers = np.flatnonzero(data[starts] == ASCII_EPOCH).tolist()
+        line_starts = starts.tolist()
+        line_ends = ends.tolist()
+        line_count = len(line_starts)
+
+        first_records, counts, epochs, timestamps = [], [], [], []
+        next_line = 0
+        for line_no in markers:
+            if line_no < next_line:
+                continue
+            line = mm[start + line_starts[line_no] : start + line_ends[line_no]]
+            try:
+                ts_epoch, epoch_flag, nos, _ = decode_epoch_line(line)
+            except ValueError:
+                continue
+            next_line = line_no + 1 + nos
+            if self.is_epoch_skipped(ts_epoch):
+                continue
+            if epoch_flag > 1:
+                logger.info(f"Special event: {epoch_flag}")
+                if epoch_flag <= 5:
                     continue
+            first_records.append(line_no + 1)
+            counts.append(min(nos, line_count - line_no - 1))
+            epochs.append(self.obs_store.add_epoch(ts_epoch, epoch_flag))
+            timestamps.append(ts_epoch)
 
-                epoch_flag = r.group("epoch_flag")
-                if epoch_flag not in ["0", "1"]:
-                    logger.info(f"Special event: {epoch_flag}")
+        if not counts or not sum(counts):
+            return
+        counts = np.asarray(counts)
+        rows = np.repeat(
+            np.asarray(first_records) - np.cumsum(counts) + counts, counts
+        ) + np.arange(counts.sum())
+        matrix = record_matrix(buffer, starts[rows], lengths[rows], width)
+        del data, buffer
+        decode_matrix(
+            matrix,
+            np.repeat(np.asarray(epochs, dtype=np.uint32), counts),
+            np.repeat(np.asarray(timestamps), counts),
+            systems,
+            skip_sat_ids,
+            blanked,
+            fields,
+        )
+
+    def is_index_read(self) -> bool:
+        """Check if epochs are located via the EpochIndex.
+
+        Byte offsets of compressed files are meaningless, they are read
+        sequentially.
+        """
+        return self.use_index and not is_compressed(self.rinex_obs_file)
+
+    def get_epoch_index(self) -> EpochIndex:
+        """Get the (persisted) EpochIndex of rinex_obs_file."""
+        return EpochIndex.for_file(self.rinex_obs_file, persist=self.persist_index)
+
+    def iter_text_records(
+        self, handler, max_epochs: int = -1
+    ) -> Iterator[Tuple[float, int, float, List[str]]]:
+        """Stream raw epochs from the current position of a text handler.
 
-                satellites = []
+        Args:
+            handler: Text handler positioned at an epoch line.
+            max_epochs: Stop after this many epoch lines (default: until EOF).
+
+        Yields:
+            tuple: (timestamp, epoch flag, clock offset, raw record lines)
+        """
+        epochs_read = 0
+        while epochs_read != max_epochs:
+            line = handler.readline()
+
+            # Check for END_OF_FILE
+            if line == "":
+                break
+
+            if line[0:1] != ">":
+                continue
+            try:
+                ts_epoch, epoch_flag, nos, clock_offset = decode_epoch_line(line)
+            except ValueError:
+                continue
+            epochs_read += 1
+
+            if self.is_epoch_skipped(ts_epoch):
                 for _ in range(nos):
-                    sat_line = handler.readline()
-                    i += 1
-                    epoch_sat = self.read_epoch_satellite(sat_line)
-                    if epoch_sat:
-                        satellites.append(epoch_sat)
-                    # else:
-                    #     logger.debug("No Data")
-
-                rinex_epoch = RinexEpoch(
-                    timestamp=ts_epoch,
-                    observation_types=self.header.sys_obs_types,
-                    satellites=satellites,
-                    rcv_clock_offset=self.header.rcv_clock_offset,
-                )
-                # if rinex_epoch.is_valid():
-                self.rinex_epochs.append(rinex_epoch)
+                    handler.readline()
+                continue
 
-        logger.debug(f"Successfully read data {self.rinex_obs_file}.")
+            if epoch_flag > 1:
+                logger.info(f"Special event: {epoch_flag}")
+            self.epoch_line = line
+            self.epoch_range = None
+            yield ts_epoch, epoch_flag, clock_offset, [handler.readline() for _ in range(nos)]
 
     def read_epoch_satellite(self, line: str) -> Satellite | None:
         """Parse satellite observation data from epoch line.
@@ -798,47 +1824,26 @@ class Rinex3ObsReader(RinexObsReader):
             sat_id: str satellite number/name
             line: str rnx line containing observations
         Returns:
-            Satellite: Satellite object with Observation objects
+            Satellite: Satellite object with Observation objects, a
+                LazySatellite with the raw line if lazy is set
         """
+        if self.obs_plan is None:
+            self.compile_obs_plan()
+        plan = self.obs_plan.get(sat_id[0], ())
+        if self.lazy or self.passthrough:
+            return LazySatellite(
+                sat_id,
+                line,
+                plan,
+                cache=self.lazy_cache,
+                verbatim=sat_id[0] in self.verbatim_systems,
+            )
         observations = []
         try:
-            sat_sys = sat_id[0]
-            # sat_buf = StringIO(line)
-            # sat_buf.seek(4)  # Skip sat_id and space
-            pos = 3
-
             # C02                  40447116.254 6  40447115.653 6  40447111.189 6                                                 210618834.50006 171145027.13806 162863805.01406                                                        39.634          36.620          39.637
 
-            for obs_type in self.header.sys_obs_types.get(sat_sys, []):
-                filter_obs_type = f"{sat_sys}{obs_type[1:]}"
-                if filter_obs_type in self.filter_sat_obs:
-                    # Skip unwanted observation type
-                    pos += 16
-                    continue
-                obs_val, obs_lli, obs_ssi = None, " ", " "
-                try:
-                    raw_val = line[pos : pos + 14]
-                    pos += 14
-                    raw_lli = line[pos : pos + 1]
-                    pos += 1
-                    raw_ssi = line[pos : pos + 1]
-                    pos += 1  # Skip space
-                    # raw_val = sat_buf.read(13).strip()
-                    # raw_lli = sat_buf.read(1).strip()
-                    # raw_ssi = sat_buf.read(1).strip()
-                    obs_val = raw_val  # if raw_val != "" else None
-                    obs_lli = " " if raw_lli == "\n" else raw_lli
-                    obs_ssi = " " if raw_ssi == "\n" else raw_ssi
-                    # sat_buf.read(1)  # Skip space
-                except Exception as e:
-                    logger.error(e)
-
-                if raw_val is not None:
-                    observations.append(
-                        Observation(
-                            code=obs_type, value=obs_val, lli=obs_lli, ss=obs_ssi
-                        )
-                    )
+            for obs_type, pos in plan:
+                observations.append(LazySatellite.decode_field(line, obs_type, pos))
 
             # m = self._get_data_obs_re().match(line)
             # if True:
@@ -0,0 +1,395 @@
+"""Header-only scan of RINEX observation files.
+
+Inventories of large archives only need the header and the time span of
+each file. The scan parses the header through END OF HEADER with a table
+mapping each header label to its field parser, decodes the first epoch
+line after the header and finds the last epoch line by reading backwards
+from the end of the file, so the observation records in between are never
+read. Compressed files can not be read backwards, their data is streamed
+and only the last blocks are kept.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import collections
+import datetime
+import itertools
+import os
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from rinex_parser.compression import get_decoder, open_binary, strip_compression_suffix
+from rinex_parser.hatanaka import is_crinex
+from rinex_parser.logger import logger
+from rinex_parser.obs_decoder import (
+    RINEX2_SATS_PER_LINE,
+    decode_epoch_line,
+    decode_epoch_line_rinex2,
+    epoch_seconds,
+    rinex2_record_lines,
+)
+
+# Bytes read from the end of a file per step of the backward search
+SCAN_TAIL_SIZE = 64 * 1024
+# Blocks kept while streaming compressed files
+SCAN_TAIL_BLOCKS = 4
+# Header lines read before a file is rejected
+SCAN_HEADER_LINES = 5000
+# Epoch flags of epochs holding observations, as kept by the readers
+OBSERVATION_FLAGS = (0, 1, 6)
+# Columns which are blank in a RINEX 2 epoch line
+RINEX2_EPOCH_BLANKS = (0, 3, 6, 9, 12, 15, 26, 27)
+
+
+def ts_to_iso(ts: Optional[float]) -> Optional[str]:
+    """Format POSIX seconds as ISO 8601 UTC time, None stays None."""
+    if ts is None:
+        return None
+    dt = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+    fraction = f".{dt.microsecond:06d}" if dt.microsecond else ""
+    return f"{dt:%Y-%m-%dT%H:%M:%S}{fraction}Z"
+
+
+def header_time(line: str) -> Optional[float]:
+    """Decode a TIME OF FIRST/LAST OBS line into POSIX seconds."""
+    try:
+        return epoch_seconds(
+            int(line[0:6]),
+            int(line[6:12]),
+            int(line[12:18]),
+            int(line[18:24]),
+            int(line[24:30]),
+            float(line[30:43]),
+        )
+    except ValueError:
+        return None
+
+
+class HeaderScan:
+    """Header fields and time span of a RINEX observation file.
+
+    Attributes:
+        path: Scanned file.
+        size: File size in bytes.
+        version: Format version, e.g. 3.04.
+        file_type: File type character, "O" for observation data.
+        satellite_system: Satellite system character of the file.
+        marker_name, marker_number: Marker of the station.
+        receiver_type, antenna_type: Receiver and antenna types.
+        approx_position: Approximate XYZ position, None if missing.
+        interval: Observation interval in seconds, None if missing.
+        obs_types: Obs codes per system. RINEX 2 files list their obs
+            types once, keyed by satellite_system.
+        time_system: Time system of the header times.
+        time_of_first_obs, time_of_last_obs: Header times in POSIX seconds.
+        first_epoch, last_epoch: Times of the first and last observation
+            epoch in POSIX seconds, None if there is none.
+    """
+
+    __slots__ = (
+        "path",
+        "size",
+        "version",
+        "file_type",
+        "satellite_system",
+        "marker_name",
+        "marker_number",
+        "receiver_type",
+        "antenna_type",
+        "approx_position",
+        "interval",
+        "obs_types",
+        "time_system",
+        "time_of_first_obs",
+        "time_of_last_obs",
+        "first_epoch",
+        "last_epoch",
+        "last_sat_sys",
+    )
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.size = 0
+        self.version = 0.0
+        self.file_type = ""
+        self.satellite_system = ""
+        self.marker_name = ""
+        self.marker_number = ""
+        self.receiver_type = ""
+        self.antenna_type = ""
+        self.approx_position: Optional[List[float]] = None
+        self.interval: Optional[float] = None
+        self.obs_types: Dict[str, List[str]] = {}
+        self.time_system = ""
+        self.time_of_first_obs: Optional[float] = None
+        self.time_of_last_obs: Optional[float] = None
+        self.first_epoch: Optional[float] = None
+        self.last_epoch: Optional[float] = None
+        # System of SYS / # / OBS TYPES continuation lines
+        self.last_sat_sys = ""
+
+    @property
+    def station(self) -> str:
+        """Get the 4 character station code, from the file name without marker name."""
+        code = self.marker_name[:4] or os.path.basename(self.path)[:4]
+        return code.upper()
+
+    @property
+    def is_rinex2(self) -> bool:
+        """Check if the file is a RINEX 2 file."""
+        return int(self.version) == 2
+
+    def set_version_type(self, line: str) -> None:
+        self.version = float(line[:9])
+        self.file_type = line[20:21]
+        self.satellite_system = line[40:41].strip() or "G"
+
+    def set_marker_name(self, line: str) -> None:
+        self.marker_name = line[:60].strip()
+
+    def set_marker_number(self, line: str) -> None:
+        self.marker_number = line[:20].strip()
+
+    def set_receiver(self, line: str) -> None:
+        self.receiver_type = line[20:40].strip()
+
+    def set_antenna(self, line: str) -> None:
+        self.antenna_type = line[20:40].strip()
+
+    def set_approx_position(self, line: str) -> None:
+        self.approx_position = [float(line[0:14]), float(line[14:28]), float(line[28:42])]
+
+    def set_interval(self, line: str) -> None:
+        self.interval = float(line[:10])
+
+    def set_observation_types(self, line: str) -> None:
+        # Continuation lines have a blank count
+        self.obs_types.setdefault(self.satellite_system, []).extend(line[6:60].split())
+
+    def set_sys_obs_types(self, line: str) -> None:
+        if line[0] != " ":
+            self.last_sat_sys = line[0]
+        self.obs_types.setdefault(self.last_sat_sys, []).extend(line[7:60].split())
+
+    def set_first_observation(self, line: str) -> None:
+        self.time_of_first_obs = header_time(line)
+        self.time_system = line[48:51].strip()
+
+    def set_last_observation(self, line: str) -> None:
+        self.time_of_last_obs = header_time(line)
+
+    def parse_header(self, handler: BinaryIO) -> None:
+        """Parse header lines of handler through END OF HEADER.
+
+        Raises:
+            ValueError: If the file does not start with a RINEX observation header.
+        """
+        for i, raw in enumerate(handler):
+            line = raw.decode("ascii", "replace").rstrip("\r\n")
+            label = line[60:].strip()
+            if i == 0 and label != "RINEX VERSION / TYPE":
+                raise ValueError("Missing RINEX VERSION / TYPE")
+            if label == "END OF HEADER":
+                if self.file_type != "O":
+                    raise ValueError(f"Not an observation file: {self.file_type!r}")
+                return
+            if i >= SCAN_HEADER_LINES:
+                break
+            parse = HEADER_LABELS.get(label)
+            if parse is not None:
+                try:
+                    parse(self, line)
+                except (ValueError, IndexError):
+                    logger.debug(f"Invalid {label} in {self.path}: {line!r}")
+        raise ValueError("Missing END OF HEADER")
+
+    def decode_epoch_line(self, line: bytes) -> Optional[Tuple[float, int, int]]:
+        """Decode time, flag and satellite count of an epoch line, None for other lines."""
+        try:
+            if not self.is_rinex2:
+                if not line.startswith(b">"):
+                    return None
+                ts, flag, nos, _ = decode_epoch_line(line)
+            else:
+                text = line.decode("ascii", "replace")
+                if len(text) < 32 or text[18] != ".":
+                    return None
+                if any(text[k] != " " for k in RINEX2_EPOCH_BLANKS):
+                    return None
+                ts, flag, nos, _ = decode_epoch_line_rinex2(text)
+        except ValueError:
+            return None
+        return ts, flag, nos
+
+    def decode_epoch(self, line: bytes) -> Optional[float]:
+        """Decode the time of an observation epoch line, None for other lines."""
+        epoch = self.decode_epoch_line(line)
+        return epoch[0] if epoch is not None and epoch[1] in OBSERVATION_FLAGS else None
+
+    def record_lines(self, flag: int, nos: int) -> int:
+        """Get the number of lines following an epoch line."""
+        if flag not in OBSERVATION_FLAGS or not self.is_rinex2:
+            # Satellite records, or header lines of events
+            return nos
+        obs_count = len(self.obs_types.get(self.satellite_system, []))
+        continuation = (nos - 1) // RINEX2_SATS_PER_LINE if nos else 0
+        return continuation + nos * rinex2_record_lines(obs_count)
+
+    def first_epoch_of(self, handler: BinaryIO) -> Optional[float]:
+        """Find the first observation epoch of the lines of handler."""
+        for line in handler:
+            ts = self.decode_epoch(line)
+            if ts is not None:
+                return ts
+        return None
+
+    def last_epoch_of(self, data: bytes, complete: bool) -> Optional[float]:
+        """Find the last observation epoch in data.
+
+        Args:
+            data: Tail of the file body.
+            complete: data starts at a line start, else its first line is skipped.
+        """
+        lines = data.split(b"\n")
+        if not complete:
+            lines = lines[1:]
+        for line in reversed(lines):
+            ts = self.decode_epoch(line)
+            if ts is not None:
+                return ts
+        return None
+
+    def scan_tail(self, handler: BinaryIO, body: int) -> None:
+        """Find the last epoch by reading backwards from the end of a seekable file.
+
+        Args:
+            handler: Binary file handler.
+            body: Offset of the first line after the header.
+        """
+        tail = SCAN_TAIL_SIZE
+        while True:
+            start = max(body, self.size - tail)
+            handler.seek(start)
+            self.last_epoch = self.last_epoch_of(handler.read(self.size - start), start == body)
+            if self.last_epoch is not None or start == body:
+                return
+            tail *= 2
+
+    def scan_stream(self, handler: BinaryIO) -> None:
+        """Find the last epoch in the last blocks of a stream."""
+        blocks = collections.deque(maxlen=SCAN_TAIL_BLOCKS)
+        complete = True
+        while True:
+            block = handler.read(SCAN_TAIL_SIZE)
+            if not block:
+                break
+            if len(blocks) == blocks.maxlen:
+                complete = False
+            blocks.append(block)
+        self.last_epoch = self.last_epoch_of(b"".join(blocks), complete)
+
+    def scan(self) -> "HeaderScan":
+        """Scan header, first and last epoch of the file.
+
+        Raises:
+            OSError: If the file can not be read.
+            ValueError: If it is not a RINEX observation file.
+        """
+        self.size = os.path.getsize(self.path)
+        seekable = get_decoder(self.path) is None and not is_crinex(
+            strip_compression_suffix(self.path)
+        )
+        with open_binary(self.path, threaded=False) as handler:
+            self.parse_header(handler)
+            if seekable:
+                # The position of a buffered handler is the one after the header
+                body = handler.tell()
+            self.first_epoch = self.first_epoch_of(handler)
+            if self.first_epoch is None:
+                return self
+            if seekable:
+                self.scan_tail(handler, body)
+            else:
+                self.scan_stream(handler)
+        return self
+
+    def scan_epochs(self) -> List[float]:
+        """Scan the header and the times of all observation epochs.
+
+        Records are skipped by the satellite count of their epoch line, they
+        are not decoded.
+
+        Returns:
+            List[float]: Epoch times in POSIX seconds.
+
+        Raises:
+            OSError: If the file can not be read.
+            ValueError: If it is not a RINEX observation file.
+        """
+        self.size = os.path.getsize(self.path)
+        timestamps: List[float] = []
+        with open_binary(self.path, threaded=False) as handler:
+            self.parse_header(handler)
+            lines = iter(handler)
+            for line in lines:
+                epoch = self.decode_epoch_line(line)
+                if epoch is None:
+                    continue
+                ts, flag, nos = epoch
+                if flag in OBSERVATION_FLAGS:
+                    timestamps.append(ts)
+                for _ in itertools.islice(lines, self.record_lines(flag, nos)):
+                    pass
+        if timestamps:
+            self.first_epoch, self.last_epoch = timestamps[0], timestamps[-1]
+        return timestamps
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the inventory entry of the file, times as ISO 8601 UTC."""
+        return {
+            "path": self.path,
+            "station": self.station,
+            "version": self.version,
+            "marker_name": self.marker_name,
+            "marker_number": self.marker_number,
+            "receiver_type": self.receiver_type,
+            "antenna_type": self.antenna_type,
+            "approx_position": self.approx_position,
+            "interval": self.interval,
+            "obs_types": self.obs_types,
+            "time_system": self.time_system,
+            "first_epoch": ts_to_iso(self.first_epoch),
+            "last_epoch": ts_to_iso(self.last_epoch),
+            "size": self.size,
+        }
+
+
+# Field parser of each header label
+HEADER_LABELS: Dict[str, Callable[[HeaderScan, str], None]] = {
+    "RINEX VERSION / TYPE": HeaderScan.set_version_type,
+    "MARKER NAME": HeaderScan.set_marker_name,
+    "MARKER NUMBER": HeaderScan.set_marker_number,
+    "REC # / TYPE / VERS": HeaderScan.set_receiver,
+    "ANT # / TYPE": HeaderScan.set_antenna,
+    "APPROX POSITION XYZ": HeaderScan.set_approx_position,
+    "INTERVAL": HeaderScan.set_interval,
+    "# / TYPES OF OBSERV": HeaderScan.set_observation_types,
+    "SYS / # / OBS TYPES": HeaderScan.set_sys_obs_types,
+    "TIME OF FIRST OBS": HeaderScan.set_first_observation,
+    "TIME OF LAST OBS": HeaderScan.set_last_observation,
+}
+
+
+def scan_file(path: str) -> HeaderScan:
+    """Scan header and time span of a RINEX observation file.
+
+    Raises:
+        OSError: If the file can not be read.
+        ValueError: If it is not a RINEX observation file.
+    """
+    return HeaderScan(path).scan()
+
+
+def inventory_entry(path: str) -> Dict[str, Any]:
+    """Get the inventory entry of a file, a picklable batch task."""
+    return scan_file(path).to_dict()
@@ -0,0 +1,528 @@
+"""Columnar observation store module.
+
+Keeps the observations of a RINEX file in flat per-system columns instead of
+one RinexEpoch/Satellite/Observation object per record. NumPy is used when it
+is installed, otherwise the columns stay ``array.array`` buffers.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import bisect
+from array import array
+from collections import abc
+from typing import Any, Dict, Iterator, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+from rinex_parser.obs_epoch import RinexEpoch, Satellite, Observation
+
+# LLI/SSI value of a blank indicator column
+FLAG_BLANK = 255
+# Internal order of satellite systems in the columnar store and its reports,
+# RINEX 3 output is sorted by obs_epoch.RINEX3_SYS_ORDER
+SAT_SYS_ORDER = "GRECJIS"
+
+
+def has_numpy() -> bool:
+    """Check if numpy backed columns are available."""
+    return np is not None
+
+
+def new_column(typecode: str, values: Sequence[Any] = ()) -> Any:
+    """Create a growable column for the given array typecode.
+
+    Args:
+        typecode: array.array typecode ("d", "B", "I").
+        values: Initial values.
+
+    Returns:
+        array.array: Column buffer.
+    """
+    return array(typecode, values)
+
+
+def as_ndarray(column: Any) -> Any:
+    """Return column as numpy array (zero copy for array.array)."""
+    if np is None or isinstance(column, np.ndarray):
+        return column
+    return np.frombuffer(column, dtype=column.typecode)
+
+
+def extend_column(column: Any, values: Any) -> Any:
+    """Append values to a column and return the (possibly new) column."""
+    if np is not None and isinstance(column, np.ndarray):
+        return np.concatenate([column, np.asarray(values, dtype=column.dtype)])
+    if np is not None and isinstance(values, np.ndarray):
+        column.frombytes(values.astype(column.typecode, copy=False).tobytes())
+    else:
+        column.extend(values)
+    return column
+
+
+def concat_columns(typecode: str, columns: Sequence[Any]) -> Any:
+    """Concatenate columns of the same typecode into one."""
+    if np is not None:
+        return np.concatenate([as_ndarray(c) for c in columns] or [np.empty(0, typecode)])
+    column = new_column(typecode)
+    for other in columns:
+        column.extend(other)
+    return column
+
+
+def take_column(column: Any, rows: Sequence[int]) -> Any:
+    """Select rows from a column."""
+    if np is not None:
+        return as_ndarray(column)[np.asarray(rows, dtype=np.int64)]
+    return array(column.typecode, [column[i] for i in rows])
+
+
+def take_texts(texts: Dict[int, str], rows: Sequence[int]) -> Dict[int, str]:
+    """Select rows from a text column, rows are ascending old row indices."""
+    rows = list(rows)
+    taken = {}
+    for row, text in texts.items():
+        new = bisect.bisect_left(rows, row)
+        if new < len(rows) and rows[new] == row:
+            taken[new] = text
+    return taken
+
+
+def format_value(value: float) -> str:
+    """Format observation value as RINEX F14.3 field (blank for NaN)."""
+    if value != value:
+        return " " * 14
+    return f"{value:14.3f}"
+
+
+def format_flag(flag: int) -> str:
+    """Format LLI/SSI indicator as single character."""
+    if flag == FLAG_BLANK:
+        return " "
+    return str(flag)
+
+
+class SystemColumns:
+    """Observation columns of one satellite system.
+
+    Every row is one satellite record of one epoch.
+
+    Attributes:
+        sat_sys: Satellite system identifier (G, R, E, C, J, I, S).
+        obs_types: Observation codes in header order.
+        epochs: Row to epoch index mapping (uint32).
+        timestamps: Epoch timestamp of each row (float64).
+        prns: Satellite number of each row (uint8).
+        values: Observation value column per obs code (float64, NaN if blank).
+        lli: Loss of lock indicator column per obs code (uint8).
+        ssi: Signal strength indicator column per obs code (uint8).
+        texts: Raw field text by row per obs code, kept for the few values
+            whose F14.3 formatting differs from the text read, e.g. "-.500".
+    """
+
+    __slots__ = (
+        "sat_sys",
+        "obs_types",
+        "epochs",
+        "timestamps",
+        "prns",
+        "values",
+        "lli",
+        "ssi",
+        "texts",
+    )
+
+    def __init__(self, sat_sys: str, obs_types: List[str]) -> None:
+        """Initialize empty columns.
+
+        Args:
+            sat_sys: Satellite system identifier.
+            obs_types: Observation codes of the system.
+        """
+        self.sat_sys: str = sat_sys
+        self.obs_types: List[str] = list(obs_types)
+        self.epochs = new_column("I")
+        self.timestamps = new_column("d")
+        self.prns = new_column("B")
+        self.values: List[Any] = [new_column("d") for _ in self.obs_types]
+        self.lli: List[Any] = [new_column("B") for _ in self.obs_types]
+        self.ssi: List[Any] = [new_column("B") for _ in self.obs_types]
+        self.texts: List[Dict[int, str]] = [{} for _ in self.obs_types]
+
+    def __len__(self) -> int:
+        return len(self.prns)
+
+    def append(
+        self,
+        epoch: int,
+        timestamp: float,
+        prn: int,
+        values: Sequence[float],
+        lli: Sequence[int],
+        ssi: Sequence[int],
+    ) -> None:
+        """Append one satellite record.
+
+        Args:
+            epoch: Epoch index within the store.
+            timestamp: Epoch timestamp.
+            prn: Satellite number.
+            values: Observation values in obs_types order.
+            lli: Loss of lock indicators in obs_types order.
+            ssi: Signal strength indicators in obs_types order.
+        """
+        self.epochs.append(epoch)
+        self.timestamps.append(timestamp)
+        self.prns.append(prn)
+        for k in range(len(self.obs_types)):
+            self.values[k].append(values[k])
+            self.lli[k].append(lli[k])
+            self.ssi[k].append(ssi[k])
+
+    def extend(
+        self,
+        epochs: Any,
+        timestamps: Any,
+        prns: Any,
+        values: List[Any],
+        lli: List[Any],
+        ssi: List[Any],
+        texts: List[Dict[int, str]] | None = None,
+    ) -> None:
+        """Append a block of satellite records, one sequence per column.
+
+        Rows of texts count from the first record of the block.
+        """
+        for k, block_texts in enumerate(texts or ()):
+            offset = len(self)
+            self.texts[k].update((offset + row, text) for row, text in block_texts.items())
+        self.epochs = extend_column(self.epochs, epochs)
+        self.timestamps = extend_column(self.timestamps, timestamps)
+        self.prns = extend_column(self.prns, prns)
+        for k in range(len(self.obs_types)):
+            self.values[k] = extend_column(self.values[k], values[k])
+            self.lli[k] = extend_column(self.lli[k], lli[k])
+            self.ssi[k] = extend_column(self.ssi[k], ssi[k])
+
+    def finalize(self) -> None:
+        """Convert columns to numpy arrays if numpy is available."""
+        self.epochs = as_ndarray(self.epochs)
+        self.timestamps = as_ndarray(self.timestamps)
+        self.prns = as_ndarray(self.prns)
+        self.values = [as_ndarray(c) for c in self.values]
+        self.lli = [as_ndarray(c) for c in self.lli]
+        self.ssi = [as_ndarray(c) for c in self.ssi]
+
+    def column(self, obs_code: str) -> tuple:
+        """Get value, LLI and SSI column of an observation code.
+
+        Args:
+            obs_code: Observation code (e.g. "C1C").
+
+        Returns:
+            tuple: (values, lli, ssi) columns.
+
+        Raises:
+            KeyError: If obs_code is not part of this system.
+        """
+        try:
+            k = self.obs_types.index(obs_code)
+        except ValueError:
+            raise KeyError(f"{self.sat_sys}: unknown obs type {obs_code}")
+        return self.values[k], self.lli[k], self.ssi[k]
+
+    def to_arrays(self) -> tuple:
+        """Get all columns as flat tuple (see ObsStore.to_arrays)."""
+        return (
+            self.epochs,
+            self.timestamps,
+            self.prns,
+            list(self.values),
+            list(self.lli),
+            list(self.ssi),
+            list(self.texts),
+        )
+
+    def sat_ids(self) -> List[str]:
+        """Get satellite identifier of each row."""
+        return [f"{self.sat_sys}{prn:02d}" for prn in self.prns]
+
+    def take(self, rows: Sequence[int], epochs: Sequence[int]) -> "SystemColumns":
+        """Create new columns from selected rows.
+
+        Args:
+            rows: Row indices to keep.
+            epochs: Ascending old epoch indices, position is the new index.
+
+        Returns:
+            SystemColumns: Columns containing the selected rows.
+        """
+        other = SystemColumns(self.sat_sys, self.obs_types)
+        if np is not None:
+            other.epochs = np.searchsorted(
+                np.asarray(epochs, dtype=np.uint32), take_column(self.epochs, rows)
+            ).astype(np.uint32)
+        else:
+            epoch_map = {old: new for new, old in enumerate(epochs)}
+            other.epochs = new_column("I", [epoch_map[self.epochs[i]] for i in rows])
+        other.timestamps = take_column(self.timestamps, rows)
+        other.prns = take_column(self.prns, rows)
+        other.values = [take_column(c, rows) for c in self.values]
+        other.lli = [take_column(c, rows) for c in self.lli]
+        other.ssi = [take_column(c, rows) for c in self.ssi]
+        other.texts = [take_texts(texts, rows) if texts else {} for texts in self.texts]
+        return other
+
+    def row_range(self, epoch: int) -> range:
+        """Get rows belonging to an epoch index."""
+        beg = bisect.bisect_left(self.epochs, epoch)
+        end = bisect.bisect_right(self.epochs, epoch, lo=beg)
+        return range(beg, end)
+
+    def to_satellites(self, rows: range) -> List[Satellite]:
+        """Build Satellite objects for a contiguous row range."""
+        beg, end = rows.start, rows.stop
+        prns = self.prns[beg:end].tolist()
+        fields = [
+            (
+                obs_code,
+                self.values[k][beg:end].tolist(),
+                self.lli[k][beg:end].tolist(),
+                self.ssi[k][beg:end].tolist(),
+                self.texts[k],
+            )
+            for k, obs_code in enumerate(self.obs_types)
+        ]
+        satellites = []
+        for i, prn in enumerate(prns):
+            observations = [
+                Observation(
+                    code=obs_code,
+                    value=texts.get(beg + i) or format_value(values[i]),
+                    lli=format_flag(lli[i]),
+                    ss=format_flag(ssi[i]),
+                )
+                for obs_code, values, lli, ssi, texts in fields
+            ]
+            satellites.append(Satellite(f"{self.sat_sys}{prn:02d}", observations))
+        return satellites
+
+
+class ObsStore:
+    """Columnar store of all epochs of a RINEX observation file.
+
+    Attributes:
+        sys_obs_types: Observation codes per satellite system, shared with the
+            header so that removed codes are not written. The column layout
+            is copied when the store is created.
+        rcv_clock_offset: Value handed to RinexEpoch objects of the view.
+        timestamps: Epoch timestamps (float64).
+        epoch_flags: Epoch flags (uint8).
+        systems: SystemColumns per satellite system.
+    """
+
+    def __init__(
+        self,
+        sys_obs_types: Dict[str, List[str]],
+        rcv_clock_offset: Any = None,
+    ) -> None:
+        """Initialize an empty store.
+
+        Args:
+            sys_obs_types: Observation codes per satellite system.
+            rcv_clock_offset: Header RCV CLOCK OFFS APPL value.
+        """
+        self.sys_obs_types: Dict[str, List[str]] = sys_obs_types
+        self.rcv_clock_offset = rcv_clock_offset
+        self.timestamps = new_column("d")
+        self.epoch_flags = new_column("B")
+        self.systems: Dict[str, SystemColumns] = {
+            sat_sys: SystemColumns(sat_sys, obs_types)
+            for sat_sys, obs_types in self.sys_obs_types.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def epochs(self) -> "RinexEpochView":
+        """Lazy sequence of RinexEpoch objects."""
+        return RinexEpochView(self)
+
+    def add_epoch(self, timestamp: float, epoch_flag: int = 0) -> int:
+        """Register a new epoch.
+
+        Epoch lines are written with rcv_clock_offset, like RinexEpoch
+        objects, so the clock offset of the epoch line is not stored.
+
+        Returns:
+            int: Index of the new epoch.
+        """
+        self.timestamps.append(timestamp)
+        self.epoch_flags.append(epoch_flag)
+        return len(self.timestamps) - 1
+
+    def finalize(self) -> "ObsStore":
+        """Convert all columns to numpy arrays if numpy is available."""
+        self.timestamps = as_ndarray(self.timestamps)
+        self.epoch_flags = as_ndarray(self.epoch_flags)
+        for columns in self.systems.values():
+            columns.finalize()
+        return self
+
+    def to_arrays(self) -> tuple:
+        """Get all columns as plain arrays, e.g. to return them from a process.
+
+        Returns:
+            tuple: (timestamps, epoch flags, columns per system as
+                returned by SystemColumns.to_arrays())
+        """
+        return (
+            self.timestamps,
+            self.epoch_flags,
+            {sat_sys: columns.to_arrays() for sat_sys, columns in self.systems.items()},
+        )
+
+    @classmethod
+    def concatenate(
+        cls,
+        sys_obs_types: Dict[str, List[str]],
+        rcv_clock_offset: Any,
+        parts: Sequence[tuple],
+    ) -> "ObsStore":
+        """Create a store from consecutive parts returned by to_arrays().
+
+        Epoch indices of each part are shifted behind the preceding parts.
+
+        Args:
+            sys_obs_types: Observation codes per satellite system.
+            rcv_clock_offset: Header RCV CLOCK OFFS APPL value.
+            parts: Column tuples of stores sharing sys_obs_types, in order.
+
+        Returns:
+            ObsStore: Finalized store of all parts.
+        """
+        store = cls(sys_obs_types, rcv_clock_offset)
+        store.timestamps = concat_columns("d", [part[0] for part in parts])
+        store.epoch_flags = concat_columns("B", [part[1] for part in parts])
+        offsets = [0]
+        for part in parts[:-1]:
+            offsets.append(offsets[-1] + len(part[0]))
+        for sat_sys, columns in store.systems.items():
+            arrays = [part[2][sat_sys] for part in parts]
+            shifted = []
+            for offset, (epochs, *_) in zip(offsets, arrays):
+                if np is not None:
+                    shifted.append(as_ndarray(epochs) + np.uint32(offset))
+                else:
+                    shifted.append(new_column("I", [e + offset for e in epochs]))
+            columns.epochs = concat_columns("I", shifted)
+            columns.timestamps = concat_columns("d", [a[1] for a in arrays])
+            columns.prns = concat_columns("B", [a[2] for a in arrays])
+            for k in range(len(columns.obs_types)):
+                columns.values[k] = concat_columns("d", [a[3][k] for a in arrays])
+                columns.lli[k] = concat_columns("B", [a[4][k] for a in arrays])
+                columns.ssi[k] = concat_columns("B", [a[5][k] for a in arrays])
+                rows = 0
+                for a in arrays:
+                    columns.texts[k].update((rows + row, text) for row, text in a[6][k].items())
+                    rows += len(a[2])
+        return store.finalize()
+
+    def sat_count(self) -> int:
+        """Get total number of satellite records."""
+        return sum(len(columns) for columns in self.systems.values())
+
+    def select_epochs(self, epochs: Sequence[int]) -> "ObsStore":
+        """Create a new store containing only the given epochs.
+
+        Args:
+            epochs: Ascending epoch indices to keep.
+
+        Returns:
+            ObsStore: New store.
+        """
+        epochs = [int(i) for i in epochs]
+        other = ObsStore(self.sys_obs_types, self.rcv_clock_offset)
+        other.timestamps = take_column(self.timestamps, epochs)
+        other.epoch_flags = take_column(self.epoch_flags, epochs)
+        for sat_sys, columns in self.systems.items():
+            if np is not None:
+                rows = np.flatnonzero(np.isin(as_ndarray(columns.epochs), epochs))
+            else:
+                keep = set(epochs)
+                rows = [i for i, e in enumerate(columns.epochs) if e in keep]
+            other.systems[sat_sys] = columns.take(rows, epochs)
+        return other.finalize()
+
+    def filter_epochs(self, keep) -> "ObsStore":
+        """Create a new store with epochs whose timestamp passes keep(ts)."""
+        return self.select_epochs(
+            [i for i, ts in enumerate(self.timestamps) if keep(ts)]
+        )
+
+    def found_obs_types(self) -> Dict[str, set]:
+        """Get observation codes that carry at least one value per system."""
+        found = {}
+        for sat_sys, columns in self.systems.items():
+            found[sat_sys] = set()
+            for obs_type, values in zip(columns.obs_types, columns.values):
+                if np is not None:
+                    has_data = bool(np.any(~np.isnan(as_ndarray(values))))
+                else:
+                    has_data = any(v == v for v in values)
+                if has_data:
+                    found[sat_sys].add(obs_type)
+        return found
+
+    def has_satellite_system(self, sat_sys: str) -> bool:
+        """Check if a satellite system has any records."""
+        columns = self.systems.get(sat_sys[0].upper())
+        return columns is not None and len(columns) > 0
+
+    def epoch(self, index: int) -> RinexEpoch:
+        """Build the RinexEpoch object of an epoch index."""
+        satellites = []
+        for columns in self.systems.values():
+            satellites += columns.to_satellites(columns.row_range(index))
+        return RinexEpoch(
+            timestamp=float(self.timestamps[index]),
+            observation_types=self.sys_obs_types,
+            satellites=satellites,
+            epoch_flag=int(self.epoch_flags[index]),
+            rcv_clock_offset=self.rcv_clock_offset,
+        )
+
+
+class RinexEpochView(abc.Sequence):
+    """Read-only list-like view that creates RinexEpoch objects on access."""
+
+    __slots__ = ("store",)
+
+    def __init__(self, store: ObsStore) -> None:
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.store.epoch(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("epoch index out of range")
+        return self.store.epoch(index)
+
+    def __iter__(self) -> Iterator[RinexEpoch]:
+        for i in range(len(self)):
+            yield self.store.epoch(i)
+
+    def __add__(self, other) -> List[RinexEpoch]:
+        return list(self) + list(other)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
@@ -0,0 +1,206 @@
+"""Template compiled RINEX 3 writer for columnar stores.
+
+The output layout of an ObsStore only depends on the header, so it is
+compiled once instead of looking up every header obs code for every
+satellite: per system a line template with one F14.3 value and two flag
+fields per header obs code, bound to the column holding that code. Epochs
+are formatted in batches straight from the columns, each batch is a single
+string written at once. Values kept as raw text by the store are written as
+such, so the output is the same as RinexEpoch.to_rinex3() of the epochs of
+the store.
+
+Created on Oct 18, 2026
+Author: jurgen
+"""
+
+import bisect
+from typing import BinaryIO, Dict, Iterator, List, Sequence, Tuple
+
+from rinex_parser.logger import logger
+from rinex_parser.obs_epoch import RINEX3_SYS_ORDER, ts_to_epoch
+from rinex_parser.obs_store import FLAG_BLANK, ObsStore, SystemColumns, np
+
+# Epochs formatted per batch
+BATCH_EPOCHS = 512
+# Minimum number of bytes collected before writing them
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+
+BLANK_VALUE = " " * 14
+BLANK_FIELD = " " * 16
+# A NaN value formatted as F14.3, replaced by a blank value
+NAN_VALUE = f"{float('nan'):14.3f}"
+# Character of each LLI/SSI column value
+FLAG_CHARS = tuple(" " if i == FLAG_BLANK else str(i) for i in range(256))
+
+
+class SystemLayout:
+    """Compiled record layout of a satellite system.
+
+    Attributes:
+        columns: SystemColumns of the system.
+        template: printf style record line, "%02d" for the PRN followed by
+            "%14.3f%s%s" for each stored or 16 blanks for each missing
+            header obs code.
+        fields: Column index of each "%14.3f%s%s" group of template.
+        texts: Line position, sorted rows and raw texts of each field with
+            values kept as text (see SystemColumns.texts).
+    """
+
+    __slots__ = ("columns", "template", "fields", "texts")
+
+    def __init__(self, columns: SystemColumns, obs_codes: Sequence[str]) -> None:
+        self.columns = columns
+        self.fields: List[int] = []
+        self.texts: List[Tuple[int, List[int], Dict[int, str]]] = []
+        parts = [columns.sat_sys.replace("%", "%%"), "%02d"]
+        for j, obs_code in enumerate(obs_codes):
+            # The first column wins, like the search in RinexEpoch.to_rinex3()
+            if obs_code in columns.obs_types:
+                k = columns.obs_types.index(obs_code)
+                self.fields.append(k)
+                parts.append("%14.3f%s%s")
+                if columns.texts[k]:
+                    # sat id and 16 characters per field
+                    pos = 3 + 16 * j
+                    self.texts.append((pos, sorted(columns.texts[k]), columns.texts[k]))
+            else:
+                parts.append(BLANK_FIELD)
+        self.template = "".join(parts)
+
+    def format_rows(self, beg: int, end: int) -> List[str]:
+        """Format record lines of the rows [beg, end)."""
+        columns = self.columns
+        args = [columns.prns[beg:end].tolist()]
+        for k in self.fields:
+            args.append(columns.values[k][beg:end].tolist())
+            args.append(list(map(FLAG_CHARS.__getitem__, columns.lli[k][beg:end].tolist())))
+            args.append(list(map(FLAG_CHARS.__getitem__, columns.ssi[k][beg:end].tolist())))
+        template = self.template
+        if not self.texts:
+            return [
+                (template % row).replace(NAN_VALUE, BLANK_VALUE).rstrip() for row in zip(*args)
+            ]
+        lines = [(template % row).replace(NAN_VALUE, BLANK_VALUE) for row in zip(*args)]
+        for pos, rows, texts in self.texts:
+            for row in rows[bisect.bisect_left(rows, beg) : bisect.bisect_left(rows, end)]:
+                line = lines[row - beg]
+                lines[row - beg] = line[:pos] + texts[row] + line[pos + len(BLANK_VALUE) :]
+        return [line.rstrip() for line in lines]
+
+
+def compile_layouts(
+    store: ObsStore, sys_obs_types: Dict[str, List[str]] | None = None
+) -> List[SystemLayout]:
+    """Compile the record layouts of the systems written for store.
+
+    Systems are ordered as in RinexEpoch.to_rinex3(). Systems of the store
+    missing in sys_obs_types or in that order are not written, as there.
+
+    Args:
+        store: Columnar store.
+        sys_obs_types: Output obs codes per system (default: store.sys_obs_types).
+
+    Returns:
+        List[SystemLayout]: Layouts in output order.
+    """
+    if sys_obs_types is None:
+        sys_obs_types = store.sys_obs_types
+    layouts = []
+    for sat_sys in RINEX3_SYS_ORDER:
+        if sat_sys in store.systems and sat_sys in sys_obs_types:
+            layouts.append(SystemLayout(store.systems[sat_sys], sys_obs_types[sat_sys]))
+    for sat_sys, columns in store.systems.items():
+        if len(columns) and not any(layout.columns is columns for layout in layouts):
+            logger.warning(f"Missing satellite system data: {sat_sys!r}")
+    return layouts
+
+
+def epoch_bounds(columns: SystemColumns, beg: int, end: int) -> List[int]:
+    """Get the first row of each epoch index in [beg, end], end exclusive."""
+    if np is not None and isinstance(columns.epochs, np.ndarray):
+        return np.searchsorted(columns.epochs, np.arange(beg, end + 1)).tolist()
+    bounds = [bisect.bisect_left(columns.epochs, beg)]
+    for epoch in range(beg + 1, end + 1):
+        bounds.append(bisect.bisect_left(columns.epochs, epoch, bounds[-1]))
+    return bounds
+
+
+def iter_rinex3_batches(
+    store: ObsStore,
+    sys_obs_types: Dict[str, List[str]] | None = None,
+    batch_size: int = BATCH_EPOCHS,
+) -> Iterator[Tuple[int, str]]:
+    """Format the epochs of store in RINEX 3 format, batch by batch.
+
+    Args:
+        store: Columnar store.
+        sys_obs_types: Output obs codes per system (default: store.sys_obs_types).
+        batch_size: Epochs per batch.
+
+    Yields:
+        Tuple[int, str]: Number of epochs and their text, each epoch
+            terminated by a newline.
+    """
+    layouts = compile_layouts(store, sys_obs_types)
+    rco = store.rcv_clock_offset if store.rcv_clock_offset else " "
+    for beg in range(0, len(store), batch_size):
+        end = min(beg + batch_size, len(store))
+        counts = [0] * (end - beg)
+        for columns in store.systems.values():
+            bounds = epoch_bounds(columns, beg, end)
+            counts = [n + b - a for n, a, b in zip(counts, bounds, bounds[1:])]
+        records = []
+        for layout in layouts:
+            bounds = epoch_bounds(layout.columns, beg, end)
+            lines = layout.format_rows(bounds[0], bounds[-1])
+            first = bounds[0]
+            records.append([lines[a - first : b - first] for a, b in zip(bounds, bounds[1:])])
+        timestamps = store.timestamps[beg:end].tolist()
+        flags = store.epoch_flags[beg:end].tolist()
+        output = []
+        for i, (ts, flag, nos) in enumerate(zip(timestamps, flags, counts)):
+            output.append(f"{ts_to_epoch(ts)}  {flag}{nos:3d}{'':6s}{rco}".strip())
+            size = len(output)
+            for system_records in records:
+                output += system_records[i]
+            if len(output) == size:
+                # Epoch without written records, to_rinex3() ends it with "\n"
+                output.append("")
+        output.append("")
+        yield end - beg, "\n".join(output)
+
+
+def write_rinex3_epochs(
+    handler: BinaryIO,
+    store: ObsStore,
+    sys_obs_types: Dict[str, List[str]] | None = None,
+    buffer_size: int = WRITE_BUFFER_SIZE,
+) -> int:
+    """Write all epochs of store in RINEX 3 format.
+
+    Batches are collected until buffer_size bytes are pending, so the
+    handler sees few large writes.
+
+    Args:
+        handler: Binary file handler.
+        store: Columnar store.
+        sys_obs_types: Output obs codes per system (default: store.sys_obs_types).
+        buffer_size: Minimum size of each write.
+
+    Returns:
+        int: Number of written epochs.
+    """
+    count = 0
+    pending: List[bytes] = []
+    size = 0
+    for n, text in iter_rinex3_batches(store, sys_obs_types):
+        count += n
+        pending.append(text.encode())
+        size += len(pending[-1])
+        if size >= buffer_size:
+            handler.write(b"".join(pending))
+            pending.clear()
+            size = 0
+    if pending:
+        handler.write(b"".join(pending))
+    return count
@@ -2,15 +2,12 @@ from ast import arg
 import os
 import glob
 import argparse
-import queue
-import time
-import threading
 import pathlib
 import logging
-import traceback
-from typing import List, Tuple
+from typing import Tuple
 
 from rinex_parser import __version__
+from rinex_parser.batch import iter_batch
 from rinex_parser.obs_parser import RinexParser, EPOCH_MAX, EPOCH_MIN
 from rinex_parser.obs_header import Rinex3ObsHeader
 from rinex_parser.logger import logger
@@ -79,7 +76,7 @@ parser.add_argument(
     "--threads",
     type=int,
     default=1,
-    help="Number of threads to process rinex files",
+    help="Number of worker processes to parse rinex files",
 )
 parser.add_argument(
     "--remove-sat-pnr",
@@ -100,25 +97,6 @@ parser.add_argument(
     help="Remove observation type (G1C,R1C,E8I,C6Q).",
 )
 
-LIST_LOCK = threading.Lock()
-
-
-def run_thread(
-    queue: queue.Queue, namespace: dict, path_list: List[Tuple[str, RinexParser]]
-):
-    while not queue.empty():
-        try:
-            path = queue.get()
-            logger.debug(f"Process {path}")
-            with LIST_LOCK:
-                path_list.append(run_single(path, **namespace))
-                logger.debug(f"Created {path_list[-1][0]}")
-            queue.task_done()
-        except Exception as e:
-            traceback.print_exc()
-            pass
-
-
 def run():
     args = parser.parse_args()
     # paths = glob.glob(args.finp)
@@ -133,16 +111,9 @@ def run():
             handler.setLevel(logging.DEBUG)
         logger.setLevel(logging.DEBUG)
 
-    parse_queue = queue.Queue()
-    parse_threads: List[threading.Thread] = []
-
-    # Fill Queue with tasks
     for path in paths:
         assert os.path.exists(path)
-        logger.debug(f"Queuing {path}")
-        parse_queue.put(path)
 
-    # Start Threads
     kwargs = {
         "fout": args.fout,
         "rnx_version": args.rnx_version,
@@ -155,18 +126,19 @@ def run():
         "filter_sat_pnr": args.remove_sat_pnr,
         "filter_sat_obs": args.remove_sat_obs,
     }
-    for _ in range(args.threads):
-        t = threading.Thread(
-            target=run_thread, args=(parse_queue, kwargs, parsed_files)
-        )
-        parse_threads.append(t)
-        t.start()
-
-    while not parse_queue.empty():
-        time.sleep(0.01)
-
-    for t in parse_threads:
-        t.join()
+    # Files are parsed and written in worker processes, parsers are only
+    # sent back to be merged
+    for result in iter_batch(
+        run_single, paths, workers=args.threads, merge=args.merge, **kwargs
+    ):
+        if not result.ok:
+            logger.error(f"Error in processing {result.path}: {result.message}")
+            logger.debug(result.error)
+        elif args.merge:
+            logger.debug(f"Parsed {result.path}")
+            parsed_files.append(result.value)
+        else:
+            logger.debug(f"Created {result.value}")
     logger.debug(f"Finished processing input file(s)")
 
     for item in parsed_files:
@@ -177,49 +149,38 @@ def run():
 
     for station in grouped_files.keys():
         for i, item in enumerate(grouped_files[station]):
-            if args.merge:
-                logger.debug("Start merging")
-                if i == 0:
-                    rnx_path, rnx_parser = grouped_files[station][0]
-                else:
-                    rnx_parser: RinexParser
-                    # TODO check if marker names are the same...
-                    rnx_parser2: RinexParser = grouped_files[station][i][1]
-                    rnx_path2: str = grouped_files[station][i][0]
-                    # rnx_parser.rinex_reader.header.set_comment(f"Add file {rnx_path2}")
-                    if not args.use_raw:
-                        for sat_sys in rnx_parser.rinex_reader.found_obs_types.keys():
-                            if (
-                                sat_sys in rnx_parser2.rinex_reader.found_obs_types
-                                and set(
-                                    rnx_parser.rinex_reader.found_obs_types[sat_sys]
-                                )
-                                == set(
-                                    rnx_parser2.rinex_reader.found_obs_types[sat_sys]
-                                )
-                            ):
-                                rnx_parser.rinex_reader.rinex_epochs += (
-                                    rnx_parser2.rinex_reader.rinex_epochs
-                                )
-                            else:
-                                logger.warning(
-                                    f"Sat obs types do not align [{sat_sys}, {rnx_path}, {rnx_path2}]"
-                                )
-                    else:
-                        logger.warning("Merging epochs without checking obs types.")
-                        rnx_parser.rinex_reader.rinex_epochs += (
-                            rnx_parser2.rinex_reader.rinex_epochs
-                        )
-
-                # generate rinex after last item
-                if i == len(grouped_files[station]) - 1:
-                    rnx_parser.to_rinex3(country=args.country, use_raw=args.use_raw)
-
+            logger.debug("Start merging")
+            if i == 0:
+                rnx_path, rnx_parser = grouped_files[station][0]
             else:
-                rnx_path, rnx_parser = grouped_files[station][i]
                 rnx_parser: RinexParser
-                rnx_path: str
-                rnx_parser.to_rinex3(country=args.country)
+                # TODO check if marker names are the same...
+                rnx_parser2: RinexParser = grouped_files[station][i][1]
+                rnx_path2: str = grouped_files[station][i][0]
+                # rnx_parser.rinex_reader.header.set_comment(f"Add file {rnx_path2}")
+                if not args.use_raw:
+                    for sat_sys in rnx_parser.rinex_reader.found_obs_types.keys():
+                        if (
+                            sat_sys in rnx_parser2.rinex_reader.found_obs_types
+                            and set(rnx_parser.rinex_reader.found_obs_types[sat_sys])
+                            == set(rnx_parser2.rinex_reader.found_obs_types[sat_sys])
+                        ):
+                            rnx_parser.rinex_reader.rinex_epochs += (
+                                rnx_parser2.rinex_reader.rinex_epochs
+                            )
+                        else:
+                            logger.warning(
+                                f"Sat obs types do not align [{sat_sys}, {rnx_path}, {rnx_path2}]"
+                            )
+                else:
+                    logger.warning("Merging epochs without checking obs types.")
+                    rnx_parser.rinex_reader.rinex_epochs += (
+                        rnx_parser2.rinex_reader.rinex_epochs
+                    )
+
+            # generate rinex after last item
+            if i == len(grouped_files[station]) - 1:
+                write_rinex(rnx_parser, rnx_path)
 
     if args.delete:
         for path in paths:
@@ -227,6 +188,14 @@ def run():
             pathlib.Path.unlink(path)
 
 
+def write_rinex(rnx_parser: RinexParser, out_file: str) -> str:
+    """Write header and epochs of rnx_parser as RINEX 3 to out_file."""
+    with open(out_file, "wb", buffering=1 << 20) as handler:
+        rnx_parser.rinex_reader.write_rinex3(handler, rnx_parser.rinex_epochs)
+    logger.info(f"Done writing to file {out_file}.")
+    return out_file
+
+
 def run_single(
     finp: str,
     fout: str,
@@ -239,7 +208,13 @@ def run_single(
     filter_sat_sys: str = "",
     filter_sat_pnr: str = "",
     filter_sat_obs: str = "",
-) -> Tuple[str, RinexParser]:
+    merge: bool = False,
+) -> str | Tuple[str, RinexParser]:
+    """Parse finp and write it to its output file.
+
+    With merge nothing is written, the output path and the parser are
+    returned to be merged with the other files of the station.
+    """
 
     rnx_parser = RinexParser(
         rinex_file=finp,
@@ -324,4 +299,6 @@ def run_single(
         out_file = os.path.join(
             os.path.dirname(finp), rnx_parser.get_rx3_long(country=country)
         )
-    return (out_file, rnx_parser)
+    if merge:
+        return (out_file, rnx_parser)
+    return write_rinex(rnx_parser, out_file)
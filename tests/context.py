@@ -6,3 +6,199 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import rinex_parser
+
+RINEX3_SAMPLE_OBS_TYPES = {
+    "G": ["C1C", "L1C", "S1C", "C2W", "L2W", "S2W"],
+    "R": ["C1C", "L1C", "S1C"],
+    "E": ["C1C", "L1C", "S1C", "C5Q", "L5Q", "S5Q"],
+}
+RINEX3_SAMPLE_SATELLITES = {
+    "G": ["G01", "G05", "G12", "G24", "G30"],
+    "R": ["R03", "R17"],
+    "E": ["E01", "E11", "E26", "E33"],
+}
+# 2025-03-16 00:00:00 UTC
+RINEX3_SAMPLE_START = 1742083200.0
+
+
+def rinex3_sample(epochs: int = 120, interval: int = 1, skip=(40, 41, 42)) -> str:
+    """Create a deterministic RINEX 3 observation file as string.
+
+    Epochs in skip are left out to produce a gap.
+    """
+    lines = [
+        f"{'     3.04':20s}{'OBSERVATION DATA':20s}{'M (MIXED)':20s}RINEX VERSION / TYPE",
+        f"{'sample':20s}{'rxp':20s}{'20250316 000000 UTC':20s}PGM / RUN BY / DATE",
+        f"{'SAMP':60s}MARKER NAME",
+        f"{'12345M001':60s}MARKER NUMBER",
+        f"{'GEODETIC':20s}{'':40s}MARKER TYPE",
+        f"{'OBSERVER':20s}{'AGENCY':40s}OBSERVER / AGENCY",
+        f"{'123':20s}{'RECEIVER':20s}{'1.0':20s}REC # / TYPE / VERS",
+        f"{'456':20s}{'ANTENNA':20s}{'':20s}ANT # / TYPE",
+        f"{4194424.1:14.4f}{1162702.4:14.4f}{4647245.2:14.4f}{'':18s}APPROX POSITION XYZ",
+        f"{0.1:14.4f}{0.0:14.4f}{0.0:14.4f}{'':18s}ANTENNA: DELTA H/E/N",
+    ]
+    for sat_sys, obs_types in RINEX3_SAMPLE_OBS_TYPES.items():
+        codes = "".join(f" {code}" for code in obs_types)
+        lines.append(f"{sat_sys}  {len(obs_types):3d}{codes:54s}SYS / # / OBS TYPES")
+    lines += [
+        f"{interval:10.3f}{'':50s}INTERVAL",
+        "  2025    03    16    00    00    0.0000000     GPS         TIME OF FIRST OBS",
+        f"{'':60s}END OF HEADER",
+    ]
+    for k in range(epochs):
+        if k in skip:
+            continue
+        second = k * interval
+        records = []
+        for sat_sys, sat_ids in RINEX3_SAMPLE_SATELLITES.items():
+            for j, sat_id in enumerate(sat_ids):
+                if (k + j) % 7 == 6:
+                    continue
+                fields = []
+                for i, code in enumerate(RINEX3_SAMPLE_OBS_TYPES[sat_sys]):
+                    if (k + i + j) % 11 == 10:
+                        fields.append(" " * 16)
+                        continue
+                    base = 20000000.0 + 1000.0 * j + 0.125 * k + 7.5 * i
+                    if code[0] == "L":
+                        value = base * 5.25
+                        lli = "1" if (k + j) % 13 == 0 else " "
+                    elif code[0] == "S":
+                        value = 30.0 + j + i * 0.25
+                        lli = " "
+                    else:
+                        value = base
+                        lli = " "
+                    ssi = str(5 + (k + i) % 4) if code[0] != "S" else " "
+                    fields.append(f"{value:14.3f}{lli}{ssi}")
+                records.append(f"{sat_id}{''.join(fields)}".rstrip())
+        hh, rest = divmod(second, 3600)
+        mm, ss = divmod(rest, 60)
+        lines.append(
+            f"> 2025 03 16 {hh:02d} {mm:02d} {ss:10.7f}  0{len(records):3d}"
+        )
+        lines += records
+    return "\n".join(lines) + "\n"
+
+
+def write_rinex3_sample(directory: str, **kwargs) -> str:
+    """Write rinex3_sample() into directory and return the file path."""
+    path = os.path.join(directory, "SAMP00AUT_R_20250750000_01H_01S_MO.rnx")
+    with open(path, "w") as handler:
+        handler.write(rinex3_sample(**kwargs))
+    return path
+
+
+RINEX2_SAMPLE_OBS_TYPES = ["C1", "L1", "L2", "P2", "S1", "S2", "D1"]
+RINEX2_SAMPLE_SATELLITES = [
+    "G01", "G05", "G07", "G12", "G13", "G15",
+    "G17", "G19", "G24", "G30", "R03", "R17", "R22",
+]
+
+
+def rinex2_sample(epochs: int = 60, interval: int = 1, skip=(20, 21)) -> str:
+    """Create a deterministic RINEX 2.11 observation file as string.
+
+    13 satellites need a continuation epoch line and 7 observation types
+    need two data lines per satellite.
+    """
+    codes = "".join(f"{code:>6s}" for code in RINEX2_SAMPLE_OBS_TYPES)
+    lines = [
+        f"{'     2.11':20s}{'OBSERVATION DATA':20s}{'M (MIXED)':20s}RINEX VERSION / TYPE",
+        f"{'sample':20s}{'rxp':20s}{'20250316 000000 UTC':20s}PGM / RUN BY / DATE",
+        f"{'SAMP':60s}MARKER NAME",
+        f"{len(RINEX2_SAMPLE_OBS_TYPES):6d}{codes:54s}# / TYPES OF OBSERV",
+        f"{interval:10.3f}{'':50s}INTERVAL",
+        "  2025     3    16     0     0    0.0000000     GPS         TIME OF FIRST OBS",
+        f"{'':60s}END OF HEADER",
+    ]
+    for k in range(epochs):
+        if k in skip:
+            continue
+        hh, rest = divmod(k * interval, 3600)
+        mm, ss = divmod(rest, 60)
+        sats = "".join(RINEX2_SAMPLE_SATELLITES)
+        lines.append(
+            f" 25  3 16 {hh:2d} {mm:2d} {ss:10.7f}  0{len(RINEX2_SAMPLE_SATELLITES):3d}"
+            f"{sats[:36]}"
+        )
+        lines.append(f"{'':32s}{sats[36:]}")
+        for j, _ in enumerate(RINEX2_SAMPLE_SATELLITES):
+            fields = []
+            for i, code in enumerate(RINEX2_SAMPLE_OBS_TYPES):
+                if (k + i + j) % 9 == 8:
+                    fields.append(" " * 16)
+                    continue
+                value = 20000000.0 + 1000.0 * j + 0.125 * k + 7.5 * i
+                fields.append(f"{value:14.3f} {5 + (k + i) % 4}")
+            lines.append("".join(fields[:5]).rstrip())
+            lines.append("".join(fields[5:]).rstrip())
+    return "\n".join(lines) + "\n"
+
+
+def write_rinex2_sample(directory: str, **kwargs) -> str:
+    """Write rinex2_sample() into directory and return the file path."""
+    path = os.path.join(directory, "samp0750.25o")
+    with open(path, "w") as handler:
+        handler.write(rinex2_sample(**kwargs))
+    return path
+
+
+def observations(epochs) -> list:
+    """Get (timestamp, sat id, code, value, lli, ssi) of all non-blank fields."""
+    found = []
+    for epoch in epochs:
+        for satellite in epoch.satellites:
+            for obs in satellite.observations:
+                value, lli, ssi = obs.value, obs.lli, obs.ss
+                if isinstance(value, str):
+                    if not value.strip():
+                        continue
+                    value, lli, ssi = float(value), int(lli.strip() or 0), int(ssi.strip() or 0)
+                found.append((epoch.timestamp, satellite.id, obs.code, value, lli, ssi))
+    return sorted(found)
+
+
+def lzw_compress(data: bytes, max_bits: int = 16) -> bytes:
+    """Compress data like Unix compress (block mode), clearing full tables."""
+    out = bytearray(b"\x1f\x9d" + bytes((0x80 | max_bits,)))
+    table = {bytes((i,)): i for i in range(256)}
+    state = {"n_bits": 9, "codes": []}
+
+    def flush(padded: bool) -> None:
+        n_bits, codes = state["n_bits"], state["codes"]
+        bits = sum(code << (i * n_bits) for i, code in enumerate(codes))
+        size = n_bits if padded else (len(codes) * n_bits + 7) // 8
+        out.extend(bits.to_bytes(size, "little"))
+        state["codes"] = []
+
+    def output(code: int, clear: bool = False) -> None:
+        state["codes"].append(code)
+        if len(state["codes"]) == 8:
+            flush(True)
+        if clear or (
+            state["n_bits"] < max_bits and len(table) + 1 > (1 << state["n_bits"]) - 1
+        ):
+            if state["codes"]:
+                flush(True)
+            state["n_bits"] = 9 if clear else state["n_bits"] + 1
+
+    word = b""
+    for byte in data:
+        extended = word + bytes((byte,))
+        if extended in table:
+            word = extended
+            continue
+        output(table[word])
+        word = bytes((byte,))
+        if len(table) + 1 < 1 << max_bits:
+            table[extended] = len(table) + 1
+        else:
+            table = {bytes((i,)): i for i in range(256)}
+            output(256, clear=True)
+    if word:
+        output(table[word])
+    if state["codes"]:
+        flush(False)
+    return bytes(out)
@@ -0,0 +1,100 @@
+#!/usr/bin/python
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from .context import rinex3_sample
+
+from rinex_parser import cli
+from rinex_parser.batch import iter_batch, split_chunks
+from rinex_parser.scripts import main
+
+
+def square(path: str, offset: int = 0) -> int:
+    if path == "fail":
+        raise ValueError("broken file")
+    return int(path) ** 2 + offset
+
+
+def exit_worker(path: str) -> int:
+    os._exit(1)
+
+
+class BatchTestSuite(unittest.TestCase):
+    def test_split_chunks(self):
+        paths = [str(i) for i in range(10)]
+        self.assertEqual(len(split_chunks(paths, 2)), 5)
+        self.assertEqual(split_chunks(paths, 2, chunk_size=4)[-1], ["8", "9"])
+        self.assertEqual(sum(split_chunks(paths, 100), []), paths)
+
+    def test_iter_batch(self):
+        paths = ["1", "fail", "2", "3", "4", "5"]
+        for workers in (1, 3):
+            results = {r.path: r for r in iter_batch(square, paths, workers, offset=1)}
+            self.assertEqual(set(results), set(paths))
+            self.assertEqual(results["3"].value, 10)
+            self.assertTrue(results["5"].ok)
+            self.assertFalse(results["fail"].ok)
+            self.assertIsNone(results["fail"].value)
+            self.assertEqual(results["fail"].message, "ValueError: broken file")
+
+    def test_worker_exit(self):
+        results = list(iter_batch(exit_worker, ["1", "2"], workers=2))
+        self.assertEqual(sorted(r.path for r in results), ["1", "2"])
+        self.assertFalse(any(r.ok for r in results))
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for station in ("AAAA", "BBBB", "CCCC"):
+                out_dir = os.path.join(tmp_dir, station)
+                os.mkdir(out_dir)
+                paths.append(
+                    os.path.join(out_dir, f"{station}00AUT_R_20250750000_01H_01S_MO.rnx")
+                )
+                with open(paths[-1], "w") as handler:
+                    handler.write(rinex3_sample())
+            broken = os.path.join(tmp_dir, "BROK00AUT_R_20250750000_01H_01S_MO.rnx")
+            with open(broken, "w") as handler:
+                handler.write("broken\n")
+            argv = ["rxp", "--resample", "30", "-n", "2", broken] + paths
+            with mock.patch("sys.argv", argv):
+                # The other files are written, the broken one fails the run
+                self.assertEqual(cli.main(), 1)
+            for path in paths:
+                self.assertEqual(
+                    sorted(os.listdir(os.path.dirname(path))),
+                    [os.path.basename(path), "SAMP00AUT_R_20250750000_02M_30S_MO.rnx"],
+                )
+
+
+    def test_ridah_obs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for station in ("AAAA", "BBBB"):
+                out_dir = os.path.join(tmp_dir, station)
+                os.mkdir(out_dir)
+                paths.append(
+                    os.path.join(out_dir, f"{station}00AUT_R_20250750000_01H_01S_MO.rnx")
+                )
+                with open(paths[-1], "w") as handler:
+                    handler.write(rinex3_sample())
+            # Workers write their output and return its path only
+            with mock.patch("sys.argv", ["ridah-obs", "-n", "2", "-s", "30"] + paths):
+                main.run()
+            for path in paths:
+                outputs = [
+                    name
+                    for name in os.listdir(os.path.dirname(path))
+                    if name != os.path.basename(path)
+                ]
+                self.assertEqual(len(outputs), 1)
+                self.assertTrue(outputs[0].endswith("_02M_30S_MO.rnx"))
+                with open(os.path.join(os.path.dirname(path), outputs[0])) as handler:
+                    self.assertEqual(handler.read().count("\n> 2025"), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
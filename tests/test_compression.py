@@ -0,0 +1,114 @@
+#!/usr/bin/python
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import tempfile
+import unittest
+
+from .context import (
+    RINEX2_SAMPLE_SATELLITES,
+    RINEX3_SAMPLE_SATELLITES,
+    lzw_compress,
+    observations,
+    rinex2_sample,
+    rinex3_sample,
+)
+
+from rinex_parser.compression import (
+    ChunkReader,
+    is_compressed,
+    iter_lzw,
+    iter_threaded,
+    open_text,
+    strip_compression_suffix,
+)
+from rinex_parser.obs_parser import RinexParser
+
+COMPRESSORS = {
+    ".gz": gzip.compress,
+    ".bz2": bz2.compress,
+    ".xz": lzma.compress,
+    ".Z": lzw_compress,
+}
+
+
+def write_compressed(path: str, text: str, suffix: str) -> str:
+    with open(path + suffix, "wb") as handler:
+        handler.write(COMPRESSORS[suffix](text.encode()))
+    return path + suffix
+
+
+def read_observations(parser: RinexParser) -> list:
+    parser.do_create_datadict()
+    return observations(parser.rinex_epochs)
+
+
+class CompressionTestSuite(unittest.TestCase):
+    def test_lzw(self):
+        data = rinex3_sample(epochs=40).encode()
+        for max_bits in (10, 12, 16):
+            compressed = lzw_compress(data, max_bits)
+            decoded = b"".join(iter_lzw(io.BytesIO(compressed), chunk_size=1000))
+            self.assertEqual(decoded, data)
+        with self.assertRaises(ValueError):
+            list(iter_lzw(io.BytesIO(b"\x1f\x8b\x08")))
+
+    def test_threaded(self):
+        chunks = iter_threaded(iter([b"a", b"b", b"c"]), depth=1)
+        self.assertEqual(b"".join(chunks), b"abc")
+
+        def failing():
+            yield b"a"
+            raise ValueError("broken")
+
+        with self.assertRaises(ValueError):
+            list(iter_threaded(failing()))
+
+        reader = ChunkReader(iter_threaded(iter([b"x" * 10] * 100), depth=2))
+        self.assertEqual(reader.read(5), b"xxxxx")
+        reader.close()
+
+    def test_suffixes(self):
+        self.assertTrue(is_compressed("graz2540.18o.Z"))
+        self.assertFalse(is_compressed("graz2540.18o"))
+        self.assertEqual(strip_compression_suffix("a.rnx.gz"), "a.rnx")
+        self.assertEqual(strip_compression_suffix("a.rnx"), "a.rnx")
+
+    def test_read_compressed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for rinex_version, name, text, sat_ids in (
+                (
+                    3,
+                    "SAMP00AUT_R_20250750000_01H_01S_MO.rnx",
+                    rinex3_sample(),
+                    sum(RINEX3_SAMPLE_SATELLITES.values(), []),
+                ),
+                (2, "samp0750.25o", rinex2_sample(), RINEX2_SAMPLE_SATELLITES),
+            ):
+                plain = os.path.join(tmp_dir, name)
+                with open(plain, "w") as handler:
+                    handler.write(text)
+                expected = read_observations(
+                    RinexParser(rinex_file=plain, rinex_version=rinex_version, sampling=5)
+                )
+                # Observations of all satellites are compared
+                self.assertEqual({row[1] for row in expected}, set(sat_ids))
+                for suffix in COMPRESSORS:
+                    path = write_compressed(plain, text, suffix)
+                    with open_text(path) as handler:
+                        self.assertEqual(handler.read(), text)
+                    parser = RinexParser.from_file(path, sampling=5, use_index=True)
+                    self.assertEqual(parser.rinex_version, rinex_version)
+                    self.assertEqual(read_observations(parser), expected)
+                    if rinex_version == 3:
+                        parser = RinexParser(
+                            rinex_file=path, rinex_version=3, sampling=5, columnar=True
+                        )
+                        self.assertEqual(read_observations(parser), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
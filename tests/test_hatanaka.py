@@ -0,0 +1,207 @@
+#!/usr/bin/python
+
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from .context import (
+    RINEX2_SAMPLE_SATELLITES,
+    RINEX3_SAMPLE_SATELLITES,
+    observations,
+    rinex2_sample,
+    rinex3_sample,
+)
+
+from rinex_parser import hatanaka
+from rinex_parser.compression import open_text
+from rinex_parser.hatanaka import (
+    CrinexDecoder,
+    CrinexEncoder,
+    decode_crinex,
+    encode_crinex,
+    format_clock,
+    format_obs,
+    is_crinex,
+)
+from rinex_parser.obs_parser import RinexParser
+
+HEADER = [
+    "     3.04           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE",
+    "G    3 C1C L1C S1C                                          SYS / # / OBS TYPES",
+    "E    2 C1C L1C                                              SYS / # / OBS TYPES",
+    "                                                            END OF HEADER",
+]
+# Clock offsets, a blank field, a value below one and a new satellite
+TINY_RINEX = "\n".join(
+    HEADER
+    + [
+        "> 2025 03 16 00 00  0.0000000  0  2       0.000123456789",
+        "G01  20000000.125 7 105000000.250 8        45.500",
+        "E11  21000000.500 6 110250000.750 7",
+        "> 2025 03 16 00 00  1.0000000  0  2      -0.000500000000",
+        "G01  20000100.250 7 105000525.500 8        45.250",
+        "E11  21000150.000 6" + " " * 17,
+        "> 2025 03 16 00 00  2.0000000  0  3      -0.000123456000",
+        "G01  20000200.500 7 105001050.750 8         -.500",
+        "G05  22000000.000 5 115500000.000 5        38.000",
+        "E11  21000300.500 6 110250787.50017",
+        "",
+    ]
+)
+# Output of RNX2CRX ver.4.1.0
+TINY_CRINEX = "\n".join(
+    [
+        "3.0                 COMPACT RINEX FORMAT                    CRINEX VERS   / TYPE",
+        "RNX2CRX ver.4.1.0                       18-Oct-26 08:51     CRINEX PROG / DATE",
+    ]
+    + HEADER
+    + [
+        "> 2025 03 16 00 00  0.0000000  0  2      G01E11",
+        "3&123456789",
+        "3&20000000125 3&105000000250 3&45500 &7&8&&",
+        "3&21000000500 3&110250000750 &6&7",
+        "                    1",
+        "-623456789",
+        "100125 525250 -250",
+        "149500     &",
+        "                    2             3         G05E11",
+        "1000000789",
+        "125 0 -45500",
+        "3&22000000000 3&115500000000 3&38000 &5&5&&",
+        "1000 3&110250787500   17",
+        "",
+    ]
+)
+# Output of CRX2RNX ver.4.1.0, which writes -0.0005 as -.0004
+TINY_DECODED = "\n".join(
+    HEADER
+    + [
+        "> 2025 03 16 00 00  0.0000000  0  2        .000123456789",
+        "G01  20000000.125 7 105000000.250 8        45.500",
+        "E11  21000000.500 6 110250000.750 7",
+        "> 2025 03 16 00 00  1.0000000  0  2       -.000400000000",
+        "G01  20000100.250 7 105000525.500 8        45.250",
+        "E11  21000150.000 6",
+        "> 2025 03 16 00 00  2.0000000  0  3       -.000123456000",
+        "G01  20000200.500 7 105001050.750 8         -.500",
+        "G05  22000000.000 5 115500000.000 5        38.000",
+        "E11  21000300.500 6 110250787.50017",
+        "",
+    ]
+)
+
+
+def encode(text: str) -> str:
+    encoder = CrinexEncoder(program="RNX2CRX ver.4.1.0", date="18-Oct-26 08:51")
+    return "".join(encoder.encode(text.splitlines()))
+
+
+def decode(text: str) -> str:
+    return "".join(CrinexDecoder().decode(text.splitlines()))
+
+
+def chopped(text: str) -> str:
+    return "".join(f"{line.rstrip()}\n" for line in text.splitlines())
+
+
+class HatanakaTestSuite(unittest.TestCase):
+    def test_reference(self):
+        self.assertEqual(encode(TINY_RINEX), TINY_CRINEX)
+        self.assertEqual(decode(TINY_CRINEX), TINY_DECODED)
+        chunks = [TINY_CRINEX.encode()[i : i + 7] for i in range(0, len(TINY_CRINEX), 7)]
+        self.assertEqual(b"".join(decode_crinex(chunks)), TINY_DECODED.encode())
+
+    def test_round_trip(self):
+        for text in (rinex3_sample(), rinex2_sample()):
+            crinex = b"".join(encode_crinex([text.encode()]))
+            self.assertLess(len(crinex), len(text) // 2)
+            self.assertEqual(decode(crinex.decode()), chopped(text))
+
+    def test_without_numpy(self):
+        crinex = encode(rinex3_sample())
+        np = hatanaka.np
+        hatanaka.np = None
+        try:
+            self.assertEqual(encode(rinex3_sample()), crinex)
+            self.assertEqual(decode(crinex), chopped(rinex3_sample()))
+        finally:
+            hatanaka.np = np
+
+    def test_format(self):
+        self.assertEqual(format_obs(-500), "         -.500")
+        self.assertEqual(format_obs(1234), "         1.234")
+        self.assertEqual(format_obs(-20000000125), " -20000000.125")
+        with self.assertRaises(ValueError):
+            format_obs(10**13)
+        self.assertEqual(format_clock(123456789, 4), "  .000123456789")
+        self.assertEqual(format_clock(-1234567890123, 4), "-1.234567890123")
+        # CRX2RNX loses one in the upper digits if the lower ones are zero
+        self.assertEqual(format_clock(-100000000, 1), " -.000000000")
+        self.assertEqual(format_clock(-100000001, 1), " -.100000001")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            decode(TINY_RINEX)
+        with self.assertRaises(ValueError):
+            # data arc continued without initialization
+            decode(TINY_CRINEX.replace("3&20000000125", "20000000125"))
+        with self.assertRaises(ValueError):
+            encode(TINY_RINEX.replace("20000100.250", "20000100,250"))
+
+    def test_read_crinex(self):
+        self.assertTrue(is_crinex("graz2540.18d"))
+        self.assertTrue(is_crinex("GRAZ00AUT_R_20182540000_01D_30S_MO.crx"))
+        self.assertFalse(is_crinex("graz2540.18o"))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for rinex_version, name, text, sat_ids in (
+                (
+                    3,
+                    "SAMP00AUT_R_20250750000_01H_01S_MO",
+                    rinex3_sample(),
+                    sum(RINEX3_SAMPLE_SATELLITES.values(), []),
+                ),
+                (2, "samp0750.25", rinex2_sample(), RINEX2_SAMPLE_SATELLITES),
+            ):
+                plain = os.path.join(tmp_dir, name + ("o" if rinex_version == 2 else ".rnx"))
+                with open(plain, "w") as handler:
+                    handler.write(text)
+                crinex = b"".join(encode_crinex([text.encode()]))
+                path = os.path.join(tmp_dir, name + ("d.gz" if rinex_version == 2 else ".crx"))
+                with open(path, "wb") as handler:
+                    handler.write(gzip.compress(crinex) if path.endswith(".gz") else crinex)
+                with open_text(path) as handler:
+                    self.assertEqual(handler.read(), chopped(text))
+
+                expected = RinexParser(rinex_file=plain, rinex_version=rinex_version, sampling=5)
+                expected.do_create_datadict()
+                parser = RinexParser.from_file(path, sampling=5, use_index=True)
+                parser.do_create_datadict()
+                self.assertEqual(parser.rinex_version, rinex_version)
+                values = observations(expected.rinex_epochs)
+                # Observations of all satellites are compared
+                self.assertEqual({row[1] for row in values}, set(sat_ids))
+                self.assertEqual(observations(parser.rinex_epochs), values)
+
+    def test_write_crinex(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            plain = os.path.join(tmp_dir, "SAMP00AUT_R_20250750000_01H_01S_MO.rnx")
+            with open(plain, "w") as handler:
+                handler.write(rinex3_sample())
+            outputs, counts = [], []
+            for crinex in (False, True):
+                parser = RinexParser.from_file(plain, sampling=10)
+                buffer = io.BytesIO()
+                count = parser.rinex_reader.write_rinex3(
+                    buffer, parser.iter_epochs(), crinex=crinex
+                )
+                counts.append(count)
+                outputs.append(buffer.getvalue().decode())
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(decode(outputs[1]), chopped(outputs[0]))
+        self.assertIn("TIME OF LAST OBS", outputs[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
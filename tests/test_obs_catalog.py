@@ -0,0 +1,140 @@
+#!/usr/bin/python
+
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from .context import (
+    RINEX3_SAMPLE_START,
+    rinex3_sample,
+    write_rinex2_sample,
+    write_rinex3_sample,
+)
+
+from rinex_parser import cli, obs_catalog
+from rinex_parser.obs_catalog import ArchiveCatalog, epoch_summary
+
+
+def make_archive(directory: str) -> dict:
+    paths = {}
+    for name in ("r2", "r3"):
+        os.mkdir(os.path.join(directory, name))
+    paths["r2"] = write_rinex2_sample(os.path.join(directory, "r2"))
+    paths["r3"] = write_rinex3_sample(os.path.join(directory, "r3"))
+    paths["broken"] = os.path.join(directory, "r3", "BROK00AUT_R_20250750000_01H_01S_MO.rnx")
+    with open(paths["broken"], "w") as handler:
+        handler.write("broken\n")
+    return paths
+
+
+class ObsCatalogTestSuite(unittest.TestCase):
+    def test_epoch_summary(self):
+        timestamps = [0, 1, 2, 5, 6, 20, 21]
+        summary = epoch_summary(timestamps, None, gapsize=5)
+        self.assertEqual(summary["epoch_interval"], 1)
+        self.assertEqual(summary["epochs_max"], 22)
+        self.assertEqual(summary["epochs_valid"], 7)
+        self.assertEqual(summary["epochs_missing"], 15)
+        self.assertEqual((summary["gaps_less"], summary["gaps_more"]), (1, 1))
+        self.assertEqual(epoch_summary([], 30.0)["epochs_max"], 0)
+
+    def test_refresh(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = make_archive(tmp_dir)
+            db = os.path.join(tmp_dir, "catalog.db")
+            files = [paths["r2"], paths["r3"], paths["broken"]]
+            with ArchiveCatalog(db) as catalog:
+                stats = catalog.refresh(files, roots=[tmp_dir])
+                self.assertEqual((stats["added"], stats["failed"]), (3, 1))
+                self.assertEqual(len(catalog), 3)
+
+                entry = catalog.entries(signal="G:C2W")[0]
+                self.assertEqual(entry["path"], paths["r3"])
+                self.assertEqual(entry["station"], "SAMP")
+                self.assertEqual(entry["first_epoch"], RINEX3_SAMPLE_START)
+                self.assertEqual(entry["last_epoch"], RINEX3_SAMPLE_START + 119)
+                self.assertEqual(entry["epoch_count"], 117)
+                self.assertEqual(entry["rinstat"]["gaps_count"], 1)
+                self.assertEqual(entry["rinstat"]["epochs_missing"], 3)
+                self.assertEqual(catalog.files(signal="M:P2"), [paths["r2"]])
+                self.assertEqual(catalog.entries(signal="M:P2")[0]["epoch_count"], 58)
+                self.assertEqual(len(catalog.files(station="samp")), 2)
+                self.assertEqual(catalog.files(start=RINEX3_SAMPLE_START + 60), [paths["r3"]])
+                self.assertEqual(catalog.files(end=RINEX3_SAMPLE_START), [])
+                self.assertEqual(catalog.files(interval=30.0), [])
+                self.assertEqual(catalog.stations(), [("SAMP", 2)])
+
+            # Only changed files are scanned again, missing ones are removed
+            os.remove(paths["r2"])
+            with open(paths["broken"], "a") as handler:
+                handler.write("still broken\n")
+            with ArchiveCatalog(db) as catalog, mock.patch.object(
+                obs_catalog, "catalog_entry", wraps=obs_catalog.catalog_entry
+            ) as entry:
+                stats = catalog.refresh([paths["r3"], paths["broken"]], roots=[tmp_dir])
+                entry.assert_called_once_with(paths["broken"])
+                self.assertEqual(stats["unchanged"], 1)
+                self.assertEqual(stats["updated"], 1)
+                self.assertEqual(stats["removed"], 1)
+                self.assertEqual(catalog.files(), [paths["r3"]])
+                signals = catalog.connection.execute("SELECT DISTINCT path FROM signals")
+                self.assertEqual([row[0] for row in signals], [paths["r3"]])
+
+    def test_refresh_compressed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            contents = {
+                # EOFError
+                "TRUN00AUT_R_20250750000_01H_01S_MO.rnx.gz": gzip.compress(
+                    rinex3_sample().encode()
+                )[:2000],
+                # gzip.BadGzipFile
+                "GARB00AUT_R_20250750000_01H_01S_MO.rnx.gz": b"garbage" * 100,
+            }
+            paths = []
+            for name, content in contents.items():
+                paths.append(os.path.join(tmp_dir, name))
+                with open(paths[-1], "wb") as handler:
+                    handler.write(content)
+            db = os.path.join(tmp_dir, "catalog.db")
+            with ArchiveCatalog(db) as catalog:
+                stats = catalog.refresh(paths)
+                self.assertEqual((stats["added"], stats["failed"]), (2, 2))
+                errors = catalog.connection.execute("SELECT error FROM files").fetchall()
+                self.assertTrue(all(row[0] for row in errors))
+                self.assertEqual(len(errors), 2)
+            # Files failing to decompress are not rescanned until they change
+            with ArchiveCatalog(db) as catalog, mock.patch.object(
+                obs_catalog, "catalog_entry", wraps=obs_catalog.catalog_entry
+            ) as entry:
+                stats = catalog.refresh(paths)
+                entry.assert_not_called()
+                self.assertEqual(stats["unchanged"], 2)
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = make_archive(tmp_dir)
+            db = os.path.join(tmp_dir, "catalog.db")
+            argv = ["rxp", "--catalog", db, "--catalog-refresh", tmp_dir]
+            with mock.patch("sys.argv", argv), mock.patch("sys.stdout", io.StringIO()):
+                self.assertEqual(cli.main(), 1)
+
+            output = io.StringIO()
+            argv = ["rxp", "--catalog", db, "--catalog-query", "--query-signal", "E:L5Q"]
+            with mock.patch("sys.argv", argv), mock.patch("sys.stdout", output):
+                self.assertEqual(cli.main(), 0)
+            self.assertEqual(output.getvalue().split(), [paths["r3"]])
+
+            # Other modes take their files from the query
+            argv = ["rxp", "--catalog", db, "--query-start", "2025-03-16T00:01:00", "--rinstat"]
+            with mock.patch("sys.argv", argv), mock.patch(
+                "rinex_parser.cli.process_rinex_task"
+            ) as task:
+                cli.main()
+            self.assertEqual([call.args[0] for call in task.call_args_list], [paths["r3"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
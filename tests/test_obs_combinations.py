@@ -0,0 +1,213 @@
+#!/usr/bin/python
+
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from .context import write_rinex3_sample
+
+from rinex_parser import cli
+from rinex_parser.obs_combinations import (
+    SPEED_OF_LIGHT,
+    carrier_frequency,
+    code_multipath,
+    detect_cycle_slips,
+    glonass_channels,
+)
+from rinex_parser.obs_header import Rinex3ObsHeader
+from rinex_parser.obs_parser import RinexParser
+from rinex_parser.obs_quality import RinexQuality
+from rinex_parser.obs_store import FLAG_BLANK, ObsStore, has_numpy, np
+
+
+def physical_store(epochs: int, slips: list, skip=(), channels=None) -> ObsStore:
+    """Create a store of dual-frequency G01, G05 and R07 series.
+
+    Geometry and ionosphere change slowly, phases carry 2 mm and codes
+    30 cm of noise. slips holds (sat_id, epoch, cycles L1, cycles L2).
+    """
+    rng = np.random.default_rng(7)
+    store = ObsStore({"G": ["C1C", "L1C", "C2W", "L2W"], "R": ["C1C", "L1C", "C2P", "L2P"]})
+    times = [float(t) for t in range(epochs) if t not in skip]
+    for ts in times:
+        store.add_epoch(ts)
+    for sat_id in ("G01", "G05", "R07"):
+        f1 = carrier_frequency(sat_id[0], "1", (channels or {}).get(int(sat_id[1:])))
+        f2 = carrier_frequency(sat_id[0], "2", (channels or {}).get(int(sat_id[1:])))
+        ts = np.array(times)
+        geometry = 2.2e7 + 7e5 * np.sin(ts / 3000.0 + int(sat_id[1:]))
+        iono = 3.0 + 2.0 * np.sin(ts / 5000.0)
+        iono2 = iono * (f1 / f2) ** 2
+        cycles = np.zeros((2, len(ts)))
+        for slip_sat, epoch, n1, n2 in slips:
+            if slip_sat == sat_id:
+                cycles[:, ts >= epoch] += [[n1], [n2]]
+        noise = rng.normal(0.0, 1.0, (4, len(ts)))
+        lli = np.isin(ts, [epoch for slip_sat, epoch, *_ in slips if slip_sat == sat_id])
+        lli = np.where(lli, 1, FLAG_BLANK)
+        columns = store.systems[sat_id[0]]
+        for k, ts_epoch in enumerate(times):
+            columns.append(
+                k,
+                ts_epoch,
+                int(sat_id[1:]),
+                [
+                    geometry[k] + iono[k] + 0.3 * noise[0, k],
+                    (geometry[k] - iono[k] + 0.002 * noise[1, k]) * f1 / SPEED_OF_LIGHT
+                    + cycles[0, k],
+                    geometry[k] + iono2[k] + 0.3 * noise[2, k],
+                    (geometry[k] - iono2[k] + 0.002 * noise[3, k]) * f2 / SPEED_OF_LIGHT
+                    + cycles[1, k],
+                ],
+                [FLAG_BLANK, int(lli[k]), FLAG_BLANK, FLAG_BLANK],
+                [FLAG_BLANK] * 4,
+            )
+    return store.finalize()
+
+
+class ObsCombinationsTestSuite(unittest.TestCase):
+    def test_glonass_channels(self):
+        header = Rinex3ObsHeader()
+        header.other_headers = [
+            f"{'  3 R01  1 R07 -4 R24  2':60s}GLONASS SLOT / FRQ #",
+            f"{'a comment':60s}COMMENT",
+        ]
+        self.assertEqual(glonass_channels(header), {1: 1, 7: -4, 24: 2})
+        header.set_glonass_slot_frq(f"{'  1 R09 -7':60s}GLONASS SLOT / FRQ #")
+        self.assertEqual(glonass_channels(header), {9: -7})
+        self.assertEqual(carrier_frequency("R", "1", -7), 1602.0e6 - 7 * 0.5625e6)
+        self.assertIsNone(carrier_frequency("R", "1"))
+        self.assertEqual(carrier_frequency("R", "3"), 1202.025e6)
+
+    @unittest.skipUnless(has_numpy(), "requires numpy")
+    def test_detect_cycle_slips(self):
+        slips = [
+            ("G01", 200, 1, 0),
+            # Equal slips only show in GF
+            ("G01", 450, 1, 1),
+            # Slips on L2 only
+            ("G05", 120, 0, 3),
+            ("R07", 500, -2, 0),
+        ]
+        store = physical_store(600, slips, skip=range(300, 331), channels={7: -4})
+        result = detect_cycle_slips(store, channels={7: -4})
+        self.assertEqual(result["epoch_interval"], 1.0)
+        self.assertEqual(result["signals"]["G"], {"phase": ["L1C", "L2W"], "code": ["C1C", "C2W"]})
+        satellites = result["satellites"]
+        self.assertEqual(satellites["G01"]["slip_epochs"], [200.0, 450.0])
+        self.assertEqual((satellites["G01"]["gf"], satellites["G01"]["mw"]), (2, 1))
+        self.assertEqual(satellites["G05"]["slip_epochs"], [120.0])
+        self.assertEqual(satellites["R07"]["slip_epochs"], [500.0])
+        self.assertEqual(satellites["G01"]["lli"], 2)
+        # The data gap splits each series, its end is no slip
+        self.assertEqual(satellites["G05"]["arcs"], 2)
+        self.assertEqual(satellites["G05"]["epochs"], 600 - 31)
+
+        # GLONASS satellites without FDMA channel are skipped
+        self.assertNotIn("R07", detect_cycle_slips(store)["satellites"])
+
+    @unittest.skipUnless(has_numpy(), "requires numpy")
+    def test_code_multipath(self):
+        slips = [("G01", 200, 1, 0), ("G05", 120, 0, 3), ("R07", 500, -2, 0)]
+        store = physical_store(600, slips, skip=range(300, 331), channels={7: -4})
+        # The last 5 epochs form an arc too short for the statistics
+        store.systems["G"].lli[1][-5] = 1
+        result = code_multipath(store, channels={7: -4})
+        satellites = result["satellites"]
+        self.assertEqual(set(satellites), {"G01", "G05", "R07"})
+        for sat_id, signals in satellites.items():
+            self.assertEqual(set(signals), {"C1C", "C2P" if sat_id[0] == "R" else "C2W"})
+            for signal in signals.values():
+                # Code noise of 30 cm
+                self.assertAlmostEqual(signal["rms"], 0.3, delta=0.05)
+        # Gap and slip split the series
+        self.assertEqual(satellites["G05"]["C2W"]["arcs"], 3)
+        self.assertEqual(satellites["G05"]["C2W"]["samples"], 569 - 5)
+        self.assertEqual(satellites["R07"]["C1C"]["samples"], 569)
+        systems = result["systems"]
+        self.assertEqual(systems["G"]["C2W"]["phase"], ["L2W", "L1C"])
+        self.assertEqual(systems["G"]["C1C"]["satellites"], 2)
+        self.assertEqual(result["overall"]["samples"], 4 * 569 + 2 * (569 - 5))
+        self.assertAlmostEqual(result["overall"]["rms"], 0.3, delta=0.02)
+        self.assertNotIn("R07", code_multipath(store)["satellites"])
+
+    @unittest.skipUnless(has_numpy(), "requires numpy")
+    def test_multipath_missing_code(self):
+        # 77 L1 and 60 L2 cycles cancel in GF, only MW shows the slip
+        store = physical_store(600, [("G05", 400, 77, 60)], channels={7: -4})
+        columns = store.systems["G"]
+        g05 = columns.prns == 5
+        columns.lli[1][g05 & (columns.timestamps == 400)] = FLAG_BLANK
+        columns.values[2][g05 & (columns.timestamps == 50)] = np.nan
+        signal = code_multipath(store)["satellites"]["G05"]["C1C"]
+        # A missing C2W epoch does not turn off the MW test of C1C
+        self.assertEqual((signal["samples"], signal["arcs"]), (600, 2))
+        self.assertAlmostEqual(signal["rms"], 0.3, delta=0.05)
+
+    @unittest.skipUnless(has_numpy(), "requires numpy")
+    def test_slips_report(self):
+        quality = RinexQuality()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = write_rinex3_sample(tmp_dir)
+            parser = RinexParser(rinex_file=rinex_file, rinex_version=3, columnar=True)
+            parser.do_create_datadict()
+            reports = [quality.get_slips_as_dict(parser.rinex_reader)]
+            # Streamed in blocks of 7 epochs
+            parser = RinexParser(rinex_file=rinex_file, rinex_version=3, use_mmap=False)
+            parser.rinex_reader.block_size = 7
+            parser.do_read_header()
+            reports.append(quality.get_slips_as_dict(parser.rinex_reader))
+
+            output = os.path.join(tmp_dir, "slips.json")
+            with mock.patch("sys.argv", ["rxp", "--slips-json", "-o", output, rinex_file]):
+                cli.main()
+            with open(output) as handler:
+                reports.append(json.load(handler))
+
+        for report in reports:
+            self.assertEqual(report, reports[0])
+        report = reports[0]
+        # The sample has one GLONASS band only
+        self.assertEqual(set(report["signals"]), {"G", "E"})
+        self.assertEqual(report["systems"]["G"]["satellites"], 5)
+        text = quality.get_slips_as_str(report)
+        self.assertIn("+++ SIG E   L1C L5Q   C1C C5Q", text)
+        self.assertIn(f"    G01 {report['satellites']['G01']['epochs']:7d}", text)
+
+    @unittest.skipUnless(has_numpy(), "requires numpy")
+    def test_multipath_report(self):
+        quality = RinexQuality()
+        header = Rinex3ObsHeader(marker_name="SAMP", interval=1.0)
+        header.other_headers = [f"{'  1 R07 -4':60s}GLONASS SLOT / FRQ #"]
+        reader = SimpleNamespace(
+            obs_store=physical_store(200, [], channels={7: -4}),
+            rinex_obs_file="/data/SAMP00AUT_R_20250750000_01H_01S_MO.rnx",
+            header=header,
+        )
+        report = quality.get_multipath_as_dict(reader)
+        self.assertEqual(report["epoch_last"], "1970-01-01T00:03:19Z")
+        self.assertEqual(report["systems"]["R"]["C2P"]["phase"], ["L2P", "L1C"])
+        text = quality.get_multipath_as_str(report)
+        rms = report["satellites"]["R07"]["C1C"]["rms"]
+        self.assertIn(f"    R07  C1C       200     1 {rms:7.4f}", text)
+        self.assertIn("    G    C2W       400     2", text)
+        self.assertIn(f"+++ ALL            1200       {report['overall']['rms']:7.4f}", text)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = write_rinex3_sample(tmp_dir)
+            parser = RinexParser(rinex_file=rinex_file, rinex_version=3)
+            parser.do_read_header()
+            report = quality.get_multipath_as_dict(parser.rinex_reader)
+            output = os.path.join(tmp_dir, "multipath.json")
+            with mock.patch("sys.argv", ["rxp", "--multipath-json", "-o", output, rinex_file]):
+                cli.main()
+            with open(output) as handler:
+                self.assertEqual(json.load(handler), report)
+        self.assertEqual(report["filename"], os.path.basename(rinex_file))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/python
+
+import calendar
+import math
+import unittest
+
+from rinex_parser.obs_decoder import (
+    GPS_EPOCH,
+    RecordBlock,
+    day_start,
+    days_from_civil,
+    decode_epoch_line,
+    decode_epoch_line_rinex2,
+    decode_records,
+    decode_records_python,
+)
+from rinex_parser import obs_decoder
+from rinex_parser.obs_epoch import ts_to_second_of_day
+from rinex_parser.obs_store import FLAG_BLANK, SystemColumns
+
+
+def field(value: str, lli: str = " ", ssi: str = " ") -> str:
+    return f"{value:>14}{lli}{ssi}"
+
+
+RECORDS = [
+    "G01" + field("20000000.123", ssi="6") + field("105000039.375", "1", "6")
+    + field("45.000"),
+    "G05" + field("-12345678.901") + field("-1234.567", "4") + field(""),
+    "G07" + field("12.34x") + field(".001", ssi="7"),
+    "G 9" + field("1.000") + field("2.000") + field("3.000"),
+    "Gxx" + field("1.000") + field("2.000") + field("3.000"),
+    "E11" + field("4.000") + field("5.000") + field("6.000"),
+]
+
+
+def column_lists(columns):
+    return [list(column) for column in columns]
+
+
+class ObsDecoderTestSuite(unittest.TestCase):
+    def test_decode_matches_python(self):
+        for obs_count in (1, 3, 4):
+            expected = decode_records_python(RECORDS[:4], obs_count)
+            decoded = decode_records(RECORDS[:4], obs_count)
+            for exp, got in zip(expected, decoded):
+                exp, got = column_lists(exp), column_lists(got)
+                self.assertEqual(
+                    [[x for x in col if x == x] for col in exp],
+                    [[x for x in col if x == x] for col in got],
+                )
+                self.assertEqual(
+                    [[x != x for x in col] for col in exp],
+                    [[x != x for x in col] for col in got],
+                )
+
+    def test_decode_values(self):
+        values, lli, ssi = decode_records_python(RECORDS[:3], 3)
+        self.assertEqual(values[0][:2], [20000000.123, -12345678.901])
+        self.assertEqual(values[1][1], -1234.567)
+        self.assertEqual(lli[1][:2], [1, 4])
+        self.assertEqual(ssi[0][:2], [6, FLAG_BLANK])
+        self.assertTrue(math.isnan(values[0][2]))
+        self.assertEqual(values[1][2], 0.001)
+        self.assertEqual(ssi[1][2], 7)
+        self.assertTrue(math.isnan(values[2][1]))
+
+    def test_record_block(self):
+        gps = SystemColumns("G", ["C1C", "L1C", "S1C"])
+        galileo = SystemColumns("E", ["C1C", "L1C", "S1C"])
+        block = RecordBlock()
+        block.append(0, 10.0, RECORDS[:3])
+        block.append(1, 11.0, RECORDS[3:])
+        self.assertEqual(len(block), 2)
+        block.flush({"G": gps, "E": galileo}, ["G05"], {"G": [2]})
+        self.assertEqual(len(block), 0)
+
+        gps.finalize()
+        galileo.finalize()
+        self.assertEqual(list(gps.prns), [1, 7, 9])
+        self.assertEqual(list(gps.epochs), [0, 0, 1])
+        self.assertEqual(list(galileo.timestamps), [11.0])
+        self.assertTrue(all(math.isnan(v) for v in gps.column("S1C")[0]))
+        self.assertEqual(gps.column("L1C")[0][0], 105000039.375)
+
+    def test_record_block_fields(self):
+        numpy = obs_decoder.np
+        decoded = []
+        for np in ([numpy, None] if numpy is not None else [None]):
+            obs_decoder.np = np
+            try:
+                gps = SystemColumns("G", ["S1C", "C1C"])
+                block = RecordBlock()
+                block.append(0, 10.0, RECORDS[:4])
+                block.flush({"G": gps}, fields={"G": [2, 0]})
+            finally:
+                obs_decoder.np = numpy
+            gps.finalize()
+            decoded.append([list(gps.column(code)[0]) for code in gps.obs_types])
+        for s1c, c1c in decoded:
+            self.assertEqual(c1c[:2], [20000000.123, -12345678.901])
+            self.assertEqual(s1c[0], 45.0)
+            self.assertEqual(s1c[-1], 3.0)
+            self.assertTrue(math.isnan(s1c[1]) and math.isnan(s1c[2]))
+
+    def test_value_texts(self):
+        lines = RECORDS[:3] + ["G08" + field("-0.500") + field("007.000") + field("-.250")]
+        numpy = obs_decoder.np
+        found = []
+        for np in ([numpy, None] if numpy is not None else [None]):
+            obs_decoder.np = np
+            try:
+                gps = SystemColumns("G", ["C1C", "L1C", "S1C"])
+                block = RecordBlock()
+                block.append(0, 10.0, lines)
+                block.flush({"G": gps})
+            finally:
+                obs_decoder.np = numpy
+            found.append(gps.texts)
+        for texts in found:
+            # Only fields not restored by F14.3 formatting keep their text
+            self.assertEqual(
+                texts,
+                [
+                    {2: f"{'12.34x':>14}"},
+                    {2: f"{'.001':>14}", 3: f"{'007.000':>14}"},
+                    {3: f"{'-.250':>14}"},
+                ],
+            )
+
+    def test_calendar(self):
+        for year in (1900, 1969, 1970, 1980, 2000, 2024, 2025, 2100):
+            for month, day in ((1, 1), (2, 28), (3, 1), (12, 31)):
+                self.assertEqual(
+                    days_from_civil(year, month, day) * 86400,
+                    calendar.timegm((year, month, day, 0, 0, 0)),
+                )
+        self.assertEqual(day_start(1980, 1, 6), GPS_EPOCH)
+        self.assertEqual(day_start(2024, 2, 29), calendar.timegm((2024, 2, 29, 0, 0, 0)))
+        for date in ((2025, 2, 29), (2025, 13, 1), (2025, 4, 0)):
+            with self.assertRaises(ValueError):
+                day_start(*date)
+
+    def test_decode_epoch_line(self):
+        line = "> 2025 03 16 23 59 59.5000000  0 37      -0.000123456789\n"
+        midnight = calendar.timegm((2025, 3, 17, 0, 0, 0))
+        for raw in (line, line.encode()):
+            self.assertEqual(decode_epoch_line(raw), (midnight - 0.5, 0, 37, -0.000123456789))
+        self.assertEqual(decode_epoch_line(line, gps=True)[0], midnight - 0.5 - GPS_EPOCH)
+        self.assertEqual(ts_to_second_of_day(decode_epoch_line(line)[0]), 86399.5)
+        timestamp, epoch_flag, nos, clock_offset = decode_epoch_line(
+            "> 2025 03 16 00 00 30.0000000  4  2"
+        )
+        self.assertEqual((epoch_flag, nos), (4, 2))
+        self.assertTrue(math.isnan(clock_offset))
+        for invalid in ("> 2025 02 30 00 00  0.0000000  0  1", ">                              4  1"):
+            with self.assertRaises(ValueError):
+                decode_epoch_line(invalid)
+
+        sats = "G01G02G03G04G05G06G07G08G09G10G11G12"
+        line = f" 79 12 31 12 30 15.2500000  0 14{sats}-0.123456789"
+        self.assertEqual(
+            decode_epoch_line_rinex2(line),
+            (calendar.timegm((2079, 12, 31, 12, 30, 15)) + 0.25, 0, 14, -0.123456789),
+        )
+        self.assertEqual(
+            decode_epoch_line_rinex2(" 80  1  6  0  0  0.0000000  0  1G01", gps=True)[0], 0.0
+        )
+        with self.assertRaises(ValueError):
+            decode_epoch_line_rinex2("  20000000.125 7 105000000.250 8")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python
+
+import os
+import tempfile
+import unittest
+
+from .context import write_rinex3_sample, RINEX3_SAMPLE_START
+
+from rinex_parser.obs_index import EpochIndex, index_path
+from rinex_parser.obs_parser import RinexParser
+
+
+def body(parser: RinexParser) -> str:
+    return parser.rinex_reader.to_rinex3().split("END OF HEADER", 1)[1]
+
+
+class ObsIndexTestSuite(unittest.TestCase):
+    def test_build_and_persist(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = write_rinex3_sample(tmp_dir)
+            index = EpochIndex.for_file(rinex_file)
+            self.assertTrue(os.path.isfile(index_path(rinex_file)))
+            self.assertEqual(len(index), 117)
+            self.assertEqual(index.timestamps[0], RINEX3_SAMPLE_START)
+            self.assertEqual(index.timestamps[40], RINEX3_SAMPLE_START + 43)
+            with open(rinex_file, "rb") as handler:
+                handler.seek(index.offsets[40])
+                self.assertTrue(handler.readline().startswith(b"> 2025 03 16 00 00 43"))
+
+            loaded = EpochIndex.load(rinex_file)
+            self.assertEqual(loaded.timestamps, index.timestamps)
+            self.assertEqual(loaded.offsets, index.offsets)
+            self.assertEqual(loaded.sat_counts, index.sat_counts)
+            self.assertEqual(loaded.data_offset, index.data_offset)
+
+            with open(rinex_file, "a") as handler:
+                handler.write("\n")
+            self.assertIsNone(EpochIndex.load(rinex_file))
+
+    def test_select_and_runs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index = EpochIndex.build(write_rinex3_sample(tmp_dir))
+        positions = index.select(RINEX3_SAMPLE_START + 38, RINEX3_SAMPLE_START + 45)
+        self.assertEqual(positions, [38, 39, 40, 41, 42])
+        self.assertEqual(list(index.runs(positions)), [(index.offsets[38], 5)])
+        positions = index.select(interval=30)
+        self.assertEqual(len(list(index.runs(positions))), 4)
+
+    def test_indexed_read(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = write_rinex3_sample(tmp_dir)
+            for columnar, use_mmap in ((False, False), (True, False), (True, True)):
+                parsers = [
+                    RinexParser(
+                        rinex_file=rinex_file,
+                        rinex_version=3,
+                        sampling=5,
+                        crop_beg=RINEX3_SAMPLE_START + 20,
+                        crop_end=RINEX3_SAMPLE_START + 90,
+                        columnar=columnar,
+                        use_index=use_index,
+                        use_mmap=use_mmap,
+                    )
+                    for use_index in (False, True)
+                ]
+                for parser in parsers:
+                    parser.run()
+                self.assertEqual(len(parsers[1].rinex_epochs), 14)
+                self.assertEqual(body(parsers[0]), body(parsers[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+#!/usr/bin/python
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from .context import RINEX3_SAMPLE_START, write_rinex2_sample, write_rinex3_sample
+
+from rinex_parser import cli
+from rinex_parser import constants as cc
+from rinex_parser import obs_quality
+from rinex_parser.obs_parser import RinexParser
+from rinex_parser.obs_quality import (
+    EpochValidity,
+    RinexQuality,
+    find_epoch_gaps,
+    is_present,
+    ts_to_rinex_datetime,
+)
+
+
+def parse_sample(directory: str, **kwargs) -> RinexParser:
+    rinex_file = write_rinex3_sample(directory)
+    parser = RinexParser(rinex_file=rinex_file, rinex_version=3, **kwargs)
+    parser.do_create_datadict()
+    return parser
+
+
+class ObsQualityTestSuite(unittest.TestCase):
+    def test_find_epoch_gaps(self):
+        timestamps = [30, 0, 60, 60, 90, 240, 270, 300, 330, 630]
+        gaps = find_epoch_gaps(timestamps, gapsize=5)
+        self.assertEqual(gaps.interval, 30)
+        self.assertEqual(list(gaps.timestamps), sorted(set(timestamps)))
+        self.assertEqual(gaps.gap_begin, [90, 330])
+        self.assertEqual(gaps.gap_end, [240, 630])
+        self.assertEqual((gaps.gaps_less, gaps.gaps_more), (1, 1))
+        self.assertEqual(gaps.epochs_missing, 4 + 9)
+        # Invalid epochs open gaps
+        valid = [t != 270 for t in timestamps]
+        gaps = find_epoch_gaps(timestamps, 30, valid=valid)
+        self.assertEqual(gaps.gap_begin, [90, 240, 330])
+        self.assertEqual(gaps.epochs_valid, 8)
+
+    def test_validity(self):
+        with self.assertRaises(ValueError):
+            EpochValidity.parse("G:five:L1")
+        validity = EpochValidity.parse("G:3:L1,L2; E:2:L1,L5")
+        self.assertEqual(str(validity), "G:3:L1,L2;E:2:L1,L5")
+
+        def reference(epoch):
+            counts = {"G": 0, "E": 0}
+            for sat in epoch.satellites:
+                # RINEX 3 objects keep the raw value text, blank if missing
+                codes = [obs.code for obs in sat.observations if str(obs.value).strip()]
+                bands = ("L1", "L2") if sat.id[0] == "G" else ("L1", "L5")
+                if sat.id[0] in counts and all(
+                    any(code.startswith(band) for code in codes) for band in bands
+                ):
+                    counts[sat.id[0]] += 1
+            return counts["G"] >= 3 and counts["E"] >= 2
+
+        quality = RinexQuality(validity=validity)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            expected = [reference(e) for e in parse_sample(tmp_dir).rinex_epochs]
+            for columnar in (False, True):
+                reader = parse_sample(tmp_dir, columnar=columnar).rinex_reader
+                self.assertEqual(list(quality.valid_epochs(reader)), expected)
+        self.assertTrue(0 < sum(expected) < len(expected))
+
+        epoch = {
+            "satellites": [
+                {"id": f"G{prn:02d}", "observations": {"L1C": 1.0, "L2W": 2.0 if prn else None}}
+                for prn in range(6)
+            ]
+        }
+        self.assertTrue(quality.is_valid_epoch(epoch, satellite_systems=["G"]))
+        self.assertFalse(quality.is_valid_epoch(epoch, satellites=6, satellite_systems=["G"]))
+        self.assertTrue(RinexQuality().is_valid_epoch(epoch))
+        self.assertFalse(quality.is_valid_epoch(epoch))
+
+    def test_rinstat(self):
+        # Every epoch is valid
+        quality = RinexQuality(validity="G:0")
+        reports = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for columnar in (False, True):
+                parser = parse_sample(tmp_dir, columnar=columnar)
+                reports.append(quality.get_rinstat_as_dict(parser.rinex_reader))
+        self.assertEqual(reports[0], reports[1])
+        report = reports[0]
+        self.assertEqual(report["epochs_valid"], 117)
+        self.assertEqual(report["epochs_max"], 3600)
+        self.assertEqual(report["epochs_missing"], 3600 - 117)
+        self.assertEqual(report["doy"], 75)
+        self.assertEqual(report["total_secs"], 119)
+        self.assertEqual(report["gaps"][0]["gap_begin"], "2025-03-16T00:00:39Z")
+        self.assertEqual(report["gaps_prepared"][0]["ge"], 3)
+        self.assertEqual((report["gaps_less"], report["gaps_more"]), (1, 0))
+        self.assertEqual(json.loads(quality.to_json(report))["gaps_count"], 1)
+        self.assertIn("3600     117    3483       0       1", quality.get_rinstat_as_str(report))
+
+    def test_accumulate(self):
+        quality = RinexQuality(validity="G:3:L1,L2;E:2:L1,L5")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parser = parse_sample(tmp_dir)
+            expected = quality.get_rinstat_as_dict(parser.rinex_reader)
+            observations, lost_lock = {}, {}
+            for epoch in parser.rinex_epochs:
+                for sat in epoch.satellites:
+                    counts = observations.setdefault(sat.id, {})
+                    lost = lost_lock.setdefault(sat.id, {})
+                    for obs in sat.observations:
+                        if is_present(obs.value):
+                            counts[obs.code] = counts.get(obs.code, 0) + 1
+                            if str(obs.lli).strip() in ("1", "3", "5", "7"):
+                                lost[obs.code] = lost.get(obs.code, 0) + 1
+
+            reports = []
+            for columnar, mmap_threshold in ((False, 0), (True, 0), (True, 1 << 30)):
+                parser = RinexParser(
+                    rinex_file=write_rinex3_sample(tmp_dir), rinex_version=3, columnar=columnar
+                )
+                parser.rinex_reader.mmap_threshold = mmap_threshold
+                parser.do_read_header()
+                accumulator = quality.accumulate(parser.rinex_reader)
+                self.assertIsNone(parser.rinex_reader.obs_store)
+                self.assertEqual(parser.rinex_reader.rinex_epochs, [])
+                reports.append(quality.get_rinstat_as_dict(accumulator))
+
+            # Without header interval it is found from the first epochs
+            parser.do_read_header()
+            parser.rinex_reader.header.interval = None
+            with mock.patch.object(obs_quality, "STREAM_INTERVAL_EPOCHS", 3):
+                reports.append(quality.get_rinstat_as_dict(quality.accumulate(parser.rinex_reader)))
+
+        for report in reports:
+            self.assertEqual(report, reports[0])
+        report = reports[0]
+        for key, value in expected.items():
+            self.assertEqual(report[key], value, key)
+        self.assertEqual(report["epochs_read"], 117)
+        self.assertGreaterEqual(report["systems"]["G"]["epochs_valid"], report["epochs_valid"])
+        satellites = report["satellites"]
+        self.assertEqual({k: sat["observations"] for k, sat in satellites.items()}, observations)
+        self.assertEqual({k: sat["lost_lock"] for k, sat in satellites.items()}, lost_lock)
+        self.assertTrue(any(lost_lock.values()))
+
+    def test_accumulate_rinex2(self):
+        quality = RinexQuality(validity="G:0")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = write_rinex2_sample(tmp_dir)
+            reports = []
+            for columnar in (False, True):
+                parser = RinexParser(rinex_file=rinex_file, rinex_version=2, columnar=columnar)
+                parser.do_read_header()
+                reports.append(quality.get_rinstat_as_dict(quality.accumulate(parser.rinex_reader)))
+        self.assertEqual(reports[0], reports[1])
+        self.assertEqual(reports[0]["epochs_valid"], 58)
+
+    def test_completeness(self):
+        quality = RinexQuality()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            expected = {}
+            for epoch in parse_sample(tmp_dir).rinex_epochs:
+                for sat in epoch.satellites:
+                    for obs in sat.observations:
+                        signal = expected.setdefault(sat.id, {}).setdefault(
+                            obs.code, {"present": 0, "lli": 0, "ssi": [0] * 10, "times": []}
+                        )
+                        if not is_present(obs.value):
+                            continue
+                        signal["present"] += 1
+                        signal["lli"] += str(obs.lli).strip() not in ("", "0")
+                        if str(obs.ss).strip():
+                            signal["ssi"][int(obs.ss)] += 1
+                        signal["times"].append(epoch.timestamp)
+
+            reader = parse_sample(tmp_dir, columnar=True).rinex_reader
+            reports = [quality.get_completeness_as_dict(reader)]
+            # Streamed in blocks of 7 epochs
+            parser = RinexParser(
+                rinex_file=write_rinex3_sample(tmp_dir), rinex_version=3, use_mmap=False
+            )
+            parser.rinex_reader.block_size = 7
+            parser.do_read_header()
+            reports.append(quality.get_completeness_as_dict(parser.rinex_reader))
+
+            output = os.path.join(tmp_dir, "completeness.json")
+            argv = ["rxp", "--completeness-json", "-o", output, parser.rinex_file]
+            with mock.patch("sys.argv", argv):
+                cli.main()
+            with open(output) as handler:
+                reports.append(json.load(handler))
+
+        for report in reports:
+            self.assertEqual(report, reports[0])
+        report = reports[0]
+        self.assertEqual((report["epochs"], report["epoch_interval"]), (117, 1))
+        self.assertEqual(set(report["satellites"]), set(expected))
+        for sat_id, signals in expected.items():
+            for code, signal in signals.items():
+                result = report["satellites"][sat_id]["signals"][code]
+                self.assertEqual(result["present"], signal["present"])
+                self.assertEqual(result["lli"], signal["lli"])
+                self.assertEqual(result["ssi"], signal["ssi"])
+                if signal["times"]:
+                    self.assertEqual(result["first"], ts_to_rinex_datetime(min(signal["times"])))
+                    self.assertEqual(result["last"], ts_to_rinex_datetime(max(signal["times"])))
+        satellite = report["satellites"]["G01"]
+        self.assertEqual(satellite["expected"], 120)
+        self.assertEqual(satellite["signals"]["C1C"]["completeness"], 76.7)
+        text = quality.get_completeness_as_str(report)
+        self.assertIn("    G01  C1C     120      92   76.7", text)
+
+    def test_datadict(self):
+        epochs = [RINEX3_SAMPLE_START + 30 * k for k in range(20) if k not in (3, 4)]
+        datadict = {
+            "fileName": "samp0750.25o",
+            "markerName": "SAMP",
+            "year4": 2025,
+            "doy": 75,
+            "epochInterval": 30,
+            "epochPeriod": "01D",
+            "epochs": [{"id": ts_to_rinex_datetime(ts, cc.RNX_FORMAT_DATETIME)} for ts in epochs],
+        }
+        chkdoy = RinexQuality(validity="G:0").do_prepare_datadict(datadict)
+        self.assertEqual(chkdoy["epochs_valid"], 18)
+        self.assertEqual(chkdoy["epochs_max"], 2880)
+        self.assertEqual(chkdoy["gaps"][0]["gap_duration"], 90)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,25 @@
 #!/usr/bin/python
 
+import builtins
+import io
 import unittest
 import os
 import tempfile
 from types import SimpleNamespace
 from unittest import mock
 
+from rinex_parser.obs_epoch import LazySatellite
 from rinex_parser.obs_quality import RinexQuality
 from rinex_parser.obs_parser import RinexParser
-from rinex_parser import cli
+from rinex_parser import cli, obs_reader
 from rinex_parser.logger import logger
 
+from .context import (
+    RINEX3_SAMPLE_START,
+    write_rinex2_sample,
+    write_rinex3_sample,
+)
+
 # logger.setLevel(logging.INFO)
 
 RINEX3_FILE = "data/r3/AGOC/AGOC00SVK_R_20250750000_01H_30S_MO.rnx"
@@ -344,5 +353,252 @@ class NameConversionTestSuite(unittest.TestCase):
         self.assertIsNone(cli.normalize_origin(None))
 
 
+class IterEpochsTestSuite(unittest.TestCase):
+    def test_rinex3_iter_epochs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = write_rinex3_sample(tmp_dir)
+            kwargs = dict(
+                rinex_file=rinex_file,
+                rinex_version=3,
+                sampling=10,
+                crop_beg=RINEX3_SAMPLE_START + 20,
+                filter_sat_sys="R",
+            )
+            streamed = list(RinexParser(**kwargs).iter_epochs())
+            parser = RinexParser(**kwargs)
+            parser.do_create_datadict()
+
+        self.assertEqual(len(streamed), 9)
+        self.assertEqual(streamed[0].timestamp, RINEX3_SAMPLE_START + 20)
+        self.assertEqual(
+            [e.to_rinex3() for e in streamed],
+            [e.to_rinex3() for e in parser.rinex_epochs],
+        )
+        self.assertFalse(any(s.id[0] == "R" for e in streamed for s in e.satellites))
+
+    def test_lazy_satellites(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            kwargs = dict(
+                rinex_file=write_rinex3_sample(tmp_dir),
+                rinex_version=3,
+                sampling=10,
+                filter_sat_obs="G1C",
+            )
+            eager = list(RinexParser(**kwargs).iter_epochs())
+            lazy = list(RinexParser(lazy=True, **kwargs).iter_epochs())
+            parser = RinexParser(lazy=True, **kwargs)
+            parser.rinex_reader.lazy_cache = False
+            uncached = list(parser.iter_epochs())
+
+        satellite = lazy[0].satellites[0]
+        self.assertIsInstance(satellite, LazySatellite)
+        self.assertFalse(satellite.is_decoded)
+        l2w = satellite.get_observation("L2W")
+        self.assertEqual(l2w.value, eager[0].satellites[0].get_observation("L2W").value)
+        self.assertIsNone(satellite.get_observation("C1C"))
+        self.assertFalse(satellite.is_decoded)
+        self.assertEqual(
+            [e.to_rinex3() for e in lazy], [e.to_rinex3() for e in eager]
+        )
+        self.assertTrue(satellite.is_decoded)
+        self.assertIs(satellite.observations, satellite.observations)
+        self.assertEqual(
+            [e.to_rinex3() for e in uncached], [e.to_rinex3() for e in eager]
+        )
+        self.assertFalse(uncached[0].satellites[0].is_decoded)
+        satellite.observations = []
+        self.assertIn(f"\n{satellite.id}\n", lazy[0].to_rinex3())
+
+    def test_passthrough(self):
+        def write(rinex_file, path=None, **kwargs):
+            parser = RinexParser(rinex_file=rinex_file, rinex_version=3, **kwargs)
+            epochs = list(parser.iter_epochs())
+            handler = open(path, "w+b") if path else io.BytesIO()
+            with handler:
+                parser.rinex_reader.write_rinex3(handler, epochs)
+                handler.seek(0)
+                return epochs, handler.read().decode().split("END OF HEADER\n")[1]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = write_rinex3_sample(tmp_dir)
+            with open(rinex_file) as handler:
+                body = handler.read().split("END OF HEADER\n")[1]
+            out_file = os.path.join(tmp_dir, "out.rnx")
+            with mock.patch.object(obs_reader, "COPY_THRESHOLD", 100):
+                epochs, copied = write(rinex_file, out_file, passthrough=True)
+            _, buffered = write(rinex_file, passthrough=True)
+            _, thinned = write(rinex_file, passthrough=True, sampling=10)
+            pnr_epochs, filtered = write(
+                rinex_file, passthrough=True, sampling=10, filter_sat_pnr="G05"
+            )
+
+        self.assertEqual(copied, body)
+        self.assertEqual(buffered, body)
+        self.assertTrue(all(epoch.is_pristine() for epoch in epochs))
+        path, start, end = epochs[0].source
+        self.assertEqual((path, end - start), (rinex_file, len(epochs[0].raw) + 1))
+        blocks = thinned.split("> ")[1:]
+        self.assertEqual(len(blocks), 11)
+        self.assertTrue(all(f"> {block}" in body for block in blocks))
+        # Epochs with G05 are reformatted, the others copied
+        self.assertNotIn("G05", filtered)
+        self.assertTrue(any(not epoch.raw for epoch in pnr_epochs))
+        self.assertTrue(all(epoch.raw in filtered for epoch in pnr_epochs if epoch.raw))
+
+        epoch = epochs[1]
+        satellite = epoch.satellites[0]
+        self.assertTrue(epoch.is_pristine())
+        satellite.observations[0].value = f"{0.125:14.3f}"
+        self.assertFalse(epoch.is_pristine())
+        self.assertIn(f"{satellite.id}         0.125", epoch.to_rinex3(use_raw=True))
+
+    def test_rinex2_iter_epochs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parser = RinexParser(
+                rinex_file=write_rinex2_sample(tmp_dir),
+                rinex_version=2,
+                sampling=5,
+                filter_sat_pnr="G07",
+                filter_sat_obs="GD1",
+            )
+            epochs = list(parser.iter_epochs())
+
+        self.assertEqual(len(epochs), 11)
+        self.assertEqual(epochs[0].timestamp, RINEX3_SAMPLE_START)
+        self.assertEqual(epochs[1].timestamp, RINEX3_SAMPLE_START + 5)
+        satellites = epochs[0].satellites
+        self.assertEqual(len(satellites), 12)
+        self.assertNotIn("G07", [s.id for s in satellites])
+        self.assertEqual(satellites[-1].id, "R22")
+        observations = {o.code: o for o in satellites[1].observations}
+        self.assertEqual(observations["S2"].value, 20001037.5)
+        self.assertEqual(observations["S2"].ss, 6)
+        self.assertNotIn("D1", observations)
+
+    def test_streaming_resample(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            kwargs = dict(
+                rinex_file=write_rinex3_sample(tmp_dir),
+                rinex_version=3,
+                sampling=30,
+                crop_beg=RINEX3_SAMPLE_START + 10,
+            )
+            output_file = cli.process_resample(RinexParser(**kwargs))
+            with open(output_file) as handler:
+                streamed = handler.read()
+            parser = RinexParser(**kwargs)
+            parser.do_create_datadict()
+            expected = parser.rinex_reader.to_rinex3()
+            self.assertEqual(
+                sorted(os.listdir(tmp_dir)),
+                [
+                    "SAMP00AUT_R_20250750000_01H_01S_MO.rnx",
+                    "SAMP00AUT_R_20250750000_01M_30S_MO.rnx",
+                ],
+            )
+
+        def header_lines(text: str, label: str) -> list:
+            return [line for line in text.splitlines() if line.endswith(label)]
+
+        for label in ("TIME OF FIRST OBS", "TIME OF LAST OBS", "INTERVAL"):
+            self.assertEqual(header_lines(streamed, label), header_lines(expected, label))
+        self.assertEqual(
+            streamed.split("END OF HEADER", 1)[1],
+            expected.split("END OF HEADER", 1)[1],
+        )
+
+    def test_resample_missing_directory(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parser = RinexParser(
+                rinex_file=write_rinex3_sample(tmp_dir), rinex_version=3, sampling=30
+            )
+            output_file = os.path.join(tmp_dir, "missing", "out.rnx")
+            with self.assertRaises(FileNotFoundError) as cm:
+                cli.process_resample(parser, output_file=output_file)
+        # The error of open(), not of removing the part file it did not create
+        self.assertIsNone(cm.exception.__context__)
+
+    def test_resample_merge(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            first = write_rinex3_sample(tmp_dir)
+            # Same station one hour later, with a new marker number
+            with open(first) as handler:
+                content = handler.read().replace("12345M001", "12345M002")
+            second = os.path.join(tmp_dir, "SAMP00AUT_R_20250750100_01H_01S_MO.rnx")
+            with open(second, "w") as handler:
+                handler.write(
+                    content.replace("> 2025 03 16 00", "> 2025 03 16 01").replace(
+                        "    00    00    0.0000000     GPS", "    01    00    0.0000000     GPS"
+                    )
+                )
+            argv = ["rxp", "--resample", "30", "--merge", second, first]
+            with mock.patch("sys.argv", argv):
+                self.assertEqual(cli.main(), 0)
+            resampled = [
+                "SAMP00AUT_R_20250750000_02M_30S_MO.rnx",
+                "SAMP00AUT_R_20250750100_02M_30S_MO.rnx",
+            ]
+            merged = "SAMP00AUT_R_20250750000_02H_30S_MO.rnx"
+            self.assertEqual(
+                sorted(os.listdir(tmp_dir)),
+                sorted([os.path.basename(first), os.path.basename(second), merged, *resampled]),
+            )
+            with open(os.path.join(tmp_dir, merged)) as handler:
+                text = handler.read()
+            parts = []
+            for name in resampled:
+                with open(os.path.join(tmp_dir, name)) as handler:
+                    parts.append(handler.read().split("END OF HEADER\n", 1)[1])
+
+        header, body = text.split("END OF HEADER\n", 1)
+        event = "\n".join(
+            [
+                f">{'':30s}4  2",
+                f"{'12345M002':60s}MARKER NUMBER",
+                f"{'  --> HEADER CHANGES DURING MERGE <--':60s}COMMENT\n",
+            ]
+        )
+        self.assertEqual(body, parts[0] + event + parts[1])
+        self.assertEqual(body.count("> 2025"), 8)
+        self.assertIn("  2025    03    16    00    00   00.0000000     GPS", header)
+        self.assertIn("  2025    03    16    01    01   30.0000000     GPS", header)
+
+
+class IngestTestSuite(unittest.TestCase):
+    def test_from_file_opens_once(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for rinex_file, rinex_version in (
+                (write_rinex3_sample(tmp_dir), 3),
+                (write_rinex2_sample(tmp_dir), 2),
+            ):
+                kwargs = dict(sampling=10, filter_sat_sys="R")
+                with mock.patch("builtins.open", wraps=builtins.open) as opened:
+                    parser = RinexParser.from_file(rinex_file, **kwargs)
+                    parser.do_create_datadict()
+                self.assertEqual(parser.rinex_version, rinex_version)
+                self.assertEqual(
+                    [c for c in opened.call_args_list if c.args[0] == rinex_file],
+                    [mock.call(rinex_file, "rb", buffering=1024 * 1024)],
+                )
+                self.assertIsNone(parser.rinex_reader.handler)
+
+                expected = RinexParser(
+                    rinex_file=rinex_file, rinex_version=rinex_version, **kwargs
+                )
+                expected.do_create_datadict()
+                self.assertEqual(
+                    [e.to_rinex3() for e in parser.rinex_epochs],
+                    [e.to_rinex3() for e in expected.rinex_epochs],
+                )
+
+    def test_from_file_invalid(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = os.path.join(tmp_dir, "invalid.rnx")
+            with open(rinex_file, "w") as handler:
+                handler.write("no rinex\n")
+            with self.assertRaises(ValueError):
+                RinexParser.from_file(rinex_file)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/python
+
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from .context import (
+    RINEX2_SAMPLE_OBS_TYPES,
+    RINEX3_SAMPLE_OBS_TYPES,
+    RINEX3_SAMPLE_START,
+    rinex2_sample,
+    write_rinex2_sample,
+    write_rinex3_sample,
+)
+
+from rinex_parser import cli, obs_scan
+from rinex_parser.obs_parser import RinexParser
+from rinex_parser.obs_scan import scan_file
+
+
+class ObsScanTestSuite(unittest.TestCase):
+    def test_rinex3(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = write_rinex3_sample(tmp_dir, epochs=3000)
+            # The backward search needs several steps
+            with mock.patch.object(obs_scan, "SCAN_TAIL_SIZE", 1000):
+                scan = scan_file(path)
+        self.assertEqual(scan.version, 3.04)
+        self.assertEqual(scan.station, "SAMP")
+        self.assertEqual(scan.receiver_type, "RECEIVER")
+        self.assertEqual(scan.interval, 1.0)
+        self.assertEqual(scan.obs_types, RINEX3_SAMPLE_OBS_TYPES)
+        self.assertEqual(scan.time_of_first_obs, RINEX3_SAMPLE_START)
+        self.assertIsNone(scan.time_of_last_obs)
+        self.assertEqual(scan.first_epoch, RINEX3_SAMPLE_START)
+        self.assertEqual(scan.last_epoch, RINEX3_SAMPLE_START + 2999)
+        entry = scan.to_dict()
+        self.assertEqual(entry["first_epoch"], "2025-03-16T00:00:00Z")
+        self.assertEqual(entry["last_epoch"], "2025-03-16T00:49:59Z")
+
+    def test_rinex2(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = write_rinex2_sample(tmp_dir)
+            # CRLF line ends and trailing event epoch
+            data = rinex2_sample().replace("\n", "\r\n")
+            data += " 25  3 16  0  5  0.0000000  4  1\r\n"
+            data += f"{'':60s}COMMENT\r\n"
+            with open(path, "w", newline="") as handler:
+                handler.write(data)
+            for compressed in (False, True):
+                if compressed:
+                    with gzip.open(f"{path}.gz", "wb") as handler:
+                        handler.write(data.encode())
+                    path = f"{path}.gz"
+                with mock.patch.object(obs_scan, "SCAN_TAIL_SIZE", 1000):
+                    scan = scan_file(path)
+                self.assertEqual(scan.version, 2.11)
+                self.assertEqual(scan.obs_types, {"M": RINEX2_SAMPLE_OBS_TYPES})
+                self.assertEqual(scan.first_epoch, RINEX3_SAMPLE_START)
+                self.assertEqual(scan.last_epoch, RINEX3_SAMPLE_START + 59)
+
+    def test_not_rinex(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "broken.rnx")
+            with open(path, "w") as handler:
+                handler.write("broken\n")
+            with self.assertRaises(ValueError):
+                scan_file(path)
+
+    def test_inventory(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.mkdir(os.path.join(tmp_dir, "r2"))
+            write_rinex2_sample(os.path.join(tmp_dir, "r2"))
+            write_rinex3_sample(tmp_dir)
+            with open(os.path.join(tmp_dir, "BROK00AUT_R_20250750000_01H_01S_MO.rnx"), "w") as f:
+                f.write("broken\n")
+            with open(os.path.join(tmp_dir, "notes.txt"), "w") as f:
+                f.write("skipped\n")
+            output = io.StringIO()
+            with mock.patch("sys.argv", ["rxp", "--inventory", tmp_dir]), mock.patch(
+                "sys.stdout", output
+            ):
+                self.assertEqual(cli.main(), 1)
+        entries = {
+            os.path.basename(entry["path"]): entry
+            for entry in map(json.loads, output.getvalue().splitlines())
+        }
+        self.assertEqual(len(entries), 3)
+        self.assertIn("error", entries["BROK00AUT_R_20250750000_01H_01S_MO.rnx"])
+        entry = entries["samp0750.25o"]
+        self.assertEqual(entry["version"], 2.11)
+        self.assertEqual(entry["last_epoch"], "2025-03-16T00:00:59Z")
+        entry = entries["SAMP00AUT_R_20250750000_01H_01S_MO.rnx"]
+        self.assertEqual(entry["station"], "SAMP")
+        self.assertEqual(entry["interval"], 1.0)
+        self.assertEqual(entry["obs_types"], RINEX3_SAMPLE_OBS_TYPES)
+        self.assertEqual(entry["last_epoch"], "2025-03-16T00:01:59Z")
+
+    def test_convert_name(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = write_rinex3_sample(tmp_dir)
+            # Epochs are not read, the scan finds the last epoch
+            with mock.patch.object(RinexParser, "do_create_datadict") as create:
+                result = cli.convert_single_rinex_name(path)
+            create.assert_not_called()
+        self.assertEqual(result["status"], "dry-run")
+        self.assertEqual(
+            os.path.basename(result["target"]), "SAMP00AUT_R_20250750000_02M_01S_MO.rnx"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
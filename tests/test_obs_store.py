@@ -0,0 +1,261 @@
+#!/usr/bin/python
+
+import math
+import mmap
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from .context import observations, rinex2_sample, write_rinex3_sample, RINEX3_SAMPLE_START
+from .test_hatanaka import TINY_DECODED
+
+from rinex_parser import obs_reader
+from rinex_parser.obs_parser import RinexParser
+from rinex_parser.obs_reader import split_byte_ranges
+from rinex_parser.obs_store import FLAG_BLANK, ObsStore, has_numpy
+
+
+def parse_sample(directory: str, **kwargs) -> RinexParser:
+    rinex_file = write_rinex3_sample(directory)
+    parser = RinexParser(rinex_file=rinex_file, rinex_version=3, **kwargs)
+    parser.do_create_datadict()
+    return parser
+
+
+def body(parser: RinexParser) -> str:
+    return parser.rinex_reader.to_rinex3().split("END OF HEADER", 1)[1]
+
+
+class ObsStoreTestSuite(unittest.TestCase):
+    def test_columnar_output_matches_objects(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            objects = parse_sample(tmp_dir)
+            columnar = parse_sample(tmp_dir, columnar=True)
+
+        self.assertIsNone(objects.rinex_reader.obs_store)
+        self.assertIsInstance(columnar.rinex_reader.obs_store, ObsStore)
+        self.assertEqual(len(objects.rinex_epochs), len(columnar.rinex_epochs))
+        self.assertEqual(body(objects), body(columnar))
+
+    def test_mmap_matches_text(self):
+        options = [
+            {},
+            {"columnar": True},
+            {"columnar": True, "filter_sat_pnr": "G05", "filter_sat_obs": "G1C"},
+            {"columnar": True, "sampling": 10},
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for kwargs in options:
+                text = parse_sample(tmp_dir, use_mmap=False, **kwargs)
+                mapped = parse_sample(tmp_dir, use_mmap=True, **kwargs)
+                self.assertEqual(body(text), body(mapped))
+
+    def test_columns(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = parse_sample(tmp_dir, columnar=True).rinex_reader.obs_store
+
+        self.assertEqual(len(store), 117)
+        self.assertEqual(store.timestamps[0], RINEX3_SAMPLE_START)
+        gps = store.systems["G"]
+        values, lli, ssi = gps.column("L1C")
+        self.assertEqual(gps.sat_ids()[:2], ["G01", "G05"])
+        self.assertAlmostEqual(values[0], 105000039.375)
+        self.assertEqual(lli[0], 1)
+        self.assertEqual(ssi[0], 6)
+        s1c, s1c_lli, s1c_ssi = gps.column("S1C")
+        self.assertEqual(s1c_lli[0], FLAG_BLANK)
+        self.assertEqual(s1c_ssi[0], FLAG_BLANK)
+        self.assertTrue(any(math.isnan(v) for v in values))
+        with self.assertRaises(KeyError):
+            gps.column("C5Q")
+
+    def test_thinning_and_crop(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            reader = parse_sample(tmp_dir, columnar=True).rinex_reader
+            reader.do_thinning(30)
+            self.assertEqual(
+                [e.timestamp - RINEX3_SAMPLE_START for e in reader.rinex_epochs],
+                [0.0, 30.0, 60.0, 90.0],
+            )
+            reader.undo_thinning()
+            self.assertEqual(len(reader.rinex_epochs), 117)
+
+            parser = RinexParser(
+                rinex_file=write_rinex3_sample(tmp_dir),
+                rinex_version=3,
+                crop_beg=RINEX3_SAMPLE_START + 10,
+                crop_end=RINEX3_SAMPLE_START + 19,
+                columnar=True,
+            )
+            parser.run()
+            self.assertEqual(len(parser.rinex_epochs), 10)
+            self.assertEqual(
+                parser.rinex_reader.header.first_observation, RINEX3_SAMPLE_START + 10
+            )
+
+    def test_filters(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parser = parse_sample(
+                tmp_dir, columnar=True, filter_sat_sys="R", filter_sat_pnr="G05"
+            )
+        store = parser.rinex_reader.obs_store
+        self.assertEqual(len(store.systems["R"]), 0)
+        self.assertNotIn("G05", store.systems["G"].sat_ids())
+        self.assertFalse(parser.rinex_reader.has_satellite_system("R"))
+
+    def test_concatenate(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = parse_sample(tmp_dir, columnar=True).rinex_reader.obs_store
+        parts = [
+            store.select_epochs(range(0, 50)).to_arrays(),
+            store.select_epochs(range(50, 50)).to_arrays(),
+            store.select_epochs(range(50, len(store))).to_arrays(),
+        ]
+        merged = ObsStore.concatenate(store.sys_obs_types, store.rcv_clock_offset, parts)
+        self.assertEqual(len(merged), len(store))
+        self.assertEqual(merged.sat_count(), store.sat_count())
+        self.assertEqual(list(merged.systems["E"].epochs), list(store.systems["E"].epochs))
+        self.assertEqual(
+            [e.to_rinex3() for e in merged.epochs], [e.to_rinex3() for e in store.epochs]
+        )
+
+    def test_value_texts(self):
+        outputs = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = os.path.join(tmp_dir, "TINY00AUT_R_20250750000_01H_01S_MO.rnx")
+            with open(rinex_file, "w") as handler:
+                handler.write(TINY_DECODED)
+            for kwargs in ({}, {"use_mmap": False}, {"use_mmap": True}):
+                parser = RinexParser(
+                    rinex_file=rinex_file, rinex_version=3, columnar=bool(kwargs), **kwargs
+                )
+                parser.do_create_datadict()
+                outputs.append([epoch.to_rinex3() for epoch in parser.rinex_epochs])
+        # CRX2RNX writes values below one without leading zero
+        self.assertIn("        -.500", outputs[0][-1])
+        for output in outputs[1:]:
+            self.assertEqual(output, outputs[0])
+        store = parser.rinex_reader.obs_store
+        self.assertEqual(store.systems["G"].texts, [{}, {}, {2: "         -.500"}])
+        self.assertEqual(store.select_epochs([0, 2]).systems["G"].texts[2], {1: "         -.500"})
+        parts = [store.select_epochs(epochs).to_arrays() for epochs in ([0, 1], [2])]
+        merged = ObsStore.concatenate(store.sys_obs_types, store.rcv_clock_offset, parts)
+        self.assertEqual(merged.systems["G"].texts, store.systems["G"].texts)
+
+    def test_split_byte_ranges(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(write_rinex3_sample(tmp_dir), "rb") as handler:
+                data = handler.read()
+                with mmap.mmap(handler.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    start = data.index(b"\n>") + 1
+                    parts = split_byte_ranges(mm, [(start, len(data))], 4)
+                    indexed = split_byte_ranges(mm, [(start, start + 5000), (9000, 20000)], 3)
+        self.assertEqual(len(parts), 4)
+        ranges = [r for part in parts for r in part]
+        self.assertEqual(ranges[0][0], start)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (_, end), (beg, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, beg)
+            self.assertEqual(data[beg : beg + 1], b">")
+        self.assertEqual(indexed[-1][-1], (indexed[-1][-1][0], 20000))
+        self.assertEqual(
+            sum(e - b for part in indexed for b, e in part), 5000 + 11000
+        )
+
+    def test_keep_obs(self):
+        keep_obs = "G:C1C,L1C,L2W;E:S5Q,C1C;R:C9X"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            full = parse_sample(tmp_dir, columnar=True).rinex_reader.obs_store
+            outputs = []
+            for kwargs in (
+                {},
+                {"columnar": True, "use_mmap": False},
+                {"columnar": True, "use_mmap": True},
+                {"columnar": True, "use_mmap": True, "filter_sat_obs": "G1C"},
+            ):
+                parser = parse_sample(tmp_dir, keep_obs=keep_obs, **kwargs)
+                reader = parser.rinex_reader
+                self.assertEqual(
+                    reader.header.sys_obs_types,
+                    {"G": ["C1C", "L1C", "L2W"], "E": ["C1C", "S5Q"]},
+                )
+                self.assertEqual(reader.obs_fields, {"G": [0, 1, 4], "E": [0, 5]})
+                self.assertNotIn("R    3", reader.to_rinex3())
+                outputs.append(body(parser))
+            store = reader.obs_store
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[1], outputs[2])
+        self.assertNotEqual(outputs[2], outputs[3])
+        self.assertNotIn("R03", outputs[0])
+        self.assertEqual(set(store.systems), {"G", "E"})
+        for sat_sys, code in (("E", "S5Q"), ("G", "L2W")):
+            self.assertEqual(
+                str(store.systems[sat_sys].column(code)),
+                str(full.systems[sat_sys].column(code)),
+            )
+        self.assertTrue(all(math.isnan(v) for v in store.systems["G"].column("C1C")[0]))
+
+    @unittest.skipUnless(has_numpy(), "requires numpy")
+    def test_workers(self):
+        options = [
+            {},
+            {"filter_sat_sys": "R", "filter_sat_pnr": "G05", "filter_sat_obs": "E5Q"},
+            {"sampling": 10, "crop_end": RINEX3_SAMPLE_START + 100},
+            {"keep_obs": "G:L2W,C1C;E:L5Q"},
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for kwargs in options:
+                serial = parse_sample(tmp_dir, columnar=True, use_mmap=True, **kwargs)
+                with mock.patch.object(obs_reader, "WORKER_CHUNK_SIZE", 4096):
+                    parallel = parse_sample(
+                        tmp_dir, columnar=True, use_mmap=True, workers=3, **kwargs
+                    )
+                self.assertEqual(len(parallel.rinex_epochs), len(serial.rinex_epochs))
+                self.assertEqual(body(parallel), body(serial))
+
+    def test_rinex2(self):
+        text = rinex2_sample()
+        lines = text.splitlines(keepends=True)
+        first = lines.index(next(line for line in lines if line.startswith(" 25  3 16")))
+        # Event with two header lines and an epoch with " 5" for G05
+        lines.insert(first, " 25  3 16  0  0  0.5000000  4  2\n")
+        lines.insert(first + 1, f"{'event':60s}COMMENT\n")
+        lines.insert(first + 2, f"{'':60s}COMMENT\n")
+        text = "".join(lines).replace("G05", " 05", 1)
+        options = [
+            {},
+            {"sampling": 10, "filter_sat_pnr": "G07", "filter_sat_obs": "GD1,RL2"},
+            {"filter_sat_sys": "R", "crop_end": RINEX3_SAMPLE_START + 30},
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rinex_file = f"{tmp_dir}/samp0750.25o"
+            with open(rinex_file, "w", newline="") as handler:
+                handler.write(text.replace("\n", "\r\n"))
+            for kwargs in options:
+                objects = RinexParser(rinex_file=rinex_file, rinex_version=2, **kwargs)
+                objects.do_create_datadict()
+                expected = observations(objects.rinex_epochs)
+                self.assertTrue(expected)
+                for use_mmap in (False, True):
+                    with mock.patch.object(obs_reader, "MMAP_CHUNK_SIZE", 1000):
+                        columnar = RinexParser(
+                            rinex_file=rinex_file,
+                            rinex_version=2,
+                            columnar=True,
+                            use_mmap=use_mmap,
+                            **kwargs,
+                        )
+                        columnar.do_create_datadict()
+                    self.assertIsInstance(columnar.rinex_reader.obs_store, ObsStore)
+                    self.assertEqual(len(columnar.rinex_epochs), len(objects.rinex_epochs))
+                    self.assertEqual(observations(columnar.rinex_epochs), expected)
+        self.assertEqual(objects.rinex_epochs[0].satellites[1].id, "G05")
+        self.assertEqual(objects.rinex_epochs[0].timestamp, RINEX3_SAMPLE_START)
+        store = columnar.rinex_reader.obs_store
+        self.assertEqual(store.systems["G"].obs_types, ["C1", "L1", "L2", "P2", "S1", "S2", "D1"])
+        self.assertEqual(len(store.systems["R"]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
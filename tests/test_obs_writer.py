@@ -0,0 +1,92 @@
+#!/usr/bin/python
+
+import io
+import os
+import tempfile
+import unittest
+
+from .context import write_rinex3_sample
+from .test_hatanaka import TINY_CRINEX, TINY_DECODED
+
+from rinex_parser.obs_epoch import RINEX3_SYS_ORDER
+from rinex_parser.obs_parser import RinexParser
+from rinex_parser.obs_writer import compile_layouts, iter_rinex3_batches
+
+
+def parse_sample(directory: str, **kwargs) -> RinexParser:
+    rinex_file = write_rinex3_sample(directory)
+    parser = RinexParser(rinex_file=rinex_file, rinex_version=3, columnar=True, **kwargs)
+    parser.do_create_datadict()
+    return parser
+
+
+def object_body(parser: RinexParser) -> str:
+    return "\n".join(epoch.to_rinex3() for epoch in parser.rinex_epochs)
+
+
+class ObsWriterTestSuite(unittest.TestCase):
+    def test_layouts(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = parse_sample(tmp_dir).rinex_reader.obs_store
+        sys_obs_types = {sat_sys: list(codes) for sat_sys, codes in store.sys_obs_types.items()}
+        sys_obs_types["G"] = ["S1C", "C5Q", "C1C"]
+        layouts = compile_layouts(store, sys_obs_types)
+        order = [layout.columns.sat_sys for layout in layouts]
+        self.assertEqual(order, [s for s in RINEX3_SYS_ORDER if s in store.systems])
+        gps = layouts[order.index("G")]
+        obs_types = store.systems["G"].obs_types
+        self.assertEqual(gps.fields, [obs_types.index("S1C"), obs_types.index("C1C")])
+        self.assertEqual(gps.template, "G%02d%14.3f%s%s" + " " * 16 + "%14.3f%s%s")
+
+    def test_matches_objects(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for kwargs in ({}, {"sampling": 10}, {"filter_sat_obs": "G1C"}):
+                parser = parse_sample(tmp_dir, **kwargs)
+                reader = parser.rinex_reader
+                self.assertEqual(reader.epochs_to_rinex3(), object_body(parser))
+                # Removed header codes are not written
+                reader.header.sys_obs_types["G"].remove("L1C")
+                self.assertEqual(reader.epochs_to_rinex3(), object_body(parser))
+                for batch_size in (1, 7):
+                    batches = list(iter_rinex3_batches(reader.obs_store, batch_size=batch_size))
+                    self.assertEqual(sum(n for n, _ in batches), len(reader.obs_store))
+                    self.assertEqual(
+                        "".join(text for _, text in batches),
+                        reader.epochs_to_rinex3() + "\n",
+                    )
+
+    def test_write_rinex3(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parser = parse_sample(tmp_dir, sampling=5)
+        reader = parser.rinex_reader
+        for crinex in (False, True):
+            compiled, objects = io.BytesIO(), io.BytesIO()
+            count = reader.write_rinex3(compiled, reader.rinex_epochs, crinex=crinex)
+            self.assertEqual(count, len(reader.rinex_epochs))
+            reader.write_rinex3(objects, iter(list(reader.rinex_epochs)), crinex=crinex)
+            self.assertEqual(compiled.getvalue(), objects.getvalue())
+
+
+    def test_value_texts(self):
+        # CRX2RNX writes values below one without leading zero, e.g. "-.500"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            name = os.path.join(tmp_dir, "TINY00AUT_R_20250750000_01H_01S_MO")
+            for extension, text in ((".rnx", TINY_DECODED), (".crx", TINY_CRINEX)):
+                with open(name + extension, "w") as handler:
+                    handler.write(text)
+            objects = RinexParser.from_file(name + ".rnx")
+            objects.do_create_datadict()
+            expected = object_body(objects)
+            self.assertIn("        -.500", expected)
+            for extension in (".rnx", ".crx"):
+                parser = RinexParser.from_file(name + extension, columnar=True)
+                parser.do_create_datadict()
+                reader = parser.rinex_reader
+                self.assertEqual(reader.epochs_to_rinex3(), expected)
+                for batch_size in (1, 2):
+                    batches = iter_rinex3_batches(reader.obs_store, batch_size=batch_size)
+                    self.assertEqual("".join(text for _, text in batches), expected + "\n")
+
+
+if __name__ == "__main__":
+    unittest.main()